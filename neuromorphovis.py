@@ -25,7 +25,7 @@ __email__       = "marwan.abdellah@epfl.ch"
 __status__      = "Production"
 
 # System imports
-import os, sys, subprocess
+import os, sys, time, subprocess
 
 # Append the internal modules into the system paths to avoid Blender importing conflicts
 import_paths = ['neuromorphovis/interface/cli', 'neuromorphovis/file/ops', 'neuromorphovis/slurm']
@@ -35,7 +35,12 @@ for import_path in import_paths:
 # Internal imports
 import arguments_parser
 import file_ops
+import job_monitor
+import local_executor
+import run_manifest
 import slurm
+import table_ops
+import worker_pool
 
 
 ####################################################################################################
@@ -58,7 +63,8 @@ def run_local_neuromorphovis(arguments):
         exit(0)
 
     # Load morphology files (.H5 or .SWC)
-    elif arguments.input == 'file':
+    # NOTE: The server runs in the foreground with the same arguments
+    elif arguments.input == 'file' or arguments.input == 'server':
 
         # Get the arguments string list
         arguments_string = arguments_parser.get_arguments_string(arguments=arguments)
@@ -92,6 +98,20 @@ def run_local_neuromorphovis(arguments):
             print('ERROR: The directory [%s] does NOT contain any morphology files' %
                   arguments.morphology_directory)
 
+        # The manifest of the run, skip the complete files if the run is resumed
+        manifest = run_manifest.RunManifest(arguments.output_directory)
+        keys = [run_manifest.get_input_key('%s/%s' % (arguments.morphology_directory, file_name))
+                for file_name in morphology_files]
+        if arguments.resume:
+            morphology_files = manifest.get_pending_inputs(
+                morphology_files, keys, run_manifest.get_options_hash(arguments))
+
+        # Use a pool of persistent workers
+        if arguments.local_workers > 0:
+            run_local_worker_pool(arguments=arguments, morphology_files=morphology_files)
+            manifest.write(keys)
+            return
+
         # Construct the commands for every individual morphology file
         for morphology_file in morphology_files:
 
@@ -108,13 +128,97 @@ def run_local_neuromorphovis(arguments):
 
             # Run NeuroMorphoVis from Blender in the background mode
             print('RUNNING: ' + shell_command)
-            subprocess.call(shell_command, shell=True)
+            started = time.time()
+            exit_code = subprocess.call(shell_command, shell=True)
+
+            # Record the file as failed if Blender exited before recording it
+            record_unfinished_input(
+                arguments, manifest, '%s/%s' % (arguments.morphology_directory, morphology_file),
+                started, 'Blender exited with code [%d]' % exit_code)
+
+        # Merge the manifest of the run
+        manifest.write(keys)
 
     else:
         print('ERROR: Input data source, use \'file, gid, target or directory\'')
         exit(0)
 
 
+####################################################################################################
+# @record_unfinished_input
+####################################################################################################
+def record_unfinished_input(arguments,
+                            manifest,
+                            morphology_file,
+                            started,
+                            error):
+    """Records an input as failed in the manifest of the run, if the Blender instance that ran
+    it exited before recording it.
+
+    :param arguments:
+        Command line arguments.
+    :param manifest:
+        The manifest of the run.
+    :param morphology_file:
+        The path to the morphology file.
+    :param started:
+        The time when the input is started.
+    :param error:
+        The error to record.
+    """
+
+    key = run_manifest.get_input_key(morphology_file)
+    entry = manifest.read_entry(key)
+    if entry is None or entry['finished'] < started:
+        manifest.record(key=key, status='failed',
+                        options_hash=run_manifest.get_options_hash(arguments),
+                        started=started, elapsed=time.time() - started, error=error)
+
+
+####################################################################################################
+# @run_local_worker_pool
+####################################################################################################
+def run_local_worker_pool(arguments,
+                          morphology_files):
+    """Process the morphology files of a directory with a pool of persistent Blender workers on
+    the local node.
+
+    :param arguments:
+        Command line arguments.
+    :param morphology_files:
+        A list of the morphology files in the morphology directory.
+    :return:
+        A list of the statuses of the jobs.
+    """
+
+    # A job per morphology file
+    jobs = list()
+    for i, morphology_file in enumerate(morphology_files):
+        jobs.append({'id': i, 'morphology_file': '%s/%s' % (
+            os.path.abspath(arguments.morphology_directory), morphology_file)})
+
+    # Run the jobs, the logs of the workers are written to the output directory
+    pool = worker_pool.WorkerPool(
+        worker_command=arguments_parser.create_executable_for_worker(arguments=arguments),
+        number_workers=arguments.local_workers,
+        log_directory='%s/%s' % (arguments.output_directory, 'workers'))
+    print('RUNNING: %d jobs on %d workers' % (len(jobs), min(len(jobs), pool.number_workers)))
+    statuses = pool.run(jobs)
+
+    # Report the failed jobs, and record those of the workers that exited
+    failed = [status for status in statuses if status['status'] != 'done']
+    print('DONE: %d jobs, %d failed' % (len(statuses), len(failed)))
+    for status in failed:
+        print('\tFAILED: %s [%s]' % (jobs[status['id']]['morphology_file'], status['error']))
+        record_unfinished_input(
+            arguments, run_manifest.RunManifest(arguments.output_directory),
+            jobs[status['id']]['morphology_file'], time.time() - status['elapsed'],
+            status['error'])
+
+    # Return the statuses
+    return statuses
+
+
 ####################################################################################################
 # @run_cluster_neuromorphovis
 ####################################################################################################
@@ -168,12 +272,9 @@ def run_cluster_neuromorphovis(arguments):
     # Use the morphology file (.H5 or .SWC)
     elif arguments.input == 'file':
 
-        # Get the arguments string list
-        arguments_string = arguments_parser.get_arguments_string(arguments=arguments)
-
         # Run the job on the cluster
         slurm.run_morphology_files_jobs_on_cluster(
-            arguments=arguments, morphology_files=arguments.morphology_file)
+            arguments=arguments, morphology_files=[arguments.morphology_file])
 
     # Operate on a directory
     elif arguments.input == 'directory':
@@ -199,19 +300,54 @@ if __name__ == "__main__":
     arguments = arguments_parser.parse_command_line_arguments()
 
     # Verify the output directory before screwing things !
-    file_ops.clean_and_create_directory(arguments.output_directory)
+    # NOTE: A resumed run keeps the outputs of the previous one
+    if not arguments.resume or not file_ops.path_exists(arguments.output_directory):
+        file_ops.clean_and_create_directory(arguments.output_directory)
     if not file_ops.path_exists(arguments.output_directory):
         print('ERROR: Please set the output directory to a valid path')
         exit(0)
 
     # Otherwise, create the output tree
     else:
-        file_ops.create_output_tree(arguments.output_directory)
+        file_ops.create_output_tree(arguments.output_directory, clean=not arguments.resume)
 
     # LOCAL EXECUTION: Compile the corresponding command and launch it on the current machine
     if arguments.execution_node == 'local':
         run_local_neuromorphovis(arguments=arguments)
 
+        # Merge the analysis tables of the individual morphologies
+        if arguments.analyze_morphology:
+            table_ops.merge_analysis_tables(arguments.output_directory)
+
+    # LOCAL CLUSTER EXECUTION: Create the SLURM scripts and run them on the current machine
+    elif arguments.execution_node == 'local-cluster':
+        executor = local_executor.LocalExecutor(
+            number_cores=min(arguments.number_cores, os.cpu_count() or 1))
+        print('Running the jobs on the local node, %d cores and %d MB' % (
+            executor.number_cores, executor.memory_mb))
+        slurm.set_local_executor(executor)
+        run_cluster_neuromorphovis(arguments=arguments)
+
+        # Wait for the jobs, and resubmit the failed ones if they are monitored
+        if arguments.monitor_jobs:
+            job_monitor.JobMonitor(arguments.output_directory,
+                                   maximum_retries=arguments.maximum_retries,
+                                   executor=executor).run()
+        executor.wait()
+
+        # Merge the analysis tables of the individual morphologies
+        if arguments.analyze_morphology:
+            table_ops.merge_analysis_tables(arguments.output_directory)
+
     # BBP CLUSTER EXECUTION: Create the SLURM scripts and run them on the cluster
     else:
         run_cluster_neuromorphovis(arguments=arguments)
+
+        # Wait for the jobs, resubmit the failed ones and report
+        if arguments.monitor_jobs:
+            job_monitor.JobMonitor(arguments.output_directory,
+                                   maximum_retries=arguments.maximum_retries).run()
+
+            # Merge the analysis tables once all the jobs are done
+            if arguments.analyze_morphology:
+                table_ops.merge_analysis_tables(arguments.output_directory)
@@ -90,6 +90,7 @@ class BridgingBuilder:
     ################################################################################################
     # @repair_morphology
     ################################################################################################
+    @nmv.utilities.profiled('repair')
     def repair_morphology(self):
         """
         Repairs the morphology artifacts, to prevent this bridging builder from failure.
@@ -98,12 +99,12 @@ class BridgingBuilder:
 
         # Remove the internal samples, or the samples that intersect the soma at the first
         # section and each arbor
-        nmv.skeleton.ops.apply_operation_to_morphology(
-            *[self.morphology, nmv.skeleton.ops.remove_samples_inside_soma])
+        nmv.skeleton.ops.clean_morphology_samples(
+            self.morphology, remove_duplicate_samples=False)
 
         # Apply the resampling filter on the whole morphology skeleton
-        nmv.skeleton.ops.apply_operation_to_morphology(
-            *[self.morphology, nmv.skeleton.ops.resample_sections])
+        nmv.skeleton.ops.resample_morphology(
+            self.morphology, method=self.options.morphology.resampling_method)
 
         # Verify the connectivity of the arbors to the soma to filter the disconnected arbors,
         # for example, an axon that is emanating from a dendrite or two intersecting dendrites
@@ -179,6 +180,7 @@ class BridgingBuilder:
     ################################################################################################
     # @build_arbors
     ################################################################################################
+    @nmv.utilities.profiled('arbors')
     def build_arbors(self,
                      bevel_object,
                      caps):
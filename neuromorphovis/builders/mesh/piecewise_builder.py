@@ -165,6 +165,7 @@ class PiecewiseBuilder:
     ################################################################################################
     # @verify_and_repair_morphology
     ################################################################################################
+    @nmv.utilities.profiled('repair')
     def verify_and_repair_morphology(self):
         """Verifies and repairs the morphology if the contain any artifacts that would potentially
         affect the reconstruction quality of the mesh.
@@ -175,20 +176,19 @@ class PiecewiseBuilder:
 
         # Remove the internal samples, or the samples that intersect the soma at the first
         # section and each arbor
-        nmv.skeleton.ops.apply_operation_to_morphology(
-            *[self.morphology, nmv.skeleton.ops.remove_samples_inside_soma])
+        nmv.skeleton.ops.clean_morphology_samples(
+            self.morphology, remove_duplicate_samples=False)
 
         # The arbors can be selected to be reconstructed with sharp edges or smooth ones. For the
         # sharp edges, we do NOT need to resample the morphology skeleton. However, if the smooth
         # edges option is selected, the arbors must be re-sampled to avoid any meshing artifacts
-        # after applying the vertex smoothing filter. The resampling filter for the moment
-        # re-samples the morphology sections at 2.5 microns, however this can be improved later
-        # by adding an algorithm that re-samples the section based on its radii.
+        # after applying the vertex smoothing filter. The resampling filter re-samples the
+        # morphology sections at 2.5 microns, unless an adaptive resampling method is selected.
         if self.options.mesh.edges == nmv.enums.Meshing.Edges.SMOOTH:
 
             # Apply the resampling filter on the whole morphology skeleton
-            nmv.skeleton.ops.apply_operation_to_morphology(
-                *[self.morphology, nmv.skeleton.ops.resample_sections])
+            nmv.skeleton.ops.resample_morphology(
+                self.morphology, method=self.options.morphology.resampling_method)
 
         # Verify the connectivity of the arbors to the soma to filter the disconnected arbors,
         # for example, an axon that is emanating from a dendrite or two intersecting dendrites
@@ -212,6 +212,7 @@ class PiecewiseBuilder:
     ################################################################################################
     # @build_arbors
     ################################################################################################
+    @nmv.utilities.profiled('arbors')
     def build_arbors(self,
                      bevel_object,
                      caps,
@@ -641,6 +642,7 @@ class PiecewiseBuilder:
     ################################################################################################
     # @add_spines
     ################################################################################################
+    @nmv.utilities.profiled('spines')
     def add_spines(self):
         """Add the spines to the neuron.
         """
@@ -664,6 +666,7 @@ class PiecewiseBuilder:
     ################################################################################################
     # @add_nucleus
     ################################################################################################
+    @nmv.utilities.profiled('nucleus')
     def add_nucleus(self):
         """Add nucleus to the neuron.
         """
@@ -39,6 +39,7 @@ import neuromorphovis.mesh
 import neuromorphovis.shading
 import neuromorphovis.skeleton
 import neuromorphovis.scene
+import neuromorphovis.utilities
 
 
 ####################################################################################################
@@ -89,6 +90,7 @@ class UnionBuilder:
     ################################################################################################
     # @repair_morphology
     ################################################################################################
+    @nmv.utilities.profiled('repair')
     def repair_morphology(self):
         """
         Repairs the morphology artifacts, to prevent this bridging builder from failure.
@@ -164,6 +166,7 @@ class UnionBuilder:
     ################################################################################################
     # @build_arbors
     ################################################################################################
+    @nmv.utilities.profiled('arbors')
     def build_arbors(self,
                      bevel_object,
                      caps):
@@ -179,9 +182,8 @@ class UnionBuilder:
 
         # Remove the internal samples, or the samples that intersect the soma at the first
         # section and each arbor
-        nmv.skeleton.ops.apply_operation_to_morphology(
-            *[self.morphology,
-              nmv.skeleton.ops.remove_samples_inside_soma])
+        nmv.skeleton.ops.clean_morphology_samples(
+            self.morphology, remove_duplicate_samples=False)
 
         # The arbors can be selected to be reconstructed with sharp edges or smooth ones. For the
         # sharp edges, we do NOT need to resample the morphology skeleton. However, if the smooth
@@ -92,6 +92,7 @@ class NucleusBuilder:
     ################################################################################################
     # @add_nucleus_inside_soma
     ################################################################################################
+    @nmv.utilities.profiled('nucleus')
     def add_nucleus_inside_soma(self):
         """Add a nucleus object randomly inside the soma of the morphology.
 
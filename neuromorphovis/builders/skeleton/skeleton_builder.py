@@ -42,6 +42,7 @@ import neuromorphovis.mesh
 import neuromorphovis.scene
 import neuromorphovis.shading
 import neuromorphovis.skeleton
+import neuromorphovis.utilities
 
 
 ####################################################################################################
@@ -681,12 +682,12 @@ class SkeletonBuilder:
         if repair_morphology:
 
             # Remove the samples that intersect with the soma
-            nmv.skeleton.ops.apply_operation_to_morphology(
-                *[self.morphology, nmv.skeleton.ops.remove_samples_inside_soma])
+            nmv.skeleton.ops.clean_morphology_samples(
+                self.morphology, remove_duplicate_samples=False)
 
             # Resample the sections
-            nmv.skeleton.ops.apply_operation_to_morphology(
-                *[self.morphology, nmv.skeleton.ops.resample_sections])
+            nmv.skeleton.ops.resample_morphology(
+                self.morphology, method=self.options.morphology.resampling_method)
 
         # Verify the connectivity of the arbors of the morphology to the soma
         nmv.skeleton.ops.update_arbors_connection_to_soma(morphology=self.morphology)
@@ -814,9 +815,8 @@ class SkeletonBuilder:
                   nmv.skeleton.ops.repair_sections_with_single_child])
 
             # Remove duplicate samples
-            nmv.skeleton.ops.apply_operation_to_morphology(
-                *[self.morphology,
-                  nmv.skeleton.ops.remove_duplicate_samples])
+            nmv.skeleton.ops.clean_morphology_samples(
+                self.morphology, remove_internal_samples=False)
 
             # Repair the short sections
             # morphology_repair_ops.repair_short_sections_of_morphology(self.morphology)
@@ -920,6 +920,7 @@ class SkeletonBuilder:
     ################################################################################################
     # @draw_morphology_skeleton
     ################################################################################################
+    @nmv.utilities.profiled('arbors')
     def draw_morphology_skeleton(self):
         """Reconstruct and draw the morphological skeleton using poly-lines.
 
@@ -25,6 +25,7 @@ __status__      = "Production"
 
 
 # System imports
+import json
 import random
 
 # Blender imports
@@ -300,14 +301,17 @@ class SomaBuilder:
         # Initialize a list to keep track on the valid profile points
         valid_profile_points = list()
 
-        # Iterate on every profile point available from the soma information to validate it
+        # Find all the intersections between the profile points at once
         nmv.logger.info('Verifying profile points intersection')
+        collisions = nmv.skeleton.ops.compute_soma_surface_collisions(
+            self.morphology, self.initial_soma_radius)
+        intersecting_profile_points = set(i for i, j in collisions['profile_points_pairs'])
+
+        # Iterate on every profile point available from the soma information to validate it
         for i, profile_point in enumerate(self.morphology.soma.profile_points):
 
             # Check if the profile point intersects with other points in the list or not
-            if nmv.skeleton.ops.profile_point_intersect_other_point(
-                    profile_point, i, self.morphology.soma.profile_points,
-                    self.initial_soma_radius):
+            if i in intersecting_profile_points:
 
                 # Report the intersection
                 nmv.logger.detail("WARNING: Profile point [%d] intersection" % i)
@@ -640,14 +644,20 @@ class SomaBuilder:
             # Initialize an array to keep track on the centers of the extruded faces
             faces_centers = list()
 
-            # Iterate on every profile point available from the soma information to validate it
+            # Find all the intersections between the profile points and the arbors at once
             nmv.logger.info('Verifying profile points intersection')
+            collisions = nmv.skeleton.ops.compute_soma_surface_collisions(
+                self.morphology, self.initial_soma_radius)
+            intersecting_profile_points = set(i for i, j in collisions['profile_points_pairs'])
+            intersected_arbors = dict()
+            for i, k in collisions['profile_points_arbors_pairs']:
+                intersected_arbors.setdefault(i, list()).append(collisions['arbors'][k])
+
+            # Iterate on every profile point available from the soma information to validate it
             for i, profile_point in enumerate(self.morphology.soma.profile_points):
 
                 # Check if the profile point intersects with other points in the list or not
-                if nmv.skeleton.ops.profile_point_intersect_other_point(
-                        profile_point, i, self.morphology.soma.profile_points,
-                        self.initial_soma_radius):
+                if i in intersecting_profile_points:
 
                     # Report the intersection
                     nmv.logger.detail("WARNING: Profile point [%d] intersection" % i)
@@ -662,9 +672,8 @@ class SomaBuilder:
                     if self.morphology.apical_dendrite is not None:
 
                         # Check that the profile point does NOT intersect the apical dendrite
-                        if nmv.skeleton.ops.point_branch_intersect(
-                                profile_point, self.morphology.apical_dendrite,
-                                self.initial_soma_radius):
+                        if any(arbor is self.morphology.apical_dendrite
+                               for arbor in intersected_arbors.get(i, list())):
 
                             # Report the intersection
                             nmv.logger.detail(
@@ -680,8 +689,8 @@ class SomaBuilder:
                     if self.morphology.axon is not None:
 
                         # Check that the profile point does NOT intersect the axon
-                        if nmv.skeleton.ops.point_branch_intersect(profile_point,
-                                self.morphology.axon, self.initial_soma_radius):
+                        if any(arbor is self.morphology.axon
+                               for arbor in intersected_arbors.get(i, list())):
 
                             # Report the intersection
                             nmv.logger.detail(
@@ -696,13 +705,11 @@ class SomaBuilder:
                     # Ensure tha existence of basal dendrites
                     if self.morphology.dendrites is not None:
 
-                        # Do it dendrite by dendrite
+                        # Check that the profile point does NOT intersect any basal dendrite
                         intersect = False
                         for dendrite_root in self.morphology.dendrites:
-
-                            # Check that the profile point does NOT intersect the basal dendrite
-                            if nmv.skeleton.ops.point_branch_intersect(
-                                    profile_point, dendrite_root, self.initial_soma_radius):
+                            if any(arbor is dendrite_root
+                                   for arbor in intersected_arbors.get(i, list())):
 
                                 # Report the intersection
                                 nmv.logger.detail(
@@ -837,13 +844,93 @@ class SomaBuilder:
         # Return the reconstructed soma object
         return soma_mesh
 
+    ################################################################################################
+    # @get_soma_mesh_key
+    ################################################################################################
+    def get_soma_mesh_key(self):
+        """Gets a key of everything the soma mesh depends on: the reconstruction options, the
+        profile points and the initial samples of the arbors.
+
+        :return:
+            A string key of the reconstruction.
+        """
+
+        # The arbors that are used to extrude the soma
+        roots = list()
+        if self.morphology.apical_dendrite is not None:
+            roots.append(self.morphology.apical_dendrite)
+        if self.morphology.dendrites is not None:
+            roots.extend(self.morphology.dendrites)
+        if self.morphology.axon is not None:
+            roots.append(self.morphology.axon)
+
+        return json.dumps({
+            'options': [self.options.soma.method,
+                        self.options.soma.stiffness,
+                        self.options.soma.subdivision_level,
+                        self.options.soma.irregular_subdivisions,
+                        self.options.soma.full_volume_extrusion,
+                        self.options.soma.simulation_steps,
+                        self.options.morphology.ignore_apical_dendrite,
+                        self.options.morphology.ignore_basal_dendrites,
+                        self.options.morphology.ignore_axon],
+            'radius': self.morphology.soma.mean_radius,
+            'profile': [point[:] for point in self.morphology.soma.profile_points],
+            'roots': [[root.type, root.id, root.connected_to_soma,
+                       root.samples[0].point[:], root.samples[0].radius] for root in roots]},
+            default=str)
+
+    ################################################################################################
+    # @build_soma_mesh_from_geometry
+    ################################################################################################
+    def build_soma_mesh_from_geometry(self,
+                                      vertices,
+                                      faces,
+                                      apply_shader=True):
+        """Builds the soma mesh from the geometry of a soma that is reconstructed before.
+
+        :param vertices:
+            A list of the vertices of the soma mesh.
+        :param faces:
+            A list of the faces of the soma mesh, every face is a list of vertex indices.
+        :param apply_shader:
+            Apply the given soma shader in the configuration.
+        :return:
+            A reference to the soma mesh.
+        """
+
+        # Create the mesh and link it to the scene
+        soma_mesh_data = bpy.data.meshes.new('%s_soma' % self.options.morphology.label)
+        soma_mesh_data.from_pydata(vertices, [], faces)
+        soma_mesh_data.update()
+        soma_mesh = bpy.data.objects.new('%s_soma' % self.options.morphology.label, soma_mesh_data)
+        bpy.context.scene.objects.link(soma_mesh)
+
+        # Smoothing the soma via shade smoothing
+        nmv.mesh.ops.shade_smooth_object(soma_mesh)
+
+        # Apply the soma shader
+        if apply_shader:
+            soma_material = nmv.shading.create_material(name='soma',
+                color=self.options.soma.soma_color, material_type=self.options.soma.soma_material)
+            nmv.shading.set_material_to_object(
+                mesh_object=soma_mesh, material_reference=soma_material)
+
+        # Return a reference to the soma mesh
+        return soma_mesh
+
     ################################################################################################
     # @reconstruct_soma_mesh
     ################################################################################################
+    @nmv.utilities.profiled('soma')
     def reconstruct_soma_mesh(self,
                               apply_shader=True):
         """Reconstructs the mesh of the soma of the neuron in a single step.
 
+        If the soma of this morphology is already reconstructed with the same options, for example
+        by an earlier stage of the pipeline, its geometry is reused and the soft body simulation
+        is skipped.
+
         :param apply_shader:
             Apply the given soma shader in the configuration. This flag will be set to False when
             the soma is created in another builder such as the skeleton builder or the piecewise
@@ -852,17 +939,30 @@ class SomaBuilder:
             A reference to the reconstructed mesh of the soma.
         """
 
+        # Reuse the soma that is reconstructed before
+        soma_mesh_key = self.get_soma_mesh_key()
+        if self.morphology.soma.reconstructed_mesh is not None and \
+                self.morphology.soma.reconstructed_mesh[0] == soma_mesh_key:
+            nmv.logger.header('Reusing the reconstructed soma')
+            return self.build_soma_mesh_from_geometry(
+                vertices=self.morphology.soma.reconstructed_mesh[1],
+                faces=self.morphology.soma.reconstructed_mesh[2],
+                apply_shader=apply_shader)
+
         # Build the soft body of the soma
         soma_soft_body = self.build_soma_soft_body(apply_shader=apply_shader)
 
         # Update the frame based on the soft body simulation
-        for frame_index in range(nmv.consts.Simulation.MIN_FRAME, nmv.consts.Simulation.MAX_FRAME):
+        with nmv.utilities.profile_span('soma-simulation'):
+            for frame_index in range(nmv.consts.Simulation.MIN_FRAME,
+                                     nmv.consts.Simulation.MAX_FRAME):
 
-            # Set the frame index
-            bpy.context.scene.frame_set(frame_index)
+                # Set the frame index
+                bpy.context.scene.frame_set(frame_index)
 
-            # Update the progress shell
-            nmv.utilities.show_progress('Simulation: ', frame_index, nmv.consts.Simulation.MAX_FRAME)
+                # Update the progress shell
+                nmv.utilities.show_progress(
+                    'Simulation: ', frame_index, nmv.consts.Simulation.MAX_FRAME)
 
         # Report process done
         nmv.utilities.show_progress(
@@ -874,6 +974,12 @@ class SomaBuilder:
         # Add noise to the soma surface to make it more realistic
         self.add_noise_to_soma_surface(reconstructed_soma_mesh)
 
+        # Keep the geometry of the soma to reuse it
+        self.morphology.soma.reconstructed_mesh = (
+            soma_mesh_key,
+            [vertex.co[:] for vertex in reconstructed_soma_mesh.data.vertices],
+            [polygon.vertices[:] for polygon in reconstructed_soma_mesh.data.polygons])
+
         # Return a reference to the reconstructed soma
         return reconstructed_soma_mesh
 
@@ -897,13 +1003,16 @@ class SomaBuilder:
         soma_soft_body = self.build_soma_based_on_profile_points_only(apply_shader=apply_shader)
 
         # Update the frame based on the soft body simulation
-        for frame_index in range(nmv.consts.Simulation.MIN_FRAME, nmv.consts.Simulation.MAX_FRAME):
+        with nmv.utilities.profile_span('soma-simulation'):
+            for frame_index in range(nmv.consts.Simulation.MIN_FRAME,
+                                     nmv.consts.Simulation.MAX_FRAME):
 
-            # Set the frame index
-            bpy.context.scene.frame_set(frame_index)
+                # Set the frame index
+                bpy.context.scene.frame_set(frame_index)
 
-            # Update the progress shell
-            nmv.utilities.show_progress('Simulation: ', frame_index, nmv.consts.Simulation.MAX_FRAME)
+                # Update the progress shell
+                nmv.utilities.show_progress(
+                    'Simulation: ', frame_index, nmv.consts.Simulation.MAX_FRAME)
 
         # Report process done
         nmv.utilities.show_progress(
@@ -136,6 +136,7 @@ class CircuitSpineBuilder:
     ################################################################################################
     # @add_spines_to_morphology
     ################################################################################################
+    @nmv.utilities.profiled('spines')
     def add_spines_to_morphology(self):
         """Builds all the spines on a spiny neuron using a BBP circuit.
 
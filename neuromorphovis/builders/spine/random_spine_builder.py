@@ -139,6 +139,7 @@ class RandomSpineBuilder:
     ################################################################################################
     # @add_spines_to_morphology
     ################################################################################################
+    @nmv.utilities.profiled('spines')
     def add_spines_to_morphology(self):
         """Add the spines randomly to the morphology.
 
@@ -141,6 +141,7 @@ def emanate_a_spine(spines_list,
 ####################################################################################################
 # @build_circuit_spines
 ####################################################################################################
+@nmv.utilities.profiled('spines')
 def build_circuit_spines(morphology,
                          blue_config,
                          gid,
@@ -57,7 +57,10 @@ class Paths:
     SEQUENCES_FOLDER = 'sequences'
 
     # The folder where the analysis files will be generated
-    ANALYSIS_FOLDER = 'sequences'
+    ANALYSIS_FOLDER = 'analysis'
+
+    # The table that merges the analysis tables of all the morphologies of a run
+    ANALYSIS_TABLE_FILE = 'analysis.csv'
 
     # The folder where SLURM files will be generated
     SLURM_FOLDER = 'slurm'
@@ -68,6 +71,9 @@ class Paths:
     # The folder where SLURM log files will be generated
     SLURM_LOGS_FOLDER = '%s/logs' % SLURM_FOLDER
 
+    # The manifest file of the morphologies in a directory
+    MORPHOLOGIES_MANIFEST_FILE = 'morphologies-manifest.json'
+
     # Keep a reference to the current directory
     current_directory = os.path.dirname(os.path.realpath(__file__))
 
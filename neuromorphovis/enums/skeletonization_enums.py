@@ -245,6 +245,46 @@ class Skeletonization:
             else:
                 return Skeletonization.ArborsRadii.AS_SPECIFIED
 
+    ################################################################################################
+    # @Resampling
+    ################################################################################################
+    class Resampling:
+        """Resampling method of the sections
+        """
+
+        # Resample the sections at a fixed step
+        FIXED_STEP = 'RESAMPLING_FIXED_STEP'
+
+        # Resample the sections at a step that is proportional to the radii of the samples
+        RADIUS_ADAPTIVE = 'RESAMPLING_RADIUS_ADAPTIVE'
+
+        # Resample the sections at a step that is refined where the sections bend
+        ANGLE_ADAPTIVE = 'RESAMPLING_ANGLE_ADAPTIVE'
+
+        ############################################################################################
+        # @__init__
+        ############################################################################################
+        def __init__(self):
+            pass
+
+        ############################################################################################
+        # @get_enum
+        ############################################################################################
+        @staticmethod
+        def get_enum(argument):
+
+            # Radius adaptive
+            if argument == 'radius':
+                return Skeletonization.Resampling.RADIUS_ADAPTIVE
+
+            # Angle adaptive
+            elif argument == 'angle':
+                return Skeletonization.Resampling.ANGLE_ADAPTIVE
+
+            # By default, a fixed step
+            else:
+                return Skeletonization.Resampling.FIXED_STEP
+
     ################################################################################################
     # @Rendering
     ################################################################################################
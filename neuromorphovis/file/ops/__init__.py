@@ -25,3 +25,5 @@ __status__      = "Production"
 
 
 from .file_ops import *
+from .manifest_ops import *
+from .table_ops import *
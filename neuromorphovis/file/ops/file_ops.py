@@ -25,7 +25,7 @@ __status__      = "Production"
 
 
 # System imports
-import sys, os, shutil
+import sys, os, shutil, hashlib
 
 # Internal imports
 sys.path.append('%s/../../consts' % os.path.dirname(os.path.realpath(__file__)))
@@ -114,46 +114,72 @@ def write_batch_job_string_to_file(output_directory,
     file_handle.close()
 
 
+####################################################################################################
+# @create_directory
+####################################################################################################
+def create_directory(path,
+                     clean=True):
+    """Creates a directory.
+
+    :param path:
+        The path of the directory to be created.
+    :param clean:
+        Remove the old directory if exists, otherwise keep it as it is.
+    """
+
+    if clean or not os.path.exists(path):
+        clean_and_create_directory(path)
+
+
 ####################################################################################################
 # @create_output_tree
 ####################################################################################################
-def create_output_tree(output_directory):
+def create_output_tree(output_directory,
+                       clean=True):
     """Creates the output directories tree.
 
     :param output_directory:
         The path where the project tree will be created.
+    :param clean:
+        Remove the existing directories. If False, the missing directories are created and the
+        existing ones are kept, except the SLURM jobs directory that is always created again,
+        for example when a run is resumed.
     """
 
     # Output directory
-    clean_and_create_directory(output_directory)
+    create_directory(output_directory, clean=clean)
 
     # SLURM directory
     slurm_directory = '%s/%s' % (output_directory, Paths.SLURM_FOLDER)
-    clean_and_create_directory(slurm_directory)
+    create_directory(slurm_directory, clean=clean)
 
     # SLURM jobs directory
     slurm_jobs_directory = '%s/%s' % (output_directory, Paths.SLURM_JOBS_FOLDER)
-    clean_and_create_directory(slurm_jobs_directory)
+    create_directory(slurm_jobs_directory, clean=True)
 
     # SLURM logs directory
     slurm_logs_directory = '%s/%s' % (output_directory, Paths.SLURM_LOGS_FOLDER)
-    clean_and_create_directory(slurm_logs_directory)
+    create_directory(slurm_logs_directory, clean=clean)
 
     # Morphologies directory
     meshes_directory = '%s/%s' % (output_directory, Paths.MORPHOLOGIES_FOLDER)
-    clean_and_create_directory(meshes_directory)
+    create_directory(meshes_directory, clean=clean)
 
     # Meshes directory
     meshes_directory = '%s/%s' % (output_directory, Paths.MESHES_FOLDER)
-    clean_and_create_directory(meshes_directory)
+    create_directory(meshes_directory, clean=clean)
 
     # Images directory
     images_directory = '%s/%s' % (output_directory, Paths.IMAGES_FOLDER)
-    clean_and_create_directory(images_directory)
+    create_directory(images_directory, clean=clean)
 
     # Sequences directory
     sequences_directory = '%s/%s' % (output_directory, Paths.SEQUENCES_FOLDER)
-    clean_and_create_directory(sequences_directory)
+    create_directory(sequences_directory, clean=clean)
+
+    # Analysis directory
+    analysis_directory = '%s/%s' % (output_directory, Paths.ANALYSIS_FOLDER)
+    create_directory(analysis_directory, clean=clean)
 
 
 ####################################################################################################
@@ -194,3 +220,28 @@ def get_file_name_from_path(path):
 
     # Otherwise, return the file name
     return file_name
+
+
+####################################################################################################
+# @compute_file_hash
+####################################################################################################
+def compute_file_hash(path,
+                      block_size=1 << 20):
+    """Computes the SHA-1 hash of the content of a file.
+
+    :param path:
+        A given path to a certain file.
+    :param block_size:
+        The size of the blocks that are read from the file.
+    :return:
+        The hexadecimal digest of the content of the file.
+    """
+
+    # Hash the file block by block to avoid loading it at once
+    file_hash = hashlib.sha1()
+    with open(path, 'rb') as input_file:
+        for block in iter(lambda: input_file.read(block_size), b''):
+            file_hash.update(block)
+
+    # Return the digest
+    return file_hash.hexdigest()
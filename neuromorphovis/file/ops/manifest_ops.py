@@ -0,0 +1,338 @@
+####################################################################################################
+# Copyright (c) 2016 - 2018, EPFL / Blue Brain Project
+#               Marwan Abdellah <marwan.abdellah@epfl.ch>
+#
+# This file is part of NeuroMorphoVis <https://github.com/BlueBrain/NeuroMorphoVis>
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU General Public License as published by the Free Software Foundation, version 3 of the License.
+#
+# This Blender-based tool is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program.
+# If not, see <http://www.gnu.org/licenses/>.
+####################################################################################################
+
+__author__      = "Marwan Abdellah"
+__copyright__   = "Copyright (c) 2016 - 2018, Blue Brain Project / EPFL"
+__credits__     = ["Ahmet Bilgili", "Juan Hernando", "Stefan Eilemann"]
+__version__     = "1.0.0"
+__maintainer__  = "Marwan Abdellah"
+__email__       = "marwan.abdellah@epfl.ch"
+__status__      = "Production"
+
+
+# System imports
+import sys, os, json, tempfile, multiprocessing
+
+import numpy
+
+# Internal imports, this module is used by the batch driver outside Blender
+sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+sys.path.append('%s/../../consts' % os.path.dirname(os.path.realpath(__file__)))
+from arbors_consts import *
+from paths_consts import *
+import file_ops
+
+
+####################################################################################################
+# @read_swc_morphology_metadata
+####################################################################################################
+def read_swc_morphology_metadata(morphology_file):
+    """Reads the metadata of an .SWC morphology file from its samples arrays without building
+    the morphology.
+
+    :param morphology_file:
+        The path to the morphology file.
+    :return:
+        A dictionary of the metadata of the morphology.
+    """
+
+    # Parse the whole file at once
+    data = numpy.loadtxt(morphology_file, comments='#', usecols=range(7), ndmin=2)
+    indices = data[:, Arbors.SWC_SAMPLE_INDEX_IDX].astype(numpy.int64)
+    types = data[:, Arbors.SWC_SAMPLE_TYPE_IDX].astype(numpy.int64)
+    points = data[:, Arbors.SWC_SAMPLE_X_COORDINATES_IDX:Arbors.SWC_SAMPLE_Z_COORDINATES_IDX + 1]
+    radii = data[:, Arbors.SWC_SAMPLE_RADIUS_IDX]
+    parents = data[:, Arbors.SWC_SAMPLE_PARENT_INDEX_IDX].astype(numpy.int64)
+
+    # The samples that have no parents, the soma is the first one
+    roots = parents == Arbors.SWC_NO_PARENT_SAMPLE_TYPE
+
+    # Center the samples at the soma, like the reader does
+    if numpy.any(roots):
+        root_rows = numpy.maximum.accumulate(numpy.where(roots, numpy.arange(len(roots)), -1))
+        translated = root_rows >= 0
+        points = points.copy()
+        points[translated] -= points[root_rows[translated]]
+
+    # The row of the parent of every sample, or -1
+    rows = numpy.full(int(indices.max()) + 1, -1, dtype=numpy.int64)
+    rows[indices] = numpy.arange(len(indices))
+    parents_rows = numpy.full(len(indices), -1, dtype=numpy.int64)
+    valid = (parents >= 0) & (parents < len(rows))
+    parents_rows[valid] = rows[parents[valid]]
+
+    # A sample starts a section unless its parent has a single child and is not a root
+    children = numpy.flatnonzero(parents_rows >= 0)
+    children_count = numpy.bincount(parents_rows[children], minlength=len(indices))
+    continues_parent = (children_count[parents_rows[children]] == 1) & \
+                       (parents_rows[parents_rows[children]] >= 0)
+    sections_starts = children[~continues_parent]
+
+    # The arbors samples and the arbors roots, that are connected to the soma
+    arbors_samples = types != Arbors.SWC_SOMA_SAMPLE_TYPE
+    arbors_roots = children[(types[children] != Arbors.SWC_SOMA_SAMPLE_TYPE) &
+                            (types[parents_rows[children]] == Arbors.SWC_SOMA_SAMPLE_TYPE)]
+
+    # The soma radius is the radius of the root soma sample
+    soma_rows = numpy.flatnonzero(roots & (types == Arbors.SWC_SOMA_SAMPLE_TYPE))
+    soma_radius = float(radii[soma_rows[-1]]) if len(soma_rows) > 0 else 0.0
+
+    # The metadata
+    return {
+        'number_samples': int(numpy.count_nonzero(arbors_samples)),
+        'number_sections': int(numpy.count_nonzero(
+            types[sections_starts] != Arbors.SWC_SOMA_SAMPLE_TYPE)),
+        'number_axons': int(numpy.count_nonzero(
+            types[arbors_roots] == Arbors.SWC_AXON_SAMPLE_TYPE)),
+        'number_basal_dendrites': int(numpy.count_nonzero(
+            types[arbors_roots] == Arbors.SWC_BASAL_DENDRITE_SAMPLE_TYPE)),
+        'number_apical_dendrites': int(numpy.count_nonzero(
+            types[arbors_roots] == Arbors.SWC_APICAL_DENDRITE_SAMPLE_TYPE)),
+        'bounding_box': get_bounding_box(points[arbors_samples]),
+        'soma_radius': soma_radius}
+
+
+####################################################################################################
+# @read_h5_morphology_metadata
+####################################################################################################
+def read_h5_morphology_metadata(morphology_file):
+    """Reads the metadata of an .H5 morphology file from its points and structure datasets
+    without building the morphology.
+
+    :param morphology_file:
+        The path to the morphology file.
+    :return:
+        A dictionary of the metadata of the morphology.
+    """
+
+    # The h5py module is only needed for the .H5 files
+    import h5py
+
+    # Read the points and the structure
+    with h5py.File(morphology_file, 'r') as data:
+        points = numpy.asarray(data[Arbors.H5_POINTS_DIRECTORY][()])
+        structure = numpy.asarray(data[Arbors.H5_STRUCTURE_DIRECTORY][()], dtype=numpy.int64)
+
+    # The first section is the soma
+    first_arbor_point = int(structure[1][0]) if len(structure) > 1 else len(points)
+    soma_points = points[structure[0][0]:first_arbor_point,
+                         Arbors.H5_SAMPLE_X_COORDINATES_IDX:Arbors.H5_SAMPLE_Z_COORDINATES_IDX + 1]
+
+    # The soma radius is the mean distance between the profile points and their centroid
+    soma_radius = 0.0
+    if len(soma_points) > 0:
+        soma_radius = float(numpy.linalg.norm(
+            soma_points - soma_points.mean(axis=0), axis=1).mean())
+
+    # The arbors sections and their roots, that are connected to the soma
+    sections = structure[1:]
+    roots = sections[sections[:, 2] <= 0]
+
+    # The metadata
+    return {
+        'number_samples': int(len(points) - first_arbor_point),
+        'number_sections': int(len(sections)),
+        'number_axons': int(numpy.count_nonzero(roots[:, 1] == Arbors.H5_AXON_SECTION_TYPE)),
+        'number_basal_dendrites': int(numpy.count_nonzero(
+            roots[:, 1] == Arbors.H5_BASAL_DENDRITE_SECTION_TYPE)),
+        'number_apical_dendrites': int(numpy.count_nonzero(
+            roots[:, 1] == Arbors.H5_APICAL_DENDRITE_SECTION_TYPE)),
+        'bounding_box': get_bounding_box(
+            points[first_arbor_point:, Arbors.H5_SAMPLE_X_COORDINATES_IDX:
+                                       Arbors.H5_SAMPLE_Z_COORDINATES_IDX + 1]),
+        'soma_radius': soma_radius}
+
+
+####################################################################################################
+# @get_bounding_box
+####################################################################################################
+def get_bounding_box(points):
+    """Gets the bounding box of a given array of points.
+
+    :param points:
+        An (N, 3) array of points.
+    :return:
+        The minimum and maximum points of the bounding box as two lists, or None if the array is
+        empty.
+    """
+
+    if len(points) == 0:
+        return None
+    return [points.min(axis=0).tolist(), points.max(axis=0).tolist()]
+
+
+####################################################################################################
+# @read_morphology_metadata
+####################################################################################################
+def read_morphology_metadata(morphology_file):
+    """Reads the metadata of a morphology file, and records the status of the file.
+
+    This function is executed by the workers of the pool, therefore it never raises, and the
+    errors are recorded in the metadata.
+
+    :param morphology_file:
+        The path to the morphology file.
+    :return:
+        A dictionary of the metadata of the morphology.
+    """
+
+    # The status of the file, used to detect the changes later
+    status = os.stat(morphology_file)
+    metadata = {'size': status.st_size, 'mtime': status.st_mtime}
+
+    try:
+
+        # Read the metadata from the file
+        if morphology_file.lower().endswith('.h5'):
+            metadata.update(read_h5_morphology_metadata(morphology_file))
+        else:
+            metadata.update(read_swc_morphology_metadata(morphology_file))
+
+        # The content hash
+        metadata['hash'] = file_ops.compute_file_hash(morphology_file)
+
+    except Exception as error:
+        metadata['error'] = str(error)
+
+    # Return the metadata
+    return metadata
+
+
+####################################################################################################
+# @read_manifest
+####################################################################################################
+def read_manifest(manifest_file):
+    """Reads a morphologies manifest.
+
+    :param manifest_file:
+        The path to the manifest file.
+    :return:
+        A dictionary mapping the names of the morphology files to their metadata, empty if the
+        manifest does not exist or cannot be read.
+    """
+
+    try:
+        with open(manifest_file, 'r') as input_file:
+            return json.load(input_file)['morphologies']
+    except (IOError, ValueError, KeyError):
+        return dict()
+
+
+####################################################################################################
+# @write_manifest
+####################################################################################################
+def write_manifest(manifest_file,
+                   morphologies):
+    """Writes a morphologies manifest atomically.
+
+    :param manifest_file:
+        The path to the manifest file.
+    :param morphologies:
+        A dictionary mapping the names of the morphology files to their metadata.
+    """
+
+    # Write to a temporary file in the same directory and then move it
+    handle, temporary_file = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(manifest_file)), suffix='.tmp')
+    with os.fdopen(handle, 'w') as output_file:
+        json.dump({'morphologies': morphologies}, output_file, indent=1, sort_keys=True)
+    os.replace(temporary_file, manifest_file)
+
+
+####################################################################################################
+# @build_morphologies_manifest
+####################################################################################################
+def build_morphologies_manifest(morphology_directory,
+                                manifest_file=None,
+                                number_processes=None,
+                                file_extensions=('.h5', '.swc')):
+    """Builds or updates the manifest of the morphology files in a given directory.
+
+    Only the files that are new, or whose size or modification time have changed since the last
+    update, are read again, in parallel, and the files that do not exist any more are removed
+    from the manifest.
+
+    :param morphology_directory:
+        The directory that contains the morphology files.
+    :param manifest_file:
+        The path to the manifest file, by default it is stored in the morphology directory.
+    :param number_processes:
+        The number of the processes used to read the files, by default the number of cores.
+    :param file_extensions:
+        The extensions of the morphology files.
+    :return:
+        A dictionary mapping the names of the morphology files to their metadata.
+    """
+
+    # The default manifest file
+    if manifest_file is None:
+        manifest_file = '%s/%s' % (morphology_directory, Paths.MORPHOLOGIES_MANIFEST_FILE)
+
+    # The current morphology files
+    morphology_files = sorted(file_name for file_name in os.listdir(morphology_directory)
+                              if file_name.lower().endswith(file_extensions))
+
+    # Keep the metadata of the files that have not been changed
+    previous_morphologies = read_manifest(manifest_file)
+    morphologies = dict()
+    changed_files = list()
+    for file_name in morphology_files:
+        status = os.stat('%s/%s' % (morphology_directory, file_name))
+        metadata = previous_morphologies.get(file_name)
+        if metadata is not None and metadata['size'] == status.st_size and \
+                metadata['mtime'] == status.st_mtime:
+            morphologies[file_name] = metadata
+        else:
+            changed_files.append(file_name)
+
+    # Read the metadata of the changed files in parallel
+    if len(changed_files) > 0:
+        paths = ['%s/%s' % (morphology_directory, file_name) for file_name in changed_files]
+        if number_processes == 1 or len(paths) == 1:
+            results = [read_morphology_metadata(path) for path in paths]
+        else:
+            with multiprocessing.Pool(processes=number_processes) as pool:
+                results = pool.map(read_morphology_metadata, paths, chunksize=4)
+        morphologies.update(zip(changed_files, results))
+
+    # Write the manifest only if it has changed
+    if len(changed_files) > 0 or len(morphologies) != len(previous_morphologies):
+        write_manifest(manifest_file, morphologies)
+
+    # Return the manifest
+    return morphologies
+
+
+####################################################################################################
+# @ Build the manifest of a directory if invoked from the command line.
+####################################################################################################
+if __name__ == "__main__":
+
+    # Parse the command line arguments
+    import argparse
+    parser = argparse.ArgumentParser(description='Builds the manifest of a morphology directory')
+    parser.add_argument('morphology_directory', help='Morphology directory')
+    parser.add_argument('--manifest', default=None, help='Manifest file')
+    parser.add_argument('--processes', type=int, default=None, help='Number of processes')
+    arguments = parser.parse_args()
+
+    # Build or update the manifest
+    manifest = build_morphologies_manifest(
+        arguments.morphology_directory, manifest_file=arguments.manifest,
+        number_processes=arguments.processes)
+    print('Manifest: %d morphologies, %d errors' % (
+        len(manifest), sum(1 for metadata in manifest.values() if 'error' in metadata)))
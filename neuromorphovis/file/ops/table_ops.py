@@ -0,0 +1,143 @@
+####################################################################################################
+# Copyright (c) 2016 - 2018, EPFL / Blue Brain Project
+#               Marwan Abdellah <marwan.abdellah@epfl.ch>
+#
+# This file is part of NeuroMorphoVis <https://github.com/BlueBrain/NeuroMorphoVis>
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU General Public License as published by the Free Software Foundation, version 3 of the License.
+#
+# This Blender-based tool is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program.
+# If not, see <http://www.gnu.org/licenses/>.
+####################################################################################################
+
+__author__      = "Marwan Abdellah"
+__copyright__   = "Copyright (c) 2016 - 2018, Blue Brain Project / EPFL"
+__credits__     = ["Ahmet Bilgili", "Juan Hernando", "Stefan Eilemann"]
+__version__     = "1.0.0"
+__maintainer__  = "Marwan Abdellah"
+__email__       = "marwan.abdellah@epfl.ch"
+__status__      = "Production"
+
+# System imports
+import sys, os, csv, glob, tempfile
+
+# Internal imports, this module is used by the batch driver outside Blender
+sys.path.append('%s/../../consts' % os.path.dirname(os.path.realpath(__file__)))
+from paths_consts import *
+
+
+####################################################################################################
+# @write_table_to_csv
+####################################################################################################
+def write_table_to_csv(table,
+                       columns,
+                       file_path):
+    """Writes a columnar table to a .CSV file atomically.
+
+    :param table:
+        A dictionary mapping the name of every column to a sequence of its values, all the columns
+        have the same length.
+    :param columns:
+        The names of the columns in their order in the file.
+    :param file_path:
+        The path to the .CSV file.
+    """
+
+    # The columns as lists, the arrays are converted to the built-in types
+    values = [table[column].tolist() if hasattr(table[column], 'tolist') else list(table[column])
+              for column in columns]
+
+    # Write to a temporary file in the same directory and then move it
+    handle, temporary_file = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(file_path)), suffix='.tmp')
+    with os.fdopen(handle, 'w', newline='') as output_file:
+        writer = csv.writer(output_file)
+        writer.writerow(columns)
+        writer.writerows(zip(*values))
+    os.replace(temporary_file, file_path)
+
+
+####################################################################################################
+# @merge_csv_files
+####################################################################################################
+def merge_csv_files(files,
+                    output_file):
+    """Merges several .CSV files into a single one, the rows are streamed and never held in memory.
+
+    The columns of the merged file are the columns of all the files in their order of appearance,
+    the missing values are left empty.
+
+    :param files:
+        A list of the paths to the .CSV files.
+    :param output_file:
+        The path to the merged .CSV file.
+    :return:
+        The number of the merged rows.
+    """
+
+    # The columns of all the files
+    columns = list()
+    for file_path in files:
+        with open(file_path, 'r', newline='') as input_file:
+            for column in next(csv.reader(input_file), list()):
+                if column not in columns:
+                    columns.append(column)
+
+    # Write to a temporary file in the same directory and then move it
+    number_rows = 0
+    handle, temporary_file = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(output_file)), suffix='.tmp')
+    with os.fdopen(handle, 'w', newline='') as output_stream:
+        writer = csv.DictWriter(output_stream, fieldnames=columns, restval='')
+        writer.writeheader()
+        for file_path in files:
+            with open(file_path, 'r', newline='') as input_file:
+                for row in csv.DictReader(input_file):
+                    writer.writerow(row)
+                    number_rows += 1
+    os.replace(temporary_file, output_file)
+
+    return number_rows
+
+
+####################################################################################################
+# @merge_analysis_tables
+####################################################################################################
+def merge_analysis_tables(output_directory):
+    """Merges the analysis tables of all the morphologies of a run into a single table in the
+    output directory.
+
+    :param output_directory:
+        The output directory of the run.
+    :return:
+        The path to the merged table, or None if there are no analysis tables.
+    """
+
+    files = sorted(glob.glob('%s/%s/*.csv' % (output_directory, Paths.ANALYSIS_FOLDER)))
+    if len(files) == 0:
+        return None
+
+    output_file = '%s/%s' % (output_directory, Paths.ANALYSIS_TABLE_FILE)
+    number_rows = merge_csv_files(files, output_file)
+    print('Analysis: %d morphologies, %d sections [%s]' % (len(files), number_rows, output_file))
+    return output_file
+
+
+####################################################################################################
+# @ Merge the analysis tables of a run if invoked from the command line.
+####################################################################################################
+if __name__ == "__main__":
+
+    # Parse the command line arguments
+    import argparse
+    parser = argparse.ArgumentParser(description='Merges the analysis tables of a run')
+    parser.add_argument('output_directory', help='Output directory of the run')
+    arguments = parser.parse_args()
+
+    # Merge the tables
+    merge_analysis_tables(arguments.output_directory)
@@ -19,4 +19,6 @@
 from .h5_reader import *
 from .swc_reader import *
 from .bbp_reader import *
-from .morphology_reader import *
\ No newline at end of file
+from .morphology_cache import *
+from .morphology_reader import *
+from .morphology_prefetcher import *
\ No newline at end of file
@@ -16,6 +16,9 @@
 ####################################################################################################
 
 
+# System imports
+import numpy
+
 # Blender imports
 from mathutils import Vector
 
@@ -37,16 +40,33 @@ class H5Reader:
     # @__init__
     ################################################################################################
     def __init__(self,
-                 h5_file):
+                 h5_file,
+                 zero_copy=False,
+                 branching_orders=None):
         """Constructor
 
         :param h5_file:
             A given .H5 morphology file.
+        :param zero_copy:
+            If True, the points are kept in a single contiguous array that is memory-mapped from
+            the file if its layout allows it, and the sections hold views into this array. The
+            samples of every section are only built when they are accessed for the first time.
+        :param branching_orders:
+            A dictionary mapping the section types to the maximum branching orders of the sections
+            that are built when the file is read, where the samples of the deeper sections are
+            only built when they are accessed for the first time. If None, all the sections are
+            built, and if an arbor type is missing, all of its sections are built.
         """
 
         # Set the path to the given h5 file
         self.morphology_file = h5_file
 
+        # Zero-copy loading mode
+        self.zero_copy = zero_copy
+
+        # The maximum branching orders of the sections that are built directly, per arbor type
+        self.branching_orders = branching_orders if branching_orders is not None else dict()
+
         # A list of all the points in the morphology file
         self.points_list = list()
 
@@ -56,6 +76,90 @@ class H5Reader:
         # A list of all the perimeters that are specific to astrocyte morphologies
         self.perimeters_list = list()
 
+    ################################################################################################
+    # @build_sections_children_index
+    ################################################################################################
+    @staticmethod
+    def build_sections_children_index(structure_list):
+        """Builds an index that maps every section to its children sections in linear time.
+
+        The index is stored in a compressed sparse row (CSR) layout: the sections are sorted by
+        their parents (with a stable sort to keep the children in order), then the children of
+        the section with ID [i] are children[offsets[i]:offsets[i + 1]].
+
+        :param structure_list:
+            Morphology section list, as read from the .H5 file.
+        :return:
+            The offsets and the children arrays of the index.
+        """
+
+        # The number of rows in the structure list, the first row is always the soma
+        number_rows = len(structure_list)
+
+        # The IDs and the parents of the sections, the soma and the last rows are not sections
+        sections_ids = numpy.arange(1, max(number_rows - 1, 1), dtype=numpy.int64)
+        parents_ids = numpy.asarray(structure_list, dtype=numpy.int64)[1:number_rows - 1, 2]
+
+        # Ignore the sections that have no valid parents
+        valid = (parents_ids >= 0) & (parents_ids < number_rows)
+        sections_ids = sections_ids[valid]
+        parents_ids = parents_ids[valid]
+
+        # Group the children by their parents
+        order = numpy.argsort(parents_ids, kind='stable')
+        children = sections_ids[order]
+
+        # The offsets of the children of every section
+        offsets = numpy.zeros(number_rows + 1, dtype=numpy.int64)
+        numpy.cumsum(numpy.bincount(parents_ids, minlength=number_rows), out=offsets[1:])
+
+        # Return the index
+        return offsets, children
+
+    ################################################################################################
+    # @compute_sections_branching_orders
+    ################################################################################################
+    @staticmethod
+    def compute_sections_branching_orders(structure_list):
+        """Computes the branching orders of all the sections from their parents, where the
+        sections that are connected to the soma have an order of one.
+
+        :param structure_list:
+            Morphology section list, as read from the .H5 file.
+        :return:
+            A list of the branching orders of the rows of the structure list.
+        """
+
+        # The parents of the sections
+        number_rows = len(structure_list)
+        parents_ids = numpy.asarray(structure_list, dtype=numpy.int64)[:, 2].tolist() \
+            if number_rows > 0 else list()
+
+        # The soma row has an order of zero, the others are unknown
+        orders = [-1] * number_rows
+        if number_rows > 0:
+            orders[0] = 0
+
+        for i_row in range(1, number_rows):
+
+            # Walk up to the first section of a known order, or to an invalid parent
+            path = list()
+            row = i_row
+            while 0 <= row < number_rows and orders[row] == -1 and len(path) < number_rows:
+                path.append(row)
+                row = parents_ids[row]
+
+            # The order of the known ancestor, zero if the chain ends without one
+            order = orders[row] if 0 <= row < number_rows and orders[row] >= 0 else 0
+
+            # Update the orders of the sections along the path
+            for row in reversed(path):
+                order += 1
+                orders[row] = order
+
+        # Return the orders list
+        return orders
+
     ################################################################################################
     # @build_tree
     ################################################################################################
@@ -67,32 +171,22 @@ class H5Reader:
             A linear list of sections of a specific type to be converted to a tree.
         """
 
-        # For each section, get the IDs of the children nodes, then find and append them to the
-        # children lists.
-        # Also find the ID of the parent node and update the parent accordingly.
-        branching_order = 0
-        for i_section in sections_list:
-
-            # First round
-            for child_id in i_section.children_ids:
+        # Index the sections by their IDs to find the parent and the children of every section
+        # directly, only the sections in the list are linked together
+        sections = {section.id: section for section in sections_list}
 
-                # For each section
-                for j_section in sections_list:
+        for section in sections_list:
 
-                    # Is it a child
-                    if child_id == j_section.id:
+            # Find and append the children
+            for child_id in section.children_ids:
+                child = sections.get(child_id)
+                if child is not None:
+                    section.children.append(child)
 
-                        # Append it to the list
-                        i_section.children.append(j_section)
-
-            # Second round
-            for k_section in sections_list:
-
-                # Is it parent
-                if i_section.parent_id == k_section.id:
-
-                    # Set it to be a parent
-                    i_section.parent = k_section
+            # Find and set the parent, if it exists
+            parent = sections.get(section.parent_id)
+            if parent is not None:
+                section.parent = parent
 
     ################################################################################################
     # @get_arbors_profile_points
@@ -206,6 +300,35 @@ class H5Reader:
         # Return a reference to the soma object
         return nmv_soma
 
+    ################################################################################################
+    # @read_dataset
+    ################################################################################################
+    def read_dataset(self,
+                     dataset,
+                     memory_mapped=False):
+        """Reads a dataset from the .H5 file into a contiguous NumPy array.
+
+        :param dataset:
+            A dataset in the .H5 file.
+        :param memory_mapped:
+            If True, the array is memory-mapped directly from the file if the dataset is stored
+            contiguously without any filters (like compression), otherwise it is read into memory.
+        :return:
+            A contiguous NumPy array of the dataset.
+        """
+
+        # Memory-map the dataset if it is stored as a contiguous block in the file
+        if memory_mapped and dataset.chunks is None and dataset.compression is None:
+
+            # The offset of the data block in the file, None if it is not allocated
+            offset = dataset.id.get_offset()
+            if offset is not None:
+                return numpy.memmap(self.morphology_file, dtype=dataset.dtype, mode='r',
+                                    offset=offset, shape=dataset.shape)
+
+        # Otherwise, read the whole dataset into a contiguous array
+        return numpy.ascontiguousarray(dataset[()])
+
     ################################################################################################
     # @read_points_and_structures
     ################################################################################################
@@ -238,30 +361,38 @@ class H5Reader:
             # Exit NMV
             exit(0)
 
+        # The data is either copied or memory-mapped, the file is closed in any case
         try:
 
             # Read the point list from the points directory
-            self.points_list = data[nmv.consts.Arbors.H5_POINTS_DIRECTORY].value
+            try:
+                self.points_list = self.read_dataset(
+                    data[nmv.consts.Arbors.H5_POINTS_DIRECTORY], memory_mapped=self.zero_copy)
 
-        except ImportError:
-
-            # Error
-            nmv.logger.log('ERROR: Cannot load the data points from [%s]' % self.morphology_file)
+            except KeyError:
 
-            # Return None
-            return None
+                # Error
+                nmv.logger.log('ERROR: Cannot load the data points from [%s]' %
+                               self.morphology_file)
 
-        try:
+                # Return None
+                return None
 
             # Get the structure list from the structures directory
-            self.structure_list = data[nmv.consts.Arbors.H5_STRUCTURE_DIRECTORY].value
+            try:
+                self.structure_list = self.read_dataset(
+                    data[nmv.consts.Arbors.H5_STRUCTURE_DIRECTORY])
 
-        except ImportError:
+            except KeyError:
 
-            nmv.logger.log('ERROR: Cannot load the data structure from [%s]' % self.morphology_file)
+                nmv.logger.log('ERROR: Cannot load the data structure from [%s]' %
+                               self.morphology_file)
 
-            # Return None
-            return None
+                # Return None
+                return None
+
+        finally:
+            data.close()
 
         # The file has been read successfully
         return True
@@ -279,6 +410,11 @@ class H5Reader:
         # Parse the sections and add them to a linear list [index, parent, type, samples]
         sections_list = list()
 
+        # The branching orders are only needed if some of the sections can be deferred
+        branching_orders = None
+        if self.branching_orders and not self.zero_copy:
+            branching_orders = self.compute_sections_branching_orders(self.structure_list)
+
         for i_section in range(1, len(self.structure_list) - 1):
 
             # Get the index of the starting point of the section
@@ -296,6 +432,26 @@ class H5Reader:
             # Get the section parent index
             section_parent_index = int(self.structure_list[i_section][2])
 
+            # In the zero-copy mode, or if the section is deeper than the branching order that is
+            # built for its arbor, the section only holds a view into the points
+            if self.zero_copy or (branching_orders is not None and branching_orders[
+                    i_section] > self.branching_orders.get(section_type, nmv.consts.Math.INFINITY)):
+
+                # Build a view of the samples, the .H5 files report the diameters of the samples
+                samples = nmv.skeleton.SamplesView(
+                    points=self.points_list[section_first_point_index:section_last_point_index,
+                                            nmv.consts.Arbors.H5_SAMPLE_X_COORDINATES_IDX:
+                                            nmv.consts.Arbors.H5_SAMPLE_Z_COORDINATES_IDX + 1],
+                    radii=self.points_list[section_first_point_index:section_last_point_index,
+                                           nmv.consts.Arbors.H5_SAMPLE_RADIUS_IDX],
+                    radius_scale=0.5)
+
+                # Add this section to the parsed sections list
+                sections_list.append([section_index, section_parent_index, section_type, samples])
+
+                # Next section
+                continue
+
             # Get the positions and radii of each sample along the section
             samples = list()
 
@@ -359,6 +515,11 @@ class H5Reader:
         # A linear list of the apical dendrites sections
         apical_dendrites_sections = list()
 
+        # Build the children index of all the sections once
+        children_offsets, children = self.build_sections_children_index(self.structure_list)
+        children_offsets = children_offsets.tolist()
+        children = children.tolist()
+
         # Construct a tree of sections and filter them based on their type
         for i_section in sections_list:
 
@@ -369,16 +530,8 @@ class H5Reader:
             section_parent_id = i_section[1]
 
             # Section children IDs, if exist
-            section_children_ids = list()
-
-            for j_section in sections_list:
-
-                # If the parent ID of another section is equivalent to the ID of this section, then
-                # it is a child
-                if section_id == j_section[1]:
-
-                    # Append it
-                    section_children_ids.append(j_section[0])
+            section_children_ids = \
+                children[children_offsets[section_id]:children_offsets[section_id + 1]]
 
             # Section type
             section_type = i_section[2]
@@ -386,10 +539,15 @@ class H5Reader:
             # Section samples
             section_samples = i_section[3]
 
-            # Construct a skeleton section
-            nmv_section = neuromorphovis.skeleton.Section(
-                id=section_id, parent_id=section_parent_id, children_ids=section_children_ids,
-                samples=section_samples, type=section_type)
+            # Construct a skeleton section, the samples of the deferred sections are only a view
+            if isinstance(section_samples, nmv.skeleton.SamplesView):
+                nmv_section = neuromorphovis.skeleton.Section(
+                    id=section_id, parent_id=section_parent_id, children_ids=section_children_ids,
+                    samples_view=section_samples, type=section_type)
+            else:
+                nmv_section = neuromorphovis.skeleton.Section(
+                    id=section_id, parent_id=section_parent_id, children_ids=section_children_ids,
+                    samples=section_samples, type=section_type)
 
             # Axon
             if section_type == nmv.consts.Arbors.H5_AXON_SECTION_TYPE:
@@ -0,0 +1,421 @@
+####################################################################################################
+# Copyright (c) 2016 - 2018, EPFL / Blue Brain Project
+#               Marwan Abdellah <marwan.abdellah@epfl.ch>
+#
+# This file is part of NeuroMorphoVis <https://github.com/BlueBrain/NeuroMorphoVis>
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU General Public License as published by the Free Software Foundation, version 3 of the License.
+#
+# This Blender-based tool is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program.
+# If not, see <http://www.gnu.org/licenses/>.
+####################################################################################################
+
+__author__      = "Marwan Abdellah"
+__copyright__   = "Copyright (c) 2016 - 2018, Blue Brain Project / EPFL"
+__credits__     = ["Ahmet Bilgili", "Juan Hernando", "Stefan Eilemann"]
+__version__     = "1.0.0"
+__maintainer__  = "Marwan Abdellah"
+__email__       = "marwan.abdellah@epfl.ch"
+__status__      = "Production"
+
+# System imports
+import os
+import json
+import hashlib
+import tempfile
+
+import numpy
+
+# Blender imports
+from mathutils import Vector
+
+# Internal imports
+import neuromorphovis as nmv
+import neuromorphovis.file
+import neuromorphovis.skeleton
+
+
+####################################################################################################
+# MorphologyCache
+####################################################################################################
+class MorphologyCache:
+    """A persistent on-disk cache of parsed morphologies.
+
+    Every entry stores the arrays of the columnar representation of a morphology in a single
+    uncompressed .npz file, that can be loaded again with a few bulk reads instead of parsing the
+    source file. The entries are keyed by the hash of the content of the source file and the
+    options that were used to read it, so a modified file or a different set of options never
+    hits a stale entry. The label of the morphology is not stored, it is set from the path of
+    the requested file, so renamed or identical files get their own labels. The modification
+    times and the hashes of the source files are kept in an index to avoid hashing the files that
+    have not been changed. The total size of the cache is bounded, and the least recently used
+    entries are evicted first.
+
+    NOTE: Only the morphologies as they are parsed are cached, the repair of the skeleton runs
+    after the loading on every run.
+    """
+
+    # The version of the layout of the entries, changing it invalidates all the entries
+    FORMAT_VERSION = 2
+
+    # The name of the index file in the cache directory
+    INDEX_FILE = 'index.json'
+
+    # The extension of the entries
+    ENTRY_EXTENSION = '.npz'
+
+    ################################################################################################
+    # @__init__
+    ################################################################################################
+    def __init__(self,
+                 cache_directory,
+                 maximum_size=1024):
+        """Constructor
+
+        :param cache_directory:
+            The directory where the entries of the cache are stored.
+        :param maximum_size:
+            The maximum size of the cache in MB.
+        """
+
+        # The cache directory, created if it does not exist
+        self.cache_directory = cache_directory
+        os.makedirs(self.cache_directory, exist_ok=True)
+
+        # The maximum size in bytes
+        self.maximum_size = int(maximum_size * 1024 * 1024)
+
+        # The index of the source files
+        self.index_file = '%s/%s' % (self.cache_directory, self.INDEX_FILE)
+        self.index = self.read_index()
+
+    ################################################################################################
+    # @read_index
+    ################################################################################################
+    def read_index(self):
+        """Reads the index of the source files from the cache directory.
+
+        :return:
+            A dictionary mapping the path of every source file to its modification time, size and
+            content hash.
+        """
+
+        try:
+            with open(self.index_file, 'r') as index_file:
+                return json.load(index_file)
+        except (IOError, ValueError):
+            return dict()
+
+    ################################################################################################
+    # @write_index
+    ################################################################################################
+    def write_index(self):
+        """Writes the index of the source files atomically to the cache directory.
+        """
+
+        handle, temporary_file = tempfile.mkstemp(dir=self.cache_directory, suffix='.tmp')
+        with os.fdopen(handle, 'w') as index_file:
+            json.dump(self.index, index_file)
+        os.replace(temporary_file, self.index_file)
+
+    ################################################################################################
+    # @get_file_hash
+    ################################################################################################
+    def get_file_hash(self,
+                      file_path):
+        """Gets the hash of the content of a source file.
+
+        The file is hashed again only if its modification time or size have changed since the
+        last time it was hashed.
+
+        :param file_path:
+            The path to the source file.
+        :return:
+            The hexadecimal digest of the content of the file.
+        """
+
+        # The status of the file
+        file_path = os.path.abspath(file_path)
+        status = os.stat(file_path)
+
+        # If the file has not been changed, use the recorded hash
+        record = self.index.get(file_path)
+        if record is not None and record['mtime'] == status.st_mtime and \
+                record['size'] == status.st_size:
+            return record['hash']
+
+        # Otherwise, hash it and update the index
+        file_hash = nmv.file.ops.compute_file_hash(file_path)
+        self.index[file_path] = {'mtime': status.st_mtime, 'size': status.st_size,
+                                 'hash': file_hash}
+        self.write_index()
+
+        # Return the hash
+        return file_hash
+
+    ################################################################################################
+    # @get_entry_path
+    ################################################################################################
+    def get_entry_path(self,
+                       file_path,
+                       options=None):
+        """Gets the path of the entry of a source file read with the given options.
+
+        :param file_path:
+            The path to the source file.
+        :param options:
+            A dictionary of the reader options, they must be serializable to JSON.
+        :return:
+            The path of the entry in the cache directory.
+        """
+
+        # The key is the content of the file, the options and the layout version
+        key = json.dumps({'hash': self.get_file_hash(file_path),
+                          'options': options if options is not None else dict(),
+                          'version': self.FORMAT_VERSION}, sort_keys=True)
+
+        # The entry is named after the digest of the key
+        return '%s/%s%s' % (self.cache_directory, hashlib.sha1(key.encode()).hexdigest(),
+                            self.ENTRY_EXTENSION)
+
+    ################################################################################################
+    # @load
+    ################################################################################################
+    def load(self,
+             file_path,
+             options=None):
+        """Loads a morphology from the cache.
+
+        :param file_path:
+            The path to the source file.
+        :param options:
+            A dictionary of the reader options.
+        :return:
+            A reference to the morphology, or None if it is not cached.
+        """
+
+        # The entry of the file
+        entry_path = self.get_entry_path(file_path, options)
+        if not os.path.isfile(entry_path):
+            return None
+
+        # Load the arrays, a corrupted entry is treated as a miss
+        try:
+            with numpy.load(entry_path, allow_pickle=False) as entry:
+                arrays = {name: entry[name] for name in entry.files}
+        except (IOError, ValueError, KeyError):
+            return None
+
+        # Mark the entry as recently used
+        os.utime(entry_path, None)
+
+        # Construct the morphology
+        morphology = self.build_morphology_from_arrays(arrays)
+
+        # The same entry is shared by all the files with the same content, so the label is taken
+        # from the requested file, unless the morphology is labeled by its gid
+        if morphology.gid is None:
+            morphology.label = nmv.file.ops.get_file_name_from_path(file_path)
+
+        # Return the morphology
+        return morphology
+
+    ################################################################################################
+    # @store
+    ################################################################################################
+    def store(self,
+              file_path,
+              morphology,
+              options=None):
+        """Stores a morphology in the cache and evicts the least recently used entries if the
+        cache exceeds its maximum size.
+
+        :param file_path:
+            The path to the source file.
+        :param morphology:
+            The morphology that was read from the file.
+        :param options:
+            A dictionary of the reader options.
+        """
+
+        # The entry of the file
+        entry_path = self.get_entry_path(file_path, options)
+
+        # Write the entry to a temporary file, then move it to make it visible atomically
+        handle, temporary_file = tempfile.mkstemp(dir=self.cache_directory, suffix='.tmp')
+        with os.fdopen(handle, 'wb') as entry_file:
+            numpy.savez(entry_file, **self.get_morphology_arrays(morphology))
+        os.replace(temporary_file, entry_path)
+
+        # Keep the cache within its size limit
+        self.evict()
+
+    ################################################################################################
+    # @read_morphology
+    ################################################################################################
+    def read_morphology(self,
+                        file_path,
+                        loader,
+                        options=None):
+        """Reads a morphology from the cache, or loads it and stores it in the cache on a miss.
+
+        :param file_path:
+            The path to the source file.
+        :param loader:
+            A function that loads the morphology from the file path on a miss, and returns None
+            on failure.
+        :param options:
+            A dictionary of the reader options.
+        :return:
+            A reference to the morphology, or None if it cannot be loaded.
+        """
+
+        # Cache hit
+        morphology = self.load(file_path, options)
+        if morphology is not None:
+            return morphology
+
+        # Cache miss
+        morphology = loader(file_path)
+        if morphology is not None:
+            self.store(file_path, morphology, options)
+
+        # Return the morphology
+        return morphology
+
+    ################################################################################################
+    # @evict
+    ################################################################################################
+    def evict(self):
+        """Removes the least recently used entries until the cache fits in its maximum size.
+        """
+
+        # The entries, their sizes and last use times
+        entries = list()
+        for file_name in os.listdir(self.cache_directory):
+            if file_name.endswith(self.ENTRY_EXTENSION):
+                entry_path = '%s/%s' % (self.cache_directory, file_name)
+                try:
+                    status = os.stat(entry_path)
+                except OSError:
+                    continue
+                entries.append((status.st_mtime, status.st_size, entry_path))
+
+        # Remove the oldest entries first
+        total_size = sum(entry[1] for entry in entries)
+        for _, size, entry_path in sorted(entries):
+            if total_size <= self.maximum_size:
+                break
+            try:
+                os.remove(entry_path)
+            except OSError:
+                pass
+            total_size -= size
+
+    ################################################################################################
+    # @clear
+    ################################################################################################
+    def clear(self):
+        """Removes all the entries and the index from the cache.
+        """
+
+        for file_name in os.listdir(self.cache_directory):
+            if file_name.endswith(self.ENTRY_EXTENSION) or file_name == self.INDEX_FILE:
+                os.remove('%s/%s' % (self.cache_directory, file_name))
+        self.index = dict()
+
+    ################################################################################################
+    # @get_morphology_arrays
+    ################################################################################################
+    @staticmethod
+    def get_morphology_arrays(morphology):
+        """Gets the arrays that are stored in the entry of a morphology.
+
+        :param morphology:
+            A given morphology object.
+        :return:
+            A dictionary of named arrays.
+        """
+
+        # Convert the morphology into a columnar morphology
+        columnar_morphology = nmv.skeleton.ColumnarMorphology.from_morphology(morphology)
+
+        # The samples and the sections
+        arrays = {
+            'points': columnar_morphology.points,
+            'radii': columnar_morphology.radii,
+            'samples_ids': columnar_morphology.samples_ids,
+            'sections_offsets': columnar_morphology.sections_offsets,
+            'sections_ids': columnar_morphology.sections_ids,
+            'sections_types': columnar_morphology.sections_types,
+            'sections_parents': columnar_morphology.sections_parents,
+            'dendrites_roots': numpy.array(columnar_morphology.dendrites_roots, dtype=numpy.int64)}
+
+        # The soma
+        soma = morphology.soma
+        if soma is not None:
+            arrays['soma_centroid'] = numpy.array(tuple(soma.centroid), dtype=numpy.float64)
+            arrays['soma_profile_points'] = numpy.array(
+                [tuple(point) for point in soma.profile_points], dtype=numpy.float64).reshape(-1, 3)
+            if soma.arbors_profile_points is not None:
+                arrays['soma_arbors_profile_points'] = numpy.array(
+                    [tuple(point) for point in soma.arbors_profile_points],
+                    dtype=numpy.float64).reshape(-1, 3)
+
+        # The scalar attributes
+        arrays['metadata'] = numpy.array(json.dumps({
+            'axon_root': columnar_morphology.axon_root,
+            'apical_dendrite_root': columnar_morphology.apical_dendrite_root,
+            'roots_parent_id': columnar_morphology.roots_parent_id,
+            'soma_mean_radius': soma.mean_radius if soma is not None else None,
+            'gid': morphology.gid,
+            'mtype': morphology.mtype}, default=str))
+
+        # Return the arrays
+        return arrays
+
+    ################################################################################################
+    # @build_morphology_from_arrays
+    ################################################################################################
+    @staticmethod
+    def build_morphology_from_arrays(arrays):
+        """Constructs a morphology from the arrays that are stored in its entry.
+
+        :param arrays:
+            A dictionary of named arrays.
+        :return:
+            A reference to the morphology, where the samples of every section are only built when
+            they are accessed for the first time.
+        """
+
+        # The scalar attributes
+        metadata = json.loads(str(arrays['metadata']))
+
+        # The soma
+        soma = None
+        if 'soma_centroid' in arrays:
+            arbors_profile_points = None
+            if 'soma_arbors_profile_points' in arrays:
+                arbors_profile_points = [
+                    Vector(point) for point in arrays['soma_arbors_profile_points'].tolist()]
+            soma = nmv.skeleton.Soma(
+                centroid=Vector(arrays['soma_centroid'].tolist()),
+                mean_radius=metadata['soma_mean_radius'],
+                profile_points=[Vector(point) for point in arrays['soma_profile_points'].tolist()],
+                arbors_profile_points=arbors_profile_points)
+
+        # Construct the columnar morphology, and then the object model
+        columnar_morphology = nmv.skeleton.ColumnarMorphology(
+            points=arrays['points'], radii=arrays['radii'], samples_ids=arrays['samples_ids'],
+            sections_offsets=arrays['sections_offsets'], sections_ids=arrays['sections_ids'],
+            sections_types=arrays['sections_types'], sections_parents=arrays['sections_parents'],
+            axon_root=metadata['axon_root'], dendrites_roots=arrays['dendrites_roots'].tolist(),
+            apical_dendrite_root=metadata['apical_dendrite_root'],
+            roots_parent_id=metadata['roots_parent_id'], soma=soma,
+            gid=metadata['gid'], mtype=metadata['mtype'])
+        return columnar_morphology.to_morphology(lazy=True)
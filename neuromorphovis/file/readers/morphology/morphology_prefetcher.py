@@ -0,0 +1,201 @@
+####################################################################################################
+# Copyright (c) 2016 - 2018, EPFL / Blue Brain Project
+#               Marwan Abdellah <marwan.abdellah@epfl.ch>
+#
+# This file is part of NeuroMorphoVis <https://github.com/BlueBrain/NeuroMorphoVis>
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU General Public License as published by the Free Software Foundation, version 3 of the License.
+#
+# This Blender-based tool is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program.
+# If not, see <http://www.gnu.org/licenses/>.
+####################################################################################################
+
+__author__      = "Marwan Abdellah"
+__copyright__   = "Copyright (c) 2016 - 2018, Blue Brain Project / EPFL"
+__credits__     = ["Ahmet Bilgili", "Juan Hernando", "Stefan Eilemann"]
+__version__     = "1.0.0"
+__maintainer__  = "Marwan Abdellah"
+__email__       = "marwan.abdellah@epfl.ch"
+__status__      = "Production"
+
+# System imports
+import queue
+import threading
+
+# Internal imports
+import neuromorphovis as nmv
+import neuromorphovis.file
+
+
+####################################################################################################
+# MorphologyPrefetcher
+####################################################################################################
+class MorphologyPrefetcher:
+    """Loads the morphologies of a list of jobs on a background thread ahead of their processing.
+
+    The morphologies are read and parsed in the order of the jobs, while the current one is being
+    meshed or rendered. The loaded morphologies are kept in a bounded queue, so at most a given
+    number of morphologies are held in memory ahead of the one being processed.
+
+    The reading is done without any call to the Blender API, therefore it is safe to run it next
+    to the main thread.
+    """
+
+    ################################################################################################
+    # @__init__
+    ################################################################################################
+    def __init__(self,
+                 jobs,
+                 loader=None,
+                 depth=1):
+        """Constructor
+
+        :param jobs:
+            A list of the options of the jobs, one per morphology.
+        :param loader:
+            A function that loads the morphology of a job from its options and returns a loading
+            flag, the morphology and the profile span of the loading, or None if the loading is
+            not measured. By default, @load_morphology without a span.
+        :param depth:
+            The maximum number of loaded morphologies that wait in the queue, while the next one
+            is being loaded. If zero, the morphologies are loaded on demand without a background
+            thread.
+        """
+
+        # The jobs
+        self.jobs = list(jobs)
+
+        # The loader
+        self.loader = loader
+        if loader is None:
+            self.loader = lambda job: tuple(nmv.file.readers.load_morphology(job)) + (None,)
+
+        # The prefetching depth
+        self.depth = max(0, int(depth))
+
+        # The queue of the loaded morphologies, the None entry marks the end of the jobs
+        self.queue = None
+
+        # An event to stop the background thread before the end of the jobs
+        self.stop_event = threading.Event()
+
+        # The background thread
+        self.thread = None
+
+    ################################################################################################
+    # @load
+    ################################################################################################
+    def load(self,
+             job):
+        """Loads the morphology of a single job, the errors are reported and never raised.
+
+        :param job:
+            The options of the job.
+        :return:
+            A tuple of the job, the loading flag, the morphology and the loading span.
+        """
+
+        try:
+            loading_flag, morphology, loading_span = self.loader(job)
+        except Exception as error:
+            nmv.logger.log('ERROR: Cannot load the morphology [%s]: %s' % (
+                str(job.morphology.label), str(error)))
+            loading_flag, morphology, loading_span = False, None, None
+
+        return job, loading_flag, morphology, loading_span
+
+    ################################################################################################
+    # @put
+    ################################################################################################
+    def put(self,
+            entry):
+        """Waits for a free slot in the queue and adds an entry to it.
+
+        :param entry:
+            The entry to be added.
+        :return:
+            True if the entry is added, or False if the prefetcher is stopped.
+        """
+
+        while not self.stop_event.is_set():
+            try:
+                self.queue.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    ################################################################################################
+    # @run
+    ################################################################################################
+    def run(self):
+        """Loads the morphologies of all the jobs in order into the queue.
+        """
+
+        for job in self.jobs:
+
+            # Load the morphology, and stop if the prefetcher is closed meanwhile
+            if not self.put(self.load(job)):
+                return
+
+        # Mark the end of the jobs
+        self.put(None)
+
+    ################################################################################################
+    # @__iter__
+    ################################################################################################
+    def __iter__(self):
+        """Iterates over the jobs in order.
+
+        :return:
+            A generator of tuples of the job, the loading flag, the morphology and the loading
+            span.
+        """
+
+        # Load on demand
+        if self.depth == 0:
+            for job in self.jobs:
+                yield self.load(job)
+            return
+
+        # Start the background thread
+        self.queue = queue.Queue(maxsize=self.depth)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+        try:
+            while True:
+                entry = self.queue.get()
+                if entry is None:
+                    break
+                yield entry
+        finally:
+            self.close()
+
+    ################################################################################################
+    # @close
+    ################################################################################################
+    def close(self):
+        """Stops the background thread and drops the morphologies that are not processed.
+        """
+
+        # Stop the thread
+        self.stop_event.set()
+
+        # Drop the loaded morphologies to release them
+        if self.queue is not None:
+            while True:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    break
+
+        # Wait for the thread to finish
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
@@ -18,20 +18,27 @@
 
 # System imports
 import sys, os
+import functools
 
 import neuromorphovis as nmv
+import neuromorphovis.consts
 import neuromorphovis.file
 
 
 ####################################################################################################
 # @read_h5_morphology
 ####################################################################################################
-def read_h5_morphology(h5_file):
+def read_h5_morphology(h5_file,
+                       zero_copy=False,
+                       branching_orders=None):
     """Verifies if the given path is valid or not and then loads a .h5 morphology file.
 
     If the path is not valid, this function returns None.
 
     :param h5_file: Path to the H5 morphology file.
+    :param zero_copy: Keep the points memory-mapped and build the samples on demand.
+    :param branching_orders: The maximum branching orders of the sections that are built directly
+    per arbor type, the samples of the deeper sections are built on demand.
     :return: A morphology object or None if the path is not valid.
     """
 
@@ -39,7 +46,8 @@ def read_h5_morphology(h5_file):
     if os.path.isfile(h5_file):
 
         # Load the .h5 morphology
-        reader = nmv.file.readers.H5Reader(h5_file=h5_file)
+        reader = nmv.file.readers.H5Reader(
+            h5_file=h5_file, zero_copy=zero_copy, branching_orders=branching_orders)
         morphology_object = reader.read_file()
 
         # Return a reference to this morphology object
@@ -55,13 +63,17 @@ def read_h5_morphology(h5_file):
 ####################################################################################################
 # @read_swc_morphology
 ####################################################################################################
-def read_swc_morphology(swc_file):
+def read_swc_morphology(swc_file,
+                        branching_orders=None):
     """Verifies if the given path is valid or not and then loads a .swc morphology file.
 
     If the path is not valid, this function returns None.
 
     :param swc_file:
         Path to the SWC morphology file.
+    :param branching_orders:
+        The maximum branching orders of the sections that are built directly per arbor type, the
+        samples of the deeper sections are built on demand.
     :return:
         Morphology object and True (if the morphology is loaded) or False (if the something is
         wrong).
@@ -71,7 +83,8 @@ def read_swc_morphology(swc_file):
     if os.path.isfile(swc_file):
 
         # Load the .h5 morphology
-        reader = nmv.file.readers.SWCReader(swc_file=swc_file)
+        reader = nmv.file.readers.SWCReader(
+            swc_file=swc_file, branching_orders=branching_orders)
         morphology_object = reader.read_file()
 
         # Return a reference to this morphology object
@@ -84,6 +97,39 @@ def read_swc_morphology(swc_file):
     return None
 
 
+####################################################################################################
+# @get_branching_orders
+####################################################################################################
+def get_branching_orders(options,
+                         axon_type,
+                         basal_dendrites_type,
+                         apical_dendrite_type):
+    """Gets the maximum branching orders of the sections that will be drawn for every arbor type,
+    where the ignored arbors are not drawn at all.
+
+    :param options:
+        A reference to the system options.
+    :param axon_type:
+        The type of the axon in the morphology file.
+    :param basal_dendrites_type:
+        The type of the basal dendrites in the morphology file.
+    :param apical_dendrite_type:
+        The type of the apical dendrite in the morphology file.
+    :return:
+        A dictionary mapping the arbor types to their maximum branching orders.
+    """
+
+    return {
+        axon_type:
+            0 if options.morphology.ignore_axon else options.morphology.axon_branch_order,
+        basal_dendrites_type:
+            0 if options.morphology.ignore_basal_dendrites else
+            options.morphology.basal_dendrites_branch_order,
+        apical_dendrite_type:
+            0 if options.morphology.ignore_apical_dendrite else
+            options.morphology.apical_dendrite_branch_order}
+
+
 ####################################################################################################
 # @read_morphology_from_file
 ####################################################################################################
@@ -105,20 +151,50 @@ def read_morphology_from_file(options):
 
     # If it is a .h5 file, use the h5 loader
     if '.h5' in morphology_extension:
+        reader = 'h5'
+        loader = functools.partial(read_h5_morphology, zero_copy=options.morphology.zero_copy)
 
-        # Load the .h5 file
-        morphology_object = read_h5_morphology(morphology_file_path)
+        # Only build the branches that will be drawn, if requested
+        if options.morphology.lazy_branches:
+            loader = functools.partial(loader, branching_orders=get_branching_orders(
+                options, nmv.consts.Arbors.H5_AXON_SECTION_TYPE,
+                nmv.consts.Arbors.H5_BASAL_DENDRITE_SECTION_TYPE,
+                nmv.consts.Arbors.H5_APICAL_DENDRITE_SECTION_TYPE))
 
     elif '.swc' in morphology_extension:
+        reader = 'swc'
+        loader = read_swc_morphology
 
-        # Load the .swc file
-        morphology_object = read_swc_morphology(morphology_file_path)
+        # Only build the branches that will be drawn, if requested
+        if options.morphology.lazy_branches:
+            loader = functools.partial(read_swc_morphology, branching_orders=get_branching_orders(
+                options, nmv.consts.Arbors.SWC_AXON_SAMPLE_TYPE,
+                nmv.consts.Arbors.SWC_BASAL_DENDRITE_SAMPLE_TYPE,
+                nmv.consts.Arbors.SWC_APICAL_DENDRITE_SAMPLE_TYPE))
 
     else:
 
         # Issue an error
         nmv.logger.log('ERROR: The morphology extension [%s] is NOT SUPPORTED' % morphology_extension)
-        return False
+        return False, None
+
+    # If a cache directory is given, read the morphology through the cache
+    if options.io.morphologies_cache_directory is not None and \
+            os.path.isfile(morphology_file_path):
+
+        # Only the parsed morphologies are cached, they depend only on the reader. The repair
+        # of the skeleton runs after the loading and it is never cached. The deferred sections
+        # are stored entirely and the cached morphologies are always loaded lazily
+        cache = nmv.file.readers.MorphologyCache(
+            cache_directory=options.io.morphologies_cache_directory,
+            maximum_size=options.io.morphologies_cache_size)
+        morphology_object = cache.read_morphology(
+            morphology_file_path, loader, options={'reader': reader})
+
+    else:
+
+        # Load the file
+        morphology_object = loader(morphology_file_path)
 
     # If the morphology object is None, return False
     if morphology_object is None:
@@ -140,14 +216,34 @@ def load_from_circuit(options):
     wrong)
     """
 
-    morphology_object = None
-
-    morphology_object = nmv.file.BBPReader.load_morphology_from_circuit(
+    loading_flag, morphology_object = nmv.file.BBPReader.load_morphology_from_circuit(
         blue_config=options.morphology.blue_config, gid=options.morphology.gid)
 
     # If the morphology object is None, return False
-    if morphology_object is None:
+    if not loading_flag or morphology_object is None:
         return False, None
 
     # The morphology file was loaded successfully
-    return True, morphology_object
\ No newline at end of file
+    return True, morphology_object
+
+
+####################################################################################################
+# @load_morphology
+####################################################################################################
+def load_morphology(options):
+    """Loads a morphology object from a circuit if a GID is given in the options, or otherwise
+    from the morphology file.
+
+    :param options:
+        A reference to the system options.
+    :return:
+        Morphology object and True (if the morphology is loaded) or False (if the something is
+        wrong).
+    """
+
+    # Load from the circuit
+    if options.morphology.gid is not None:
+        return load_from_circuit(options)
+
+    # Load from the file
+    return read_morphology_from_file(options)
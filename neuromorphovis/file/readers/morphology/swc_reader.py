@@ -18,6 +18,7 @@
 
 # System imports
 import copy
+import numpy
 
 # Blender imports
 from mathutils import Vector
@@ -38,16 +39,25 @@ class SWCReader:
     # @__init__
     ################################################################################################
     def __init__(self,
-                 swc_file):
+                 swc_file,
+                 branching_orders=None):
         """Constructor
 
         :param swc_file:
             A given .SWC morphology file.
+        :param branching_orders:
+            A dictionary mapping the sample types of the arbors to the maximum branching orders
+            of the sections that are built when the file is read, where the samples of the deeper
+            sections are only built when they are accessed for the first time. If None, all the
+            sections are built, and if an arbor type is missing, all of its sections are built.
         """
 
         # Set the path to the given h5 file
         self.morphology_file = swc_file
 
+        # The maximum branching orders of the sections that are built directly, per arbor type
+        self.branching_orders = branching_orders if branching_orders is not None else dict()
+
         # A list of all the samples parsed from the morphology file, to be used as a lookup table
         # to construct the morphology skeleton directly
         # http://www.neuronland.org/NLMorphologyConverter/MorphologyFormats/SWC/Spec.html
@@ -61,6 +71,16 @@ class SWCReader:
         #       [6] The index of the parent sample
         self.samples_list = list()
 
+        # The samples of the morphology file stored in typed columns, where every array has the
+        # same number of entries as the samples in the file (without the dummy zeroth sample).
+        # These arrays are filled in a single pass by @read_samples_into_arrays and then used to
+        # build the samples_list without parsing every line by hand
+        self.samples_indices = None
+        self.samples_types = None
+        self.samples_points = None
+        self.samples_radii = None
+        self.samples_parents_indices = None
+
         # A list of the indices of the terminals of the sections
         # This list is only updated once during the morphology loading, and then used to build the
         # sections later in an accelerated way
@@ -116,7 +136,8 @@ class SWCReader:
             # If processing the list is break
             if index > len(self.samples_list) - 2:
 
-                # Append the last path
+                # Append the last sample in the file to the last path, then append the path
+                path.append(self.samples_list[index][0])
                 self.paths.append(path)
 
                 # Then break
@@ -188,86 +209,129 @@ class SWCReader:
                 self.sections_samples_indices_list.append(section_indices)
 
     ################################################################################################
-    # @read_samples
+    # @build_sections_from_parents_indices
     ################################################################################################
-    def read_samples(self):
-        """Reads an SWC files and returns a list of all the samples in the file"""
-
-        # Open the file, read it line by line and store the result in list.
-        morphology_file = open(self.morphology_file, 'r')
-
-        # Add a dummy sample to the list at index 0 to match the indices
-        # The zeroth sample always defines the soma parameters, and it is parsed independently
-        self.samples_list.append([0, 0, 0.0, 0.0, 0.0, 0.0, 0])
-
-        # Translation vector in case the file is not centered at the origin
-        translation = Vector((0.0, 0.0, 0.0))
-
-        # For each line in the morphology file
-        for line in morphology_file:
+    def build_sections_from_parents_indices(self):
+        """Builds the lists of the indices of the samples of every section directly from the parent
+        indices of the samples in linear time.
+
+        This builder produces the same sections of @build_connected_paths_from_samples and
+        @build_sections_from_paths without searching the paths. The number of children of every
+        sample is computed with a single bincount, and then a section starts at every child of a
+        root sample or of a branching sample and continues along the only children until it
+        reaches a terminal or a branching sample. Every section includes its parent sample as the
+        first one, like the sections built from the paths.
+        """
 
-            # Ignore lines with comments that have '#'
-            if '#' in line:
-                continue
+        # The number of samples in the file
+        number_samples = len(self.samples_indices)
 
-            # Ignore empty lines
-            if not line.strip():
-                continue
+        # A lookup table to get the row of a sample in the arrays from its index, -1 if missing
+        samples_rows = numpy.full(int(self.samples_indices.max()) + 1, -1, dtype=numpy.int64)
+        samples_rows[self.samples_indices] = numpy.arange(number_samples)
 
-            # Extract the data from the line
-            data = line.strip('\n').split(' ')
+        # The row of the parent of every sample, or -1 if the sample has no valid parent
+        parents_rows = numpy.full(number_samples, -1, dtype=numpy.int64)
+        valid_parents = (self.samples_parents_indices >= 0) & \
+                        (self.samples_parents_indices < len(samples_rows))
+        parents_rows[valid_parents] = samples_rows[self.samples_parents_indices[valid_parents]]
 
-            # If unwanted characters exit, remove them
-            for i in data:
+        # The rows of the samples that have a parent and the rows of their parents
+        children = numpy.flatnonzero(parents_rows >= 0)
+        parents = parents_rows[children]
 
-                # Unwanted spaces
-                if i == '':
-                    data.remove(i)
+        # The number of children of every sample
+        children_count = numpy.bincount(parents, minlength=number_samples)
 
-                # Unwanted new lines
-                if '\n' in i:
-                    i.replace('\n', '')
+        # A sample continues the section of its parent if the parent has a single child and is
+        # not a root, otherwise it starts a new section
+        continues_parent = (children_count[parents] == 1) & (parents_rows[parents] >= 0)
 
-            # Get the index
-            index = int(data[nmv.consts.Arbors.SWC_SAMPLE_INDEX_IDX])
+        # The row of the only child that continues the section of every sample, or -1
+        next_rows = numpy.full(number_samples, -1, dtype=numpy.int64)
+        next_rows[parents[continues_parent]] = children[continues_parent]
 
-            # Get the branch type
-            sample_type = int(data[nmv.consts.Arbors.SWC_SAMPLE_TYPE_IDX])
+        # Use native lists for walking along the sections
+        next_rows = next_rows.tolist()
+        parents_rows = parents_rows.tolist()
+        samples_indices = self.samples_indices.tolist()
 
-            # Get the X-coordinate
-            x = float(data[nmv.consts.Arbors.SWC_SAMPLE_X_COORDINATES_IDX])
+        # Build the sections in the order of their first samples in the file
+        self.sections_samples_indices_list = list()
+        for first_row in children[~continues_parent].tolist():
 
-            # Get the Y-coordinate
-            y = float(data[nmv.consts.Arbors.SWC_SAMPLE_Y_COORDINATES_IDX])
+            # The section starts with the parent sample, then follows the only children
+            section_indices = [samples_indices[parents_rows[first_row]]]
+            row = first_row
+            while row != -1:
+                section_indices.append(samples_indices[row])
+                row = next_rows[row]
 
-            # Get the Z-coordinate
-            z = float(data[nmv.consts.Arbors.SWC_SAMPLE_Z_COORDINATES_IDX])
+            # Add the section to the list
+            self.sections_samples_indices_list.append(section_indices)
 
-            # Get the sample radius
-            radius = float(data[nmv.consts.Arbors.SWC_SAMPLE_RADIUS_IDX])
+    ################################################################################################
+    # @read_samples_into_arrays
+    ################################################################################################
+    def read_samples_into_arrays(self):
+        """Reads all the samples of the SWC file in a single pass into typed NumPy columns.
 
-            # Get the sample parent index
-            parent_index = int(data[nmv.consts.Arbors.SWC_SAMPLE_PARENT_INDEX_IDX])
+        The comments (anything after a '#') and the empty lines are ignored, and the columns can
+        be separated by any mix of spaces and tabs. The points of all the samples are translated
+        in a single array operation to center the morphology at the origin if the soma is not.
+        """
 
-            # If this is the soma sample, get the translation vector
-            if parent_index == -1:
+        # Parse the whole file at once, only the first seven columns are defined by the format
+        data = numpy.loadtxt(self.morphology_file, comments='#', usecols=range(7), ndmin=2)
+
+        # Split the data into typed columns
+        self.samples_indices = data[:, nmv.consts.Arbors.SWC_SAMPLE_INDEX_IDX].astype(numpy.int64)
+        self.samples_types = data[:, nmv.consts.Arbors.SWC_SAMPLE_TYPE_IDX].astype(numpy.int64)
+        self.samples_points = numpy.ascontiguousarray(
+            data[:, nmv.consts.Arbors.SWC_SAMPLE_X_COORDINATES_IDX:
+                    nmv.consts.Arbors.SWC_SAMPLE_Z_COORDINATES_IDX + 1])
+        self.samples_radii = numpy.ascontiguousarray(
+            data[:, nmv.consts.Arbors.SWC_SAMPLE_RADIUS_IDX])
+        self.samples_parents_indices = \
+            data[:, nmv.consts.Arbors.SWC_SAMPLE_PARENT_INDEX_IDX].astype(numpy.int64)
+
+        # Every sample is translated by the position of the last soma sample (that has no parent)
+        # found before it in the file, exactly like the file is centered line by line
+        root_samples = self.samples_parents_indices == nmv.consts.Arbors.SWC_NO_PARENT_SAMPLE_TYPE
+        if numpy.any(root_samples):
+
+            # The row of the closest root sample preceding every sample, or -1 if none
+            root_rows = numpy.where(root_samples, numpy.arange(len(root_samples)), -1)
+            root_rows = numpy.maximum.accumulate(root_rows)
+
+            # Translate the samples that follow a root sample, the others are kept as they are
+            translated = root_rows >= 0
+            self.samples_points[translated] -= self.samples_points[root_rows[translated]]
 
-                translation[0] = x
-                translation[1] = y
-                translation[2] = z
+    ################################################################################################
+    # @read_samples
+    ################################################################################################
+    def read_samples(self):
+        """Reads an SWC files and returns a list of all the samples in the file"""
 
-            # Update the coordinates if the morphology is transformed
-            x = x - translation[0]
-            y = y - translation[1]
-            z = z - translation[2]
+        # Read all the samples into typed columns
+        self.read_samples_into_arrays()
 
-            # Add the sample to the list
-            self.samples_list.append([index, sample_type, x, y, z, radius, parent_index])
+        # Add a dummy sample to the list at index 0 to match the indices
+        # The zeroth sample always defines the soma parameters, and it is parsed independently
+        self.samples_list = [[0, 0, 0.0, 0.0, 0.0, 0.0, 0]]
 
-        # Construct the connected paths from the samples list
-        self.build_connected_paths_from_samples()
+        # Build the samples list from the columns, using native Python types for the consumers
+        self.samples_list.extend(map(list, zip(self.samples_indices.tolist(),
+                                               self.samples_types.tolist(),
+                                               self.samples_points[:, 0].tolist(),
+                                               self.samples_points[:, 1].tolist(),
+                                               self.samples_points[:, 2].tolist(),
+                                               self.samples_radii.tolist(),
+                                               self.samples_parents_indices.tolist())))
 
-        self.build_sections_from_paths()
+        # Build the sections directly from the parents of the samples
+        self.build_sections_from_parents_indices()
 
     ################################################################################################
     # @get_nmv_sample_from_samples_list
@@ -429,6 +493,71 @@ class SWCReader:
         # Return a reference to the soma object
         return soma_object
 
+    ################################################################################################
+    # @get_sections_parenting
+    ################################################################################################
+    def get_sections_parenting(self,
+                               sections_samples_indices):
+        """Finds the parent and the children of every section from the indices of their samples.
+
+        A section is a child of another one if its first sample is the last sample of the other
+        section, exactly like @update_section_parenting, but the sections are matched through a
+        lookup table of their first and last samples instead of comparing every pair of sections.
+
+        :param sections_samples_indices:
+            A list of the indices of the samples of every section, without the soma sample.
+        :return:
+            The index of the parent of every section, -1 if the section has no parent, and the
+            indices of the children of every section.
+        """
+
+        # The sections that start and end at every sample, in order
+        sections_starting_at = dict()
+        sections_ending_at = dict()
+        for i, samples_indices in enumerate(sections_samples_indices):
+            sections_starting_at.setdefault(samples_indices[0], list()).append(i)
+            sections_ending_at.setdefault(samples_indices[-1], list()).append(i)
+
+        # The parent and the children of every section
+        parents = list()
+        children = list()
+        for i, samples_indices in enumerate(sections_samples_indices):
+
+            # The last other section that ends at the first sample is the parent
+            parent = -1
+            for j in sections_ending_at.get(samples_indices[0], list()):
+                if j != i:
+                    parent = j
+            parents.append(parent)
+
+            # The other sections that start at the last sample are the children
+            children.append([j for j in sections_starting_at.get(samples_indices[-1], list())
+                             if j != i])
+
+        # Return the parenting of the sections
+        return parents, children
+
+    ################################################################################################
+    # @get_samples_view
+    ################################################################################################
+    def get_samples_view(self,
+                         samples_indices):
+        """Gets a view of the samples of a section that builds them on demand.
+
+        :param samples_indices:
+            The indices of the samples of the section.
+        :return:
+            A samples view with a copy of the points and the radii of the section samples.
+        """
+
+        # The rows of the samples in the arrays, the zeroth dummy sample is not in the arrays
+        rows = numpy.array(samples_indices, dtype=numpy.int64) - 1
+
+        # Build the view
+        return nmv.skeleton.SamplesView(
+            points=self.samples_points[rows], radii=self.samples_radii[rows],
+            samples_ids=self.samples_indices[rows])
+
     ################################################################################################
     # @get_sections_of_specific_type
     ################################################################################################
@@ -442,9 +571,7 @@ class SWCReader:
             A list of all the sections that have specific type.
         """
 
-        sections_list = list()
-
-        # A list that only contains the arbors of the requested type
+        # A list that only contains the samples indices of the sections of the requested type
         arbor_sections_samples_indices_list = list()
 
         # For each section
@@ -456,30 +583,60 @@ class SWCReader:
             # If the type is matching
             if str(last_sample[1]) == str(arbor_type):
 
-                # Append to the list
-                arbor_sections_samples_indices_list.append(section_samples_indices)
+                # Append to the list, and ignore the soma sample
+                arbor_sections_samples_indices_list.append(
+                    [index for index in section_samples_indices if self.samples_list[index][0] != 1])
+
+        # Find the parents and the children of the sections
+        parents, children = self.get_sections_parenting(arbor_sections_samples_indices_list)
+
+        # The branching orders are only needed if some of the sections can be deferred
+        maximum_branching_order = self.branching_orders.get(arbor_type, nmv.consts.Math.INFINITY)
+        if maximum_branching_order < nmv.consts.Math.INFINITY:
+            branching_orders = [0] * len(parents)
+            for i in range(len(parents)):
+
+                # Walk up to the root, or to the first section of a known order
+                path = list()
+                section = i
+                while section != -1 and branching_orders[section] == 0 and \
+                        len(path) < len(parents):
+                    path.append(section)
+                    section = parents[section]
+                order = branching_orders[section] if section != -1 else 0
+                for section in reversed(path):
+                    order += 1
+                    branching_orders[section] = order
+        else:
+            branching_orders = None
+
+        sections_list = list()
 
         # For each section
-        for arbor_section in arbor_sections_samples_indices_list:
+        for i, arbor_section in enumerate(arbor_sections_samples_indices_list):
+
+            # The samples of the sections that are deeper than the maximum branching order are only
+            # built on demand
+            if branching_orders is not None and branching_orders[i] > maximum_branching_order:
+                nmv_section = neuromorphovis.skeleton.Section(
+                    samples_view=self.get_samples_view(arbor_section))
 
-            # Construct the samples list
-            samples_list = list()
+            else:
 
-            # For each sample in the section
-            for arbor_sample_index in arbor_section:
+                # Construct the samples list
+                samples_list = list()
 
-                # Ignore the soma sample
-                if self.samples_list[arbor_sample_index][0] == 1:
-                    continue
+                # For each sample in the section
+                for arbor_sample_index in arbor_section:
 
-                # Get the a nmv sample based on its index
-                nmv_sample = self.get_nmv_sample_from_samples_list(arbor_sample_index)
+                    # Get the a nmv sample based on its index
+                    nmv_sample = self.get_nmv_sample_from_samples_list(arbor_sample_index)
 
-                samples_list.append(nmv_sample)
+                    samples_list.append(nmv_sample)
 
-            # Construct an nmv section that ONLY contains the samples list, and UPDATE its other
-            # members later when all the other sections are reconstructed
-            nmv_section = neuromorphovis.skeleton.Section(samples=samples_list)
+                # Construct an nmv section that ONLY contains the samples list, and UPDATE its
+                # other members later when all the other sections are reconstructed
+                nmv_section = neuromorphovis.skeleton.Section(samples=samples_list)
 
             # Append the reconstructed sections to the sections list
             sections_list.append(nmv_section)
@@ -494,8 +651,22 @@ class SWCReader:
             section.type = arbor_type
 
         # Updates the sections parenting
-        for section in sections_list:
-            nmv.skeleton.ops.update_section_parenting(section, sections_list)
+        for i, section in enumerate(sections_list):
+
+            # The section is a root if its first sample is connected to the soma
+            if self.samples_list[arbor_sections_samples_indices_list[i][0]][6] == 1:
+                section.parent = None
+                section.parent_id = None
+
+            # Children
+            for child in children[i]:
+                section.children.append(sections_list[child])
+                section.children_ids.append(child)
+
+            # Parent
+            if parents[i] != -1:
+                section.parent = sections_list[parents[i]]
+                section.parent_id = parents[i]
 
         # Return a list of all the disconnected sections
         return sections_list
@@ -22,6 +22,7 @@ import neuromorphovis.utilities
 ####################################################################################################
 # @export_object_to_ply_file
 ####################################################################################################
+@nmv.utilities.profiled('export')
 def export_object_to_ply_file(mesh_object,
                               output_directory,
                               output_file_name):
@@ -56,6 +57,7 @@ def export_object_to_ply_file(mesh_object,
 ####################################################################################################
 # @export_object_to_obj_file
 ####################################################################################################
+@nmv.utilities.profiled('export')
 def export_object_to_obj_file(mesh_object,
                               output_directory,
                               output_file_name):
@@ -92,6 +94,7 @@ def export_object_to_obj_file(mesh_object,
 ####################################################################################################
 # @export_object_to_stl_file
 ####################################################################################################
+@nmv.utilities.profiled('export')
 def export_object_to_stl_file(mesh_object,
                               output_directory,
                               output_file_name):
@@ -126,6 +129,7 @@ def export_object_to_stl_file(mesh_object,
 ####################################################################################################
 # @export_object_to_blend_file
 ####################################################################################################
+@nmv.utilities.profiled('export')
 def export_object_to_blend_file(mesh_object,
                                 output_directory,
                                 output_file_name):
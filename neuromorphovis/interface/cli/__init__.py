@@ -28,3 +28,7 @@ from .args import *
 from .arguments_parser import *
 from .cli_interface import *
 from .options_parser import *
+from .worker_pool import *
+from .job_server import *
+from .run_manifest import *
+from .inputs_list import *
@@ -64,12 +64,27 @@ class Args:
     # A path to a blue config or circuit file
     BLUE_CONFIG = '--blue-config'
 
+    # A file that lists the inputs of a job array, one job per line
+    INPUTS_LIST = '--inputs-list'
+
+    # The index of the chunk of the inputs list that is processed by this instance
+    CHUNK_INDEX = '--chunk-index'
+
     ################################################################################################
     # Output arguments
     ################################################################################################
     # The root output directory
     OUTPUT_DIRECTORY = '--output-directory'
 
+    # The directory where the parsed morphologies are cached
+    MORPHOLOGIES_CACHE_DIRECTORY = '--morphologies-cache-directory'
+
+    # The maximum size of the morphologies cache
+    MORPHOLOGIES_CACHE_SIZE = '--morphologies-cache-size'
+
+    # Run the stages even if their outputs exist
+    OVERWRITE_OUTPUTS = '--overwrite-outputs'
+
     ################################################################################################
     # Soma reconstruction arguments
     ################################################################################################
@@ -112,9 +127,18 @@ class Args:
     # Basal dednrites branching order
     BASAL_DENDRITES_BRANCHING_ORDER = '--apical-dendrites-branching-order'
 
+    # Build only the branches that are drawn when the morphology is loaded
+    LAZY_BRANCHES = '--lazy-branches'
+
+    # Keep the points of the .H5 morphologies memory-mapped, and build the samples on demand
+    ZERO_COPY = '--zero-copy'
+
     # Sections radii
     SECTIONS_RADII = '--sections-radii'
 
+    # The resampling method of the sections
+    RESAMPLING_METHOD = '--resampling-method'
+
     # Radii scale factor
     RADII_SCALE_FACTOR = '--radii-scale-factor'
 
@@ -292,6 +316,45 @@ class Args:
     # Job granularity
     JOB_GRANULARITY = '--job-granularity'
 
+    # The backend of the cluster jobs, a job array or a job per input
+    SLURM_BACKEND = '--slurm-backend'
+
+    # Number of inputs that are processed by every task of the job array
+    CHUNK_SIZE = '--chunk-size'
+
+    # The maximum number of jobs, or tasks of the job array, that run on the cluster at once
+    MAXIMUM_JOBS = '--maximum-jobs'
+
+    # The file of the cost model that packs the inputs into the cluster jobs
+    COST_MODEL = '--cost-model'
+
+    # Monitor the cluster jobs and resubmit the failed ones
+    MONITOR_JOBS = '--monitor-jobs'
+
+    # The maximum number of times that a failed cluster job is resubmitted
+    MAXIMUM_RETRIES = '--maximum-retries'
+
+    # Number of persistent local Blender workers
+    LOCAL_WORKERS = '--local-workers'
+
+    # Number of morphologies loaded in the background ahead of the processed one
+    PREFETCH_MORPHOLOGIES = '--prefetch-morphologies'
+
+    # The Unix socket of the job server
+    SERVER_SOCKET = '--server-socket'
+
+    # Resume a batch run from its manifest
+    RESUME = '--resume'
+
+    # Profile the stages of every morphology
+    PROFILE_STAGES = '--profile-stages'
+
+    # Profile the code of every morphology, with cProfile or a sampling profiler
+    PROFILER = '--profiler'
+
+    # Number of the hottest functions of the code profile reported to the log
+    PROFILER_TOP = '--profiler-top'
+
     ################################################################################################
     # Analysis arguments
     ################################################################################################
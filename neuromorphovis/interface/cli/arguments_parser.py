@@ -37,12 +37,14 @@ from args import *
 ####################################################################################################
 # @parse_command_line_arguments
 ####################################################################################################
-def parse_command_line_arguments():
+def parse_command_line_arguments(arguments_list=None):
     """Parse the command line arguments.
 
     NOTE: We do not define a destination to facilitate printing to a string and doing another
     iteration of parsing for blender.
 
+    :param arguments_list:
+        A list of the arguments to parse, by default the arguments of the command line.
     :return:
         A structure with all the system options.
     """
@@ -71,8 +73,12 @@ def parse_command_line_arguments():
     input_args = parser.add_argument_group('Input', 'Input')
 
     # Input source (gid, target, morphology file, or a directory containing a group of morphologies)
-    arg_options = ['gid', 'target', 'file', 'directory']
+    arg_options = ['gid', 'target', 'file', 'directory', 'list', 'server', 'worker']
     arg_help = 'Input morphology sources. \n'\
+               'The list option processes a chunk of the inputs of a job array. \n'\
+               'The server option accepts the morphologies as jobs on a local socket. \n'\
+               'The worker option reads the morphologies as jobs from the standard input, it is \n'\
+               'used by the pool of local workers. \n'\
                'Options: %s' % arg_options
     input_args.add_argument(
         Args.INPUT_SOURCE,
@@ -114,6 +120,21 @@ def parse_command_line_arguments():
         action='store', default=None,
         help=arg_help)
 
+    # Inputs list
+    arg_help = 'A file that lists the inputs of a job array, if the input is list.'
+    input_args.add_argument(
+        Args.INPUTS_LIST,
+        action='store', default=None,
+        help=arg_help)
+
+    # Chunk index
+    arg_help = 'The index of the chunk of the inputs list that is processed, if the input \n' \
+               'is list. Default 0.'
+    input_args.add_argument(
+        Args.CHUNK_INDEX,
+        action='store', type=int, default=0,
+        help=arg_help)
+
     ################################################################################################
     # Output arguments
     ################################################################################################
@@ -126,6 +147,31 @@ def parse_command_line_arguments():
         action='store', default=None,
         help=arg_help)
 
+    # Morphologies cache directory
+    arg_help = 'A directory where the parsed morphologies are cached to be loaded faster later, \n' \
+               'the repaired morphologies are not cached. \n' \
+               'Default None, the morphologies are not cached.'
+    output_args.add_argument(
+        Args.MORPHOLOGIES_CACHE_DIRECTORY,
+        action='store', default=None,
+        help=arg_help)
+
+    # Morphologies cache size
+    arg_help = 'The maximum size of the morphologies cache in MB. \n' \
+               'Default 1024.'
+    output_args.add_argument(
+        Args.MORPHOLOGIES_CACHE_SIZE,
+        action='store', type=int, default=1024,
+        help=arg_help)
+
+    # Overwrite the outputs
+    arg_help = 'Run the stages of every morphology even if their outputs exist. \n' \
+               'By default, the stages whose outputs exist are skipped.'
+    output_args.add_argument(
+        Args.OVERWRITE_OUTPUTS,
+        action='store_true', default=False,
+        help=arg_help)
+
     ################################################################################################
     # Soma arguments
     ################################################################################################
@@ -235,6 +281,33 @@ def parse_command_line_arguments():
         action='store', type=int, default=10000000000,
         help=arg_help)
 
+    # Lazy branches
+    arg_help = 'Build only the samples of the branches that will be drawn when the morphology ' \
+               'is loaded, \nthe deeper branches and the ignored arbors are built on demand.'
+    skeletonization_args.add_argument(
+        Args.LAZY_BRANCHES,
+        action='store_true', default=False,
+        help=arg_help)
+
+    # Zero copy
+    arg_help = 'Keep the points of the .H5 morphologies memory-mapped and build the samples of \n' \
+               'every section on demand, to reduce the memory of the batch runs.'
+    skeletonization_args.add_argument(
+        Args.ZERO_COPY,
+        action='store_true', default=False,
+        help=arg_help)
+
+    # Resampling method (fixed, radius or angle)
+    arg_options = ['fixed (default)', 'radius', 'angle']
+    arg_help = 'The method of resampling the sections when the skeleton is repaired.\n' \
+               'fixed: a fixed step, radius: a step proportional to the radii of the samples, \n' \
+               'angle: a step that is refined where the sections bend.\n' \
+               'Options: %s' % arg_options
+    skeletonization_args.add_argument(
+        Args.RESAMPLING_METHOD,
+        action='store', default='fixed',
+        help=arg_help)
+
     # Section radii (default, scaled or fixed)
     arg_options = ['(default)', 'scaled', 'fixed']
     arg_help = 'The radii of the morphological sections.\n' \
@@ -671,8 +744,10 @@ def parse_command_line_arguments():
     execution_args = parser.add_argument_group('Execution', 'Execution')
 
     # Execution node
-    arg_options = ['(local)', 'cluster']
+    arg_options = ['(local)', 'cluster', 'local-cluster']
     arg_help = 'Execution is local or using cluster nodes. \n' \
+               'The local-cluster option runs the cluster jobs on the local node, \n' \
+               'capped by its cores and memory. \n' \
                'Options: %s' % arg_options
     execution_args.add_argument(
         Args.EXECUTION_NODE,
@@ -680,7 +755,8 @@ def parse_command_line_arguments():
         help=arg_help)
 
     # Execution cores
-    arg_help = 'Number of execution cores on cluster. \n' \
+    arg_help = 'Number of execution cores on cluster, or the maximum number of cores used \n' \
+               'on the local node by the local-cluster execution. \n' \
                'Default 256.'
     execution_args.add_argument(
         Args.NUMBER_CORES,
@@ -696,20 +772,142 @@ def parse_command_line_arguments():
         action='store', default='low',
         help=arg_help)
 
+    # SLURM backend
+    arg_options = ['(array)', 'jobs']
+    arg_help = 'The backend of the jobs on the cluster, a single job array whose tasks \n' \
+               'process chunks of the inputs, or a batch job per input. \n' \
+               'Options: %s' % arg_options
+    execution_args.add_argument(
+        Args.SLURM_BACKEND,
+        action='store', default='array',
+        help=arg_help)
+
+    # Chunk size
+    arg_help = 'Number of inputs that are processed in one Blender session by every task \n' \
+               'of the job array on the cluster. \n' \
+               'Default 10.'
+    execution_args.add_argument(
+        Args.CHUNK_SIZE,
+        action='store', type=int, default=10,
+        help=arg_help)
+
+    # Maximum jobs
+    arg_help = 'The maximum number of jobs, or tasks of the job array, that run on the \n' \
+               'cluster at the same time. \n' \
+               'Default 500.'
+    execution_args.add_argument(
+        Args.MAXIMUM_JOBS,
+        action='store', type=int, default=500,
+        help=arg_help)
+
+    # Cost model
+    arg_help = 'A JSON file of the cost model that packs the inputs into the cluster jobs \n' \
+               'and sizes their memory and time. The model is calibrated from the timings \n' \
+               'of the runs that it has scheduled and updated at every run. \n' \
+               'Default None, the model is calibrated from the current run only.'
+    execution_args.add_argument(
+        Args.COST_MODEL,
+        action='store', default=None,
+        help=arg_help)
+
+    # Monitor the jobs
+    arg_help = 'Wait for the jobs on the cluster to finish, verify their outputs, resubmit \n' \
+               'the failed ones with more memory or time, and write a summary report to \n' \
+               'the slurm folder of the output directory.'
+    execution_args.add_argument(
+        Args.MONITOR_JOBS,
+        action='store_true', default=False,
+        help=arg_help)
+
+    # Maximum retries
+    arg_help = 'The maximum number of times that a failed job on the cluster is resubmitted, \n' \
+               'if the jobs are monitored. \n' \
+               'Default 2.'
+    execution_args.add_argument(
+        Args.MAXIMUM_RETRIES,
+        action='store', type=int, default=2,
+        help=arg_help)
+
+    # Local workers
+    arg_help = 'Number of persistent Blender workers that process the morphologies of a \n' \
+               'directory on the local node. \n' \
+               'Default 0, a new Blender instance is launched for every morphology.'
+    execution_args.add_argument(
+        Args.LOCAL_WORKERS,
+        action='store', type=int, default=0,
+        help=arg_help)
+
+    # Prefetching
+    arg_help = 'Number of morphologies that are loaded in the background ahead of the one \n' \
+               'being processed, if a list of morphologies is processed in the same instance. \n' \
+               'Default 1, 0 to load them on demand.'
+    execution_args.add_argument(
+        Args.PREFETCH_MORPHOLOGIES,
+        action='store', type=int, default=1,
+        help=arg_help)
+
+    # Job server socket
+    arg_help = 'The Unix socket where the server accepts the jobs, if the input is server. \n' \
+               'Default <output-directory>/nmv-server.sock.'
+    execution_args.add_argument(
+        Args.SERVER_SOCKET,
+        action='store', default=None,
+        help=arg_help)
+
+    # Resume
+    arg_help = 'Resume a batch run that is interrupted, using the run manifest in the output \n' \
+               'directory. The inputs that are done with the same options, and whose outputs \n' \
+               'exist, are skipped.'
+    execution_args.add_argument(
+        Args.RESUME,
+        action='store_true', default=False,
+        help=arg_help)
+
+    # Stage profiling
+    arg_help = 'Profile the stages of every morphology, with their wall time, CPU time and \n' \
+               'peak memory, and write the profiles to the profiles folder of the output \n' \
+               'directory. Run utilities/profiler.py on the output directory to aggregate them.'
+    execution_args.add_argument(
+        Args.PROFILE_STAGES,
+        action='store_true', default=False,
+        help=arg_help)
+
+    # Code profiler
+    arg_options = ['(none)', 'cprofile', 'sampling']
+    arg_help = 'Profile the code that processes every morphology in Blender, deterministically \n' \
+               'with cProfile, or with a low-overhead sampling profiler. The profile is written \n' \
+               'to the profiles folder of the output directory and the hottest functions are \n' \
+               'reported to the log. \n' \
+               'Options: %s' % arg_options
+    execution_args.add_argument(
+        Args.PROFILER,
+        action='store', default='none',
+        help=arg_help)
+
+    # Code profiler summary
+    arg_help = 'Number of the hottest functions of the code profile reported to the log. \n' \
+               'Default 20.'
+    execution_args.add_argument(
+        Args.PROFILER_TOP,
+        action='store', type=int, default=20,
+        help=arg_help)
+
     ################################################################################################
     # Analysis and meta-data generation
     ################################################################################################
     analysis_args = parser.add_argument_group('Analysis', 'Analysis')
 
     # Morphology analysis
-    arg_help = 'Analyze the morphology skeleton and report the artifacts.'
+    arg_help = 'Analyze all the sections of the morphology skeleton in a single pass, and write \n' \
+               'a table of their metrics to the analysis folder. The tables of a directory run \n' \
+               'are merged into a single table in the output directory.'
     analysis_args.add_argument(
         Args.ANALYZE_MORPHOLOGY,
         action='store_true', default=False,
         help=arg_help)
 
     # Parse the arguments, and return a list of them
-    return parser.parse_args()
+    return parser.parse_args(arguments_list)
 
 
 ####################################################################################################
@@ -802,9 +1000,10 @@ def get_arguments_string_for_individual_file(arguments,
         if '--input=' in argument:
             arguments_string_list[i] = '--input=file '
 
-    # Add the absolute path of the file
-    arguments_string_list.append('--morphology-file=%s/%s' % (
-        arguments.morphology_directory, morphology_file))
+    # Add the path of the file, relative to the morphology directory if any
+    if arguments.morphology_directory not in [None, 'None']:
+        morphology_file = '%s/%s' % (arguments.morphology_directory, morphology_file)
+    arguments_string_list.append('--morphology-file=%s' % morphology_file)
 
     # Compose the arguments string
     arguments_string = ''
@@ -880,6 +1079,80 @@ def create_executable_for_single_morphology_file(arguments,
     return shell_command
 
 
+####################################################################################################
+# @create_executable_for_worker
+####################################################################################################
+def create_executable_for_worker(arguments):
+    """Create an EXECUTABLE command for a persistent worker that processes the morphology jobs
+    that are given to its standard input.
+
+    :param arguments:
+        Command line arguments.
+    :return:
+        An executable shell command to call NeuroMorphoVis as a worker.
+    """
+
+    # Get the arguments string list
+    arguments_string_list = get_arguments_string_as_list(arguments=arguments)
+
+    # Replace the input argument
+    for i, argument in enumerate(arguments_string_list):
+        if '--input=' in argument:
+            arguments_string_list[i] = '--input=worker '
+
+    # Retrieve the path to the CLI interface
+    cli_interface = '%s/cli_interface.py' % os.path.dirname(os.path.realpath(__file__))
+
+    # Setup the shell command
+    shell_command = '%s -b --verbose 0 --python %s -- %s' % (
+        arguments.blender, cli_interface, ''.join(arguments_string_list))
+
+    # Return the shell command
+    return shell_command
+
+
+####################################################################################################
+# @create_executable_for_array_task
+####################################################################################################
+def create_executable_for_array_task(arguments,
+                                     inputs_list_file):
+    """Create an EXECUTABLE command for a task of a SLURM job array, that processes the chunk of
+    the inputs list that is selected by the index of the task in a single Blender session.
+
+    :param arguments:
+        Command line arguments.
+    :param inputs_list_file:
+        The file that lists the inputs of the job array.
+    :return:
+        An executable shell command to call NeuroMorphoVis for a chunk of the inputs list.
+    """
+
+    # Get the arguments string list, without the chunk of the main instance
+    arguments_string_list = list()
+    for argument in get_arguments_string_as_list(arguments=arguments):
+        if argument.startswith((Args.INPUTS_LIST + '=', Args.CHUNK_INDEX + '=')):
+            continue
+
+        # Replace the input argument
+        if '--input=' in argument:
+            argument = '--input=list '
+        arguments_string_list.append(argument)
+
+    # The chunk is selected by the index of the task at runtime
+    arguments_string_list.append('%s=%s ' % (Args.INPUTS_LIST, inputs_list_file))
+    arguments_string_list.append('%s=${SLURM_ARRAY_TASK_ID} ' % Args.CHUNK_INDEX)
+
+    # Retrieve the path to the CLI interface
+    cli_interface = '%s/cli_interface.py' % os.path.dirname(os.path.realpath(__file__))
+
+    # Setup the shell command
+    shell_command = '%s -b --verbose 0 --python %s -- %s' % (
+        arguments.blender, cli_interface, ''.join(arguments_string_list))
+
+    # Return the shell command
+    return shell_command
+
+
 ####################################################################################################
 # @create_executable_for_single_gid
 ####################################################################################################
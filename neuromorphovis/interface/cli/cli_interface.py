@@ -25,7 +25,12 @@ __status__      = "Production"
 
 
 # System imports
+import io
+import os
 import sys
+import copy
+import time
+import contextlib
 
 # Blender imports
 import bpy
@@ -43,6 +48,7 @@ import neuromorphovis.options
 import neuromorphovis.rendering
 import neuromorphovis.scene
 import neuromorphovis.skeleton
+import neuromorphovis.utilities
 
 
 ####################################################################################################
@@ -63,6 +69,29 @@ def reconstruct_soma_skeleton(morphology_object,
     nmv.scene.ops.clear_scene()
 
 
+####################################################################################################
+# @proceed_morphology_analysis
+####################################################################################################
+def proceed_morphology_analysis(cli_morphology,
+                                cli_options):
+    """Analyzes all the sections of the morphology in a single pass, and writes the table of
+    their metrics to the analysis directory.
+
+    :param cli_morphology:
+        The morphology loaded from the command line interface (CLI).
+    :param cli_options:
+        System options parsed from the command line interface (CLI).
+    """
+
+    # The directory is shared by the workers of a batch, so it is never cleaned here
+    os.makedirs(cli_options.io.analysis_directory, exist_ok=True)
+
+    # Analyze the morphology and write the table
+    table_file = nmv.skeleton.ops.write_morphology_analysis_table(
+        cli_morphology, cli_options.io.analysis_directory)
+    nmv.logger.log('Analysis: [%s]' % table_file)
+
+
 ####################################################################################################
 # @proceed_morphology_reconstruction_visualization
 ####################################################################################################
@@ -143,7 +172,7 @@ def proceed_neuron_morphology_reconstruction_visualization(cli_morphology,
                 bounding_box=bounding_box,
                 camera_view=nmv.enums.Camera.View.FRONT,
                 image_scale_factor=cli_options.mesh.resolution_scale_factor,
-                image_name='MESH_FRONT_%s' % cli_morphology.label,
+                image_name='MORPHOLOGY_FRONT_%s' % cli_morphology.label,
                 image_directory=cli_options.io.images_directory)
 
         pass
@@ -331,6 +360,680 @@ def proceed_neuron_mesh_reconstruction_visualization(cli_morphology,
     neuron_mesh_objects = neuron_mesh_builder.reconstruct_mesh()
 
 
+####################################################################################################
+# @get_file_job_options
+####################################################################################################
+def get_file_job_options(cli_options,
+                         morphology_file):
+    """Gets the options of a job that processes a morphology file.
+
+    :param cli_options:
+        System options parsed from the command line interface (CLI).
+    :param morphology_file:
+        The path to the morphology file.
+    :return:
+        A copy of the options updated to the morphology file.
+    """
+
+    job_options = copy.deepcopy(cli_options)
+    job_options.morphology.gid = None
+    job_options.morphology.morphology_file_path = morphology_file
+    job_options.morphology.label = nmv.file.ops.get_file_name_from_path(morphology_file)
+    return job_options
+
+
+####################################################################################################
+# @get_gid_job_options
+####################################################################################################
+def get_gid_job_options(cli_options,
+                        gid,
+                        blue_config):
+    """Gets the options of a job that processes a neuron in a circuit.
+
+    :param cli_options:
+        System options parsed from the command line interface (CLI).
+    :param gid:
+        The GID of the neuron.
+    :param blue_config:
+        BBP circuit configuration file.
+    :return:
+        A copy of the options updated to the GID.
+    """
+
+    job_options = copy.deepcopy(cli_options)
+    job_options.morphology.gid = str(gid)
+    job_options.morphology.blue_config = blue_config
+    job_options.morphology.label = 'neuron_' + str(gid)
+    return job_options
+
+
+####################################################################################################
+# @get_job_options
+####################################################################################################
+def get_job_options(job,
+                    cli_options,
+                    arguments):
+    """Gets the options of a job that is given to a worker or a server as a dictionary.
+
+    :param job:
+        A dictionary of the job, with either a 'morphology_file' or a 'gid' and an optional
+        'blue_config'.
+    :param cli_options:
+        System options parsed from the command line interface (CLI).
+    :param arguments:
+        Command line arguments.
+    :return:
+        A copy of the options updated to the morphology of the job.
+    """
+
+    if job.get('gid') is not None:
+        return get_gid_job_options(
+            cli_options, job['gid'], job.get('blue_config') or arguments.blue_config)
+    return get_file_job_options(cli_options, job['morphology_file'])
+
+
+####################################################################################################
+# @get_morphologies_jobs
+####################################################################################################
+def get_morphologies_jobs(arguments,
+                          cli_options):
+    """Gets the options of every morphology that will be processed by this instance.
+
+    A GID or a morphology file gives a single job, while a target or a directory gives a job per
+    GID or per morphology file, and a list gives a job per input in the chunk of a job array task.
+
+    :param arguments:
+        Command line arguments.
+    :param cli_options:
+        System options parsed from the command line interface (CLI).
+    :return:
+        A list of the options of the jobs.
+    """
+
+    # A single morphology
+    if arguments.input == 'gid' or arguments.input == 'file':
+        return [cli_options]
+
+    # All the GIDs of a target
+    if arguments.input == 'target':
+
+        # Get the GIDs
+        gids = nmv.file.BBPReader.get_gids_from_target(
+            blue_config=arguments.blue_config, target=arguments.target)
+        if gids is None:
+            nmv.logger.log('ERROR: Cannot load the target [%s] from the circuit [%s]' %
+                           (arguments.target, arguments.blue_config))
+            exit(0)
+
+        # A job per GID
+        return [get_gid_job_options(cli_options, gid, arguments.blue_config) for gid in gids]
+
+    # All the morphology files in a directory
+    if arguments.input == 'directory':
+
+        # A job per file
+        return [get_file_job_options(cli_options, '%s/%s' % (
+                    arguments.morphology_directory, morphology_file))
+                for morphology_file in sorted(nmv.file.ops.get_files_in_directory(
+                    arguments.morphology_directory))
+                if morphology_file.lower().endswith(('.h5', '.swc'))]
+
+    # A chunk of the inputs of a job array
+    if arguments.input == 'list':
+
+        # A job per input in the chunk
+        return [get_job_options(job, cli_options, arguments)
+                for job in nmv.interface.cli.read_inputs_list_chunk(
+                    arguments.inputs_list, arguments.chunk_index, arguments.chunk_size)]
+
+    nmv.logger.log('ERROR: Invalid input option')
+    exit(0)
+
+
+# The stages of the pipeline in the order of their execution
+PIPELINE_STAGES = ['analysis', 'skeleton', 'soma', 'neuron-mesh']
+
+
+####################################################################################################
+# @get_pipeline_stages
+####################################################################################################
+def get_pipeline_stages(arguments):
+    """Gets the stages of the pipeline that are requested by the command line arguments.
+
+    :param arguments:
+        Command line arguments.
+    :return:
+        A list of the requested stages in the order of their execution.
+    """
+
+    requested_stages = {
+        'analysis': arguments.analyze_morphology,
+        'skeleton': arguments.reconstruct_morphology_skeleton or
+                    arguments.render_neuron_morphology or
+                    arguments.render_neuron_morphology_360 or
+                    arguments.render_neuron_morphology_progressive or
+                    arguments.export_morphology_blend,
+        'soma': arguments.reconstruct_soma_mesh or
+                arguments.render_soma_mesh or
+                arguments.render_soma_mesh_360 or
+                arguments.render_soma_mesh_progressive,
+        'neuron-mesh': arguments.reconstruct_neuron_mesh or
+                       arguments.render_neuron_mesh or
+                       arguments.render_neuron_mesh_360}
+
+    return [stage for stage in PIPELINE_STAGES if requested_stages[stage]]
+
+
+####################################################################################################
+# @get_exported_files
+####################################################################################################
+def get_exported_files(directory,
+                       file_name,
+                       ply=False,
+                       obj=False,
+                       stl=False,
+                       blend=False):
+    """Gets the paths of the files that are written by @export_mesh_object.
+
+    :param directory:
+        The output directory.
+    :param file_name:
+        The name of the files without extension.
+    :param ply:
+        Exported to .ply format.
+    :param obj:
+        Exported to .obj format.
+    :param stl:
+        Exported to .stl format.
+    :param blend:
+        Exported to .blend format.
+    :return:
+        A list of the paths of the files.
+    """
+
+    return ['%s/%s.%s' % (directory, file_name, extension)
+            for extension, exported in [('ply', ply), ('obj', obj), ('stl', stl),
+                                        ('blend', blend)] if exported]
+
+
+####################################################################################################
+# @get_stage_outputs
+####################################################################################################
+def get_stage_outputs(stage,
+                      cli_options):
+    """Gets the paths of the files that a stage of the pipeline writes.
+
+    The sequences are not listed, so a stage that only renders sequences has no known outputs.
+
+    :param stage:
+        The name of the stage.
+    :param cli_options:
+        System options parsed from the command line interface (CLI).
+    :return:
+        A list of the paths of the output files.
+    """
+
+    label = cli_options.morphology.label
+    outputs = list()
+
+    # Analysis
+    if stage == 'analysis':
+        outputs.append('%s/%s.csv' % (cli_options.io.analysis_directory, label))
+
+    # Skeleton
+    elif stage == 'skeleton':
+        if cli_options.morphology.render:
+            outputs.append('%s/MORPHOLOGY_FRONT_%s.png' % (cli_options.io.images_directory, label))
+        outputs.extend(get_exported_files(
+            cli_options.io.morphologies_directory, label,
+            blend=cli_options.morphology.export_blend))
+
+    # Soma
+    elif stage == 'soma':
+        if cli_options.soma.render_soma_mesh:
+            outputs.append('%s/SOMA_MESH_%s_%s.png' % (
+                cli_options.io.images_directory, nmv.enums.Camera.View.FRONT, label))
+        if cli_options.soma.reconstruct_soma_mesh:
+            outputs.extend(get_exported_files(
+                cli_options.io.meshes_directory, 'SOMA_MESH_%s' % label,
+                ply=cli_options.soma.export_ply, obj=cli_options.soma.export_obj,
+                stl=cli_options.soma.export_stl, blend=cli_options.soma.export_blend))
+
+    # Neuron mesh
+    elif stage == 'neuron-mesh':
+        if cli_options.mesh.render:
+            outputs.append('%s/MESH_FRONT_%s.png' % (cli_options.io.images_directory, label))
+        outputs.extend(get_exported_files(
+            cli_options.io.meshes_directory, label,
+            ply=cli_options.mesh.export_ply, obj=cli_options.mesh.export_obj,
+            stl=cli_options.mesh.export_stl, blend=cli_options.mesh.export_blend))
+
+    return outputs
+
+
+####################################################################################################
+# @is_stage_done
+####################################################################################################
+def is_stage_done(stage,
+                  cli_options):
+    """Checks if all the outputs of a stage of the pipeline exist from a previous run.
+
+    :param stage:
+        The name of the stage.
+    :param cli_options:
+        System options parsed from the command line interface (CLI).
+    :return:
+        True if the stage has known outputs and all of them exist, otherwise False.
+    """
+
+    outputs = get_stage_outputs(stage, cli_options)
+    return len(outputs) > 0 and all(nmv.file.ops.path_exists(output) for output in outputs)
+
+
+####################################################################################################
+# @get_repaired_morphology
+####################################################################################################
+def get_repaired_morphology(cli_morphology):
+    """Gets a copy of the morphology with the repairs that every mesh builder applies first.
+
+    The samples inside the soma are removed and the connectivity of the arbors to the soma is
+    verified once, then the soma and neuron mesh stages share the repaired copy. The builders
+    apply the same operations again, but they have nothing left to do.
+
+    :param cli_morphology:
+        The loaded morphology.
+    :return:
+        A repaired copy of the morphology.
+    """
+
+    repaired_morphology = copy.deepcopy(cli_morphology)
+    nmv.skeleton.ops.clean_morphology_samples(
+        repaired_morphology, remove_duplicate_samples=False)
+    nmv.skeleton.ops.update_arbors_connection_to_soma(repaired_morphology)
+    return repaired_morphology
+
+
+####################################################################################################
+# @process_morphology
+####################################################################################################
+def process_morphology(cli_morphology,
+                       cli_options,
+                       arguments,
+                       report_stage=None):
+    """Runs the requested stages of the pipeline on a loaded morphology.
+
+    The stages run in order against the same loaded morphology. The analysis and the skeleton
+    stages use the morphology as it is. The soma and neuron mesh stages share a repaired copy of
+    it, and the neuron mesh stage reuses the soma that the soma stage reconstructs. If all the
+    outputs of a stage exist, the stage is skipped, unless the outputs are overwritten.
+
+    :param cli_morphology:
+        The morphology loaded from the command line interface (CLI).
+    :param cli_options:
+        System options parsed from the command line interface (CLI).
+    :param arguments:
+        Command line arguments.
+    :param report_stage:
+        An optional function that is called with the name of every stage before running it.
+    :return:
+        A list of the stages that are run.
+    """
+
+    # The stages to run
+    stages = list()
+    for stage in get_pipeline_stages(arguments):
+        if not arguments.overwrite_outputs and is_stage_done(stage, cli_options):
+            nmv.logger.log('Skipping the [%s] stage of [%s], its outputs exist' % (
+                stage, cli_options.morphology.label))
+            continue
+        stages.append(stage)
+
+    # The repaired morphology is created before the skeleton stage changes the loaded one
+    repaired_morphology = None
+    if 'soma' in stages or 'neuron-mesh' in stages:
+        with nmv.utilities.profile_span('repair'):
+            repaired_morphology = get_repaired_morphology(cli_morphology)
+
+    for stage in stages:
+
+        if report_stage is not None:
+            report_stage(stage)
+
+        with nmv.utilities.profile_span(stage):
+
+            ########################################################################################
+            # Morphology analysis
+            ########################################################################################
+            if stage == 'analysis':
+                proceed_morphology_analysis(
+                    cli_morphology=cli_morphology, cli_options=cli_options)
+
+            ########################################################################################
+            # Morphology skeleton reconstruction
+            ########################################################################################
+            elif stage == 'skeleton':
+                proceed_neuron_morphology_reconstruction_visualization(
+                    cli_morphology=cli_morphology, cli_options=cli_options)
+
+            ########################################################################################
+            # Soma mesh reconstruction
+            ########################################################################################
+            elif stage == 'soma':
+                proceed_soma_mesh_reconstruction_visualization(
+                    cli_morphology=repaired_morphology, cli_options=cli_options)
+
+            ########################################################################################
+            # Whole neuron mesh reconstruction
+            ########################################################################################
+            elif stage == 'neuron-mesh':
+                proceed_neuron_mesh_reconstruction_visualization(
+                    cli_morphology=repaired_morphology, cli_options=cli_options)
+
+    return stages
+
+
+####################################################################################################
+# @get_job_key
+####################################################################################################
+def get_job_key(job_options):
+    """Gets the key of the input of a job in the run manifest.
+
+    :param job_options:
+        The options of the job.
+    :return:
+        The key of the input.
+    """
+
+    return nmv.interface.cli.get_input_key(
+        morphology_file=job_options.morphology.morphology_file_path,
+        gid=job_options.morphology.gid)
+
+
+####################################################################################################
+# @get_profile_tags
+####################################################################################################
+def get_profile_tags(job_options,
+                     arguments):
+    """Gets the tags of the stage profile of a job, which group the profiles of a batch.
+
+    :param job_options:
+        The options of the job.
+    :param arguments:
+        Command line arguments.
+    :return:
+        A dictionary of the tags.
+    """
+
+    stages = get_pipeline_stages(arguments)
+
+    # The profiles of the neuron meshes are grouped by their builder
+    builder = '+'.join(stages) if len(stages) > 0 else 'none'
+    if 'neuron-mesh' in stages:
+        builder = str(job_options.mesh.meshing_technique)
+
+    return {'builder': builder, 'stages': stages}
+
+
+####################################################################################################
+# @load_morphology_with_profile
+####################################################################################################
+def load_morphology_with_profile(job_options):
+    """Loads the morphology of a job and measures the loading as the read span of its profile.
+
+    The loading may run on the prefetching thread, so the span is measured on its own and added
+    to the profile of the job when the job is processed, see @run_morphology_job.
+
+    :param job_options:
+        The options of the job.
+    :return:
+        The loading flag, the morphology and the span of the loading.
+    """
+
+    with nmv.utilities.ProfileSpan('read') as loading_span:
+        loading_flag, cli_morphology = nmv.file.load_morphology(job_options)
+    return loading_flag, cli_morphology, loading_span
+
+
+####################################################################################################
+# @run_morphology_job
+####################################################################################################
+def run_morphology_job(job_options,
+                       loading_flag,
+                       cli_morphology,
+                       arguments,
+                       run_manifest,
+                       loading_span=None):
+    """Processes the loaded morphology of a job and records the job in the run manifest.
+
+    If the stages or the code are profiled, the profiles of the job are written to the profiles
+    folder of the output directory. The code profile covers the processing of the morphology, its
+    loading is measured by the read span of the stage profile.
+
+    :param job_options:
+        The options of the job.
+    :param loading_flag:
+        The flag of loading the morphology.
+    :param cli_morphology:
+        The loaded morphology.
+    :param arguments:
+        Command line arguments.
+    :param run_manifest:
+        The manifest of the run, see @RunManifest.
+    :param loading_span:
+        The span of the loading of the morphology, see @load_morphology_with_profile, or None if
+        the loading is not measured.
+    :return:
+        A dictionary of the status of the job.
+    """
+
+    started = time.time()
+    status = {'status': 'done', 'error': None}
+
+    # The size of the morphology, counted before the stages modify it
+    size = None
+    if loading_flag:
+        size = nmv.skeleton.ops.get_morphology_number_samples(cli_morphology)
+
+    # Measure the peak memory of this job only, the session may have run larger ones before. If the
+    # peak cannot be reset, it is only known if this job raises it
+    peak_reset = nmv.utilities.reset_peak_rss()
+    previous_peak_memory = nmv.utilities.get_peak_rss()
+
+    # Profile the job, starting with the loading of its morphology
+    if arguments.profile_stages:
+        profiler = nmv.utilities.start_profiling(
+            label=job_options.morphology.label, tags=get_profile_tags(job_options, arguments))
+        profiler.add_span(loading_span)
+
+    # Profile the code of the job
+    code_profiler = None
+    if arguments.profiler in nmv.utilities.CODE_PROFILERS:
+        code_profiler = nmv.utilities.CodeProfiler(arguments.profiler)
+        code_profiler.start()
+
+    # Process the morphology, any error fails the job only
+    try:
+        if loading_flag:
+            process_morphology(
+                cli_morphology=cli_morphology, cli_options=job_options, arguments=arguments)
+        else:
+            status = {'status': 'failed', 'error': 'Cannot load the morphology'}
+    except Exception as error:
+        status = {'status': 'failed', 'error': '%s: %s' % (type(error).__name__, str(error))}
+        nmv.logger.log('ERROR: Processing [%s] failed, %s' % (
+            str(job_options.morphology.label), status['error']))
+
+    # Write the code profile of the job and report its hottest functions
+    if code_profiler is not None:
+        code_profiler.stop()
+        nmv.logger.log('Code profile: [%s]' % code_profiler.write(
+            '%s/%s' % (arguments.output_directory, nmv.utilities.PROFILES_FOLDER),
+            job_options.morphology.label))
+        nmv.logger.log(code_profiler.get_summary(arguments.profiler_top))
+
+    # Write the profile of the job
+    if arguments.profile_stages:
+        profiler = nmv.utilities.stop_profiling()
+        profiler.tags['status'] = status['status']
+        nmv.logger.log('Profile: [%s]' % profiler.write(arguments.output_directory))
+
+    # Record the job with the outputs of its stages
+    outputs = list()
+    for stage in get_pipeline_stages(arguments):
+        outputs.extend(get_stage_outputs(stage, job_options))
+    peak_memory = nmv.utilities.get_peak_rss()
+    if not peak_reset and peak_memory is not None and previous_peak_memory is not None and \
+            peak_memory <= previous_peak_memory:
+        peak_memory = None
+    run_manifest.record(
+        key=get_job_key(job_options), status=status['status'],
+        options_hash=nmv.interface.cli.get_options_hash(arguments), outputs=outputs,
+        started=started, elapsed=time.time() - started, error=status['error'],
+        peak_memory=peak_memory, size=size)
+
+    return status
+
+
+####################################################################################################
+# @run_as_worker
+####################################################################################################
+def run_as_worker(arguments,
+                  cli_options):
+    """Runs this instance as a worker of a local pool, see @WorkerPool.
+
+    The worker reads a job per line from its standard input, where every job gives a morphology
+    file or a GID, processes it with the options of the command line, resets the scene, and
+    reports the status of the job to its standard output. The worker exits when its standard
+    input is closed or when it is asked to exit.
+
+    :param arguments:
+        Command line arguments.
+    :param cli_options:
+        System options parsed from the command line interface (CLI).
+    """
+
+    # The manifest of the run
+    run_manifest = nmv.interface.cli.RunManifest(arguments.output_directory)
+
+    while True:
+
+        # Get the next job
+        job = nmv.interface.cli.read_job(sys.stdin)
+        if job is None:
+            break
+
+        # The options of the job
+        job_options = get_job_options(job, cli_options, arguments)
+
+        # Load and process the morphology
+        try:
+            loading_flag, cli_morphology, loading_span = load_morphology_with_profile(job_options)
+        except Exception as error:
+            nmv.logger.log('ERROR: %s' % str(error))
+            loading_flag, cli_morphology, loading_span = False, None, None
+        status = run_morphology_job(
+            job_options, loading_flag, cli_morphology, arguments, run_manifest, loading_span)
+
+        # Reset the scene for the next job
+        nmv.scene.ops.clear_scene()
+
+        # Report the status
+        nmv.interface.cli.write_job_status(sys.stdout, status)
+
+
+####################################################################################################
+# @process_server_job
+####################################################################################################
+def process_server_job(job,
+                       report):
+    """Processes a single job of the server, see @run_as_server.
+
+    The arguments of the job are appended to the arguments of the server, so the job only gives
+    what is different from them. The outputs of the job are the files that are created or updated
+    in its output directory.
+
+    :param job:
+        A dictionary of the job.
+    :param report:
+        A function that reports an event of the job.
+    :return:
+        A dictionary of the final status of the job.
+    """
+
+    # Parse the arguments of the job on top of those of the server
+    job_arguments_list = list(sys.argv[1:]) + list(job.get('arguments') or [])
+    if job.get('output_directory'):
+        job_arguments_list.append('%s=%s' % (nmv.interface.cli.Args.OUTPUT_DIRECTORY,
+                                             job['output_directory']))
+
+    # A bad option makes the parser exit, which must fail the job rather than the server
+    parser_errors = io.StringIO()
+    try:
+        with contextlib.redirect_stderr(parser_errors):
+            job_arguments = nmv.interface.cli.parse_command_line_arguments(job_arguments_list)
+    except SystemExit:
+        return {'status': 'failed',
+                'error': 'Invalid arguments: %s' % (parser_errors.getvalue().strip() or
+                                                    ' '.join(job.get('arguments') or []))}
+
+    # Create the output directory of the job
+    if not nmv.file.ops.path_exists(job_arguments.output_directory):
+        os.makedirs(job_arguments.output_directory)
+
+    # The options of the job
+    job_cli_options = nmv.options.NeuroMorphoVisOptions()
+    job_cli_options.consume_arguments(arguments=job_arguments)
+    job_options = get_job_options(job, job_cli_options, job_arguments)
+
+    # Stream the messages of the logger back to the client while the job is processed
+    output_snapshot = nmv.interface.cli.get_directory_snapshot(job_arguments.output_directory)
+    log_stream = nmv.interface.cli.EventLogStream(report)
+    try:
+        with contextlib.redirect_stdout(log_stream):
+
+            # Load the morphology
+            loading_flag, cli_morphology = nmv.file.load_morphology(job_options)
+            if not loading_flag:
+                return {'status': 'failed', 'error': 'Cannot load the morphology'}
+            report('loaded', label=job_options.morphology.label)
+
+            # Process it
+            process_morphology(cli_morphology=cli_morphology, cli_options=job_options,
+                               arguments=job_arguments,
+                               report_stage=lambda stage: report('stage', stage=stage))
+    finally:
+        log_stream.flush()
+
+        # Reset the scene for the next job
+        nmv.scene.ops.clear_scene()
+
+    # Report the outputs
+    return {'status': 'done', 'outputs': nmv.interface.cli.get_new_files(
+        output_snapshot,
+        nmv.interface.cli.get_directory_snapshot(job_arguments.output_directory))}
+
+
+####################################################################################################
+# @run_as_server
+####################################################################################################
+def run_as_server(arguments):
+    """Runs this instance as a server that accepts the jobs on a local Unix socket, see @JobServer.
+
+    The Blender session stays alive between the jobs, so a job costs only its processing time.
+
+    :param arguments:
+        Command line arguments.
+    """
+
+    # The socket of the server
+    socket_path = arguments.server_socket
+    if socket_path in [None, 'None']:
+        socket_path = '%s/nmv-server.sock' % arguments.output_directory
+
+    # Serve until a client asks the server to shutdown
+    server = nmv.interface.cli.JobServer(socket_path=socket_path, job_handler=process_server_job)
+    nmv.logger.log('Server: [%s]' % socket_path)
+    server.run()
 
 
 ####################################################################################################
@@ -358,67 +1061,42 @@ if __name__ == "__main__":
     # Convert the CLI arguments to system options
     cli_options.consume_arguments(arguments=arguments)
 
-    # Read the morphology
-    cli_morphology = None
-
-    # If the input is a GID, then open the circuit and read it
-    if arguments.input == 'gid':
+    # Run as a worker of a local pool
+    if arguments.input == 'worker':
+        run_as_worker(arguments=arguments, cli_options=cli_options)
+        exit(0)
 
-        # Load the morphology from the file
-        loading_flag, cli_morphology = nmv.file.BBPReader.load_morphology_from_circuit(
-            blue_config=cli_options.morphology.blue_config,
-            gid=cli_options.morphology.gid)
+    # Run as a server of jobs on a local socket
+    if arguments.input == 'server':
+        run_as_server(arguments=arguments)
+        exit(0)
 
-        if not loading_flag:
-            nmv.logger.log('ERROR: Cannot load the GID [%s] from the circuit [%s]' %
-                           cli_options.morphology.blue_config, str(cli_options.morphology.gid))
-            exit(0)
+    # Get the jobs, one per morphology
+    cli_jobs = get_morphologies_jobs(arguments=arguments, cli_options=cli_options)
 
-    # If the input is a morphology file, then use the parser to load it directly
-    elif arguments.input == 'file':
+    # The manifest of the run, skip the complete jobs if the run is resumed
+    run_manifest = nmv.interface.cli.RunManifest(arguments.output_directory)
+    if arguments.resume:
+        cli_jobs = run_manifest.get_pending_inputs(
+            cli_jobs, [get_job_key(job_options) for job_options in cli_jobs],
+            nmv.interface.cli.get_options_hash(arguments))
 
-        # Read the morphology file
-        loading_flag, cli_morphology = nmv.file.read_morphology_from_file(options=cli_options)
+    # Load every morphology ahead of its processing, and process it
+    for job_options, loading_flag, cli_morphology, loading_span in nmv.file.MorphologyPrefetcher(
+            jobs=cli_jobs, loader=load_morphology_with_profile,
+            depth=arguments.prefetch_morphologies):
 
+        # Skip the morphologies that cannot be loaded
         if not loading_flag:
-            nmv.logger.log('ERROR: Cannot load the morphology file [%s]' %
-                           str(cli_options.morphology.morphology_file_path))
-            exit(0)
-
-    else:
-        nmv.logger.log('ERROR: Invalid input option')
-        exit(0)
+            if job_options.morphology.gid is not None:
+                nmv.logger.log('ERROR: Cannot load the GID [%s] from the circuit [%s]' % (
+                    str(job_options.morphology.gid), job_options.morphology.blue_config))
+            else:
+                nmv.logger.log('ERROR: Cannot load the morphology file [%s]' %
+                               str(job_options.morphology.morphology_file_path))
 
-    ###############################################################################################
-    # Whole neuron mesh reconstruction
-    ################################################################################################
-    if arguments.render_neuron_mesh or arguments.render_neuron_mesh_360 or arguments.reconstruct_neuron_mesh:
+        # Process the morphology and record it
+        run_morphology_job(job_options, loading_flag, cli_morphology, arguments, run_manifest,
+                           loading_span)
 
-        # Neuron mesh reconstruction and visualization
-        proceed_neuron_mesh_reconstruction_visualization(
-            cli_morphology=cli_morphology, cli_options=cli_options)
     exit(0)
-
-    # Reconstruct the morphology skeleton
-    proceed_neuron_morphology_reconstruction_visualization(cli_morphology=cli_morphology,
-        cli_options=cli_options)
-
-    ################################################################################################
-    # Soma mesh reconstruction
-    ################################################################################################
-    if arguments.render_soma_mesh or                \
-       arguments.render_soma_mesh_360 or            \
-       arguments.render_soma_mesh_progressive or    \
-       arguments.reconstruct_soma_mesh:
-
-        # Soma mesh reconstruction and visualization
-        proceed_soma_mesh_reconstruction_visualization(cli_morphology=cli_morphology,
-                                                       cli_options=cli_options)
-
-    #
-
-    ################################################################################################
-    # Morphology skeleton reconstruction
-    ################################################################################################
-
-
@@ -0,0 +1,102 @@
+####################################################################################################
+# Copyright (c) 2016 - 2018, EPFL / Blue Brain Project
+#               Marwan Abdellah <marwan.abdellah@epfl.ch>
+#
+# This file is part of NeuroMorphoVis <https://github.com/BlueBrain/NeuroMorphoVis>
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU General Public License as published by the Free Software Foundation, version 3 of the License.
+#
+# This Blender-based tool is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program.
+# If not, see <http://www.gnu.org/licenses/>.
+####################################################################################################
+
+__author__      = "Marwan Abdellah"
+__copyright__   = "Copyright (c) 2016 - 2018, Blue Brain Project / EPFL"
+__credits__     = ["Ahmet Bilgili", "Juan Hernando", "Stefan Eilemann"]
+__version__     = "1.0.0"
+__maintainer__  = "Marwan Abdellah"
+__email__       = "marwan.abdellah@epfl.ch"
+__status__      = "Production"
+
+
+# System imports
+import json
+
+
+####################################################################################################
+# @write_inputs_list
+####################################################################################################
+def write_inputs_list(inputs_list_file,
+                      jobs):
+    """Writes the inputs of a job array to a file, a job per line as JSON.
+
+    Every job is a dictionary with either a 'morphology_file' or a 'gid' and an optional
+    'blue_config', the same as the jobs of the local workers.
+
+    :param inputs_list_file:
+        The path to the inputs list file.
+    :param jobs:
+        A list of dictionaries of the jobs.
+    """
+
+    with open(inputs_list_file, 'w') as list_file:
+        for job in jobs:
+            list_file.write('%s\n' % json.dumps(job))
+
+
+####################################################################################################
+# @get_number_chunks
+####################################################################################################
+def get_number_chunks(number_inputs,
+                      chunk_size):
+    """Gets the number of chunks, or tasks of a job array, that process a number of inputs.
+
+    :param number_inputs:
+        The number of inputs.
+    :param chunk_size:
+        The number of inputs per chunk.
+    :return:
+        The number of chunks.
+    """
+
+    chunk_size = max(1, int(chunk_size))
+    return (int(number_inputs) + chunk_size - 1) // chunk_size
+
+
+####################################################################################################
+# @read_inputs_list_chunk
+####################################################################################################
+def read_inputs_list_chunk(inputs_list_file,
+                           chunk_index,
+                           chunk_size):
+    """Reads the jobs of a single chunk of an inputs list file.
+
+    If the jobs are packed into chunks, every job gives the index of its chunk in a 'chunk' field,
+    otherwise the list is split into chunks of the given size in order.
+
+    :param inputs_list_file:
+        The path to the inputs list file.
+    :param chunk_index:
+        The index of the chunk, the index of the task of the job array.
+    :param chunk_size:
+        The number of inputs per chunk, if the jobs are not packed.
+    :return:
+        A list of dictionaries of the jobs of the chunk, empty if the chunk is out of the list.
+    """
+
+    with open(inputs_list_file, 'r') as list_file:
+        jobs = [json.loads(line) for line in list_file if line.strip()]
+
+    # Packed jobs
+    if any('chunk' in job for job in jobs):
+        return [job for job in jobs if job.get('chunk') == int(chunk_index)]
+
+    # Fixed size chunks
+    chunk_size = max(1, int(chunk_size))
+    first = int(chunk_index) * chunk_size
+    return jobs[first:first + chunk_size]
@@ -0,0 +1,341 @@
+####################################################################################################
+# Copyright (c) 2016 - 2018, EPFL / Blue Brain Project
+#               Marwan Abdellah <marwan.abdellah@epfl.ch>
+#
+# This file is part of NeuroMorphoVis <https://github.com/BlueBrain/NeuroMorphoVis>
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU General Public License as published by the Free Software Foundation, version 3 of the License.
+#
+# This Blender-based tool is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program.
+# If not, see <http://www.gnu.org/licenses/>.
+####################################################################################################
+
+__author__      = "Marwan Abdellah"
+__copyright__   = "Copyright (c) 2016 - 2018, Blue Brain Project / EPFL"
+__credits__     = ["Ahmet Bilgili", "Juan Hernando", "Stefan Eilemann"]
+__version__     = "1.0.0"
+__maintainer__  = "Marwan Abdellah"
+__email__       = "marwan.abdellah@epfl.ch"
+__status__      = "Production"
+
+
+
+# System imports
+import os, sys, json, time, codecs, socket, argparse, socketserver
+
+
+# The command that asks the server to exit
+SHUTDOWN_COMMAND = 'shutdown'
+
+# The events that end a job
+FINAL_EVENTS = ['done', 'failed']
+
+
+####################################################################################################
+# @write_event
+####################################################################################################
+def write_event(stream,
+                event,
+                **data):
+    """Writes an event of a job to a stream as a single JSON line.
+
+    :param stream:
+        The output stream.
+    :param event:
+        The name of the event.
+    :param data:
+        The data of the event.
+    """
+
+    data['event'] = event
+    stream.write('%s\n' % json.dumps(data))
+    stream.flush()
+
+
+####################################################################################################
+# @EventLogStream
+####################################################################################################
+class EventLogStream:
+    """A text stream that reports every line written to it as a 'log' event.
+
+    The standard output is redirected to this stream while a job is processed, so the messages of
+    the logger are streamed back to the client as the progress of the job.
+    """
+
+    ################################################################################################
+    # @__init__
+    ################################################################################################
+    def __init__(self,
+                 report):
+        """Constructor
+
+        :param report:
+            A function that reports an event, called as report('log', message=line).
+        """
+
+        # The function that reports the events
+        self.report = report
+
+        # The incomplete line
+        self.buffer = ''
+
+    ################################################################################################
+    # @write
+    ################################################################################################
+    def write(self,
+              text):
+        """Writes a text to the stream.
+
+        :param text:
+            The text to write.
+        :return:
+            The length of the text.
+        """
+
+        self.buffer += text
+        while '\n' in self.buffer:
+            line, self.buffer = self.buffer.split('\n', 1)
+            if line.strip():
+                self.report('log', message=line)
+        return len(text)
+
+    ################################################################################################
+    # @flush
+    ################################################################################################
+    def flush(self):
+        """Sends the incomplete line, if any.
+        """
+
+        if self.buffer.strip():
+            self.report('log', message=self.buffer)
+        self.buffer = ''
+
+
+####################################################################################################
+# @get_directory_snapshot
+####################################################################################################
+def get_directory_snapshot(directory):
+    """Gets the modification times of all the files in a directory tree, to find the outputs of a
+    job by comparing the snapshots before and after the job.
+
+    :param directory:
+        The directory.
+    :return:
+        A dictionary of the modification times of the files keyed by their paths.
+    """
+
+    snapshot = dict()
+    for root, _, files in os.walk(directory):
+        for file_name in files:
+            path = os.path.join(root, file_name)
+            try:
+                snapshot[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+    return snapshot
+
+
+####################################################################################################
+# @get_new_files
+####################################################################################################
+def get_new_files(before,
+                  after):
+    """Gets the files that are created or modified between two snapshots of a directory.
+
+    :param before:
+        The snapshot before the job.
+    :param after:
+        The snapshot after the job.
+    :return:
+        A sorted list of the paths of the new files.
+    """
+
+    return sorted(path for path, mtime in after.items() if before.get(path) != mtime)
+
+
+####################################################################################################
+# @JobServer
+####################################################################################################
+class JobServer(socketserver.UnixStreamServer):
+    """A server that accepts JSON jobs on a local Unix socket and processes them one at a time.
+
+    A client connects to the socket and writes a job per line as JSON. For every job, the server
+    writes back a stream of JSON events, one per line, that ends with a 'done' or a 'failed' event.
+    The jobs are processed sequentially in the thread of the server, since the Blender API is not
+    thread-safe. A {"command": "shutdown"} line stops the server after the current connection.
+    """
+
+    ################################################################################################
+    # @__init__
+    ################################################################################################
+    def __init__(self,
+                 socket_path,
+                 job_handler):
+        """Constructor
+
+        :param socket_path:
+            The path to the Unix socket, an existing socket file is replaced.
+        :param job_handler:
+            A function that processes a job, it is called with the job and a function that
+            reports the events of the job, and returns the final event data as a dictionary
+            with a 'status' of 'done' or 'failed'.
+        """
+
+        # Remove a stale socket of a previous server
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+        # The path to the socket
+        self.socket_path = socket_path
+
+        # The function that processes the jobs
+        self.job_handler = job_handler
+
+        # The server runs until it is asked to shutdown
+        self.running = True
+
+        socketserver.UnixStreamServer.__init__(self, socket_path, JobRequestHandler)
+
+    ################################################################################################
+    # @run
+    ################################################################################################
+    def run(self):
+        """Serves the clients until the server is asked to shutdown, then removes the socket.
+        """
+
+        try:
+            while self.running:
+                self.handle_request()
+        finally:
+            self.server_close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+
+####################################################################################################
+# @JobRequestHandler
+####################################################################################################
+class JobRequestHandler(socketserver.StreamRequestHandler):
+    """Handles the jobs of a single client connection.
+    """
+
+    ################################################################################################
+    # @handle
+    ################################################################################################
+    def handle(self):
+        """Processes the jobs of the client until it closes the connection.
+        """
+
+        # A text stream of the events
+        events = codecs.getwriter('utf-8')(self.wfile)
+
+        for line in self.rfile:
+
+            # Ignore the empty lines
+            line = line.decode('utf-8').strip()
+            if not line:
+                continue
+
+            # Parse the job
+            try:
+                job = json.loads(line)
+            except ValueError as error:
+                write_event(events, 'failed', error='Invalid job: %s' % str(error))
+                continue
+
+            # Shutdown the server
+            if job.get('command') == SHUTDOWN_COMMAND:
+                self.server.running = False
+                write_event(events, 'done', status='done', id=job.get('id'))
+                return
+
+            # Process the job
+            start = time.time()
+            write_event(events, 'accepted', id=job.get('id'))
+            try:
+                result = self.server.job_handler(
+                    job, lambda event, **data: write_event(events, event, id=job.get('id'),
+                                                           **data))
+            except Exception as error:
+                result = {'status': 'failed',
+                          'error': '%s: %s' % (type(error).__name__, str(error))}
+            result['id'] = job.get('id')
+            result['elapsed'] = time.time() - start
+            write_event(events, 'done' if result.get('status') == 'done' else 'failed', **result)
+
+
+####################################################################################################
+# @submit_job
+####################################################################################################
+def submit_job(socket_path,
+               job):
+    """Submits a job to a running server and yields its events until the job is finished.
+
+    :param socket_path:
+        The path to the Unix socket of the server.
+    :param job:
+        A dictionary of the job.
+    :return:
+        A generator of the events of the job as dictionaries.
+    """
+
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    connection.connect(socket_path)
+    try:
+        connection.sendall(('%s\n' % json.dumps(job)).encode('utf-8'))
+        with connection.makefile('r', encoding='utf-8') as stream:
+            for line in stream:
+                event = json.loads(line)
+                yield event
+                if event['event'] in FINAL_EVENTS:
+                    break
+    finally:
+        connection.close()
+
+
+####################################################################################################
+# @ Run the main function if invoked from the command line.
+####################################################################################################
+if __name__ == "__main__":
+
+    # A client that submits a single job to a running server and prints its events.
+    # The arguments that are not listed here are passed to the server as NeuroMorphoVis options,
+    # for example: --reconstruct-neuron-mesh --meshing-technique=piecewise-watertight
+    parser = argparse.ArgumentParser(description='Submits a job to a NeuroMorphoVis server')
+    parser.add_argument('--socket', action='store', required=True,
+                        help='The Unix socket of the server')
+    parser.add_argument('--morphology-file', action='store', default=None,
+                        help='Morphology file (.H5 or .SWC)')
+    parser.add_argument('--gid', action='store', default=None,
+                        help='Cell GID (requires BBP circuit)')
+    parser.add_argument('--blue-config', action='store', default=None,
+                        help='BBP circuit configuration')
+    parser.add_argument('--output-directory', action='store', default=None,
+                        help='The output directory of the job')
+    parser.add_argument('--shutdown', action='store_true', default=False,
+                        help='Stop the server')
+    arguments, options = parser.parse_known_args()
+
+    # The job
+    if arguments.shutdown:
+        job = {'command': SHUTDOWN_COMMAND}
+    else:
+        job = {'morphology_file': arguments.morphology_file, 'gid': arguments.gid,
+               'blue_config': arguments.blue_config,
+               'output_directory': arguments.output_directory, 'arguments': options}
+
+    # Print the events, and fail if the job fails
+    status = 0
+    for job_event in submit_job(arguments.socket, job):
+        if job_event['event'] == 'log':
+            print(job_event['message'])
+        else:
+            print(json.dumps(job_event))
+        if job_event['event'] == 'failed':
+            status = 1
+    sys.exit(status)
@@ -0,0 +1,343 @@
+####################################################################################################
+# Copyright (c) 2016 - 2018, EPFL / Blue Brain Project
+#               Marwan Abdellah <marwan.abdellah@epfl.ch>
+#
+# This file is part of NeuroMorphoVis <https://github.com/BlueBrain/NeuroMorphoVis>
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU General Public License as published by the Free Software Foundation, version 3 of the License.
+#
+# This Blender-based tool is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program.
+# If not, see <http://www.gnu.org/licenses/>.
+####################################################################################################
+
+__author__      = "Marwan Abdellah"
+__copyright__   = "Copyright (c) 2016 - 2018, Blue Brain Project / EPFL"
+__credits__     = ["Ahmet Bilgili", "Juan Hernando", "Stefan Eilemann"]
+__version__     = "1.0.0"
+__maintainer__  = "Marwan Abdellah"
+__email__       = "marwan.abdellah@epfl.ch"
+__status__      = "Production"
+
+
+
+# System imports
+import os, sys, json, time, hashlib, tempfile, argparse
+
+
+# The consolidated manifest file of a run, in the output directory
+RUN_MANIFEST_FILE = 'run-manifest.json'
+
+# The folder where every input records its own entry, in the output directory
+RUN_MANIFEST_ENTRIES_FOLDER = 'run-manifest'
+
+# The arguments that select the inputs or control the execution, they do not change the outputs
+# of an input and therefore they are not part of the options hash
+EXECUTION_ARGUMENTS = ['blender', 'input', 'morphology_file', 'morphology_directory', 'gid',
+                       'target', 'execution_node', 'number_cores', 'job_granularity',
+                       'local_workers', 'prefetch_morphologies', 'server_socket',
+                       'morphologies_cache_directory', 'morphologies_cache_size',
+                       'overwrite_outputs', 'resume', 'inputs_list', 'chunk_index',
+                       'slurm_backend', 'chunk_size', 'maximum_jobs', 'cost_model',
+                       'monitor_jobs', 'maximum_retries', 'profile_stages', 'profiler',
+                       'profiler_top', 'zero_copy']
+
+
+####################################################################################################
+# @get_options_hash
+####################################################################################################
+def get_options_hash(arguments):
+    """Gets a hash of the arguments that change the outputs of an input.
+
+    The values are compared as strings, so the arguments parsed by the main process and those
+    parsed again by the Blender instances give the same hash.
+
+    :param arguments:
+        Command line arguments.
+    :return:
+        A hex digest of the options.
+    """
+
+    options = {name: str(value) for name, value in vars(arguments).items()
+               if name not in EXECUTION_ARGUMENTS}
+    return hashlib.sha1(json.dumps(options, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+####################################################################################################
+# @get_input_key
+####################################################################################################
+def get_input_key(morphology_file=None,
+                  gid=None):
+    """Gets the key of an input in the manifest.
+
+    :param morphology_file:
+        The path to a morphology file.
+    :param gid:
+        The GID of a neuron in a circuit, used if given.
+    :return:
+        'gid-<gid>' for a GID, or the real path of the morphology file.
+    """
+
+    if gid not in [None, 'None']:
+        return 'gid-%s' % str(gid)
+    return os.path.realpath(morphology_file)
+
+
+####################################################################################################
+# @write_json_atomically
+####################################################################################################
+def write_json_atomically(data,
+                          file_path):
+    """Writes a JSON file atomically, the file is either the old one or the new one, even if the
+    process is killed while writing it.
+
+    :param data:
+        The data to write.
+    :param file_path:
+        The path to the file.
+    """
+
+    directory = os.path.dirname(os.path.abspath(file_path))
+    file_descriptor, temporary_file = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(file_descriptor, 'w') as json_file:
+            json.dump(data, json_file, indent=1, sort_keys=True)
+        os.replace(temporary_file, file_path)
+    except Exception:
+        if os.path.exists(temporary_file):
+            os.remove(temporary_file)
+        raise
+
+
+####################################################################################################
+# @RunManifest
+####################################################################################################
+class RunManifest:
+    """The manifest of a batch run, it records the status, the outputs, the options hash and the
+    timing of every input.
+
+    Every input is recorded by the process that runs it in its own entry file, which is written
+    atomically, so the Blender instances of a run can record their inputs at the same time, on the
+    local node or on the cluster, without locking. The consolidated manifest file is merged from
+    the entries by the main process.
+    """
+
+    ################################################################################################
+    # @__init__
+    ################################################################################################
+    def __init__(self,
+                 output_directory):
+        """Constructor
+
+        :param output_directory:
+            The output directory of the run.
+        """
+
+        # The consolidated manifest file
+        self.manifest_file = '%s/%s' % (output_directory, RUN_MANIFEST_FILE)
+
+        # The directory of the entries
+        self.entries_directory = '%s/%s' % (output_directory, RUN_MANIFEST_ENTRIES_FOLDER)
+
+    ################################################################################################
+    # @get_entry_file
+    ################################################################################################
+    def get_entry_file(self,
+                       key):
+        """Gets the path to the entry file of an input.
+
+        :param key:
+            The key of the input.
+        :return:
+            The path to the entry file.
+        """
+
+        return '%s/%s.json' % (self.entries_directory,
+                               hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    ################################################################################################
+    # @record
+    ################################################################################################
+    def record(self,
+               key,
+               status,
+               options_hash,
+               outputs=None,
+               started=None,
+               elapsed=None,
+               error=None,
+               peak_memory=None,
+               size=None):
+        """Records the entry of an input.
+
+        :param key:
+            The key of the input.
+        :param status:
+            The status of the input, 'done' or 'failed'.
+        :param options_hash:
+            The hash of the options that the input is run with.
+        :param outputs:
+            A list of the output files of the input.
+        :param started:
+            The time when the input is started.
+        :param elapsed:
+            The time that the input took, in seconds.
+        :param error:
+            The error, if the input failed.
+        :param peak_memory:
+            The peak memory of the process while it ran the input, in MB, or None if it cannot be
+            measured.
+        :param size:
+            The number of samples of the morphology of the input, if it was loaded.
+        """
+
+        if not os.path.exists(self.entries_directory):
+            os.makedirs(self.entries_directory, exist_ok=True)
+
+        write_json_atomically({'input': key,
+                               'status': status,
+                               'options_hash': options_hash,
+                               'outputs': list(outputs) if outputs is not None else list(),
+                               'started': started,
+                               'elapsed': elapsed,
+                               'finished': time.time(),
+                               'error': error,
+                               'peak_memory': peak_memory,
+                               'size': size}, self.get_entry_file(key))
+
+    ################################################################################################
+    # @read_entry
+    ################################################################################################
+    def read_entry(self,
+                   key):
+        """Reads the entry of an input.
+
+        :param key:
+            The key of the input.
+        :return:
+            A dictionary of the entry, or None if the input is not recorded.
+        """
+
+        try:
+            with open(self.get_entry_file(key), 'r') as entry_file:
+                return json.load(entry_file)
+        except (IOError, ValueError):
+            return None
+
+    ################################################################################################
+    # @read_entries
+    ################################################################################################
+    def read_entries(self):
+        """Reads all the recorded entries.
+
+        :return:
+            A dictionary of the entries keyed by their inputs.
+        """
+
+        entries = dict()
+        if not os.path.isdir(self.entries_directory):
+            return entries
+        for file_name in os.listdir(self.entries_directory):
+            if not file_name.endswith('.json'):
+                continue
+            try:
+                with open('%s/%s' % (self.entries_directory, file_name), 'r') as entry_file:
+                    entry = json.load(entry_file)
+            except (IOError, ValueError):
+                continue
+            entries[entry['input']] = entry
+        return entries
+
+    ################################################################################################
+    # @is_complete
+    ################################################################################################
+    def is_complete(self,
+                    key,
+                    options_hash):
+        """Checks if an input is done with the same options and all its outputs exist.
+
+        :param key:
+            The key of the input.
+        :param options_hash:
+            The hash of the current options.
+        :return:
+            True if the input can be skipped, otherwise False.
+        """
+
+        entry = self.read_entry(key)
+        return entry is not None and entry['status'] == 'done' and \
+            entry['options_hash'] == options_hash and \
+            all(os.path.exists(output) for output in entry['outputs'])
+
+    ################################################################################################
+    # @get_pending_inputs
+    ################################################################################################
+    def get_pending_inputs(self,
+                           inputs,
+                           keys,
+                           options_hash):
+        """Filters the inputs that are not complete, to resume a run.
+
+        :param inputs:
+            A list of the inputs.
+        :param keys:
+            A list of the keys of the inputs.
+        :param options_hash:
+            The hash of the current options.
+        :return:
+            A list of the inputs that must be run.
+        """
+
+        pending = [item for item, key in zip(inputs, keys)
+                   if not self.is_complete(key, options_hash)]
+        print('RESUMING: %d inputs of %d are complete' % (len(inputs) - len(pending), len(inputs)))
+        return pending
+
+    ################################################################################################
+    # @write
+    ################################################################################################
+    def write(self,
+              keys=None):
+        """Merges the entries into the consolidated manifest file, atomically.
+
+        :param keys:
+            A list of the keys of all the inputs of the run, the inputs that are not recorded are
+            listed as pending. If None, only the recorded inputs are listed.
+        :return:
+            A dictionary of the manifest.
+        """
+
+        inputs = self.read_entries()
+        if keys is not None:
+            for key in keys:
+                if key not in inputs:
+                    inputs[key] = {'input': key, 'status': 'pending'}
+
+        # Count the inputs per status
+        summary = dict()
+        for entry in inputs.values():
+            summary[entry['status']] = summary.get(entry['status'], 0) + 1
+
+        manifest = {'updated': time.time(), 'summary': summary, 'inputs': inputs}
+        write_json_atomically(manifest, self.manifest_file)
+        return manifest
+
+
+####################################################################################################
+# @ Run the main function if invoked from the command line.
+####################################################################################################
+if __name__ == "__main__":
+
+    # Merge the entries of a run, for example while its jobs are running on the cluster
+    parser = argparse.ArgumentParser(description='Merges and summarizes the manifest of a run')
+    parser.add_argument('output_directory', help='The output directory of the run')
+    arguments = parser.parse_args()
+
+    manifest = RunManifest(arguments.output_directory).write()
+    for status, count in sorted(manifest['summary'].items()):
+        print('%s: %d' % (status, count))
+    sys.exit(0)
@@ -0,0 +1,292 @@
+####################################################################################################
+# Copyright (c) 2016 - 2018, EPFL / Blue Brain Project
+#               Marwan Abdellah <marwan.abdellah@epfl.ch>
+#
+# This file is part of NeuroMorphoVis <https://github.com/BlueBrain/NeuroMorphoVis>
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU General Public License as published by the Free Software Foundation, version 3 of the License.
+#
+# This Blender-based tool is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program.
+# If not, see <http://www.gnu.org/licenses/>.
+####################################################################################################
+
+__author__      = "Marwan Abdellah"
+__copyright__   = "Copyright (c) 2016 - 2018, Blue Brain Project / EPFL"
+__credits__     = ["Ahmet Bilgili", "Juan Hernando", "Stefan Eilemann"]
+__version__     = "1.0.0"
+__maintainer__  = "Marwan Abdellah"
+__email__       = "marwan.abdellah@epfl.ch"
+__status__      = "Production"
+
+
+# System imports
+import os, sys, json, time, queue, threading, subprocess
+
+
+# The prefix of the lines that a worker writes to its standard output to report the status of a
+# job, the other lines are the normal output of Blender and NeuroMorphoVis
+JOB_STATUS_PREFIX = 'NMV-JOB-STATUS: '
+
+# The command that asks a worker to exit
+EXIT_COMMAND = 'exit'
+
+
+####################################################################################################
+# @read_job
+####################################################################################################
+def read_job(stream):
+    """Reads the next job from a stream, used by the workers to read their standard input.
+
+    :param stream:
+        The input stream.
+    :return:
+        A dictionary of the job, or None if the stream is closed or the worker is asked to exit.
+    """
+
+    while True:
+
+        # The end of the stream
+        line = stream.readline()
+        if not line:
+            return None
+
+        # Ignore the empty lines
+        line = line.strip()
+        if not line:
+            continue
+
+        # A job or a command
+        job = json.loads(line)
+        if job.get('command') == EXIT_COMMAND:
+            return None
+        return job
+
+
+####################################################################################################
+# @write_job_status
+####################################################################################################
+def write_job_status(stream,
+                     status):
+    """Writes the status of a job to a stream, used by the workers to report to the pool.
+
+    :param stream:
+        The output stream.
+    :param status:
+        A dictionary of the status of the job.
+    """
+
+    stream.write('\n%s%s\n' % (JOB_STATUS_PREFIX, json.dumps(status)))
+    stream.flush()
+
+
+####################################################################################################
+# @WorkerPool
+####################################################################################################
+class WorkerPool:
+    """A pool of long-lived background Blender processes that process jobs from a shared queue.
+
+    Every worker runs the command line interface in the worker mode: it reads a job per line from
+    its standard input as JSON, processes it, resets the scene, and reports the status of the job
+    on its standard output in a line that starts with JOB_STATUS_PREFIX. The rest of the output of
+    every worker is written to its own log file. If a worker exits while processing a job, the job
+    is reported as failed and the worker is started again.
+    """
+
+    ################################################################################################
+    # @__init__
+    ################################################################################################
+    def __init__(self,
+                 worker_command,
+                 number_workers,
+                 log_directory=None):
+        """Constructor
+
+        :param worker_command:
+            The shell command that starts a worker.
+        :param number_workers:
+            The number of workers.
+        :param log_directory:
+            The directory where the logs of the workers are written, if None the logs are dropped.
+        """
+
+        # The command of the workers
+        self.worker_command = worker_command
+
+        # The number of workers
+        self.number_workers = max(1, int(number_workers))
+
+        # The logs directory
+        self.log_directory = log_directory
+
+        # The queue of the jobs
+        self.jobs_queue = queue.Queue()
+
+        # The statuses of the processed jobs, and a lock to update them
+        self.statuses = list()
+        self.statuses_lock = threading.Lock()
+
+    ################################################################################################
+    # @start_worker
+    ################################################################################################
+    def start_worker(self):
+        """Starts a worker process.
+
+        :return:
+            A reference to the worker process.
+        """
+
+        return subprocess.Popen(self.worker_command, shell=True, stdin=subprocess.PIPE,
+                                stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                universal_newlines=True, bufsize=1)
+
+    ################################################################################################
+    # @stop_worker
+    ################################################################################################
+    @staticmethod
+    def stop_worker(worker):
+        """Asks a worker process to exit and waits for it.
+
+        :param worker:
+            A reference to the worker process.
+        """
+
+        try:
+            worker.stdin.write('%s\n' % json.dumps({'command': EXIT_COMMAND}))
+            worker.stdin.close()
+        except (IOError, ValueError):
+            pass
+        worker.stdout.read()
+        worker.wait()
+
+    ################################################################################################
+    # @process_job
+    ################################################################################################
+    def process_job(self,
+                    worker,
+                    job,
+                    log_file):
+        """Sends a job to a worker and waits for its status.
+
+        :param worker:
+            A reference to the worker process.
+        :param job:
+            A dictionary of the job.
+        :param log_file:
+            The log file of the worker, or None.
+        :return:
+            A dictionary of the status of the job, or None if the worker exited.
+        """
+
+        # Send the job
+        try:
+            worker.stdin.write('%s\n' % json.dumps(job))
+            worker.stdin.flush()
+        except (IOError, ValueError):
+            return None
+
+        # Read the output of the worker until the status of the job
+        for line in worker.stdout:
+            if line.startswith(JOB_STATUS_PREFIX):
+                return json.loads(line[len(JOB_STATUS_PREFIX):])
+            if log_file is not None:
+                log_file.write(line)
+
+        # The worker exited before reporting the status
+        return None
+
+    ################################################################################################
+    # @run_worker
+    ################################################################################################
+    def run_worker(self,
+                   worker_index):
+        """Runs a worker until the queue of the jobs is empty.
+
+        :param worker_index:
+            The index of the worker.
+        """
+
+        # The log file of the worker
+        log_file = None
+        if self.log_directory is not None:
+            log_file = open('%s/worker-%d.log' % (self.log_directory, worker_index), 'w')
+
+        worker = None
+        while True:
+
+            # Get the next job
+            try:
+                job = self.jobs_queue.get_nowait()
+            except queue.Empty:
+                break
+
+            # Start the worker if it is not running
+            if worker is None:
+                worker = self.start_worker()
+
+            # Process the job
+            start = time.time()
+            status = self.process_job(worker, job, log_file)
+
+            # If the worker exited, report the job as failed and restart the worker
+            if status is None:
+                status = {'status': 'failed', 'error': 'The worker exited with code [%s]' %
+                                                       str(worker.wait())}
+                worker = None
+
+            # Record the status
+            status['id'] = job['id']
+            status['worker'] = worker_index
+            status['elapsed'] = time.time() - start
+            with self.statuses_lock:
+                self.statuses.append(status)
+                print('JOB [%s] %s: %s (%.2f s)' % (str(job['id']), status['status'].upper(),
+                                                    str(job.get('morphology_file',
+                                                                job.get('gid', ''))),
+                                                    status['elapsed']))
+                sys.stdout.flush()
+
+        # Stop the worker
+        if worker is not None:
+            self.stop_worker(worker)
+        if log_file is not None:
+            log_file.close()
+
+    ################################################################################################
+    # @run
+    ################################################################################################
+    def run(self,
+            jobs):
+        """Processes a list of jobs with the workers of the pool.
+
+        :param jobs:
+            A list of dictionaries of the jobs, every job must have a unique 'id'.
+        :return:
+            A list of the statuses of the jobs in the order of the jobs.
+        """
+
+        # Fill the queue
+        self.statuses = list()
+        for job in jobs:
+            self.jobs_queue.put(job)
+
+        # Create the logs directory
+        if self.log_directory is not None and not os.path.exists(self.log_directory):
+            os.makedirs(self.log_directory)
+
+        # Run the workers, no more workers than the jobs are started
+        threads = list()
+        for worker_index in range(min(self.number_workers, len(jobs))):
+            thread = threading.Thread(target=self.run_worker, args=(worker_index,))
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+
+        # Return the statuses in the order of the jobs
+        order = {job['id']: i for i, job in enumerate(jobs)}
+        return sorted(self.statuses, key=lambda status: order[status['id']])
@@ -176,6 +176,7 @@ def smooth_object_vertices(mesh_object,
 ####################################################################################################
 # @decimate_mesh_object
 ####################################################################################################
+@nmv.utilities.profiled('decimate')
 def decimate_mesh_object(mesh_object,
                          decimation_ratio=1.0):
     """Decimate a mesh object.
@@ -551,6 +552,7 @@ def intersect_mesh_objects(mesh_object1,
 ####################################################################################################
 # @join_mesh_objects
 ####################################################################################################
+@nmv.utilities.profiled('join')
 def join_mesh_objects(mesh_list,
                       name='joint'):
     """Join all the meshes into one only and rename it.
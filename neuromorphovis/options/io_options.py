@@ -56,3 +56,8 @@ class IOOptions:
         # Analysis directory, where the analysis reports will be saved
         self.analysis_directory = None
 
+        # Morphologies cache directory, where the parsed morphologies are cached, None to disable
+        self.morphologies_cache_directory = None
+
+        # The maximum size of the morphologies cache in MB
+        self.morphologies_cache_size = 1024
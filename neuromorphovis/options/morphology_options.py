@@ -95,6 +95,12 @@ class MorphologyOptions:
         # Apical dendrites branch order
         self.apical_dendrite_branch_order = nmv.consts.Arbors.MAX_BRANCHING_ORDER
 
+        # Build only the samples of the branches that will be drawn when the morphology is loaded
+        self.lazy_branches = False
+
+        # Keep the points of the .H5 morphologies memory-mapped, and build the samples on demand
+        self.zero_copy = False
+
         # Soma color
         self.soma_color = nmv.enums.Color.SOMA
 
@@ -114,6 +120,9 @@ class MorphologyOptions:
         # scale factor, or constant at given fixed value)
         self.arbors_radii = nmv.enums.Skeletonization.ArborsRadii.AS_SPECIFIED
 
+        # The resampling method of the sections
+        self.resampling_method = nmv.enums.Skeletonization.Resampling.FIXED_STEP
+
         # A scale factor for the radii of the sections
         self.sections_radii_scale = 1.0
 
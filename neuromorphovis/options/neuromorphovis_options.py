@@ -97,10 +97,17 @@ class NeuroMorphoVisOptions:
         self.io.morphologies_directory = '%s/%s' % (arguments.output_directory,
                                                     nmv.consts.Paths.MORPHOLOGIES_FOLDER)
 
-        # Morphologies directory
+        # Analysis directory
         self.io.analysis_directory = '%s/%s' % (arguments.output_directory,
                                                 nmv.consts.Paths.ANALYSIS_FOLDER)
 
+        # Morphologies cache directory, the unset arguments are passed as 'None' to the instances
+        if arguments.morphologies_cache_directory not in [None, 'None']:
+            self.io.morphologies_cache_directory = arguments.morphologies_cache_directory
+
+        # Morphologies cache size
+        self.io.morphologies_cache_size = arguments.morphologies_cache_size
+
         ############################################################################################
         # Morphology options
         ############################################################################################
@@ -144,7 +151,7 @@ class NeuroMorphoVisOptions:
         self.morphology.ignore_axon = arguments.ignore_axon
 
         # Ignore apical dendrite, if exists
-        self.morphology.ignore_apical = arguments.ignore_apical_dendrites
+        self.morphology.ignore_apical_dendrite = arguments.ignore_apical_dendrites
 
         # Ignore basal dendrites
         self.morphology.ignore_basal_dendrites = arguments.ignore_basal_dendrites
@@ -158,6 +165,16 @@ class NeuroMorphoVisOptions:
         # Apical dendrite branching level, if exists
         self.morphology.apical_dendrite_branch_order = arguments.apical_dendrites_branching_order
 
+        # Build only the branches that will be drawn
+        self.morphology.lazy_branches = arguments.lazy_branches
+
+        # Keep the points of the .H5 morphologies memory-mapped
+        self.morphology.zero_copy = arguments.zero_copy
+
+        # The resampling method of the sections
+        self.morphology.resampling_method = nmv.enums.Skeletonization.Resampling.get_enum(
+            arguments.resampling_method)
+
         # Morphology material
         self.morphology.material = nmv.enums.Shading.get_enum(arguments.shader)
 
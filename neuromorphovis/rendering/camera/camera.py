@@ -144,6 +144,7 @@ class Camera:
     ################################################################################################
     # @render_image
     ################################################################################################
+    @nmv.utilities.profiled('render')
     def render_image(self,
                      image_name='IMAGE'):
         """Render an image to a file.
@@ -33,11 +33,13 @@ import neuromorphovis as nmv
 import neuromorphovis.bbox
 import neuromorphovis.scene
 import neuromorphovis.camera
+import neuromorphovis.utilities
 
 
 ####################################################################################################
 # @render_scene_at_resolution
 ####################################################################################################
+@nmv.utilities.profiled('render')
 def render_scene_at_resolution(file_name='image',
                                film_base_resolution=512,
                                view='FRONT'):
@@ -112,6 +114,7 @@ def render_scene_at_resolution(file_name='image',
 ####################################################################################################
 # @render_scene_to_scale
 ####################################################################################################
+@nmv.utilities.profiled('render')
 def render_scene_to_scale(file_name='image',
                           resolution_scale_factor=1,
                           view='FRONT'):
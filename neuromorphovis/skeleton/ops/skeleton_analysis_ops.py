@@ -26,8 +26,10 @@ __status__      = "Production"
 
 # System imports
 import math
+import numpy
 
 import neuromorphovis as nmv
+import neuromorphovis.file
 import neuromorphovis.skeleton
 
 
@@ -434,6 +436,205 @@ def analyze_short_sections(section,
             analysis_data_list.append(analysis_string)
 
 
+####################################################################################################
+# The columns of the sections analysis table, in their order
+####################################################################################################
+SECTIONS_ANALYSIS_COLUMNS = [
+    'section_index', 'section_id', 'section_type', 'parent_index', 'branching_order',
+    'number_samples', 'number_segments', 'number_children', 'length', 'average_radius',
+    'minimum_radius', 'maximum_radius', 'short_section', 'duplicate_samples', 'negative_samples',
+    'minimum_branching_angle', 'maximum_branching_angle', 'parent_radius',
+    'maximum_child_radius', 'branching_radii_error']
+
+
+####################################################################################################
+# @compute_sections_analysis_table
+####################################################################################################
+def compute_sections_analysis_table(columnar_morphology,
+                                    duplicate_threshold=1.0):
+    """Computes all the per-section metrics of a columnar morphology at once, and returns them as
+    a columnar table with a row per section, see @SECTIONS_ANALYSIS_COLUMNS.
+
+    The short sections are shorter than the sum of the diameters of their first and last samples.
+    The duplicate samples are closer than the threshold to the previous sample along the section.
+    The negative samples are the samples of a root section that are closer to the soma than its
+    first sample. The branching angles, in degrees, are measured between the first child of a
+    section and every other child, and a branching radii error is reported if any child is
+    thicker than its parent. The undefined values are set to NaN.
+
+    :param columnar_morphology:
+        A given columnar morphology, see @nmv.skeleton.ColumnarMorphology.
+    :param duplicate_threshold:
+        The distance below which a sample is considered a duplicate, by default 1.0 micron.
+    :return:
+        A dictionary mapping the name of every column to an array of its values.
+    """
+
+    points = columnar_morphology.points
+    radii = columnar_morphology.radii
+    offsets = columnar_morphology.sections_offsets
+    parents = columnar_morphology.sections_parents
+    number_sections = len(parents)
+    number_samples = len(radii)
+
+    # The section of every sample and its position along the section
+    counts = numpy.diff(offsets)
+    section_index = numpy.repeat(numpy.arange(number_sections), counts)
+    positions = numpy.arange(number_samples) - offsets[section_index]
+    valid = counts > 0
+    firsts = numpy.minimum(offsets[:-1], max(number_samples - 1, 0))
+    lasts = numpy.maximum(offsets[1:] - 1, 0)
+
+    # Radii statistics
+    average_radii = numpy.full(number_sections, numpy.nan)
+    minimum_radii = numpy.full(number_sections, numpy.nan)
+    maximum_radii = numpy.full(number_sections, numpy.nan)
+    first_radii = numpy.full(number_sections, numpy.nan)
+    last_radii = numpy.full(number_sections, numpy.nan)
+    if number_samples > 0:
+        average_radii[valid] = numpy.bincount(
+            section_index, weights=radii, minlength=number_sections)[valid] / counts[valid]
+        minimum_radii[valid] = numpy.minimum.reduceat(radii, firsts[valid])
+        maximum_radii[valid] = numpy.maximum.reduceat(radii, firsts[valid])
+        first_radii[valid] = radii[firsts[valid]]
+        last_radii[valid] = radii[lasts[valid]]
+
+    # The segments along the sections, and their lengths
+    segments = numpy.flatnonzero(section_index[1:] == section_index[:-1]) \
+        if number_samples > 1 else numpy.zeros(0, dtype=numpy.int64)
+    segments_lengths = numpy.linalg.norm(points[segments + 1] - points[segments], axis=1)
+    lengths = numpy.bincount(section_index[segments], weights=segments_lengths,
+                             minlength=number_sections)
+    duplicate_samples = numpy.bincount(
+        section_index[segments][segments_lengths < duplicate_threshold],
+        minlength=number_sections)
+
+    # Short sections
+    short_sections = (counts > 1) & (lengths < (first_radii + last_radii) * 2.0)
+
+    # The negative samples of the root sections
+    soma = columnar_morphology.soma
+    soma_center = numpy.zeros(3)
+    if soma is not None and soma.centroid is not None:
+        soma_center = numpy.array(tuple(soma.centroid), dtype=numpy.float64)
+    negative_samples = numpy.zeros(number_sections, dtype=numpy.int64)
+    if number_samples > 0:
+        distances = numpy.linalg.norm(points - soma_center, axis=1)
+        negative = (parents[section_index] < 0) & (positions > 0) & \
+            (distances < distances[firsts][section_index])
+        negative_samples = numpy.bincount(section_index[negative], minlength=number_sections)
+
+    # The children of every section
+    children_offsets = columnar_morphology.children_offsets
+    children = columnar_morphology.children
+    number_children = numpy.diff(children_offsets)
+    children_parents = parents[children]
+
+    # The directions of the first segments of the children
+    directions = numpy.full((number_sections, 3), numpy.nan)
+    oriented = counts > 1
+    directions[oriented] = points[firsts[oriented] + 1] - points[firsts[oriented]]
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        directions /= numpy.linalg.norm(directions, axis=1)[:, None]
+
+    # The branching angles between the first child and every other child
+    minimum_angles = numpy.full(number_sections, numpy.nan)
+    maximum_angles = numpy.full(number_sections, numpy.nan)
+    primary_children = numpy.full(number_sections, -1, dtype=numpy.int64)
+    branching = number_children > 0
+    primary_children[branching] = children[children_offsets[:-1][branching]]
+    secondary = children[children != primary_children[children_parents]]
+    if len(secondary) > 0:
+        cosines = numpy.einsum('ij,ij->i', directions[primary_children[parents[secondary]]],
+                               directions[secondary])
+        angles = numpy.degrees(numpy.arccos(numpy.clip(cosines, -1.0, 1.0)))
+        numpy.fmin.at(minimum_angles, parents[secondary], angles)
+        numpy.fmax.at(maximum_angles, parents[secondary], angles)
+
+    # The branching radii
+    maximum_children_radii = numpy.full(number_sections, numpy.nan)
+    if len(children) > 0:
+        numpy.fmax.at(maximum_children_radii, children_parents, first_radii[children])
+    with numpy.errstate(invalid='ignore'):
+        branching_radii_errors = (number_children > 1) & (maximum_children_radii > last_radii)
+
+    # The types of the sections as strings
+    types_strings = {2: 'AXON', 3: 'BASAL_DENDRITE', 4: 'APICAL_DENDRITE'}
+    sections_types = numpy.array(
+        [types_strings.get(section_type, 'UNKNOWN_BRANCH_TYPE')
+         for section_type in columnar_morphology.sections_types.tolist()], dtype=object)
+
+    return {'section_index': numpy.arange(number_sections),
+            'section_id': columnar_morphology.sections_ids,
+            'section_type': sections_types,
+            'parent_index': parents,
+            'branching_order': columnar_morphology.compute_branching_orders(),
+            'number_samples': counts,
+            'number_segments': numpy.maximum(counts - 1, 0),
+            'number_children': number_children,
+            'length': lengths,
+            'average_radius': average_radii,
+            'minimum_radius': minimum_radii,
+            'maximum_radius': maximum_radii,
+            'short_section': short_sections,
+            'duplicate_samples': duplicate_samples,
+            'negative_samples': negative_samples,
+            'minimum_branching_angle': minimum_angles,
+            'maximum_branching_angle': maximum_angles,
+            'parent_radius': last_radii,
+            'maximum_child_radius': maximum_children_radii,
+            'branching_radii_error': branching_radii_errors}
+
+
+####################################################################################################
+# @analyze_morphology_sections
+####################################################################################################
+def analyze_morphology_sections(morphology,
+                                duplicate_threshold=1.0):
+    """Analyzes all the sections of a morphology in a single pass, see
+    @compute_sections_analysis_table.
+
+    :param morphology:
+        A given morphology.
+    :param duplicate_threshold:
+        The distance below which a sample is considered a duplicate, by default 1.0 micron.
+    :return:
+        A dictionary mapping the name of every column to an array of its values.
+    """
+
+    return compute_sections_analysis_table(
+        nmv.skeleton.ColumnarMorphology.from_morphology(morphology),
+        duplicate_threshold=duplicate_threshold)
+
+
+####################################################################################################
+# @write_morphology_analysis_table
+####################################################################################################
+def write_morphology_analysis_table(morphology,
+                                    analysis_directory,
+                                    duplicate_threshold=1.0):
+    """Analyzes all the sections of a morphology and writes the table to a .CSV file named after
+    the label of the morphology.
+
+    :param morphology:
+        A given morphology.
+    :param analysis_directory:
+        The directory where the table is written.
+    :param duplicate_threshold:
+        The distance below which a sample is considered a duplicate, by default 1.0 micron.
+    :return:
+        The path to the written table.
+    """
+
+    table = analyze_morphology_sections(morphology, duplicate_threshold=duplicate_threshold)
+    table['morphology'] = [morphology.label] * len(table['section_index'])
+
+    table_file = '%s/%s.csv' % (analysis_directory, morphology.label)
+    nmv.file.ops.write_table_to_csv(
+        table, ['morphology'] + SECTIONS_ANALYSIS_COLUMNS, table_file)
+    return table_file
+
+
 ####################################################################################################
 # @get_largest_radius_of_children
 ####################################################################################################
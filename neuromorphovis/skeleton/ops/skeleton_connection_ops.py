@@ -280,13 +280,48 @@ def label_primary_and_secondary_sections_based_on_angles(section):
     section.samples[-1].radius = greatest_radius
 
 
+####################################################################################################
+# @get_morphology_spatial_index
+####################################################################################################
+def get_morphology_spatial_index(morphology):
+    """Returns the spatial index of the samples of a given morphology.
+
+    The index is built once and cached on the morphology, until it is invalidated with
+    @invalidate_morphology_spatial_index.
+
+    :param morphology:
+        A given morphology.
+    :return:
+        The spatial index of the morphology, see @nmv.skeleton.SpatialIndex.
+    """
+
+    if morphology.spatial_index is None:
+        morphology.spatial_index = nmv.skeleton.SpatialIndex(morphology)
+    return morphology.spatial_index
+
+
+####################################################################################################
+# @invalidate_morphology_spatial_index
+####################################################################################################
+def invalidate_morphology_spatial_index(morphology):
+    """Invalidates the cached spatial index of a given morphology after its samples are changed.
+
+    :param morphology:
+        A given morphology.
+    """
+
+    morphology.spatial_index = None
+
+
 ####################################################################################################
 # @find_nearest_sample_along_section
 ####################################################################################################
 def find_nearest_sample_along_section(point,
                                       section,
                                       nearest_sample_found=None):
-    """Find the nearest sample along the given section to the given point.
+    """Find the nearest sample along the given section, and its children, to the given point.
+
+    NOTE: To search the arbors of a morphology, use the spatial index of the morphology instead.
 
     :param point:
         A given point in the three-dimensional space.
@@ -302,29 +337,57 @@ def find_nearest_sample_along_section(point,
     # further notice
     if nearest_sample_found is None:
         nearest_sample_found = section.samples[0]
+    nearest_sample_to_point_distance = (point - nearest_sample_found.point).length
 
-    for sample in section.samples:
+    for child_section in nmv.skeleton.ops.get_arbor_sections(section):
+        for sample in child_section.samples:
 
-        # Compute the distance between the point and the sample
-        current_sample_to_point_distance = (point - sample.point).length
+            # Compute the distance between the point and the sample, and compare
+            current_sample_to_point_distance = (point - sample.point).length
+            if current_sample_to_point_distance < nearest_sample_to_point_distance:
 
-        # Compute the distance between the point and the @nearest_sample_found
-        nearest_sample_to_point_distance = (point - nearest_sample_found.point).length
+                # Update the nearest sample
+                nearest_sample_found = sample
+                nearest_sample_to_point_distance = current_sample_to_point_distance
 
-        # Compare
-        if current_sample_to_point_distance < nearest_sample_to_point_distance:
+    # Return a reference to the nearest sample
+    return nearest_sample_found
 
-            # Update the nearest sample
-            nearest_sample_found = sample
 
-    # Iterate over the children
-    for child in section.children:
+####################################################################################################
+# @find_nearest_sample_in_morphology
+####################################################################################################
+def find_nearest_sample_in_morphology(morphology,
+                                      point,
+                                      arbor_types=None,
+                                      excluded_arbors=None,
+                                      nearest_sample=None):
+    """Find the nearest sample of the morphology to the given point using its spatial index.
+
+    :param morphology:
+        The morphology skeleton of the neuron.
+    :param point:
+        A given point in the three-dimensional space.
+    :param arbor_types:
+        A list of the arbor types to search, if None, all the arbors are searched.
+    :param excluded_arbors:
+        A list of arbors to exclude from the search.
+    :param nearest_sample:
+        A reference to the current nearest sample if exists.
+    :return:
+        The nearest sample to the given point.
+    """
 
-        # Find the nearest sample recursively
-        nearest_sample_found = find_nearest_sample_along_section(point, child, nearest_sample_found)
+    # Query the index
+    sample, distance = get_morphology_spatial_index(morphology).find_nearest_sample(
+        point, arbor_types=arbor_types, excluded_arbors=excluded_arbors)
 
-    # Return a reference to the nearest sample
-    return nearest_sample_found
+    # Keep the current nearest sample, unless a closer one is found
+    if sample is None:
+        return nearest_sample
+    if nearest_sample is not None and (point - nearest_sample.point).length <= distance:
+        return nearest_sample
+    return sample
 
 
 ####################################################################################################
@@ -350,8 +413,9 @@ def find_nearest_apical_dendritic_sample_to_axon(morphology,
         return None
 
     # Find the nearest sample between the axon initial segment and the apical dendrite
-    nearest_sample = find_nearest_sample_along_section(
-        morphology.axon.samples[0].point, morphology.apical_dendrite, nearest_sample)
+    nearest_sample = find_nearest_sample_in_morphology(
+        morphology, morphology.axon.samples[0].point, arbor_types=['APICAL_DENDRITE'],
+        nearest_sample=nearest_sample)
 
     # Return the sample along the apical dendrite that it is very close the axon initial sample
     return nearest_sample
@@ -373,12 +437,10 @@ def find_nearest_basal_dendritic_sample_to_axon(morphology,
         The nearest sample along a basal dendrite to the axon initial sample.
     """
 
-    # Iterate over the basal dendrites and apply the test
-    for basal_dendrite in morphology.dendrites:
-
-        # Find the nearest sample between the axon initial segment and the basal dendrite
-        nearest_sample = find_nearest_sample_along_section(
-            morphology.axon.samples[0].point, basal_dendrite, nearest_sample)
+    # Find the nearest sample between the axon initial segment and the basal dendrites
+    nearest_sample = find_nearest_sample_in_morphology(
+        morphology, morphology.axon.samples[0].point, arbor_types=['BASAL_DENDRITE'],
+        nearest_sample=nearest_sample)
 
     # Return the sample along the basal dendrites that it is very close the axon initial sample
     return nearest_sample
@@ -431,8 +493,8 @@ def find_nearest_apical_dendritic_sample_to_basal_dendrite(morphology,
     """
 
     # Find the nearest sample between the dendrite initial sample and the apical dendrite
-    nearest_sample = find_nearest_sample_along_section(
-        point=basal_dendrite.samples[0].point, section=morphology.apical_dendrite)
+    nearest_sample = find_nearest_sample_in_morphology(
+        morphology, basal_dendrite.samples[0].point, arbor_types=['APICAL_DENDRITE'])
 
     # Return the nearest sample found
     return nearest_sample
@@ -453,20 +515,14 @@ def find_nearest_basal_dendritic_sample_to_basal_dendrite(morphology,
         The nearest sample on a basal dendrite to the given one.
     """
 
-    # A reference to the nearest sample found
-    # The initial value is set to None to indicate no samples found so far
-    nearest_sample = None
-
-    for dendrite in morphology.dendrites:
-
-        # If the @basal_dendrite is the same as the @dendrite, then skip the check
-        if dendrite.id == basal_dendrite.id:
-            continue
+    # Skip the given @basal_dendrite and any other dendrite with the same id
+    excluded_dendrites = [dendrite for dendrite in morphology.dendrites
+                          if dendrite.id == basal_dendrite.id]
 
-        # Find the nearest sample between the dendrite initial sample and the other basal dendrite
-        nearest_sample = find_nearest_sample_along_section(
-            point=basal_dendrite.samples[0].point, section=dendrite,
-            nearest_sample_found=nearest_sample)
+    # Find the nearest sample between the dendrite initial sample and the other basal dendrites
+    nearest_sample = find_nearest_sample_in_morphology(
+        morphology, basal_dendrite.samples[0].point, arbor_types=['BASAL_DENDRITE'],
+        excluded_arbors=excluded_dendrites)
 
     # Return the nearest sample found
     return nearest_sample
@@ -523,6 +579,9 @@ def verify_axon_connection_to_soma(morphology):
         # The sample should have a smaller radius to avoid the extrusion artifacts
         morphology.axon.samples[0].radius = nearest_sample.radius * 0.5
 
+        # The axon initial sample is moved, the spatial index must be rebuilt
+        invalidate_morphology_spatial_index(morphology)
+
         # The axon is found not connected to the soma
         return
 
@@ -560,6 +619,9 @@ def verify_axon_connection_to_soma(morphology):
             # The sample should have a smaller radius to avoid the extrusion artifacts
             morphology.axon.samples[0].radius = nearest_sample.radius * 0.5
 
+            # The axon initial sample is moved, the spatial index must be rebuilt
+            invalidate_morphology_spatial_index(morphology)
+
             # The axon is found to be intersecting with the apical dendrite
             return
 
@@ -591,6 +653,9 @@ def verify_axon_connection_to_soma(morphology):
         # The sample should have a smaller radius to avoid the extrusion artifacts
         morphology.axon.samples[0].radius = nearest_sample.radius * 0.5
 
+        # The axon initial sample is moved, the spatial index must be rebuilt
+        invalidate_morphology_spatial_index(morphology)
+
         # The axon is found to be intersecting with the apical dendrite
         return
 
@@ -662,6 +727,9 @@ def verify_basal_dendrites_connection_to_soma(morphology):
             basal_dendrite.samples[0].point = \
                 basal_dendrite.samples[0].point.normalized() * maximum_arbor_distance
 
+            # The initial sample is moved, the spatial index must be rebuilt
+            invalidate_morphology_spatial_index(morphology)
+
             # Mark the basal dendrite CONNECTED from the soma
             basal_dendrite.connected_to_soma = True
 
@@ -674,13 +742,17 @@ def verify_basal_dendrites_connection_to_soma(morphology):
         nmv.logger.detail('NOTE: The basal dendrite [%d] @ section [%d] is connected to the soma' %
                           (i_basal_dendrite, basal_dendrite.id))
 
+    # Find all the intersections between the basal dendrites and the other arbors at once
+    # NOTE: A basal dendrite intersecting with another basal dendrite is reported only if the other
+    # basal dendrite has a larger radius
+    intersecting_apical_dendrite, intersecting_basal_dendrites = \
+        nmv.skeleton.ops.find_intersecting_basal_dendrites(
+            morphology, soma_radius=morphology.soma.mean_radius)
+
     for i_basal_dendrite, basal_dendrite in enumerate(morphology.dendrites):
 
         # Verify if the axon intersects with the apical dendrite
-        if nmv.skeleton.ops.dendrite_intersects_apical_dendrite(
-                dendrite=basal_dendrite,
-                apical_dendrite=morphology.apical_dendrite,
-                soma_radius=morphology.soma.mean_radius):
+        if i_basal_dendrite in intersecting_apical_dendrite:
 
             # Mark the basal dendrite connected to the soma
             basal_dendrite.connected_to_soma = False
@@ -688,11 +760,7 @@ def verify_basal_dendrites_connection_to_soma(morphology):
             continue
 
         # Is the basal dendrite intersecting with another basal dendrite !
-        # NOTE: The intersection function returns a positive result if this input basal
-        # dendrite is intersecting with another basal dendrite with largest radius
-        if nmv.skeleton.ops.basal_dendrite_intersects_basal_dendrite(
-                dendrite=basal_dendrite, dendrites=morphology.dendrites,
-                soma_radius=morphology.soma.mean_radius):
+        if i_basal_dendrite in intersecting_basal_dendrites:
 
             # Mark the basal dendrite connected to the soma
             basal_dendrite.connected_to_soma = False
@@ -712,6 +780,9 @@ def update_arbors_connection_to_soma(morphology):
         A given morphology skeleton.
     """
 
+    # The samples might have been changed since the last verification, rebuild the spatial index
+    invalidate_morphology_spatial_index(morphology)
+
     # If the apical dendrite exists, then set its connectivity to True directly
     if morphology.apical_dendrite is not None:
 
@@ -139,6 +139,75 @@ def apply_operation_to_arbor_conditionally(*args):
             apply_operation_to_arbor_conditionally(*section_args)
 
 
+####################################################################################################
+# @get_arbor_sections
+####################################################################################################
+def get_arbor_sections(arbor):
+    """Gets all the sections of an arbor in a depth-first order without recursion, every parent
+    precedes its children.
+
+    :param arbor:
+        The root section of the arbor.
+    :return:
+        A list of the sections of the arbor.
+    """
+
+    sections = list()
+    if arbor is None:
+        return sections
+
+    stack = [arbor]
+    while stack:
+        section = stack.pop()
+        sections.append(section)
+        if section.children is not None:
+            stack.extend(reversed(section.children))
+    return sections
+
+
+####################################################################################################
+# @get_morphology_sections
+####################################################################################################
+def get_morphology_sections(morphology):
+    """Gets all the sections of a morphology in a depth-first order without recursion, in the same
+    order of the arbors as @apply_operation_to_morphology.
+
+    :param morphology:
+        A given morphology.
+    :return:
+        A list of the sections of the morphology.
+    """
+
+    sections = get_arbor_sections(morphology.apical_dendrite)
+    if morphology.dendrites is not None:
+        for dendrite in morphology.dendrites:
+            sections.extend(get_arbor_sections(dendrite))
+    sections.extend(get_arbor_sections(morphology.axon))
+    return sections
+
+
+####################################################################################################
+# @get_morphology_number_samples
+####################################################################################################
+def get_morphology_number_samples(morphology):
+    """Gets the number of samples of a morphology, without building the samples of the sections
+    that are loaded lazily.
+
+    :param morphology:
+        A given morphology.
+    :return:
+        The number of samples of all the sections of the morphology.
+    """
+
+    number_samples = 0
+    for section in get_morphology_sections(morphology):
+        if section.samples_view is not None:
+            number_samples += len(section.samples_view)
+        elif section.samples is not None:
+            number_samples += len(section.samples)
+    return number_samples
+
+
 ####################################################################################################
 # @apply_operation_to_morphology
 ####################################################################################################
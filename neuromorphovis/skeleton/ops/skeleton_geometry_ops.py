@@ -54,6 +54,20 @@ def compute_section_bounding_box(section,
         Return value for the p_max.
     """
 
+    # If the samples of the section are not built yet, use the points of its view directly
+    if section.samples_view is not None:
+
+        # Get the bounds of the view
+        section_p_min, section_p_max = section.samples_view.get_bounding_box()
+
+        # Update the minimum and maximum
+        for i in range(3):
+            p_min[i] = min(p_min[i], section_p_min[i])
+            p_max[i] = max(p_max[i], section_p_max[i])
+
+        # Done
+        return
+
     # Iterate over all the samples of the section and get the min and max ones
     for sample in section.samples:
 
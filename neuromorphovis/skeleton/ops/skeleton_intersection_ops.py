@@ -23,6 +23,170 @@ __maintainer__  = "Marwan Abdellah"
 __email__       = "marwan.abdellah@epfl.ch"
 __status__      = "Production"
 
+# System imports
+import numpy
+
+
+####################################################################################################
+# @project_points_on_soma
+####################################################################################################
+def project_points_on_soma(points,
+                           radii,
+                           soma_radius):
+    """Projects a group of points and their radii onto the surface of the soma sphere.
+
+    The radii are scaled based on [ tan(angle) = r1/x1 = r2/x2 ].
+
+    :param points:
+        An Nx3 array of points.
+    :param radii:
+        An array of N radii.
+    :param soma_radius:
+        The radius of the soma.
+    :return:
+        A tuple of the Nx3 unit directions of the points and their N scaled radii.
+    """
+
+    points = numpy.asarray(points, dtype=numpy.float64).reshape(-1, 3)
+    radii = numpy.asarray(radii, dtype=numpy.float64)
+    lengths = numpy.linalg.norm(points, axis=1)
+
+    # The points located at the origin have no direction, they never intersect
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        directions = points / lengths[:, None]
+        scaled_radii = radii * (soma_radius / lengths)
+
+    return directions, scaled_radii
+
+
+####################################################################################################
+# @compute_soma_surface_collisions_matrix
+####################################################################################################
+def compute_soma_surface_collisions_matrix(points_1,
+                                           radii_1,
+                                           points_2,
+                                           radii_2,
+                                           soma_radius):
+    """Checks if the points of two groups intersect along the soma surface, all pairs at once.
+
+    Every point is mapped to the soma sphere, and two points intersect if the arc distance between
+    their projections is less than the sum of their scaled radii.
+
+    :param points_1:
+        An Nx3 array of the points of the first group.
+    :param radii_1:
+        An array of the N radii of the first group.
+    :param points_2:
+        An Mx3 array of the points of the second group.
+    :param radii_2:
+        An array of the M radii of the second group.
+    :param soma_radius:
+        The radius of the soma.
+    :return:
+        An NxM boolean matrix, set to True where the two points intersect.
+    """
+
+    directions_1, scaled_radii_1 = project_points_on_soma(points_1, radii_1, soma_radius)
+    directions_2, scaled_radii_2 = project_points_on_soma(points_2, radii_2, soma_radius)
+
+    # The arc distances between the projected points
+    arc_lengths = numpy.arccos(
+        numpy.clip(numpy.dot(directions_1, directions_2.T), -1.0, 1.0)) * soma_radius
+
+    with numpy.errstate(invalid='ignore'):
+        return arc_lengths < scaled_radii_1[:, None] + scaled_radii_2[None, :]
+
+
+####################################################################################################
+# @get_arbors_initial_samples
+####################################################################################################
+def get_arbors_initial_samples(arbors):
+    """Returns the points and the radii of the initial samples of a list of arbors as arrays.
+
+    :param arbors:
+        A list of arbors.
+    :return:
+        A tuple of the Nx3 array of the points and the array of the N radii.
+    """
+
+    points = numpy.array([tuple(arbor.samples[0].point) for arbor in arbors],
+                         dtype=numpy.float64).reshape(-1, 3)
+    radii = numpy.array([arbor.samples[0].radius for arbor in arbors], dtype=numpy.float64)
+    return points, radii
+
+
+####################################################################################################
+# @compute_soma_surface_collisions
+####################################################################################################
+def compute_soma_surface_collisions(morphology,
+                                    soma_radius,
+                                    profile_points=None,
+                                    profile_point_radius=1.0,
+                                    profile_point_to_arbor_radius=2.5):
+    """Finds all the intersections between the arbors and the profile points along the soma surface
+    in a single call.
+
+    :param morphology:
+        A given morphology.
+    :param soma_radius:
+        The radius of the soma.
+    :param profile_points:
+        A list of profile points, if None, the profile points of the soma are used.
+    :param profile_point_radius:
+        The radius of a profile point when it is tested against the other profile points.
+    :param profile_point_to_arbor_radius:
+        The radius of a profile point when it is tested against the arbors.
+    :return:
+        A dictionary with the following keys:
+        'arbors': the list of the root arbors, the apical dendrite, the basal dendrites and axon,
+        'arbors_pairs': a list of the (i, j) indices of the intersecting arbors, where i < j,
+        'profile_points_pairs': a list of the (i, j) indices of the intersecting profile points,
+        where i < j,
+        'profile_points_arbors_pairs': a list of the (i, k) indices of the profile points and the
+        arbors that intersect.
+    """
+
+    # The root arbors
+    arbors = list()
+    if morphology.apical_dendrite is not None:
+        arbors.append(morphology.apical_dendrite)
+    if morphology.dendrites is not None:
+        arbors.extend(morphology.dendrites)
+    if morphology.axon is not None:
+        arbors.append(morphology.axon)
+    arbors_points, arbors_radii = get_arbors_initial_samples(arbors)
+
+    # The profile points
+    if profile_points is None and morphology.soma is not None:
+        profile_points = morphology.soma.profile_points
+    if profile_points is None:
+        profile_points = list()
+    points = numpy.array([tuple(point) for point in profile_points],
+                         dtype=numpy.float64).reshape(-1, 3)
+
+    # The arbors against each other
+    arbors_matrix = compute_soma_surface_collisions_matrix(
+        arbors_points, arbors_radii, arbors_points, arbors_radii, soma_radius)
+
+    # The profile points against each other
+    profile_points_matrix = compute_soma_surface_collisions_matrix(
+        points, numpy.full(len(points), profile_point_radius), points,
+        numpy.full(len(points), profile_point_radius), soma_radius)
+
+    # The profile points against the arbors
+    profile_points_arbors_matrix = compute_soma_surface_collisions_matrix(
+        points, numpy.full(len(points), profile_point_to_arbor_radius), arbors_points,
+        arbors_radii, soma_radius)
+
+    return {'arbors': arbors,
+            'arbors_pairs':
+                [tuple(pair) for pair in numpy.argwhere(numpy.triu(arbors_matrix, 1)).tolist()],
+            'profile_points_pairs':
+                [tuple(pair) for pair in
+                 numpy.argwhere(numpy.triu(profile_points_matrix, 1)).tolist()],
+            'profile_points_arbors_pairs':
+                [tuple(pair) for pair in numpy.argwhere(profile_points_arbors_matrix).tolist()]}
+
 
 ####################################################################################################
 # @branches_intersect
@@ -45,37 +209,10 @@ def branches_intersect(branch_1,
         True or False.
     """
 
-    # Get the initial segment (is) points of the two branches
-    is_point_1 = branch_1.samples[0].point
-    is_point_2 = branch_2.samples[0].point
-
-    # Get the initial segments radii of the two branches
-    is_radius_1 = branch_1.samples[0].radius
-    is_radius_2 = branch_2.samples[0].radius
-
-    # Get the directions of the initial segments of the two branches
-    is_direction_1 = is_point_1.normalized()
-    is_direction_2 = is_point_2.normalized()
-
-    # Compute the mapping radii (i.e. the scale required to connect the branch to the soma radius)
-    scaled_point_1 = is_direction_1 * soma_radius
-    scaled_point_2 = is_direction_2 * soma_radius
-
-    # Compute the scaled radii based on [ tan(angle) = r1/x1 = r2/x2 ]
-    scaled_radius1 = is_radius_1 * (scaled_point_1.length / is_point_1.length)
-    scaled_radius2 = is_radius_2 * (scaled_point_2.length / is_point_2.length)
-
-    # Compute the arc distance between the two scaled points
-    arc_length = scaled_point_1.angle(scaled_point_2) * soma_radius
-
-    # If the distance between the centers is less than the radii sum, then they intersect
-    if arc_length < (scaled_radius1 + scaled_radius2) :
-
-        # Positive intersection
-        return True
-
-    # Negative intersection, the branches do not intersect at all
-    return False
+    # Map the initial segments of the two branches to the soma sphere and test them
+    points, radii = get_arbors_initial_samples([branch_1, branch_2])
+    return bool(compute_soma_surface_collisions_matrix(
+        points[:1], radii[:1], points[1:], radii[1:], soma_radius)[0, 0])
 
 
 ####################################################################################################
@@ -106,32 +243,14 @@ def profile_points_intersect(point_1,
         True or False.
     """
 
-    # Initial segments (is) directions
-    is_direction_1 = point_1.normalized()
-    is_direction_2 = point_2.normalized()
-
-    # Compute the map (scale to connect the branch to the soma radius)
-    scaled_point_1 = is_direction_1 * soma_radius
-    scaled_point_2 = is_direction_2 * soma_radius
+    # Avoid the duplication, only the intersections with the next points are reported
+    if index_2 <= index_1:
+        return False
 
-    # Compute the scaled radii based on [ tan(angle) = r1/x1 = r2/x2 ]
-    scaled_radius_1 = profile_point_radius * (scaled_point_1.length / point_1.length)
-    scaled_radius_2 = profile_point_radius * (scaled_point_2.length / point_2.length)
-
-    # Compute the arc distance between the two scaled points
-    arc_length = scaled_point_1.angle(scaled_point_2) * soma_radius
-
-    # If the distance between the centers is less than the radii sum, then they intersect
-    if arc_length < (scaled_radius_1 + scaled_radius_2):
-
-        # Positive intersection, but check the indices to avoid duplication
-        if index_2 > index_1:
-
-            # Positive intersection
-            return True
-
-    # Negative intersection
-    return False
+    # Map the two profile points to the soma sphere and test them
+    return bool(compute_soma_surface_collisions_matrix(
+        [tuple(point_1)], [profile_point_radius], [tuple(point_2)], [profile_point_radius],
+        soma_radius)[0, 0])
 
 
 ####################################################################################################
@@ -157,20 +276,18 @@ def profile_point_intersect_other_point(profile_point,
         True or False.
     """
 
-    # Repeat this operation for every profile point
     # NOTE: The given profile point is the primary profile point and therefore it has priority and
-    # the other profile points given in the list 'profile_points' are secondary.
-    for i, secondary_profile_point in enumerate(profile_points):
+    # the other profile points given in the list 'profile_points' are secondary. Only the secondary
+    # points that come after the primary one are checked to avoid duplications.
+    secondary_profile_points = [tuple(point) for point in
+                                profile_points[profile_point_index + 1:]]
+    if len(secondary_profile_points) == 0:
+        return False
 
-        # Check if the primary and the secondary profile points intersect or not.
-        if profile_points_intersect(
-                profile_point, secondary_profile_point, profile_point_index, i, soma_radius):
-
-            # Positive intersection
-            return True
-
-    # Negative intersection
-    return False
+    # Check all the secondary profile points at once
+    return bool(compute_soma_surface_collisions_matrix(
+        [tuple(profile_point)], [1.0], secondary_profile_points,
+        [1.0] * len(secondary_profile_points), soma_radius).any())
 
 
 ####################################################################################################
@@ -195,37 +312,10 @@ def point_branch_intersect(point,
         True or False.
     """
 
-    # Get a reference to the first sample of the initial segment of the branch and the profile point
-    branch_point = branch.samples[0].point
-    profile_point = point
-
-    # Get their radii, assuming that the profile point radius is set to 1.0
-    branch_radius = branch.samples[0].radius
-
-    # Get their directions
-    branch_point_direction = branch_point.normalized()
-    profile_point_direction = profile_point.normalized()
-
-    # Compute the map (scale to connect the branch to the soma radius)
-    branch_scaled_point = branch_point_direction * soma_radius
-    profile_scaled_point = profile_point_direction * soma_radius
-
-    # Compute the scaled radii based on [ tan(angle) = r1/x1 = r2/x2 ]
-    branch_point_scaled_radius = branch_radius * (branch_scaled_point.length / branch_point.length)
-    profile_point_scaled_radius = profile_point_radius * \
-                                  (profile_scaled_point.length / profile_point.length)
-
-    # Compute the arc distance between the two scaled points
-    arc_length = branch_scaled_point.angle(profile_scaled_point) * soma_radius
-
-    # If the distance between the centers is less than the radii sum, then they intersect
-    if arc_length < (branch_point_scaled_radius + profile_point_scaled_radius):
-
-        # Positive intersection
-        return True
-
-    # Negative intersection
-    return False
+    # Map the profile point and the initial segment of the branch to the soma sphere and test them
+    branch_points, branch_radii = get_arbors_initial_samples([branch])
+    return bool(compute_soma_surface_collisions_matrix(
+        [tuple(point)], [profile_point_radius], branch_points, branch_radii, soma_radius)[0, 0])
 
 
 ###################################################################################################
@@ -247,17 +337,15 @@ def axon_intersects_dendrites(axon,
         True or False.
     """
 
-    # Check if the axon intersects with any dendrite
-    for dendrite in dendrites:
-
-        # Branch intersection test
-        if branches_intersect(dendrite, axon, soma_radius):
+    # Ensure the presence of the dendrites
+    if dendrites is None or len(dendrites) == 0:
+        return False
 
-            # Intersection happens
-            return True
-
-    # No intersection
-    return False
+    # Check if the axon intersects with any dendrite, all the dendrites at once
+    axon_points, axon_radii = get_arbors_initial_samples([axon])
+    dendrites_points, dendrites_radii = get_arbors_initial_samples(dendrites)
+    return bool(compute_soma_surface_collisions_matrix(
+        axon_points, axon_radii, dendrites_points, dendrites_radii, soma_radius).any())
 
 
 ####################################################################################################
@@ -337,29 +425,68 @@ def basal_dendrite_intersects_basal_dendrite(dendrite,
         True or False.
     """
 
-    # Check if the primary dendrite intersects with any of the other secondary dendrites
-    for secondary_dendrite in dendrites:
+    # The dendrite cannot intersect with itself
+    secondary_dendrites = [secondary_dendrite for secondary_dendrite in dendrites
+                           if secondary_dendrite.id != dendrite.id]
+    if len(secondary_dendrites) == 0:
+        return False
 
-        # The dendrite cannot intersect with itself, continue
-        if dendrite.id == secondary_dendrite.id:
-            continue
+    # Check the intersection between the primary and all the secondary dendrites at once
+    primary_points, primary_radii = get_arbors_initial_samples([dendrite])
+    secondary_points, secondary_radii = get_arbors_initial_samples(secondary_dendrites)
+    intersections = compute_soma_surface_collisions_matrix(
+        primary_points, primary_radii, secondary_points, secondary_radii, soma_radius)[0]
 
-        # Check the intersection between the primary and the secondary dendrites
-        if branches_intersect(dendrite, secondary_dendrite, soma_radius):
+    # The intersection is true only if the radius of the primary dendrite is less than the
+    # secondary one
+    return bool((intersections & (primary_radii[0] < secondary_radii)).any())
 
-            # If the radius of the primary dendrite is less than the secondary one, then the
-            # intersection is true
-            primary_radius = dendrite.samples[0].radius
-            secondary_radius = secondary_dendrite.samples[0].radius
 
-            # Compare the radii
-            if primary_radius < secondary_radius:
+####################################################################################################
+# @find_intersecting_basal_dendrites
+####################################################################################################
+def find_intersecting_basal_dendrites(morphology,
+                                      soma_radius):
+    """Finds all the basal dendrites that intersect with the apical dendrite or with a thicker basal
+    dendrite, in a single call, see @compute_soma_surface_collisions.
+
+    :param morphology:
+        A given morphology.
+    :param soma_radius:
+        The radius of the soma of the neuron.
+    :return:
+        A tuple of two sets of the indices of the basal dendrites in the morphology, the first has
+        the dendrites that intersect with the apical dendrite, and the second has the dendrites
+        that intersect with a thicker basal dendrite.
+    """
 
-                # The primary dendrite intersects with the secondary one and has less radius,
-                # then the intersection exists
-                return True
+    # Only the arbors are tested
+    collisions = compute_soma_surface_collisions(morphology, soma_radius, profile_points=list())
+    arbors = collisions['arbors']
 
-    # No intersection
-    return False
+    # The indices of the basal dendrites in the morphology
+    dendrites_indices = dict()
+    if morphology.dendrites is not None:
+        for i, dendrite in enumerate(morphology.dendrites):
+            dendrites_indices[id(dendrite)] = i
+
+    intersecting_apical_dendrite = set()
+    intersecting_basal_dendrites = set()
+    for i, j in collisions['arbors_pairs']:
+        for primary, secondary in ((arbors[i], arbors[j]), (arbors[j], arbors[i])):
+
+            # Only the basal dendrites are reported
+            if id(primary) not in dendrites_indices:
+                continue
+            index = dendrites_indices[id(primary)]
+
+            # Intersecting with the apical dendrite
+            if secondary is morphology.apical_dendrite:
+                intersecting_apical_dendrite.add(index)
 
+            # Intersecting with a thicker basal dendrite
+            elif id(secondary) in dendrites_indices and secondary.id != primary.id and \
+                    primary.samples[0].radius < secondary.samples[0].radius:
+                intersecting_basal_dendrites.add(index)
 
+    return intersecting_apical_dendrite, intersecting_basal_dendrites
@@ -25,15 +25,255 @@ __status__      = "Production"
 
 
 # System imports
-import os, copy, math
+import os, math
+import numpy
+
+# Blender imports
+from mathutils import Vector
 
 # Internal import
 import neuromorphovis as nmv
 import neuromorphovis.consts
+import neuromorphovis.enums
 import neuromorphovis.geometry
 import neuromorphovis.skeleton
 
 
+####################################################################################################
+# @compute_resampled_samples
+####################################################################################################
+def compute_resampled_samples(points,
+                              radii,
+                              sections_offsets,
+                              method=nmv.enums.Skeletonization.Resampling.FIXED_STEP,
+                              resampling_distance=2.5,
+                              radius_factor=1.0,
+                              angle_step=math.radians(15.0),
+                              minimum_distance=0.1):
+    """Resamples the samples of many sections at once, given as contiguous arrays.
+
+    The original samples are kept, and every segment that is longer than its resampling step is
+    divided evenly, so no segment of the resampled sections is longer than its step. The new
+    samples are interpolated linearly along the arc length of their segments, as well as their
+    radii. The resampling step of a segment depends on the method:
+
+    * FIXED_STEP: the resampling distance.
+    * RADIUS_ADAPTIVE: the radius factor times the smaller radius of the two samples of the
+      segment, so the thin branches are sampled more densely than the thick ones.
+    * ANGLE_ADAPTIVE: the resampling distance divided by (1 + angle / angle step), where the angle
+      is the largest turning angle of the section at the two samples of the segment, so the
+      sections are sampled more densely where they bend.
+
+    The step is never smaller than the minimum distance.
+
+    :param points:
+        An (N, 3) array of the points of the samples of all the sections.
+    :param radii:
+        An (N) array of the radii of the samples.
+    :param sections_offsets:
+        An (S + 1) array of the offsets of the samples of every section.
+    :param method:
+        The resampling method, see @nmv.enums.Skeletonization.Resampling.
+    :param resampling_distance:
+        The resampling distance of the fixed step and angle adaptive methods, in microns.
+    :param radius_factor:
+        The factor of the radii of the radius adaptive method.
+    :param angle_step:
+        The turning angle, in radians, that adds one subdivision of the step in the angle adaptive
+        method.
+    :param minimum_distance:
+        The minimum resampling step, in microns.
+    :return:
+        A tuple of the resampled points, the resampled radii, the offsets of the resampled
+        sections and an array of the indices of the original samples of the resampled ones, -1
+        for the new samples.
+    """
+
+    points = numpy.asarray(points, dtype=numpy.float64).reshape(-1, 3)
+    radii = numpy.asarray(radii, dtype=numpy.float64)
+    sections_offsets = numpy.asarray(sections_offsets, dtype=numpy.int64)
+    number_samples = len(radii)
+
+    # The segments between every sample and the next one, those crossing the sections are invalid
+    segments = numpy.diff(points, axis=0)
+    lengths = numpy.linalg.norm(segments, axis=1)
+    valid = numpy.ones(len(lengths), dtype=bool)
+    borders = sections_offsets[1:-1] - 1
+    valid[borders[(borders >= 0) & (borders < len(lengths))]] = False
+    valid &= lengths > 0.0
+
+    # The resampling step of every segment
+    if method == nmv.enums.Skeletonization.Resampling.RADIUS_ADAPTIVE:
+        steps = radius_factor * numpy.minimum(radii[:-1], radii[1:])
+
+    elif method == nmv.enums.Skeletonization.Resampling.ANGLE_ADAPTIVE:
+
+        # The turning angle of the sections at every sample between two valid segments
+        angles = numpy.zeros(number_samples)
+        if len(lengths) > 1:
+            joints = valid[:-1] & valid[1:]
+            cosines = numpy.einsum('ij,ij->i', segments[:-1][joints], segments[1:][joints]) / \
+                (lengths[:-1][joints] * lengths[1:][joints])
+            angles[1:-1][joints] = numpy.arccos(numpy.clip(cosines, -1.0, 1.0))
+
+        # Refine the segments around the bends
+        steps = resampling_distance / (1.0 + numpy.maximum(angles[:-1], angles[1:]) / angle_step)
+
+    else:
+        steps = numpy.full(len(lengths), float(resampling_distance))
+    steps = numpy.maximum(steps, minimum_distance)
+
+    # The number of the new samples of every segment, nothing is added after the last sample
+    subdivisions = numpy.ones(len(lengths), dtype=numpy.int64)
+    subdivisions[valid] = numpy.ceil(lengths[valid] / steps[valid]).astype(numpy.int64)
+    new_samples_counts = numpy.zeros(number_samples, dtype=numpy.int64)
+    new_samples_counts[:-1] = subdivisions - 1
+
+    # The position of every original sample in the resampled arrays
+    positions = numpy.zeros(number_samples + 1, dtype=numpy.int64)
+    numpy.cumsum(1 + new_samples_counts, out=positions[1:])
+    number_resampled = int(positions[-1])
+
+    # The segment of every new sample and its fraction along the segment
+    new_segments = numpy.repeat(numpy.arange(number_samples), new_samples_counts)
+    first_new_samples = numpy.cumsum(new_samples_counts) - new_samples_counts
+    fractions = (numpy.arange(len(new_segments)) - first_new_samples[new_segments] + 1) / \
+        subdivisions[new_segments]
+
+    # Interpolate the new samples along their segments
+    new_positions = positions[new_segments] + \
+        (numpy.arange(len(new_segments)) - first_new_samples[new_segments] + 1)
+    resampled_points = numpy.zeros((number_resampled, 3))
+    resampled_radii = numpy.zeros(number_resampled)
+    sources = numpy.full(number_resampled, -1, dtype=numpy.int64)
+    resampled_points[positions[:-1]] = points
+    resampled_radii[positions[:-1]] = radii
+    sources[positions[:-1]] = numpy.arange(number_samples)
+    resampled_points[new_positions] = \
+        points[new_segments] + fractions[:, None] * segments[new_segments]
+    resampled_radii[new_positions] = \
+        radii[new_segments] + fractions * (radii[new_segments + 1] - radii[new_segments])
+
+    # The offsets of the resampled sections
+    resampled_offsets = positions[sections_offsets]
+
+    return resampled_points, resampled_radii, resampled_offsets, sources
+
+
+####################################################################################################
+# @resample_sections_list
+####################################################################################################
+def resample_sections_list(sections,
+                           method=nmv.enums.Skeletonization.Resampling.FIXED_STEP,
+                           resampling_distance=2.5,
+                           radius_factor=1.0,
+                           angle_step=math.radians(15.0),
+                           minimum_distance=0.1):
+    """Resamples a list of sections in a single vectorized pass, see @compute_resampled_samples.
+
+    The original samples of the sections are kept as they are, and the new samples are added
+    between them as auxiliary samples. The samples of every section are reordered afterwards.
+
+    :param sections:
+        A list of sections.
+    :param method:
+        The resampling method, see @nmv.enums.Skeletonization.Resampling.
+    :param resampling_distance:
+        The resampling distance of the fixed step and angle adaptive methods, in microns.
+    :param radius_factor:
+        The factor of the radii of the radius adaptive method.
+    :param angle_step:
+        The turning angle, in radians, that adds one subdivision in the angle adaptive method.
+    :param minimum_distance:
+        The minimum resampling step, in microns.
+    :return:
+        The number of the added samples.
+    """
+
+    # Gather the samples of all the sections in contiguous arrays
+    samples = list()
+    sections_offsets = [0]
+    for section in sections:
+        samples.extend(section.samples)
+        sections_offsets.append(len(samples))
+    if len(samples) == 0:
+        return 0
+
+    points = numpy.array([tuple(sample.point) for sample in samples], dtype=numpy.float64)
+    radii = numpy.array([sample.radius for sample in samples], dtype=numpy.float64)
+
+    # Resample them at once
+    resampled_points, resampled_radii, resampled_offsets, sources = compute_resampled_samples(
+        points, radii, sections_offsets, method=method, resampling_distance=resampling_distance,
+        radius_factor=radius_factor, angle_step=angle_step, minimum_distance=minimum_distance)
+
+    # Insert the new samples into their sections
+    resampled_points = resampled_points.tolist()
+    resampled_radii = resampled_radii.tolist()
+    sources = sources.tolist()
+    resampled_offsets = resampled_offsets.tolist()
+    for i, section in enumerate(sections):
+
+        first, last = resampled_offsets[i], resampled_offsets[i + 1]
+        if last - first == sections_offsets[i + 1] - sections_offsets[i]:
+            section.reorder_samples()
+            continue
+
+        section_samples = list()
+        for j in range(first, last):
+
+            # An original sample
+            if sources[j] >= 0:
+                section_samples.append(samples[sources[j]])
+
+            # A new sample, it takes the type of the previous one
+            else:
+                section_samples.append(nmv.skeleton.Sample(
+                    point=Vector(resampled_points[j]), radius=resampled_radii[j], id=-1,
+                    section=section, type=section_samples[-1].type))
+
+        section.samples = section_samples
+        section.reorder_samples()
+
+    return len(sources) - len(samples)
+
+
+####################################################################################################
+# @resample_morphology
+####################################################################################################
+def resample_morphology(morphology,
+                        method=nmv.enums.Skeletonization.Resampling.FIXED_STEP,
+                        resampling_distance=2.5,
+                        radius_factor=1.0,
+                        angle_step=math.radians(15.0),
+                        minimum_distance=0.1):
+    """Resamples all the sections of a morphology in a single call, see @resample_sections_list.
+
+    :param morphology:
+        A given morphology.
+    :param method:
+        The resampling method, see @nmv.enums.Skeletonization.Resampling.
+    :param resampling_distance:
+        The resampling distance of the fixed step and angle adaptive methods, in microns.
+    :param radius_factor:
+        The factor of the radii of the radius adaptive method.
+    :param angle_step:
+        The turning angle, in radians, that adds one subdivision in the angle adaptive method.
+    :param minimum_distance:
+        The minimum resampling step, in microns.
+    :return:
+        The number of the added samples.
+    """
+
+    # The samples are changed, the spatial index must be rebuilt
+    nmv.skeleton.ops.invalidate_morphology_spatial_index(morphology)
+
+    return resample_sections_list(
+        nmv.skeleton.ops.get_morphology_sections(morphology), method=method,
+        resampling_distance=resampling_distance, radius_factor=radius_factor,
+        angle_step=angle_step, minimum_distance=minimum_distance)
+
+
 ####################################################################################################
 # @resample_section
 ####################################################################################################
@@ -83,86 +323,27 @@ def resample_sections(section,
         if section_length < diameters:
             nmv.logger.log('\t\t\t* BAD SECTION')
 
-    # An index that will be used to keep track on the samples list
-    i = 0
-    while True:
-
-        # Break at the last sample
-        if i == len(section.samples) - 1:
-            break
-
-        # Compute the distance between the two samples
-        distance = (section.samples[i + 1].point - section.samples[i].point).length
-
-        # If the distance is greater than the DOUBLE of the resampling distance, then add the new
-        # samples at the exact distance
-        if distance > resampling_distance * 2:
-
-            # Compute the direction
-            direction = (section.samples[i + 1].point - section.samples[i].point).normalized()
-
-            # Compute the auxiliary sample point, use epsilon for floating point comparison
-            sample_point = \
-                section.samples[i].point + (direction * resampling_distance * nmv.consts.Math.EPSILON)
-
-            # Compute the auxiliary sample radius based on the previous and next samples
-            sample_radius = (section.samples[i + 1].radius + section.samples[i].radius) * 0.5
-
-            # Add the auxiliary sample, the id of the sample is set to -1 (auxiliary sample)
-            auxiliary_sample = nmv.skeleton.Sample(
-                point=sample_point, radius=sample_radius, id=-1, section=section,
-                type=section.samples[i].type)
-
-            # Update the samples list
-            section.samples.insert(i + 1, auxiliary_sample)
-
-            # Reset the index to start from the beginning
-            i = 0
-
-        # If the distance is greater than the resampling distance, then add a new sample midway
-        elif distance > resampling_distance and (distance < resampling_distance * 2):
-
-            # Compute the direction
-            direction = (section.samples[i + 1].point - section.samples[i].point).normalized()
-
-            # Compute the auxiliary sample point at the middle between the two samples
-            sample_point = section.samples[i].point + (direction * distance * 0.5)
-
-            # Compute the auxiliary sample radius
-            sample_radius = (section.samples[i + 1].radius + section.samples[i].radius) * 0.5
-
-            # Add the auxiliary sample, the id of the sample is set to -1
-            auxiliary_sample = nmv.skeleton.Sample(
-                point=sample_point, radius=sample_radius, id=-1, section=section,
-                type=section.samples[i].type)
-
-            # Update the samples list
-            section.samples.insert(i + 1, auxiliary_sample)
-
-            # Reset the index to start from the beginning
-            i = 0
-
-        else:
-
-            # Increment the counter to proceed along the section
-            i += 1
-
-    # After resampling the section, update the logical indexes of the samples
-    section.reorder_samples()
+    # Resample the section, no segment is longer than the resampling distance afterwards
+    resample_sections_list([section], resampling_distance=resampling_distance)
 
 
 ####################################################################################################
 # @resample_section_adaptively
 ####################################################################################################
-def resample_section_based_on_radius(section):
-    """Resample a given section based on the radius of its last sample.
-    This function resamples a section with a resampling distance
-    TODO: Implement this function
+def resample_section_based_on_radius(section,
+                                     radius_factor=1.0):
+    """Resample a given section with a resampling distance that is proportional to the radii of
+    its samples, so the thin segments are sampled more densely than the thick ones.
+
     :param section:
-    :return:
+        A given section to resample.
+    :param radius_factor:
+        The resampling distance of a segment is this factor times its smaller radius.
     """
 
-    return
+    resample_sections_list(
+        [section], method=nmv.enums.Skeletonization.Resampling.RADIUS_ADAPTIVE,
+        radius_factor=radius_factor)
 
 ####################################################################################################
 # @add_sample_at_section_center
@@ -198,6 +379,250 @@ def add_sample_at_section_center(section):
         section.reorder_samples()
 
 
+####################################################################################################
+# @compute_cleaned_samples
+####################################################################################################
+def compute_cleaned_samples(points,
+                            sections_offsets,
+                            root_sections,
+                            soma_center=(0.0, 0.0, 0.0),
+                            remove_internal_samples=True,
+                            remove_duplicate_samples=True,
+                            duplicate_threshold=1.0):
+    """Computes which samples of a group of sections must be removed, in a single pass.
+
+    The samples of all the sections are given in contiguous arrays, where the samples of the
+    section i are located between sections_offsets[i] and sections_offsets[i + 1].
+
+    The internal samples are the samples of a root section, except its first one, that are
+    closer to the soma center than the first sample. They are removed in order until the section
+    is left with two samples. If a root section ends with two samples, and the second one is closer
+    to the soma than the first one, the two samples are flipped.
+
+    The duplicate samples are the samples that are closer than the threshold to the last kept
+    sample along the section. The last sample of a section is never removed.
+
+    :param points:
+        An Nx3 array of the points of the samples.
+    :param sections_offsets:
+        An array of S + 1 offsets of the sections into the samples arrays.
+    :param root_sections:
+        An array of S booleans, set to True if the section is connected to the soma.
+    :param soma_center:
+        The center of the soma, the internal samples are detected based on their distance to it.
+    :param remove_internal_samples:
+        Remove the samples of the root sections that are located inside the soma.
+    :param remove_duplicate_samples:
+        Remove the duplicate samples.
+    :param duplicate_threshold:
+        The distance below which a sample is considered a duplicate, by default 1.0 micron.
+    :return:
+        A tuple of three arrays: the mask of the internal samples, the mask of the duplicate
+        samples and the mask of the sections that must be flipped.
+    """
+
+    points = numpy.asarray(points, dtype=numpy.float64).reshape(-1, 3)
+    sections_offsets = numpy.asarray(sections_offsets, dtype=numpy.int64)
+    root_sections = numpy.asarray(root_sections, dtype=bool)
+
+    number_samples = len(points)
+    number_sections = len(sections_offsets) - 1
+    internal = numpy.zeros(number_samples, dtype=bool)
+    duplicates = numpy.zeros(number_samples, dtype=bool)
+    flipped = numpy.zeros(number_sections, dtype=bool)
+    if number_samples == 0:
+        return internal, duplicates, flipped
+
+    # The section of every sample and its position along the section
+    counts = numpy.diff(sections_offsets)
+    section_index = numpy.repeat(numpy.arange(number_sections), counts)
+    positions = numpy.arange(number_samples) - sections_offsets[section_index]
+    firsts = numpy.minimum(sections_offsets[:-1], number_samples - 1)
+
+    if remove_internal_samples:
+
+        # The distances between the samples and the soma center
+        distances = numpy.linalg.norm(
+            points - numpy.asarray(soma_center, dtype=numpy.float64), axis=1)
+
+        # The samples of the root sections that are closer to the soma than the first one
+        candidates = root_sections[section_index] & (counts[section_index] > 2) & \
+            (positions > 0) & (distances < distances[firsts][section_index])
+
+        # Remove them in order, until the section is left with two samples
+        ranks = numpy.cumsum(candidates)
+        ranks -= numpy.concatenate(([0], ranks))[sections_offsets[:-1]][section_index]
+        internal = candidates & (ranks <= counts[section_index] - 2)
+
+        # The root sections that are left with two samples are flipped if the second one is
+        # closer to the soma than the first one
+        kept_counts = counts - numpy.bincount(
+            section_index[internal], minlength=number_sections)
+        kept = numpy.flatnonzero(~internal)
+        kept_offsets = numpy.concatenate(([0], numpy.cumsum(kept_counts)))
+        pairs = numpy.flatnonzero(root_sections & (kept_counts == 2))
+        flipped[pairs] = distances[kept[kept_offsets[pairs] + 1]] < \
+            distances[kept[kept_offsets[pairs]]]
+
+    if remove_duplicate_samples:
+
+        # The segments between the consecutive samples that are not internal
+        kept = numpy.flatnonzero(~internal)
+        kept_sections = section_index[kept]
+        kept_points = points[kept]
+        lengths = numpy.linalg.norm(numpy.diff(kept_points, axis=0), axis=1)
+        same_section = kept_sections[1:] == kept_sections[:-1]
+        last = numpy.ones(len(kept), dtype=bool)
+        last[:-1] = ~same_section
+
+        # The samples that end a short segment and are not the last ones of their sections
+        candidates = numpy.flatnonzero(
+            (lengths < duplicate_threshold) & same_section & ~last[1:]) + 1
+
+        # Resolve the chains of the short segments against the last kept sample, only the
+        # candidates and the samples following a removed one are visited
+        removed = numpy.zeros(len(kept), dtype=bool)
+        visited = -1
+        for i in candidates.tolist():
+            if i <= visited:
+                continue
+            anchor = kept_points[i - 1]
+            while not last[i] and \
+                    numpy.linalg.norm(kept_points[i] - anchor) < duplicate_threshold:
+                removed[i] = True
+                i += 1
+            visited = i
+        duplicates[kept[removed]] = True
+
+    return internal, duplicates, flipped
+
+
+####################################################################################################
+# @clean_sections_samples
+####################################################################################################
+def clean_sections_samples(sections,
+                           soma_center=(0.0, 0.0, 0.0),
+                           remove_internal_samples=True,
+                           remove_duplicate_samples=True,
+                           duplicate_threshold=1.0):
+    """Removes the internal and the duplicate samples of a list of sections in a single pass,
+    see @compute_cleaned_samples.
+
+    :param sections:
+        A list of sections.
+    :param soma_center:
+        The center of the soma, the internal samples are detected based on their distance to it.
+    :param remove_internal_samples:
+        Remove the samples of the root sections that are located inside the soma.
+    :param remove_duplicate_samples:
+        Remove the duplicate samples.
+    :param duplicate_threshold:
+        The distance below which a sample is considered a duplicate, by default 1.0 micron.
+    :return:
+        A report of the removed samples, a dictionary with the total number of the internal and
+        the duplicate samples, the number of the flipped sections and a list of the repaired
+        sections, each as a tuple of (section type, section id, internal samples, duplicate
+        samples, flipped).
+    """
+
+    # Gather the samples of all the sections in contiguous arrays
+    samples = list()
+    sections_offsets = [0]
+    root_sections = list()
+    for section in sections:
+        samples.extend(section.samples)
+        sections_offsets.append(len(samples))
+        root_sections.append(not section.has_parent())
+
+        # The root sections must have at least two samples
+        if remove_internal_samples and root_sections[-1] and len(section.samples) < 2:
+            nmv.logger.log('\t\t* ERROR: Section [%s: %d] has %s' % (
+                section.get_type_string(), section.id,
+                'NO samples' if len(section.samples) == 0 else 'only ONE sample'))
+
+    points = numpy.array([tuple(sample.point) for sample in samples],
+                         dtype=numpy.float64).reshape(-1, 3)
+
+    internal, duplicates, flipped = compute_cleaned_samples(
+        points, sections_offsets, root_sections, soma_center=soma_center,
+        remove_internal_samples=remove_internal_samples,
+        remove_duplicate_samples=remove_duplicate_samples,
+        duplicate_threshold=duplicate_threshold)
+
+    report = {'internal_samples': int(internal.sum()),
+              'duplicate_samples': int(duplicates.sum()),
+              'flipped_sections': int(flipped.sum()),
+              'sections': list()}
+
+    # Compact the changed sections
+    removed = internal | duplicates
+    changed = numpy.flatnonzero(
+        numpy.logical_or.reduceat(numpy.append(removed, False), sections_offsets[:-1]) &
+        (numpy.diff(sections_offsets) > 0) | flipped)
+    for i in changed.tolist():
+        section = sections[i]
+        first, last = sections_offsets[i], sections_offsets[i + 1]
+
+        section.samples = [samples[j] for j in range(first, last) if not removed[j]]
+        if flipped[i]:
+            section.samples.reverse()
+
+        number_internal = int(internal[first:last].sum())
+        number_duplicates = int(duplicates[first:last].sum())
+        if number_internal or flipped[i]:
+            nmv.logger.log('\t\t* REPAIRING: Removing internal sample, section [%s: %d]' %
+                           (section.get_type_string(), section.id))
+
+        report['sections'].append((section.get_type_string(), section.id,
+                                   number_internal, number_duplicates, bool(flipped[i])))
+
+    return report
+
+
+####################################################################################################
+# @clean_morphology_samples
+####################################################################################################
+def clean_morphology_samples(morphology,
+                             remove_internal_samples=True,
+                             remove_duplicate_samples=True,
+                             duplicate_threshold=1.0):
+    """Removes the samples located inside the soma and the duplicate samples of all the sections
+    of a morphology in a single pass, see @clean_sections_samples.
+
+    :param morphology:
+        A given morphology.
+    :param remove_internal_samples:
+        Remove the samples of the root sections that are located inside the soma.
+    :param remove_duplicate_samples:
+        Remove the duplicate samples.
+    :param duplicate_threshold:
+        The distance below which a sample is considered a duplicate, by default 1.0 micron.
+    :return:
+        A report of the removed samples, see @clean_sections_samples.
+    """
+
+    # The internal samples are detected based on their distance to the soma centroid
+    soma_center = (0.0, 0.0, 0.0)
+    if morphology.soma is not None and morphology.soma.centroid is not None:
+        soma_center = tuple(morphology.soma.centroid)
+
+    # The samples are changed, the spatial index must be rebuilt
+    nmv.skeleton.ops.invalidate_morphology_spatial_index(morphology)
+
+    report = clean_sections_samples(
+        nmv.skeleton.ops.get_morphology_sections(morphology), soma_center=soma_center,
+        remove_internal_samples=remove_internal_samples,
+        remove_duplicate_samples=remove_duplicate_samples,
+        duplicate_threshold=duplicate_threshold)
+
+    nmv.logger.log('\t* Cleaning: [%d] internal samples, [%d] duplicate samples, '
+                   '[%d] flipped sections' % (report['internal_samples'],
+                                              report['duplicate_samples'],
+                                              report['flipped_sections']))
+
+    return report
+
+
 ####################################################################################################
 # @remove_duplicate_samples
 ####################################################################################################
@@ -213,31 +638,12 @@ def remove_duplicate_samples(section,
         A threshold distance, by default 1.0 micron.
     """
 
-    # Iterate over all the samples along the section
-    for i, sample in enumerate(list(section.samples)):
-
-        # Ensure that we don't exceed the section length
-        if i == len(section.samples) - 2:
-            break
-
-        # Compute the distance between the two samples
-        distance = (section.samples[i + 1].point - section.samples[i].point).length
-
-        # If the distance is lower than the threshold
-        if distance < threshold:
-
-            # Then remove the duplicate sample
-            section.samples.remove(section.samples[i + 1])
-
-            # Repeat the process
-            remove_duplicate_samples(section=section, threshold=threshold)
-
-            # Due to the recursive call of the function, there are no more samples to process,
-            break
+    clean_sections_samples([section], remove_internal_samples=False,
+                           duplicate_threshold=threshold)
 
 
 ####################################################################################################
-# @remove_duplicate_samples
+# @remove_samples_inside_soma
 ####################################################################################################
 def remove_samples_inside_soma(section):
     """
@@ -250,6 +656,7 @@ def remove_samples_inside_soma(section):
 
     NOTE: Make sure that the section has at least two samples to avoid the meshing artifacts.
     NOTE: If the section has initially two samples and has internal sample, then flip the samples.
+    NOTE: To repair a whole morphology in a single pass, use @clean_morphology_samples.
 
     :param section:
         A given section to remove its internal samples that are located inside the soma.
@@ -261,73 +668,7 @@ def remove_samples_inside_soma(section):
         # Not a root section, as it has a parent, then RETURN
         return
 
-    # If the section has no samples, report this as an error and ignore this filter
-    if len(section.samples) == 0:
-
-        # Report the error
-        nmv.logger.log('\t\t* ERROR: Section [%s: %d] has NO samples' %
-              (section.get_type_string(), section.id))
-
-        # Return
-        return
-
-    # If the section has ONLY one sample, report this as an error and ignore this filter
-    elif len(section.samples) == 1:
-
-        # Report the error
-        nmv.logger.log('\t\t* ERROR: Section [%s: %d] has only ONE sample' %
-              (section.get_type_string(), section.id))
-
-        # Return
-        return
-
-    # Handle the case when the section has only two samples
-    elif len(section.samples) == 2:
-
-        # Make a copy of both samples along the section
-        sample_0 = copy.copy(section.samples[0])
-        sample_1 = copy.copy(section.samples[1])
-
-        # Compare the distances between the two samples and the origin
-        if sample_1.point.length < sample_0.point.length:
-
-            # Report the repair
-            nmv.logger.log('\t\t* REPAIRING: Removing internal sample, section [%s: %d]' %
-                  (section.get_type_string(), section.id))
-
-            # Flip the samples
-            section.samples[0] = sample_1
-            section.samples[1] = sample_0
-
-    # The section has more than TWO samples
-    else:
-
-        # Compute the minimal distance at which the samples with smaller distances will be filtered
-        minimal_distance = section.samples[0].point.length
-
-        # Iterate over the next samples
-        for i, sample in enumerate(list(section.samples)):
-
-            # Ignore the first sample
-            if i == 0:
-                continue
-
-            # Compare the distance between the sample and the origin to the minimal distance
-            if sample.point.length < minimal_distance:
-
-                # Remove the sample
-                section.samples.remove(sample)
-
-                # Report the repair
-                nmv.logger.log('\t\t* REPAIRING: Removing internal sample, section [%s: %d]' %
-                      (section.get_type_string(), section.id))
-
-                # After removing this sample, the section might have two samples only, so we
-                # recursively call this function and break afterwards.
-                remove_samples_inside_soma(section=section)
-
-                # Break
-                break
+    clean_sections_samples([section], remove_duplicate_samples=False)
 
 
 ####################################################################################################
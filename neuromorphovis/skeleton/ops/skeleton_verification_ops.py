@@ -305,6 +305,11 @@ def verify_basal_dendrites_connection_to_soma(morphology):
         A given morphology skeleton.
     """
 
+    # Find all the intersections between the basal dendrites and the other arbors at once
+    intersecting_apical_dendrite, intersecting_basal_dendrites = \
+        nmv.skeleton.ops.find_intersecting_basal_dendrites(
+            morphology, soma_radius=morphology.soma.mean_radius)
+
     # Verify dendrite by dendrite
     for i_basal_dendrite, basal_dendrite in enumerate(morphology.dendrites):
 
@@ -319,9 +324,7 @@ def verify_basal_dendrites_connection_to_soma(morphology):
         if morphology.apical_dendrite is not None:
 
             # Verify if the axon intersects with the apical dendrite
-            if nmv.skeleton.ops.dendrite_intersects_apical_dendrite(
-                    dendrite=basal_dendrite, apical_dendrite=morphology.apical_dendrite,
-                    soma_radius=morphology.soma.mean_radius):
+            if i_basal_dendrite in intersecting_apical_dendrite:
 
                 # Report the issue
                 nmv.logger.log('\t\t* WARNING: Section [%s: %d] intersects with section [%s: %d]' %
@@ -331,9 +334,7 @@ def verify_basal_dendrites_connection_to_soma(morphology):
         # Is the basal dendrite intersecting with another basal dendrite !
         # NOTE: The intersection function returns a positive result if this input basal
         # dendrite is intersecting with another basal dendrite with largest radius
-        if nmv.skeleton.ops.basal_dendrite_intersects_basal_dendrite(
-            dendrite=basal_dendrite, dendrites=morphology.dendrites,
-                soma_radius=morphology.soma.mean_radius):
+        if i_basal_dendrite in intersecting_basal_dendrites:
 
                 # Report the issue
                 nmv.logger.log('\t\t* WARNING: Section [%s: %d] intersects with section [%s: %d]' %
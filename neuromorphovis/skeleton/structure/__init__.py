@@ -24,8 +24,11 @@ __email__       = "marwan.abdellah@epfl.ch"
 __status__      = "Production"
 
 from .sample import *
+from .samples_view import *
 from .section import *
 from .soma import *
 from .morphology import *
+from .columnar_morphology import *
 from .spine import *
+from .spatial_index import *
 
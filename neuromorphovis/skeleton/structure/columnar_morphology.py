@@ -0,0 +1,513 @@
+####################################################################################################
+# Copyright (c) 2016 - 2018, EPFL / Blue Brain Project
+#               Marwan Abdellah <marwan.abdellah@epfl.ch>
+#
+# This file is part of NeuroMorphoVis <https://github.com/BlueBrain/NeuroMorphoVis>
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU General Public License as published by the Free Software Foundation, version 3 of the License.
+#
+# This Blender-based tool is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program.
+# If not, see <http://www.gnu.org/licenses/>.
+####################################################################################################
+
+__author__      = "Marwan Abdellah"
+__copyright__   = "Copyright (c) 2016 - 2018, Blue Brain Project / EPFL"
+__credits__     = ["Ahmet Bilgili", "Juan Hernando", "Stefan Eilemann"]
+__version__     = "1.0.0"
+__maintainer__  = "Marwan Abdellah"
+__email__       = "marwan.abdellah@epfl.ch"
+__status__      = "Production"
+
+# System imports
+import numpy
+
+# Blender imports
+from mathutils import Vector
+
+# Internal imports
+import neuromorphovis as nmv
+import neuromorphovis.skeleton
+
+
+####################################################################################################
+# ColumnarMorphology
+####################################################################################################
+class ColumnarMorphology:
+    """A columnar (struct-of-arrays) representation of the morphological skeleton.
+
+    Instead of a graph of sections and samples objects, the samples of all the sections are
+    stored in a single points array and a single radii array. The samples of the section [i] are
+    the rows offsets[i]:offsets[i + 1] of these arrays. The sections are stored in a depth-first
+    order, where every parent precedes its children, and the children of the section [i] are
+    children[children_offsets[i]:children_offsets[i + 1]].
+    """
+
+    ################################################################################################
+    # @__init__
+    ################################################################################################
+    def __init__(self,
+                 points,
+                 radii,
+                 samples_ids,
+                 sections_offsets,
+                 sections_ids,
+                 sections_types,
+                 sections_parents,
+                 axon_root=-1,
+                 dendrites_roots=None,
+                 apical_dendrite_root=-1,
+                 roots_parent_id=-1,
+                 soma=None,
+                 gid=None,
+                 mtype=None,
+                 label=None):
+        """Constructor
+
+        :param points:
+            An (N, 3) array of the points of all the samples of the morphology.
+        :param radii:
+            An (N) array of the radii of all the samples.
+        :param samples_ids:
+            An (N) array of the IDs of the samples, as given in the object model.
+        :param sections_offsets:
+            An (S + 1) array of the offsets of the samples of every section.
+        :param sections_ids:
+            An (S) array of the IDs of the sections, as given in the object model.
+        :param sections_types:
+            An (S) array of the types of the sections.
+        :param sections_parents:
+            An (S) array of the indices of the parents of the sections, -1 for the roots.
+        :param axon_root:
+            The index of the root section of the axon, -1 if the morphology has no axon.
+        :param dendrites_roots:
+            A list of the indices of the root sections of the basal dendrites.
+        :param apical_dendrite_root:
+            The index of the root section of the apical dendrite, -1 if it does not exist.
+        :param roots_parent_id:
+            The parent ID of the root sections, as given in the object model.
+        :param soma:
+            Morphology soma.
+        :param gid:
+            Morphology GID, if available.
+        :param mtype:
+            Morphology type, if available.
+        :param label:
+            Morphology label.
+        """
+
+        # Samples
+        self.points = numpy.ascontiguousarray(points, dtype=numpy.float64).reshape(-1, 3)
+        self.radii = numpy.ascontiguousarray(radii, dtype=numpy.float64)
+        self.samples_ids = numpy.ascontiguousarray(samples_ids, dtype=numpy.int64)
+
+        # Sections
+        self.sections_offsets = numpy.ascontiguousarray(sections_offsets, dtype=numpy.int64)
+        self.sections_ids = numpy.ascontiguousarray(sections_ids, dtype=numpy.int64)
+        self.sections_types = numpy.ascontiguousarray(sections_types, dtype=numpy.int8)
+        self.sections_parents = numpy.ascontiguousarray(sections_parents, dtype=numpy.int64)
+
+        # Children of the sections in a CSR layout
+        self.children_offsets, self.children = self.build_children_index(self.sections_parents)
+
+        # Arbors
+        self.axon_root = axon_root
+        self.dendrites_roots = list() if dendrites_roots is None else list(dendrites_roots)
+        self.apical_dendrite_root = apical_dendrite_root
+        self.roots_parent_id = roots_parent_id
+
+        # Soma
+        self.soma = soma
+
+        # Morphology GID, type and label
+        self.gid = gid
+        self.mtype = mtype
+        self.label = label
+
+    ################################################################################################
+    # @build_children_index
+    ################################################################################################
+    @staticmethod
+    def build_children_index(sections_parents):
+        """Builds the children index of the sections in a CSR layout.
+
+        :param sections_parents:
+            An array of the indices of the parents of the sections, -1 for the roots.
+        :return:
+            The offsets and the children arrays of the index.
+        """
+
+        # The number of sections
+        number_sections = len(sections_parents)
+
+        # The sections that have parents, and their parents
+        children = numpy.flatnonzero(sections_parents >= 0)
+        parents = sections_parents[children]
+
+        # Group the children by their parents, keeping their order
+        children = children[numpy.argsort(parents, kind='stable')]
+
+        # The offsets of the children of every section
+        offsets = numpy.zeros(number_sections + 1, dtype=numpy.int64)
+        numpy.cumsum(numpy.bincount(parents, minlength=number_sections), out=offsets[1:])
+
+        # Return the index
+        return offsets, children
+
+    ################################################################################################
+    # @from_morphology
+    ################################################################################################
+    @staticmethod
+    def from_morphology(morphology):
+        """Converts a NeuroMorphoVis morphology object into a columnar morphology.
+
+        The samples of the sections that are loaded with a samples view are copied directly from
+        the view without building them.
+
+        :param morphology:
+            A given morphology object.
+        :return:
+            A reference to the columnar morphology.
+        """
+
+        # The points, radii and IDs arrays of every section
+        sections_points = list()
+        sections_radii = list()
+        sections_samples_ids = list()
+
+        # The sections data
+        roots_parent_id = [-1]
+        sections_ids = list()
+        sections_types = list()
+        sections_parents = list()
+
+        def add_arbor(root):
+            """Adds the sections of an arbor in a depth-first order and returns the root index."""
+
+            root_index = len(sections_ids)
+            roots_parent_id[0] = root.parent_id
+            stack = [(root, -1)]
+            while stack:
+                section, parent_index = stack.pop()
+
+                # The samples, from the view if they are not built yet
+                if section.samples_view is not None:
+                    view = section.samples_view
+                    sections_points.append(numpy.asarray(view.points, dtype=numpy.float64))
+                    sections_radii.append(numpy.asarray(view.radii) * view.radius_scale)
+                    if view.samples_ids is not None:
+                        sections_samples_ids.append(
+                            numpy.asarray(view.samples_ids, dtype=numpy.int64))
+                    else:
+                        sections_samples_ids.append(numpy.arange(len(view)))
+                else:
+                    samples = section.samples
+                    sections_points.append(numpy.array(
+                        [tuple(sample.point) for sample in samples], dtype=numpy.float64))
+                    sections_radii.append(numpy.array(
+                        [sample.radius for sample in samples], dtype=numpy.float64))
+                    sections_samples_ids.append(numpy.array(
+                        [sample.id for sample in samples], dtype=numpy.int64))
+
+                # The section data
+                section_index = len(sections_ids)
+                sections_ids.append(section.id)
+                sections_types.append(int(section.type) if section.type is not None else -1)
+                sections_parents.append(parent_index)
+
+                # Visit the children in their order
+                for child in reversed(section.children):
+                    stack.append((child, section_index))
+
+            # Return the index of the root section
+            return root_index
+
+        # Axon
+        axon_root = -1
+        if morphology.axon is not None:
+            axon_root = add_arbor(morphology.axon)
+
+        # Basal dendrites
+        dendrites_roots = list()
+        if morphology.dendrites is not None:
+            for dendrite in morphology.dendrites:
+                dendrites_roots.append(add_arbor(dendrite))
+
+        # Apical dendrite
+        apical_dendrite_root = -1
+        if morphology.apical_dendrite is not None:
+            apical_dendrite_root = add_arbor(morphology.apical_dendrite)
+
+        # The offsets of the samples of every section
+        sections_offsets = numpy.zeros(len(sections_ids) + 1, dtype=numpy.int64)
+        numpy.cumsum([len(radii) for radii in sections_radii], out=sections_offsets[1:])
+
+        # Concatenate the samples of all the sections
+        if len(sections_ids) > 0:
+            points = numpy.concatenate([p.reshape(-1, 3) for p in sections_points])
+            radii = numpy.concatenate(sections_radii)
+            samples_ids = numpy.concatenate(sections_samples_ids)
+        else:
+            points = numpy.zeros((0, 3))
+            radii = numpy.zeros(0)
+            samples_ids = numpy.zeros(0, dtype=numpy.int64)
+
+        # Construct the columnar morphology
+        return ColumnarMorphology(
+            points=points, radii=radii, samples_ids=samples_ids,
+            sections_offsets=sections_offsets, sections_ids=sections_ids,
+            sections_types=sections_types, sections_parents=sections_parents,
+            axon_root=axon_root, dendrites_roots=dendrites_roots,
+            apical_dendrite_root=apical_dendrite_root, roots_parent_id=roots_parent_id[0],
+            soma=morphology.soma,
+            gid=morphology.gid, mtype=morphology.mtype, label=morphology.label)
+
+    ################################################################################################
+    # @to_morphology
+    ################################################################################################
+    def to_morphology(self,
+                      lazy=False):
+        """Converts the columnar morphology into a NeuroMorphoVis morphology object.
+
+        :param lazy:
+            If True, the sections hold views into the arrays of the columnar morphology and their
+            samples are only built when they are accessed for the first time.
+        :return:
+            A reference to the morphology object.
+        """
+
+        # Use native lists to construct the objects
+        offsets = self.sections_offsets.tolist()
+        sections_ids = self.sections_ids.tolist()
+        sections_types = self.sections_types.tolist()
+        sections_parents = self.sections_parents.tolist()
+        children_offsets = self.children_offsets.tolist()
+        children = self.children.tolist()
+
+        # Construct the sections
+        sections = list()
+        for i in range(len(sections_ids)):
+
+            # The samples of the section
+            first_sample, last_sample = offsets[i], offsets[i + 1]
+            if lazy:
+                samples = None
+                samples_view = nmv.skeleton.SamplesView(
+                    points=self.points[first_sample:last_sample],
+                    radii=self.radii[first_sample:last_sample],
+                    samples_ids=self.samples_ids[first_sample:last_sample])
+            else:
+                samples = self.build_samples(first_sample, last_sample, sections_types[i])
+                samples_view = None
+
+            # The parent ID
+            parent = sections_parents[i]
+            parent_id = sections_ids[parent] if parent >= 0 else self.roots_parent_id
+
+            # The children IDs
+            children_ids = [sections_ids[child] for child in
+                            children[children_offsets[i]:children_offsets[i + 1]]]
+
+            # Construct the section
+            sections.append(nmv.skeleton.Section(
+                id=sections_ids[i], parent_id=parent_id, children_ids=children_ids,
+                samples=samples, type=sections_types[i], samples_view=samples_view))
+
+        # Link the sections together
+        for i, section in enumerate(sections):
+            if sections_parents[i] >= 0:
+                section.parent = sections[sections_parents[i]]
+            for child in children[children_offsets[i]:children_offsets[i + 1]]:
+                section.children.append(sections[child])
+
+        # Get the arbors
+        axon = sections[self.axon_root] if self.axon_root >= 0 else None
+        dendrites = [sections[root] for root in self.dendrites_roots]
+        apical_dendrite = \
+            sections[self.apical_dendrite_root] if self.apical_dendrite_root >= 0 else None
+
+        # Construct the morphology
+        return nmv.skeleton.Morphology(
+            soma=self.soma, axon=axon, dendrites=dendrites, apical_dendrite=apical_dendrite,
+            gid=self.gid, mtype=self.mtype, label=self.label)
+
+    ################################################################################################
+    # @build_samples
+    ################################################################################################
+    def build_samples(self,
+                      first_sample,
+                      last_sample,
+                      sample_type=-1):
+        """Builds a list of NeuroMorphoVis samples from a range of the samples arrays.
+
+        :param first_sample:
+            The index of the first sample in the range.
+        :param last_sample:
+            The index after the last sample in the range.
+        :param sample_type:
+            The type of the samples.
+        :return:
+            A list of samples.
+        """
+
+        # Copy the data of the range only
+        points = self.points[first_sample:last_sample].tolist()
+        radii = self.radii[first_sample:last_sample].tolist()
+        samples_ids = self.samples_ids[first_sample:last_sample].tolist()
+
+        # Build the samples
+        samples = list()
+        for point, radius, sample_id in zip(points, radii, samples_ids):
+            samples.append(nmv.skeleton.Sample(
+                point=Vector(point), radius=radius, id=sample_id, type=sample_type))
+
+        # Return the samples list
+        return samples
+
+    ################################################################################################
+    # @get_number_sections
+    ################################################################################################
+    def get_number_sections(self):
+        """Gets the number of sections in the morphology.
+
+        :return:
+            The number of sections.
+        """
+
+        return len(self.sections_ids)
+
+    ################################################################################################
+    # @get_number_samples
+    ################################################################################################
+    def get_number_samples(self):
+        """Gets the number of samples in the morphology.
+
+        :return:
+            The number of samples.
+        """
+
+        return len(self.radii)
+
+    ################################################################################################
+    # @get_sections_samples_counts
+    ################################################################################################
+    def get_sections_samples_counts(self):
+        """Gets the number of samples of every section.
+
+        :return:
+            An array of the number of samples of every section.
+        """
+
+        return numpy.diff(self.sections_offsets)
+
+    ################################################################################################
+    # @get_sections_children_counts
+    ################################################################################################
+    def get_sections_children_counts(self):
+        """Gets the number of children of every section.
+
+        :return:
+            An array of the number of children of every section.
+        """
+
+        return numpy.diff(self.children_offsets)
+
+    ################################################################################################
+    # @compute_segments_lengths
+    ################################################################################################
+    def compute_segments_lengths(self):
+        """Computes the lengths of the segments between every sample and the next one.
+
+        :return:
+            An (N - 1) array of the segments lengths, where the entries between the last sample
+            of a section and the first sample of the next section are set to zero.
+        """
+
+        # The lengths between all the consecutive samples
+        lengths = numpy.linalg.norm(numpy.diff(self.points, axis=0), axis=1)
+
+        # Ignore the segments that cross the borders of the sections
+        borders = self.sections_offsets[1:-1] - 1
+        lengths[borders[(borders >= 0) & (borders < len(lengths))]] = 0.0
+
+        # Return the segments lengths
+        return lengths
+
+    ################################################################################################
+    # @compute_sections_lengths
+    ################################################################################################
+    def compute_sections_lengths(self):
+        """Computes the lengths of all the sections at once.
+
+        :return:
+            An array of the lengths of the sections.
+        """
+
+        # The cumulative length along the samples
+        cumulative_lengths = numpy.zeros(len(self.radii))
+        numpy.cumsum(self.compute_segments_lengths(), out=cumulative_lengths[1:])
+
+        # The length of a section is the cumulative length of its last sample minus its first
+        counts = self.get_sections_samples_counts()
+        first_samples = numpy.minimum(self.sections_offsets[:-1], len(self.radii) - 1)
+        last_samples = numpy.maximum(self.sections_offsets[1:] - 1, 0)
+        lengths = numpy.zeros(len(counts))
+        valid = counts > 0
+        lengths[valid] = cumulative_lengths[last_samples[valid]] - \
+                         cumulative_lengths[first_samples[valid]]
+
+        # Return the lengths of the sections
+        return lengths
+
+    ################################################################################################
+    # @compute_branching_orders
+    ################################################################################################
+    def compute_branching_orders(self):
+        """Computes the branching order of every section, where the roots have an order of one.
+
+        :return:
+            An array of the branching orders of the sections.
+        """
+
+        # The parents always precede their children
+        orders = numpy.ones(len(self.sections_ids), dtype=numpy.int64)
+        for i, parent in enumerate(self.sections_parents.tolist()):
+            if parent >= 0:
+                orders[i] = orders[parent] + 1
+
+        # Return the branching orders
+        return orders
+
+    ################################################################################################
+    # @compute_bounding_box
+    ################################################################################################
+    def compute_bounding_box(self):
+        """Computes the bounding box of all the samples of the morphology.
+
+        :return:
+            The minimum and maximum points of the bounding box as two lists, or None if the
+            morphology has no samples, for example if all its arbors are ignored.
+        """
+
+        if len(self.points) == 0:
+            return None
+
+        return self.points.min(axis=0).tolist(), self.points.max(axis=0).tolist()
+
+    ################################################################################################
+    # @get_memory_footprint
+    ################################################################################################
+    def get_memory_footprint(self):
+        """Gets the number of bytes used by the arrays of the columnar morphology.
+
+        :return:
+            The number of bytes.
+        """
+
+        return sum(array.nbytes for array in (
+            self.points, self.radii, self.samples_ids, self.sections_offsets, self.sections_ids,
+            self.sections_types, self.sections_parents, self.children_offsets, self.children))
@@ -109,6 +109,9 @@ class Morphology:
         # Morphology unified bounding box
         self.unified_bounding_box = None
 
+        # A spatial index of the samples, built on demand by the connection queries
+        self.spatial_index = None
+
         # Update the bounding boxes
         self.compute_bounding_box()
 
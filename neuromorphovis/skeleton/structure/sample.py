@@ -38,6 +38,16 @@ class Sample:
     file.
     """
 
+    # The samples are the most numerous objects in the morphology, therefore, their attributes are
+    # stored in slots to avoid allocating a dictionary per sample
+    __slots__ = ('point',
+                 'radius',
+                 'id',
+                 'morphology_index',
+                 'section',
+                 'type',
+                 'parent_id')
+
     ################################################################################################
     # @__init__
     ################################################################################################
@@ -0,0 +1,143 @@
+####################################################################################################
+# Copyright (c) 2016 - 2018, EPFL / Blue Brain Project
+#               Marwan Abdellah <marwan.abdellah@epfl.ch>
+#
+# This file is part of NeuroMorphoVis <https://github.com/BlueBrain/NeuroMorphoVis>
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU General Public License as published by the Free Software Foundation, version 3 of the License.
+#
+# This Blender-based tool is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program.
+# If not, see <http://www.gnu.org/licenses/>.
+####################################################################################################
+
+__author__      = "Marwan Abdellah"
+__copyright__   = "Copyright (c) 2016 - 2018, Blue Brain Project / EPFL"
+__credits__     = ["Ahmet Bilgili", "Juan Hernando", "Stefan Eilemann"]
+__version__     = "1.0.0"
+__maintainer__  = "Marwan Abdellah"
+__email__       = "marwan.abdellah@epfl.ch"
+__status__      = "Production"
+
+# Blender imports
+from mathutils import Vector
+
+# Internal imports
+import neuromorphovis as nmv
+import neuromorphovis.skeleton
+
+
+####################################################################################################
+# SamplesView
+####################################################################################################
+class SamplesView:
+    """A view of the samples of a section into the contiguous arrays of the whole morphology.
+
+    The points and the radii of the samples are kept as views (slices) into the arrays that were
+    read from the morphology file, which can be memory-mapped, and the actual samples objects
+    are only built when the samples of the section are accessed for the first time.
+    """
+
+    ################################################################################################
+    # @__init__
+    ################################################################################################
+    def __init__(self,
+                 points,
+                 radii,
+                 radius_scale=1.0,
+                 samples_ids=None):
+        """Constructor
+
+        :param points:
+            An (N, 3) array view of the cartesian points of the samples of the section.
+        :param radii:
+            An (N) array view of the radii of the samples of the section.
+        :param radius_scale:
+            A factor that is applied to the radii when the samples are built, for example 0.5 if
+            the file reports the diameters of the samples.
+        :param samples_ids:
+            An (N) array view of the IDs of the samples, if None the samples are numbered by their
+            order along the section.
+        """
+
+        # Points of the samples
+        self.points = points
+
+        # Radii of the samples
+        self.radii = radii
+
+        # Radius scale factor
+        self.radius_scale = radius_scale
+
+        # IDs of the samples
+        self.samples_ids = samples_ids
+
+    ################################################################################################
+    # @__len__
+    ################################################################################################
+    def __len__(self):
+        """Returns the number of samples in the view.
+
+        :return:
+            The number of samples in the view.
+        """
+
+        return len(self.points)
+
+    ################################################################################################
+    # @__deepcopy__
+    ################################################################################################
+    def __deepcopy__(self,
+                     memo):
+        """The views are never modified, therefore the copies share the same arrays.
+
+        :param memo:
+            Deep copy memo dictionary.
+        :return:
+            A new view into the same arrays.
+        """
+
+        return SamplesView(self.points, self.radii, self.radius_scale, self.samples_ids)
+
+    ################################################################################################
+    # @get_bounding_box
+    ################################################################################################
+    def get_bounding_box(self):
+        """Gets the minimum and maximum points of the samples without building them.
+
+        :return:
+            The minimum and maximum points of the samples as two lists.
+        """
+
+        return self.points.min(axis=0).tolist(), self.points.max(axis=0).tolist()
+
+    ################################################################################################
+    # @build_samples
+    ################################################################################################
+    def build_samples(self):
+        """Builds a list of NeuroMorphoVis samples from the view.
+
+        :return:
+            A list of samples.
+        """
+
+        # Copy the data of the section only
+        points = self.points.tolist()
+        radii = (self.radii * self.radius_scale).tolist()
+        if self.samples_ids is not None:
+            samples_ids = self.samples_ids.tolist()
+        else:
+            samples_ids = range(len(points))
+
+        # Build the samples
+        samples = list()
+        for point, radius, sample_id in zip(points, radii, samples_ids):
+            samples.append(nmv.skeleton.Sample(
+                point=Vector(point), radius=radius, id=sample_id, morphology_id=sample_id))
+
+        # Return the samples list
+        return samples
@@ -30,6 +30,23 @@ __status__      = "Production"
 class Section:
     """ A morphological section represents a series of morphological samples. """
 
+    # The attributes of the sections are stored in slots to avoid allocating a dictionary per
+    # section, the samples list is accessed via the @samples property
+    __slots__ = ('id',
+                 'parent_id',
+                 'children_ids',
+                 '_samples',
+                 'samples_view',
+                 'type',
+                 'parent',
+                 'children',
+                 'connected_to_soma',
+                 'mesh',
+                 'soma_face_index',
+                 'soma_face_centroid',
+                 'is_primary',
+                 'branching_order')
+
     ################################################################################################
     # @__init__
     ################################################################################################
@@ -38,7 +55,8 @@ class Section:
                  parent_id=-1,
                  children_ids=None,
                  samples=None,
-                 type=None):
+                 type=None,
+                 samples_view=None):
         """Constructor
 
         :param id:
@@ -51,6 +69,9 @@ class Section:
             A list of samples that compose this section.
         :param type:
             Section type, can be AXON, DENDRITE, APICAL_DENDRITE, or NONE.
+        :param samples_view:
+            A view of the samples into the arrays of the morphology, used instead of the samples
+            list to build the samples only when they are accessed for the first time.
         """
 
         # Section index
@@ -65,12 +86,15 @@ class Section:
         else:
             self.children_ids = list()
 
+        # A view of the samples that are not built yet, None when the samples list is valid
+        self.samples_view = samples_view
+
         # Segments samples (points along the section)
         self.samples = samples
 
         # Add a reference to the section as a member variable of the sample, for accessibility !
-        if self.samples is not None:
-            for sample in self.samples:
+        if samples is not None:
+            for sample in samples:
                 sample.section = self
 
         # Section type: AXON (2), DENDRITE (3), APICAL_DENDRITE (4), or NONE
@@ -109,6 +133,42 @@ class Section:
         # The branching order of this section
         self.branching_order = 0
 
+    ################################################################################################
+    # @samples
+    ################################################################################################
+    @property
+    def samples(self):
+        """The list of the samples of the section.
+
+        If the section was loaded with a samples view, the samples are built on the first access.
+
+        :return:
+            A list of samples.
+        """
+
+        # Build the samples from the view, if they are not built yet
+        if self._samples is None and self.samples_view is not None:
+            self._samples = self.samples_view.build_samples()
+            self.samples_view = None
+            for sample in self._samples:
+                sample.section = self
+
+        return self._samples
+
+    ################################################################################################
+    # @samples
+    ################################################################################################
+    @samples.setter
+    def samples(self,
+                samples):
+        """Sets the list of the samples of the section.
+
+        :param samples:
+            A list of samples.
+        """
+
+        self._samples = samples
+
     ################################################################################################
     # @get_type_string
     ################################################################################################
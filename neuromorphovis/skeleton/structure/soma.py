@@ -63,6 +63,10 @@ class Soma:
         # The profile points of the arbors
         self.arbors_profile_points = arbors_profile_points
 
+        # The geometry of the last reconstructed soma mesh and the key of its reconstruction, it
+        # is reused by the builders instead of running the soft body simulation again
+        self.reconstructed_mesh = None
+
         # Possible radii that can be assigned to the soma during its reconstruction
         self.possible_radii = list()
 
@@ -0,0 +1,161 @@
+####################################################################################################
+# Copyright (c) 2016 - 2018, EPFL / Blue Brain Project
+#               Marwan Abdellah <marwan.abdellah@epfl.ch>
+#
+# This file is part of NeuroMorphoVis <https://github.com/BlueBrain/NeuroMorphoVis>
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU General Public License as published by the Free Software Foundation, version 3 of the License.
+#
+# This Blender-based tool is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program.
+# If not, see <http://www.gnu.org/licenses/>.
+####################################################################################################
+
+__author__      = "Marwan Abdellah"
+__copyright__   = "Copyright (c) 2016 - 2018, Blue Brain Project / EPFL"
+__credits__     = ["Ahmet Bilgili", "Juan Hernando", "Stefan Eilemann"]
+__version__     = "1.0.0"
+__maintainer__  = "Marwan Abdellah"
+__email__       = "marwan.abdellah@epfl.ch"
+__status__      = "Production"
+
+# Blender imports
+from mathutils import kdtree
+
+# Internal imports
+import neuromorphovis as nmv
+import neuromorphovis.skeleton
+
+
+####################################################################################################
+# SpatialIndex
+####################################################################################################
+class SpatialIndex:
+    """A spatial index of all the samples of a morphology.
+
+    The samples of every arbor are inserted into a KD-tree of their own, and every arbor is tagged
+    with its type (AXON, BASAL_DENDRITE or APICAL_DENDRITE). The queries can then be restricted to
+    certain arbor types or exclude certain arbors in logarithmic time per arbor.
+
+    NOTE: The index keeps the positions of the samples at the time it was built, if the samples are
+    moved or removed afterwards, the index must be rebuilt.
+    """
+
+    ################################################################################################
+    # @__init__
+    ################################################################################################
+    def __init__(self,
+                 morphology):
+        """Constructor
+
+        :param morphology:
+            A given morphology to index its samples.
+        """
+
+        # A list of the indexed arbors, each is a list of [arbor, type, samples, tree]
+        self.arbors = list()
+
+        # Apical dendrite
+        if morphology.apical_dendrite is not None:
+            self.add_arbor(morphology.apical_dendrite)
+
+        # Basal dendrites
+        if morphology.dendrites is not None:
+            for dendrite in morphology.dendrites:
+                self.add_arbor(dendrite)
+
+        # Axon
+        if morphology.axon is not None:
+            self.add_arbor(morphology.axon)
+
+    ################################################################################################
+    # @__deepcopy__
+    ################################################################################################
+    def __deepcopy__(self,
+                     memo):
+        """The KD-trees cannot be copied, the copied morphologies rebuild their index on demand.
+
+        :param memo:
+            The dictionary of the copied objects.
+        :return:
+            None.
+        """
+
+        return None
+
+    ################################################################################################
+    # @add_arbor
+    ################################################################################################
+    def add_arbor(self,
+                  arbor):
+        """Adds all the samples of a given arbor to the index.
+
+        :param arbor:
+            The root section of the arbor.
+        """
+
+        # Collect the samples of the arbor
+        samples = list()
+        for section in nmv.skeleton.ops.get_arbor_sections(arbor):
+            samples.extend(section.samples)
+
+        # Build a KD-tree
+        tree = kdtree.KDTree(len(samples))
+        for i, sample in enumerate(samples):
+            tree.insert(sample.point, i)
+        tree.balance()
+
+        self.arbors.append([arbor, arbor.get_type_string(), samples, tree])
+
+    ################################################################################################
+    # @get_arbors
+    ################################################################################################
+    def get_arbors(self,
+                   arbor_types=None,
+                   excluded_arbors=None):
+        """Returns the indexed arbors that match the given filters.
+
+        :param arbor_types:
+            A list of arbor types, if None, all the types are used.
+        :param excluded_arbors:
+            A list of arbors to exclude from the results.
+        :return:
+            A list of the matching arbors, each is a list of [arbor, type, samples, tree].
+        """
+
+        excluded = set() if excluded_arbors is None else set(id(a) for a in excluded_arbors)
+        return [indexed_arbor for indexed_arbor in self.arbors
+                if (arbor_types is None or indexed_arbor[1] in arbor_types) and
+                id(indexed_arbor[0]) not in excluded and len(indexed_arbor[2]) > 0]
+
+    ################################################################################################
+    # @find_nearest_sample
+    ################################################################################################
+    def find_nearest_sample(self,
+                            point,
+                            arbor_types=None,
+                            excluded_arbors=None):
+        """Finds the nearest sample to a given point.
+
+        :param point:
+            A given point in the three-dimensional space.
+        :param arbor_types:
+            A list of arbor types, if None, all the types are searched.
+        :param excluded_arbors:
+            A list of arbors to exclude from the search.
+        :return:
+            A tuple of the nearest sample and its distance to the point, or (None, None) if there
+            are no samples to search.
+        """
+
+        nearest_sample, nearest_distance = None, None
+        for arbor, arbor_type, samples, tree in self.get_arbors(arbor_types, excluded_arbors):
+            co, index, distance = tree.find(point)
+            if nearest_distance is None or distance < nearest_distance:
+                nearest_sample, nearest_distance = samples[index], distance
+
+        return nearest_sample, nearest_distance
@@ -0,0 +1,444 @@
+####################################################################################################
+# Copyright (c) 2016 - 2018, EPFL / Blue Brain Project
+#               Marwan Abdellah <marwan.abdellah@epfl.ch>
+#
+# This file is part of NeuroMorphoVis <https://github.com/BlueBrain/NeuroMorphoVis>
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU General Public License as published by the Free Software Foundation, version 3 of the License.
+#
+# This Blender-based tool is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program.
+# If not, see <http://www.gnu.org/licenses/>.
+####################################################################################################
+
+__author__      = "Marwan Abdellah"
+__copyright__   = "Copyright (c) 2016 - 2018, Blue Brain Project / EPFL"
+__credits__     = ["Ahmet Bilgili", "Juan Hernando", "Stefan Eilemann"]
+__version__     = "1.0.0"
+__maintainer__  = "Marwan Abdellah"
+__email__       = "marwan.abdellah@epfl.ch"
+__status__      = "Production"
+
+
+# System imports
+import os, sys, json, math, heapq, argparse
+
+# Add other modules
+sys.path.append("%s/../interface/cli" % os.path.dirname(os.path.realpath(__file__)))
+
+# Internal modules
+import run_manifest
+
+
+# The size of a morphology whose file is not known or cannot be resolved, in samples
+DEFAULT_MORPHOLOGY_SIZE = 5000
+
+# The prior cost of an input before any calibration: a fixed time, and a time per sample for every
+# requested operation, in seconds
+PRIOR_SECONDS_PER_INPUT = 10.0
+PRIOR_SECONDS_PER_SAMPLE = 0.001
+
+# The prior factors of the operations and the meshing algorithms that are more expensive
+PRIOR_OPERATION_FACTORS = {'360': 10.0, 'progressive': 10.0}
+PRIOR_ALGORITHM_FACTORS = {'union': 3.0, 'bridging': 2.0}
+
+# The prior peak memory of an input, a fixed part and a part per sample, in MB
+PRIOR_MEMORY_MB = 1000.0
+PRIOR_MEMORY_MB_PER_SAMPLE = 0.05
+
+# The time to start Blender and load the add-on for every job, in seconds
+JOB_STARTUP_SECONDS = 60.0
+
+# The margins of the requested time and memory over the predicted ones
+TIME_MARGIN = 1.5
+MEMORY_MARGIN = 1.25
+
+# The smallest requested time in seconds, and the step and smallest requested memory in MB
+MINIMUM_JOB_SECONDS = 600
+MEMORY_STEP_MB = 256
+MINIMUM_JOB_MEMORY_MB = 1024
+
+
+####################################################################################################
+# @get_morphology_size
+####################################################################################################
+def get_morphology_size(morphology_file):
+    """Gets the size of a morphology file in samples, without loading its structure.
+
+    The samples of an .SWC file are its non-comment lines, and those of an .H5 file are the rows of
+    its points dataset. If the file cannot be read, the size is estimated from the file size.
+
+    :param morphology_file:
+        The path to the morphology file, or None if the morphology has no file.
+    :return:
+        The number of samples of the morphology.
+    """
+
+    if morphology_file is None or not os.path.isfile(morphology_file):
+        return DEFAULT_MORPHOLOGY_SIZE
+
+    # SWC, a sample per line
+    if morphology_file.lower().endswith('.swc'):
+        with open(morphology_file, 'r') as swc_file:
+            return sum(1 for line in swc_file if line.strip() and not line.startswith('#'))
+
+    # H5, a sample per row of the points
+    try:
+        import h5py
+        with h5py.File(morphology_file, 'r') as h5_file:
+            return int(h5_file['points'].shape[0])
+    except (ImportError, IOError, KeyError):
+        return max(1, os.path.getsize(morphology_file) // 20)
+
+
+####################################################################################################
+# @get_gids_morphology_files
+####################################################################################################
+def get_gids_morphology_files(blue_config,
+                              gids):
+    """Gets the morphology files of the neurons of a circuit, to size them without loading them.
+
+    :param blue_config:
+        The circuit configuration file.
+    :param gids:
+        A list of the GIDs of the neurons.
+    :return:
+        A dictionary mapping every GID, as a string, to the path of its morphology file. It is
+        empty if brain is not available or the circuit cannot be opened.
+    """
+
+    if blue_config in [None, 'None'] or not gids:
+        return dict()
+
+    # The URIs are returned in the order of the sorted GIDs
+    sorted_gids = sorted(set(int(gid) for gid in gids))
+    try:
+        import brain
+        uris = brain.Circuit(blue_config).morphology_uris(sorted_gids)
+    except Exception:
+        return dict()
+
+    return {str(gid): str(uri)[len('file://'):] if str(uri).startswith('file://') else str(uri)
+            for gid, uri in zip(sorted_gids, uris)}
+
+
+####################################################################################################
+# @get_builder_key
+####################################################################################################
+def get_builder_key(arguments):
+    """Gets a key of the requested operations and builders, the inputs that are run with the same
+    key share the same cost model.
+
+    :param arguments:
+        Command line arguments.
+    :return:
+        A string key.
+    """
+
+    # The requested operations
+    operations = sorted(name for name, value in vars(arguments).items() if value is True and
+                        name.startswith(('render_', 'reconstruct_', 'export_')))
+
+    # The builders and their parameters
+    builders = {'operations': operations,
+                'morphology_reconstruction_algorithm':
+                    getattr(arguments, 'morphology_reconstruction_algorithm', None)}
+    if any('neuron_mesh' in operation for operation in operations):
+        builders['meshing_algorithm'] = getattr(arguments, 'meshing_algorithm', None)
+        builders['tessellation_level'] = getattr(arguments, 'tessellation_level', None)
+        builders['spines'] = getattr(arguments, 'spines', None)
+
+    return json.dumps(builders, sort_keys=True)
+
+
+####################################################################################################
+# @fit_line
+####################################################################################################
+def fit_line(points):
+    """Fits a line to a list of points with least squares.
+
+    :param points:
+        A list of (x, y) tuples.
+    :return:
+        The intercept and slope of the line, both non-negative, or None if the points cannot
+        define a line.
+    """
+
+    n = len(points)
+    if n < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if variance == 0:
+        return None
+    slope = max(0.0, sum((x - mean_x) * (y - mean_y) for x, y in points) / variance)
+    return max(0.0, mean_y - slope * mean_x), slope
+
+
+####################################################################################################
+# @CostModel
+####################################################################################################
+class CostModel:
+    """A model of the time and peak memory that an input takes to be processed, as a linear
+    function of the size of its morphology, per set of requested operations and builders.
+
+    Before any calibration, the model uses a rough prior. The model is calibrated from the entries
+    of the run manifests of the runs that it has scheduled, where every finished input records its
+    elapsed time and peak memory, and it is stored in a JSON file to be reused by the next runs.
+    """
+
+    ################################################################################################
+    # @__init__
+    ################################################################################################
+    def __init__(self,
+                 model_file=None):
+        """Constructor
+
+        :param model_file:
+            The JSON file of the model, if None the model is not persistent.
+        """
+
+        # The model file
+        self.model_file = model_file
+
+        # The observations per builder key, every one maps an input to its size, time and memory
+        self.observations = dict()
+
+        # The output directories of the scheduled runs, mapped to their builder keys
+        self.runs = dict()
+
+        # Load the model
+        if model_file is not None and os.path.isfile(model_file):
+            with open(model_file, 'r') as json_file:
+                data = json.load(json_file)
+            self.observations = data.get('observations', dict())
+            self.runs = data.get('runs', dict())
+
+    ################################################################################################
+    # @write
+    ################################################################################################
+    def write(self):
+        """Writes the model to its file atomically, if it is persistent.
+        """
+
+        if self.model_file is not None:
+            run_manifest.write_json_atomically(
+                {'observations': self.observations, 'runs': self.runs}, self.model_file)
+
+    ################################################################################################
+    # @add_run
+    ################################################################################################
+    def add_run(self,
+                output_directory,
+                builder_key):
+        """Registers a run, whose timings calibrate the model when they are recorded.
+
+        :param output_directory:
+            The output directory of the run.
+        :param builder_key:
+            The builder key of the run, see @get_builder_key.
+        """
+
+        self.runs[os.path.abspath(output_directory)] = builder_key
+
+    ################################################################################################
+    # @calibrate
+    ################################################################################################
+    def calibrate(self):
+        """Adds the timings of the finished inputs of all the registered runs to the observations.
+
+        The size of every input is the number of samples that is recorded in its entry. For the
+        entries that do not record it, the size is read from the morphology file of the input,
+        and the inputs that are given by their GIDs are not used.
+
+        :return:
+            The number of new observations.
+        """
+
+        number_observations = 0
+        for output_directory, builder_key in self.runs.items():
+            observations = self.observations.setdefault(builder_key, dict())
+            entries = run_manifest.RunManifest(output_directory).read_entries()
+            for key, entry in entries.items():
+                if key in observations or entry.get('status') != 'done' or \
+                        entry.get('elapsed') is None:
+                    continue
+                size = entry.get('size')
+                if size is None:
+                    if key.startswith('gid-'):
+                        continue
+                    size = get_morphology_size(key)
+                observations[key] = [size, entry['elapsed'], entry.get('peak_memory')]
+                number_observations += 1
+        return number_observations
+
+    ################################################################################################
+    # @get_input_size
+    ################################################################################################
+    def get_input_size(self,
+                       key,
+                       morphology_file=None):
+        """Gets the size of an input, as observed by any run if it was processed before, or
+        otherwise from its morphology file.
+
+        :param key:
+            The key of the input in the run manifest.
+        :param morphology_file:
+            The path to the morphology file of the input, if known.
+        :return:
+            The number of samples of the morphology.
+        """
+
+        for observations in self.observations.values():
+            if key in observations:
+                return observations[key][0]
+        return get_morphology_size(morphology_file)
+
+    ################################################################################################
+    # @get_prior_cost
+    ################################################################################################
+    @staticmethod
+    def get_prior_cost(builder_key,
+                       size):
+        """Gets the prior time and memory of an input.
+
+        :param builder_key:
+            The builder key, see @get_builder_key.
+        :param size:
+            The size of the morphology in samples.
+        :return:
+            The predicted time in seconds and peak memory in MB.
+        """
+
+        builders = json.loads(builder_key)
+
+        # Every operation adds a time per sample
+        factor = 0.0
+        for operation in builders['operations']:
+            operation_factor = 1.0
+            for name, value in PRIOR_OPERATION_FACTORS.items():
+                if name in operation:
+                    operation_factor *= value
+            factor += operation_factor
+        factor *= PRIOR_ALGORITHM_FACTORS.get(builders.get('meshing_algorithm'), 1.0)
+
+        return PRIOR_SECONDS_PER_INPUT + factor * PRIOR_SECONDS_PER_SAMPLE * size, \
+            PRIOR_MEMORY_MB + PRIOR_MEMORY_MB_PER_SAMPLE * size
+
+    ################################################################################################
+    # @predict
+    ################################################################################################
+    def predict(self,
+                builder_key,
+                size):
+        """Predicts the time and the peak memory of an input.
+
+        With two observations or more, a line is fitted to them. With a single observation, the
+        prior is scaled to match it.
+
+        :param builder_key:
+            The builder key, see @get_builder_key.
+        :param size:
+            The size of the morphology in samples.
+        :return:
+            The predicted time in seconds and peak memory in MB.
+        """
+
+        prior_time, prior_memory = self.get_prior_cost(builder_key, size)
+        observations = list(self.observations.get(builder_key, dict()).values())
+
+        predictions = list()
+        for index, prior in ((1, prior_time), (2, prior_memory)):
+            points = [(observation[0], observation[index]) for observation in observations
+                      if observation[index] is not None]
+            line = fit_line(points)
+            if line is not None:
+                predictions.append(line[0] + line[1] * size)
+            elif points:
+                observed_prior = self.get_prior_cost(builder_key, points[0][0])[index - 1]
+                predictions.append(prior * points[0][1] / observed_prior)
+            else:
+                predictions.append(prior)
+
+        return predictions[0], predictions[1]
+
+
+####################################################################################################
+# @pack_inputs
+####################################################################################################
+def pack_inputs(costs,
+                number_bins):
+    """Packs the inputs into bins with balanced total costs.
+
+    The inputs are assigned from the most to the least expensive, every one to the bin with the
+    least total cost so far.
+
+    :param costs:
+        A list of the costs of the inputs.
+    :param number_bins:
+        The number of bins.
+    :return:
+        A list of the bins, every one is a list of the indices of its inputs, and a list of the
+        total costs of the bins.
+    """
+
+    number_bins = max(1, min(int(number_bins), len(costs)))
+    bins = [list() for _ in range(number_bins)]
+    loads = [0.0] * number_bins
+
+    # A heap of the loads of the bins
+    heap = [(0.0, i) for i in range(number_bins)]
+    for index in sorted(range(len(costs)), key=lambda i: costs[i], reverse=True):
+        load, bin_index = heapq.heappop(heap)
+        bins[bin_index].append(index)
+        loads[bin_index] = load + costs[index]
+        heapq.heappush(heap, (loads[bin_index], bin_index))
+
+    return bins, loads
+
+
+####################################################################################################
+# @get_job_resources
+####################################################################################################
+def get_job_resources(predicted_time,
+                      predicted_memory):
+    """Gets the SLURM time and memory of a job from its predicted time and peak memory.
+
+    :param predicted_time:
+        The predicted time of all the inputs of the job, in seconds.
+    :param predicted_memory:
+        The predicted peak memory of the most expensive input of the job, in MB.
+    :return:
+        The session time as H:MM:SS and the memory in MB.
+    """
+
+    seconds = max(MINIMUM_JOB_SECONDS, (JOB_STARTUP_SECONDS + predicted_time) * TIME_MARGIN)
+    minutes = int(math.ceil(seconds / 60.0))
+    memory = max(MINIMUM_JOB_MEMORY_MB, predicted_memory * MEMORY_MARGIN)
+    memory = int(math.ceil(memory / MEMORY_STEP_MB)) * MEMORY_STEP_MB
+    return '%d:%02d:00' % (minutes // 60, minutes % 60), str(memory)
+
+
+####################################################################################################
+# @ Run the main function if invoked from the command line.
+####################################################################################################
+if __name__ == "__main__":
+
+    # Calibrate a model from the runs that it has scheduled, for example after they are done
+    parser = argparse.ArgumentParser(description='Calibrates and reports a cost model')
+    parser.add_argument('model_file', help='The JSON file of the cost model')
+    arguments = parser.parse_args()
+
+    model = CostModel(arguments.model_file)
+    print('Calibrated with %d new observations' % model.calibrate())
+    model.write()
+    for builder_key, observations in sorted(model.observations.items()):
+        line = fit_line([(observation[0], observation[1])
+                         for observation in observations.values()])
+        print('%s\n\t%d observations, %s' % (builder_key, len(observations), 'time = %.2f s + '
+              '%.5f s per sample' % line if line is not None else 'not enough to fit'))
@@ -0,0 +1,589 @@
+####################################################################################################
+# Copyright (c) 2016 - 2018, EPFL / Blue Brain Project
+#               Marwan Abdellah <marwan.abdellah@epfl.ch>
+#
+# This file is part of NeuroMorphoVis <https://github.com/BlueBrain/NeuroMorphoVis>
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU General Public License as published by the Free Software Foundation, version 3 of the License.
+#
+# This Blender-based tool is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program.
+# If not, see <http://www.gnu.org/licenses/>.
+####################################################################################################
+
+__author__      = "Marwan Abdellah"
+__copyright__   = "Copyright (c) 2016 - 2018, Blue Brain Project / EPFL"
+__credits__     = ["Ahmet Bilgili", "Juan Hernando", "Stefan Eilemann"]
+__version__     = "1.0.0"
+__maintainer__  = "Marwan Abdellah"
+__email__       = "marwan.abdellah@epfl.ch"
+__status__      = "Production"
+
+
+# System imports
+import os, sys, json, time, argparse, subprocess
+
+# Add other modules
+sys.path.append("%s/../consts" % os.path.dirname(os.path.realpath(__file__)))
+sys.path.append("%s/../interface/cli" % os.path.dirname(os.path.realpath(__file__)))
+
+# Internal modules
+import local_executor
+import paths_consts
+import run_manifest
+
+
+# The file where the submitted jobs of a run are recorded, in the slurm folder
+SUBMISSIONS_FILE = 'submissions.json'
+
+# The file of the summary report of the monitor, in the slurm folder
+REPORT_FILE = 'report.json'
+
+# The patterns of the errors in the logs of the jobs, per failure reason
+FAILURE_PATTERNS = {
+    'memory': ['oom-kill', 'out of memory', 'out-of-memory', 'exceeded job memory limit',
+               'memoryerror'],
+    'time': ['due to time limit', 'time limit exceeded']}
+
+# The final states of the jobs in sacct, per failure reason
+FAILURE_STATES = {
+    'memory': ['OUT_OF_MEMORY'],
+    'time': ['TIMEOUT', 'DEADLINE']}
+
+# The factors of the resources of the resubmitted jobs, per failure reason
+ESCALATION_FACTORS = {
+    'memory': (2.0, 1.0),
+    'time': (1.0, 2.0)}
+
+
+####################################################################################################
+# @get_submissions_file
+####################################################################################################
+def get_submissions_file(output_directory):
+    """Gets the path to the submissions file of a run.
+
+    :param output_directory:
+        The output directory of the run.
+    :return:
+        The path to the submissions file.
+    """
+
+    return '%s/%s/%s' % (output_directory, paths_consts.Paths.SLURM_FOLDER, SUBMISSIONS_FILE)
+
+
+####################################################################################################
+# @read_submissions
+####################################################################################################
+def read_submissions(output_directory):
+    """Reads the submitted jobs of a run.
+
+    :param output_directory:
+        The output directory of the run.
+    :return:
+        A dictionary of the options hash of the run and the list of its submissions.
+    """
+
+    try:
+        with open(get_submissions_file(output_directory), 'r') as submissions_file:
+            return json.load(submissions_file)
+    except (IOError, ValueError):
+        return {'options_hash': None, 'submissions': list()}
+
+
+####################################################################################################
+# @start_submissions
+####################################################################################################
+def start_submissions(output_directory,
+                      options_hash):
+    """Starts the record of the submitted jobs of a run, the submissions of any previous run in the
+    same output directory are dropped.
+
+    :param output_directory:
+        The output directory of the run.
+    :param options_hash:
+        The hash of the options of the run, see @get_options_hash.
+    """
+
+    run_manifest.write_json_atomically({'options_hash': options_hash, 'submissions': list()},
+                                       get_submissions_file(output_directory))
+
+
+####################################################################################################
+# @record_submission
+####################################################################################################
+def record_submission(output_directory,
+                      job_id,
+                      script,
+                      tasks,
+                      memory_mb,
+                      session_time,
+                      array=False,
+                      attempt=0):
+    """Records a submitted job of a run.
+
+    :param output_directory:
+        The output directory of the run.
+    :param job_id:
+        The ID of the job.
+    :param script:
+        The path to the batch script of the job.
+    :param tasks:
+        A dictionary of the tasks of the job, mapping the index of every task to a dictionary of
+        the keys of its 'inputs' and its 'stderr' log. A single job has a single task.
+    :param memory_mb:
+        The memory of the job in MB.
+    :param session_time:
+        The time of the job as H:MM:SS.
+    :param array:
+        If the job is a job array.
+    :param attempt:
+        The attempt of the tasks, zero for the first submission.
+    :return:
+        A dictionary of the submission.
+    """
+
+    data = read_submissions(output_directory)
+    submission = {'job_id': str(job_id), 'script': script, 'tasks': tasks,
+                  'memory_mb': str(memory_mb), 'session_time': session_time, 'array': array,
+                  'attempt': attempt, 'submitted': time.time()}
+    data['submissions'].append(submission)
+    run_manifest.write_json_atomically(data, get_submissions_file(output_directory))
+    return submission
+
+
+####################################################################################################
+# @format_session_time
+####################################################################################################
+def format_session_time(seconds):
+    """Formats a time limit as H:MM:SS, rounded up to the minute.
+
+    :param seconds:
+        The time limit in seconds.
+    :return:
+        The time limit.
+    """
+
+    minutes = (int(seconds) + 59) // 60
+    return '%d:%02d:00' % (minutes // 60, minutes % 60)
+
+
+####################################################################################################
+# @get_active_jobs
+####################################################################################################
+def get_active_jobs(job_ids):
+    """Gets the jobs that are still pending or running on the cluster.
+
+    The jobs that finished a while ago are purged by SLURM, and squeue fails if any of the given
+    IDs is unknown. In that case, the jobs are queried one by one, and an unknown job is inactive.
+
+    :param job_ids:
+        A list of job IDs.
+    :return:
+        A set of the IDs of the active jobs.
+    """
+
+    if not job_ids:
+        return set()
+    try:
+        result = subprocess.check_output(
+            ['squeue', '--noheader', '--format=%i',
+             '--states=PENDING,RUNNING,CONFIGURING,COMPLETING', '--jobs=%s' % ','.join(job_ids)],
+            universal_newlines=True, stderr=subprocess.DEVNULL)
+    except (subprocess.CalledProcessError, OSError):
+        if len(job_ids) == 1:
+            return set()
+        return set().union(*(get_active_jobs([job_id]) for job_id in job_ids))
+
+    # The tasks of an array are listed as <job ID>_<task> or <job ID>_[<tasks>]
+    return set(line.strip().split('_')[0] for line in result.split('\n') if line.strip())
+
+
+####################################################################################################
+# @get_jobs_states
+####################################################################################################
+def get_jobs_states(job_ids):
+    """Gets the final states and exit codes of the finished jobs from the accounting of SLURM.
+
+    :param job_ids:
+        A list of job IDs.
+    :return:
+        A dictionary mapping every job, or every task as <job ID>_<task>, to a tuple of its state
+        and exit code. It is empty if the accounting is not available.
+    """
+
+    try:
+        result = subprocess.check_output(
+            ['sacct', '--noheader', '--parsable2', '--format=JobID,State,ExitCode',
+             '--jobs=%s' % ','.join(job_ids)], universal_newlines=True)
+    except (OSError, subprocess.CalledProcessError):
+        return dict()
+
+    states = dict()
+    for line in result.split('\n'):
+        fields = line.strip().split('|')
+
+        # Ignore the steps of the jobs
+        if len(fields) < 3 or '.' in fields[0]:
+            continue
+
+        # A cancelled job is reported as 'CANCELLED by <user>'
+        states[fields[0]] = (fields[1].split(' ')[0], fields[2])
+    return states
+
+
+####################################################################################################
+# @read_log
+####################################################################################################
+def read_log(log_file):
+    """Reads a log file of a job.
+
+    :param log_file:
+        The path to the log file.
+    :return:
+        The content of the log, or an empty string if it does not exist.
+    """
+
+    try:
+        with open(log_file, 'r', errors='replace') as log:
+            return log.read()
+    except IOError:
+        return ''
+
+
+####################################################################################################
+# @get_failure_reason
+####################################################################################################
+def get_failure_reason(state,
+                       log):
+    """Gets the reason of the failure of a task, from its state and its error log.
+
+    :param state:
+        The state of the task in the accounting, or None.
+    :param log:
+        The content of the error log of the task.
+    :return:
+        'memory', 'time' or 'error'.
+    """
+
+    for reason in ('memory', 'time'):
+        if state in FAILURE_STATES[reason]:
+            return reason
+    log = log.lower()
+    for reason in ('memory', 'time'):
+        if any(pattern in log for pattern in FAILURE_PATTERNS[reason]):
+            return reason
+    return 'error'
+
+
+####################################################################################################
+# @JobMonitor
+####################################################################################################
+class JobMonitor:
+    """Tracks the submitted jobs of a run until they finish, verifies their outputs, and resubmits
+    the failed tasks with more memory or time, up to a retry budget.
+
+    A task succeeds if all its inputs are complete in the run manifest, that is they are done with
+    the options of the run and all their outputs exist. The reason of a failure is taken from the
+    state of the task in the accounting of SLURM if it is available, otherwise from its error log.
+    A task that ran out of memory is resubmitted with double the memory, and a task that ran out
+    of time with double the time. The other failures are resubmitted with the same resources.
+
+    The jobs are tracked with the commands of SLURM, or with a @LocalExecutor that runs them on
+    the local node.
+    """
+
+    ################################################################################################
+    # @__init__
+    ################################################################################################
+    def __init__(self,
+                 output_directory,
+                 maximum_retries=2,
+                 poll_interval=30,
+                 executor=None):
+        """Constructor
+
+        :param output_directory:
+            The output directory of the run.
+        :param maximum_retries:
+            The maximum number of times that a task is resubmitted.
+        :param poll_interval:
+            The time between two polls of the queue, in seconds.
+        :param executor:
+            A @LocalExecutor that runs the jobs, or None if they run on the cluster.
+        """
+
+        # The local executor
+        self.executor = executor
+
+        # The output directory
+        self.output_directory = output_directory
+
+        # The retry budget
+        self.maximum_retries = maximum_retries
+
+        # The poll interval
+        self.poll_interval = poll_interval
+
+        # The manifest of the run
+        self.manifest = run_manifest.RunManifest(output_directory)
+
+        # The submissions of the run
+        submissions = read_submissions(output_directory)
+        self.options_hash = submissions['options_hash']
+
+        # The submissions to be checked, only the last attempt of every task is kept, so a
+        # monitor that is restarted does not resubmit the tasks again
+        latest = dict()
+        for submission in submissions['submissions']:
+            for task in submission['tasks']:
+                latest[(submission['script'], task)] = submission
+        self.pending_submissions = list()
+        for submission in submissions['submissions']:
+            tasks = {task: task_data for task, task_data in submission['tasks'].items()
+                     if latest[(submission['script'], task)] is submission}
+            if tasks:
+                self.pending_submissions.append(dict(submission, tasks=tasks))
+
+        # The results of the tasks, keyed by their submissions and tasks
+        self.results = list()
+
+    ################################################################################################
+    # @wait
+    ################################################################################################
+    def wait(self,
+             job_ids):
+        """Waits until the given jobs leave the queue.
+
+        :param job_ids:
+            A list of job IDs.
+        """
+
+        # The local executor notifies the end of its jobs
+        if self.executor is not None:
+            self.executor.wait(job_ids)
+            return
+
+        while True:
+            active_jobs = get_active_jobs(job_ids)
+            if not active_jobs:
+                return
+            print('MONITOR: %d jobs are active' % len(active_jobs))
+            sys.stdout.flush()
+            time.sleep(self.poll_interval)
+
+    ################################################################################################
+    # @check_task
+    ################################################################################################
+    def check_task(self,
+                   submission,
+                   task,
+                   states):
+        """Checks a finished task.
+
+        :param submission:
+            The submission of the task.
+        :param task:
+            The index of the task.
+        :param states:
+            The states of the finished jobs, see @get_jobs_states.
+        :return:
+            A dictionary of the result of the task.
+        """
+
+        task_data = submission['tasks'][task]
+
+        # The state of the task, or of the job if it is not an array
+        state_key = '%s_%s' % (submission['job_id'], task) if submission['array'] else \
+            submission['job_id']
+        state, exit_code = states.get(state_key, (None, None))
+
+        # The task succeeds if all its inputs are complete
+        missing = [key for key in task_data['inputs']
+                   if not self.manifest.is_complete(key, self.options_hash)]
+        result = {'job_id': submission['job_id'], 'task': task, 'attempt': submission['attempt'],
+                  'state': state, 'exit_code': exit_code, 'inputs': task_data['inputs'],
+                  'missing': missing, 'stderr': task_data['stderr']}
+        if not missing:
+            result['status'] = 'done'
+        else:
+            result['status'] = 'failed'
+            result['reason'] = get_failure_reason(state, read_log(task_data['stderr']))
+        return result
+
+    ################################################################################################
+    # @resubmit
+    ################################################################################################
+    def resubmit(self,
+                 submission,
+                 tasks,
+                 reason):
+        """Resubmits the failed tasks of a submission with escalated resources.
+
+        The batch script is submitted again, and the options of sbatch override its directives.
+
+        :param submission:
+            The submission of the tasks.
+        :param tasks:
+            A list of the indices of the failed tasks.
+        :param reason:
+            The reason of the failure of the tasks.
+        :return:
+            A dictionary of the new submission, or None if it is not submitted.
+        """
+
+        # Escalate the resources
+        memory_factor, time_factor = ESCALATION_FACTORS.get(reason, (1.0, 1.0))
+        memory_mb = int(float(submission['memory_mb']) * memory_factor)
+        session_time = format_session_time(
+            local_executor.parse_time(submission['session_time']) * time_factor)
+
+        # Resubmit only the failed tasks of an array
+        options = {'mem': str(memory_mb), 'time': session_time}
+        if submission['array']:
+            options['array'] = ','.join(tasks)
+        command = ['sbatch', '--parsable'] + \
+            ['--%s=%s' % (name, value) for name, value in sorted(options.items())] + \
+            [submission['script']]
+        print('RESUBMITTING: %s' % ' '.join(command))
+        if self.executor is not None:
+            job_id = self.executor.submit(submission['script'], options)
+        else:
+            try:
+                job_id = subprocess.check_output(command, universal_newlines=True).strip()
+            except (OSError, subprocess.CalledProcessError) as error:
+                print('ERROR: Cannot resubmit [%s], %s' % (submission['script'], str(error)))
+                return None
+            job_id = job_id.split(';')[0]
+
+        # The logs of the tasks of a new array are named after its ID
+        new_tasks = dict()
+        for task in tasks:
+            stderr = submission['tasks'][task]['stderr']
+            if submission['array']:
+                stderr = stderr.replace('_%s_%s.log' % (submission['job_id'], task),
+                                        '_%s_%s.log' % (job_id, task))
+            new_tasks[task] = {'inputs': submission['tasks'][task]['inputs'], 'stderr': stderr}
+
+        # Record the new submission
+        return record_submission(
+            self.output_directory, job_id, submission['script'], new_tasks, memory_mb,
+            session_time, array=submission['array'], attempt=submission['attempt'] + 1)
+
+    ################################################################################################
+    # @run
+    ################################################################################################
+    def run(self):
+        """Monitors the jobs until all the tasks succeed or run out of retries, and writes the
+        summary report.
+
+        :return:
+            A dictionary of the report.
+        """
+
+        while self.pending_submissions:
+
+            # Wait for the pending jobs to finish
+            job_ids = [submission['job_id'] for submission in self.pending_submissions]
+            self.wait(job_ids)
+            states = self.executor.get_jobs_states(job_ids) if self.executor is not None else \
+                get_jobs_states(job_ids)
+
+            # Check their tasks, and resubmit the failed ones by their failure reasons
+            resubmissions = list()
+            for submission in self.pending_submissions:
+                failed_tasks = dict()
+                for task in sorted(submission['tasks'], key=int):
+                    result = self.check_task(submission, task, states)
+                    self.results.append(result)
+                    if result['status'] == 'failed':
+                        print('FAILED: Job [%s] task [%s], %s, %d inputs missing' % (
+                            submission['job_id'], task, result['reason'],
+                            len(result['missing'])))
+                        failed_tasks.setdefault(result['reason'], list()).append(task)
+
+                # Resubmit within the budget
+                if submission['attempt'] >= self.maximum_retries:
+                    continue
+                for reason, tasks in sorted(failed_tasks.items()):
+                    resubmission = self.resubmit(submission, tasks, reason)
+                    if resubmission is not None:
+                        resubmissions.append(resubmission)
+
+            self.pending_submissions = resubmissions
+
+        # Write the report
+        return self.write_report()
+
+    ################################################################################################
+    # @write_report
+    ################################################################################################
+    def write_report(self):
+        """Writes the summary report of the run to the slurm folder.
+
+        :return:
+            A dictionary of the report.
+        """
+
+        # The final status of every input is the one of its last attempt
+        inputs = dict()
+        for result in self.results:
+            for key in result['inputs']:
+                failed = key in result['missing']
+                entry = self.manifest.read_entry(key) if failed else None
+                inputs[key] = {'status': 'failed' if failed else 'done',
+                               'attempts': result['attempt'] + 1,
+                               'job_id': result['job_id'], 'task': result['task']}
+                if failed:
+                    inputs[key]['reason'] = result['reason']
+                    inputs[key]['stderr'] = result['stderr']
+                    inputs[key]['error'] = entry.get('error') if entry is not None else None
+
+        # Count the inputs per status and the failed tasks per reason
+        summary = dict()
+        for entry in inputs.values():
+            summary[entry['status']] = summary.get(entry['status'], 0) + 1
+        failures = dict()
+        for result in self.results:
+            if result['status'] == 'failed':
+                failures[result['reason']] = failures.get(result['reason'], 0) + 1
+
+        report = {'summary': summary, 'failures': failures,
+                  'resubmissions': sum(1 for result in self.results if result['attempt'] > 0),
+                  'inputs': inputs, 'tasks': self.results}
+        run_manifest.write_json_atomically(
+            report, '%s/%s/%s' % (self.output_directory, paths_consts.Paths.SLURM_FOLDER,
+                                  REPORT_FILE))
+
+        # Update the manifest of the run
+        self.manifest.write(list(inputs.keys()))
+
+        # Report
+        print('REPORT: %d inputs done, %d failed, failed tasks per reason %s' % (
+            summary.get('done', 0), summary.get('failed', 0), json.dumps(failures)))
+        for key, entry in sorted(inputs.items()):
+            if entry['status'] == 'failed':
+                print('\tFAILED: %s after %d attempts, %s [%s]' % (
+                    key, entry['attempts'], entry['reason'], entry['stderr']))
+        return report
+
+
+####################################################################################################
+# @ Run the main function if invoked from the command line.
+####################################################################################################
+if __name__ == "__main__":
+
+    # Monitor the jobs of a run that are submitted before, for example from another session
+    parser = argparse.ArgumentParser(description='Monitors and resubmits the jobs of a run')
+    parser.add_argument('output_directory', help='The output directory of the run')
+    parser.add_argument('--maximum-retries', type=int, default=2,
+                        help='The maximum number of times that a task is resubmitted')
+    parser.add_argument('--poll-interval', type=float, default=30,
+                        help='The time between two polls of the queue, in seconds')
+    arguments = parser.parse_args()
+
+    JobMonitor(arguments.output_directory, maximum_retries=arguments.maximum_retries,
+               poll_interval=arguments.poll_interval).run()
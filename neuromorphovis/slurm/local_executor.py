@@ -0,0 +1,569 @@
+####################################################################################################
+# Copyright (c) 2016 - 2018, EPFL / Blue Brain Project
+#               Marwan Abdellah <marwan.abdellah@epfl.ch>
+#
+# This file is part of NeuroMorphoVis <https://github.com/BlueBrain/NeuroMorphoVis>
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU General Public License as published by the Free Software Foundation, version 3 of the License.
+#
+# This Blender-based tool is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program.
+# If not, see <http://www.gnu.org/licenses/>.
+####################################################################################################
+
+__author__      = "Marwan Abdellah"
+__copyright__   = "Copyright (c) 2016 - 2018, Blue Brain Project / EPFL"
+__credits__     = ["Ahmet Bilgili", "Juan Hernando", "Stefan Eilemann"]
+__version__     = "1.0.0"
+__maintainer__  = "Marwan Abdellah"
+__email__       = "marwan.abdellah@epfl.ch"
+__status__      = "Production"
+
+
+# System imports
+import os, re, sys, time, signal, argparse, threading, subprocess
+
+
+####################################################################################################
+# @parse_batch_script
+####################################################################################################
+def parse_batch_script(script):
+    """Parses the #SBATCH directives of a batch script.
+
+    :param script:
+        The path to the batch script.
+    :return:
+        A dictionary of the directives, mapping every option name without the dashes to its value.
+    """
+
+    directives = dict()
+    with open(script, 'r') as script_file:
+        for line in script_file:
+            match = re.match(r'\s*#SBATCH\s+--([\w-]+)(?:[=\s]+(.*))?', line)
+            if match is not None:
+                directives[match.group(1)] = (match.group(2) or '').strip().strip('"')
+    return directives
+
+
+####################################################################################################
+# @parse_memory
+####################################################################################################
+def parse_memory(memory):
+    """Parses a SLURM memory size, in MB by default or with a K, M, G or T unit.
+
+    :param memory:
+        The memory size.
+    :return:
+        The memory size in MB.
+    """
+
+    match = re.match(r'^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)B?\s*$', str(memory).upper())
+    if match is None:
+        raise ValueError('Invalid memory size [%s]' % str(memory))
+    factors = {'K': 1.0 / 1024, '': 1.0, 'M': 1.0, 'G': 1024.0, 'T': 1024.0 * 1024}
+    return float(match.group(1)) * factors[match.group(2)]
+
+
+####################################################################################################
+# @parse_time
+####################################################################################################
+def parse_time(session_time):
+    """Parses a SLURM time limit, as [D-]H:MM:SS, MM:SS or MM.
+
+    :param session_time:
+        The time limit.
+    :return:
+        The time limit in seconds, or None if it is unlimited.
+    """
+
+    if session_time in [None, '', 'UNLIMITED', 'INFINITE']:
+        return None
+    days = 0
+    if '-' in session_time:
+        days, session_time = session_time.split('-', 1)
+    fields = [int(field) for field in session_time.split(':')]
+    if len(fields) == 1:
+        fields = [0, fields[0], 0]
+    elif len(fields) == 2:
+        fields = [0] + fields
+    return int(days) * 86400 + fields[0] * 3600 + fields[1] * 60 + fields[2]
+
+
+####################################################################################################
+# @parse_array
+####################################################################################################
+def parse_array(array):
+    """Parses the indices of a SLURM job array, for example 0-9:2,15%4.
+
+    :param array:
+        The array specification.
+    :return:
+        A list of the indices of the tasks, and the maximum number of tasks that run at once, or
+        None if it is not limited.
+    """
+
+    limit = None
+    if '%' in array:
+        array, limit = array.split('%', 1)
+        limit = max(1, int(limit))
+
+    indices = list()
+    for part in array.split(','):
+        step = 1
+        if ':' in part:
+            part, step = part.split(':', 1)
+            step = int(step)
+        if '-' in part:
+            first, last = part.split('-', 1)
+            indices.extend(range(int(first), int(last) + 1, step))
+        else:
+            indices.append(int(part))
+    return indices, limit
+
+
+####################################################################################################
+# @get_local_memory
+####################################################################################################
+def get_local_memory():
+    """Gets the physical memory of the local node.
+
+    :return:
+        The memory in MB.
+    """
+
+    try:
+        with open('/proc/meminfo', 'r') as meminfo:
+            for line in meminfo:
+                if line.startswith('MemTotal:'):
+                    return int(line.split()[1]) / 1024.0
+    except IOError:
+        pass
+    return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') / (1024.0 * 1024.0)
+
+
+####################################################################################################
+# @LocalTask
+####################################################################################################
+class LocalTask:
+    """A single job, or a single task of a job array, that is run by the local executor.
+    """
+
+    ################################################################################################
+    # @__init__
+    ################################################################################################
+    def __init__(self,
+                 job_id,
+                 task_id,
+                 script,
+                 directives,
+                 submit_directory):
+        """Constructor
+
+        :param job_id:
+            The ID of the job.
+        :param task_id:
+            The index of the task in the job array, or None if the job is not an array.
+        :param script:
+            The path to the batch script.
+        :param directives:
+            The directives of the job, see @parse_batch_script.
+        :param submit_directory:
+            The directory where the job is submitted, and where the script runs.
+        """
+
+        self.job_id = job_id
+        self.task_id = task_id
+        self.script = script
+        self.directives = directives
+        self.submit_directory = submit_directory
+
+        # The requested resources
+        self.cpus = int(directives.get('cpus-per-task', 1)) * int(directives.get('ntasks', 1))
+        self.memory_mb = parse_memory(directives.get('mem', 0))
+        self.time_limit = parse_time(directives.get('time'))
+
+        # The state, the exit code and the process
+        self.state = 'PENDING'
+        self.exit_code = '0:0'
+        self.process = None
+
+    ################################################################################################
+    # @get_name
+    ################################################################################################
+    def get_name(self):
+        """Gets the name of the task as listed by SLURM, <job ID>_<task> or <job ID>.
+
+        :return:
+            The name of the task.
+        """
+
+        if self.task_id is None:
+            return self.job_id
+        return '%s_%d' % (self.job_id, self.task_id)
+
+    ################################################################################################
+    # @get_log_file
+    ################################################################################################
+    def get_log_file(self,
+                     pattern):
+        """Gets the path to a log file from its pattern, with the replacement symbols of SLURM.
+
+        :param pattern:
+            The pattern of the log file.
+        :return:
+            The path to the log file.
+        """
+
+        replacements = {'%A': self.job_id,
+                        '%a': str(self.task_id) if self.task_id is not None else '4294967294',
+                        '%j': self.job_id,
+                        '%x': self.directives.get('job-name', os.path.basename(self.script)),
+                        '%%': '%'}
+        log_file = re.sub(r'%[Aajx%]', lambda match: replacements[match.group(0)], pattern)
+        return os.path.join(self.submit_directory, log_file)
+
+    ################################################################################################
+    # @get_environment
+    ################################################################################################
+    def get_environment(self):
+        """Gets the environment of the task, with the variables that SLURM sets for a job.
+
+        :return:
+            A dictionary of the environment.
+        """
+
+        environment = dict(os.environ)
+        environment.update({'SLURM_JOB_ID': self.job_id,
+                            'SLURM_JOB_NAME': self.directives.get('job-name', ''),
+                            'SLURM_CPUS_PER_TASK': self.directives.get('cpus-per-task', '1'),
+                            'SLURM_NTASKS': self.directives.get('ntasks', '1'),
+                            'SLURM_MEM_PER_NODE': str(int(self.memory_mb)),
+                            'SLURM_SUBMIT_DIR': self.submit_directory,
+                            'SLURM_JOB_NODELIST': 'localhost'})
+        if self.task_id is not None:
+            environment['SLURM_ARRAY_JOB_ID'] = self.job_id
+            environment['SLURM_ARRAY_TASK_ID'] = str(self.task_id)
+        return environment
+
+    ################################################################################################
+    # @get_log_files
+    ################################################################################################
+    def get_log_files(self):
+        """Gets the paths to the output and error logs of the task, and creates their directories.
+
+        :return:
+            The paths to the output log and the error log, the error log is the output log if it
+            is not given.
+        """
+
+        output_pattern = self.directives.get(
+            'output', 'slurm-%A_%a.out' if self.task_id is not None else 'slurm-%j.out')
+        output_log = self.get_log_file(output_pattern)
+        error_log = self.get_log_file(self.directives.get('error', output_pattern))
+        for log_file in (output_log, error_log):
+            os.makedirs(os.path.dirname(log_file), exist_ok=True)
+        return output_log, error_log
+
+    ################################################################################################
+    # @reject
+    ################################################################################################
+    def reject(self,
+               error):
+        """Fails the task without running it, and writes the error to its error log.
+
+        :param error:
+            The error message.
+        """
+
+        self.state, self.exit_code = 'FAILED', '1:0'
+        with open(self.get_log_files()[1], 'w') as error_file:
+            error_file.write('sbatch: error: %s\n' % error)
+        print('ERROR: Job [%s], %s' % (self.get_name(), error))
+
+    ################################################################################################
+    # @run
+    ################################################################################################
+    def run(self):
+        """Runs the script of the task until it exits or exceeds its time limit.
+        """
+
+        # The logs
+        output_log, error_log = self.get_log_files()
+
+        with open(output_log, 'w') as output_file:
+            error_file = output_file if error_log == output_log else open(error_log, 'w')
+            try:
+                self.process = subprocess.Popen(
+                    ['bash', self.script], cwd=self.submit_directory,
+                    env=self.get_environment(), stdout=output_file, stderr=error_file,
+                    start_new_session=True)
+                try:
+                    return_code = self.process.wait(timeout=self.time_limit)
+                except subprocess.TimeoutExpired:
+
+                    # Kill all the processes of the job, and report it like SLURM
+                    os.killpg(self.process.pid, signal.SIGKILL)
+                    self.process.wait()
+                    error_file.write('slurmstepd: error: *** JOB %s ON localhost CANCELLED AT %s '
+                                     'DUE TO TIME LIMIT ***\n' % (
+                                         self.get_name(), time.strftime('%Y-%m-%dT%H:%M:%S')))
+                    self.state, self.exit_code = 'TIMEOUT', '0:%d' % signal.SIGTERM
+                    return
+            finally:
+                if error_file is not output_file:
+                    error_file.close()
+
+        # A script that is killed by a signal, a SIGKILL that is not sent by the executor is
+        # most likely sent by the out-of-memory killer
+        if return_code < 0:
+            self.exit_code = '0:%d' % -return_code
+            self.state = 'OUT_OF_MEMORY' if -return_code == signal.SIGKILL else 'FAILED'
+        else:
+            self.exit_code = '%d:0' % return_code
+            self.state = 'COMPLETED' if return_code == 0 else 'FAILED'
+
+
+####################################################################################################
+# @LocalExecutor
+####################################################################################################
+class LocalExecutor:
+    """Runs the batch scripts that are generated for SLURM on the local node.
+
+    The tasks run in a pool of processes that is capped by the cores and the memory of the node.
+    The tasks are admitted in the order of their submission, every one when the free cores and
+    memory fit its CPU and memory directives, and the tasks of a job array respect its concurrency
+    limit. The environment of every task and its stdout and stderr logs are the same as on the
+    cluster, and its time limit is enforced.
+
+    The executor mirrors the commands of SLURM that are used by the framework: @submit for sbatch,
+    @get_active_jobs for squeue and @get_jobs_states for sacct.
+    """
+
+    ################################################################################################
+    # @__init__
+    ################################################################################################
+    def __init__(self,
+                 number_cores=None,
+                 memory_mb=None):
+        """Constructor
+
+        :param number_cores:
+            The number of cores of the pool, by default all the cores of the node.
+        :param memory_mb:
+            The memory of the pool in MB, by default all the memory of the node.
+        """
+
+        # The resources of the pool
+        self.number_cores = number_cores if number_cores else os.cpu_count() or 1
+        self.memory_mb = memory_mb if memory_mb else get_local_memory()
+
+        # The tasks in the order of their submission
+        self.tasks = list()
+
+        # The limits of the running tasks of the job arrays
+        self.array_limits = dict()
+
+        # The ID of the next job
+        self.next_job_id = 1
+
+        # The lock of the state of the executor, and a condition to notify the scheduler
+        self.condition = threading.Condition()
+
+        # The scheduler thread
+        self.scheduler = None
+
+    ################################################################################################
+    # @submit
+    ################################################################################################
+    def submit(self,
+               script,
+               options=None):
+        """Submits a batch script, like sbatch.
+
+        :param script:
+            The path to the batch script.
+        :param options:
+            A dictionary of the options that override the directives of the script, for example
+            {'mem': '4096', 'array': '1,3'}.
+        :return:
+            The ID of the job.
+        """
+
+        directives = parse_batch_script(script)
+        directives.update(options or dict())
+
+        with self.condition:
+            job_id = str(self.next_job_id)
+            self.next_job_id += 1
+
+            # A task per index of a job array, or a single task
+            tasks = [None]
+            if directives.get('array'):
+                tasks, self.array_limits[job_id] = parse_array(directives['array'])
+            for task_id in tasks:
+                task = LocalTask(job_id, task_id, os.path.abspath(script), directives,
+                                 os.getcwd())
+
+                # A task that can never fit in the pool is rejected
+                if task.cpus > self.number_cores or task.memory_mb > self.memory_mb:
+                    task.reject('Requested %d cores and %d MB, the node has %d cores and %d MB' % (
+                        task.cpus, task.memory_mb, self.number_cores, self.memory_mb))
+                self.tasks.append(task)
+
+            # Start the scheduler
+            if self.scheduler is None:
+                self.scheduler = threading.Thread(target=self.schedule, daemon=True)
+                self.scheduler.start()
+            self.condition.notify_all()
+
+        return job_id
+
+    ################################################################################################
+    # @can_run
+    ################################################################################################
+    def can_run(self,
+                task,
+                free_cores,
+                free_memory):
+        """Checks if a pending task can be admitted.
+
+        :param task:
+            The pending task.
+        :param free_cores:
+            The free cores of the pool.
+        :param free_memory:
+            The free memory of the pool in MB.
+        :return:
+            True if the task fits the free resources and the limit of its array.
+        """
+
+        if task.cpus > free_cores or task.memory_mb > free_memory:
+            return False
+        limit = self.array_limits.get(task.job_id)
+        if task.task_id is not None and limit is not None:
+            running = sum(1 for other in self.tasks
+                          if other.job_id == task.job_id and other.state == 'RUNNING')
+            return running < limit
+        return True
+
+    ################################################################################################
+    # @run_task
+    ################################################################################################
+    def run_task(self,
+                 task):
+        """Runs a task and releases its resources when it finishes.
+
+        :param task:
+            The admitted task.
+        """
+
+        try:
+            task.run()
+        except Exception as error:
+            task.reject('Cannot run, %s' % str(error))
+        with self.condition:
+            self.condition.notify_all()
+
+    ################################################################################################
+    # @schedule
+    ################################################################################################
+    def schedule(self):
+        """Admits the pending tasks in order whenever they fit the free resources.
+
+        A task that does not fit does not block the smaller tasks that are submitted after it.
+        """
+
+        with self.condition:
+            while True:
+                running = [task for task in self.tasks if task.state == 'RUNNING']
+                free_cores = self.number_cores - sum(task.cpus for task in running)
+                free_memory = self.memory_mb - sum(task.memory_mb for task in running)
+
+                for task in self.tasks:
+                    if task.state == 'PENDING' and self.can_run(task, free_cores, free_memory):
+                        task.state = 'RUNNING'
+                        free_cores -= task.cpus
+                        free_memory -= task.memory_mb
+                        threading.Thread(target=self.run_task, args=(task,), daemon=True).start()
+
+                self.condition.wait()
+
+    ################################################################################################
+    # @get_active_jobs
+    ################################################################################################
+    def get_active_jobs(self,
+                        job_ids=None):
+        """Gets the jobs that are still pending or running, like squeue.
+
+        :param job_ids:
+            A list of job IDs, or None for all the jobs.
+        :return:
+            A set of the IDs of the active jobs.
+        """
+
+        with self.condition:
+            return set(task.job_id for task in self.tasks
+                       if task.state in ('PENDING', 'RUNNING') and
+                       (job_ids is None or task.job_id in job_ids))
+
+    ################################################################################################
+    # @get_jobs_states
+    ################################################################################################
+    def get_jobs_states(self,
+                        job_ids=None):
+        """Gets the states and exit codes of the tasks, like sacct.
+
+        :param job_ids:
+            A list of job IDs, or None for all the jobs.
+        :return:
+            A dictionary mapping every task, as <job ID>_<task> or <job ID>, to a tuple of its
+            state and exit code.
+        """
+
+        with self.condition:
+            return {task.get_name(): (task.state, task.exit_code) for task in self.tasks
+                    if job_ids is None or task.job_id in job_ids}
+
+    ################################################################################################
+    # @wait
+    ################################################################################################
+    def wait(self,
+             job_ids=None):
+        """Waits until the given jobs finish.
+
+        :param job_ids:
+            A list of job IDs, or None for all the jobs.
+        """
+
+        with self.condition:
+            while any(task.state in ('PENDING', 'RUNNING') and
+                      (job_ids is None or task.job_id in job_ids) for task in self.tasks):
+                self.condition.wait()
+
+
+####################################################################################################
+# @ Run the main function if invoked from the command line.
+####################################################################################################
+if __name__ == "__main__":
+
+    # Run a list of batch scripts on the local node, and report their states
+    parser = argparse.ArgumentParser(description='Runs SLURM batch scripts on the local node')
+    parser.add_argument('scripts', nargs='+', help='The batch scripts')
+    parser.add_argument('--cores', type=int, default=None,
+                        help='The number of cores of the pool, by default all the cores')
+    parser.add_argument('--memory', type=float, default=None,
+                        help='The memory of the pool in MB, by default all the memory')
+    arguments = parser.parse_args()
+
+    executor = LocalExecutor(number_cores=arguments.cores, memory_mb=arguments.memory)
+    for script in arguments.scripts:
+        print('Submitted batch job %s' % executor.submit(script))
+    executor.wait()
+    for name, (state, exit_code) in sorted(executor.get_jobs_states().items()):
+        print('%s|%s|%s' % (name, state, exit_code))
+    sys.exit(0 if all(state == 'COMPLETED'
+                      for state, _ in executor.get_jobs_states().values()) else 1)
@@ -25,7 +25,7 @@ __status__      = "Production"
 
 
 # System imports
-import sys, os, subprocess, time
+import sys, os, subprocess, time, getpass
 
 # Add other modules
 sys.path.append("%s/../consts" % os.path.dirname(os.path.realpath(__file__)))
@@ -34,11 +34,34 @@ sys.path.append("%s/../interface" % os.path.dirname(os.path.realpath(__file__)))
 
 # Internal modules
 import arguments_parser
+import cost_model
 import file_ops
+import inputs_list
+import job_monitor
 import paths_consts
+import run_manifest
 import slurm_configuration
 
 
+# The executor that runs the batch jobs on the local node instead of the cluster, if any
+LOCAL_EXECUTOR = None
+
+
+####################################################################################################
+# @set_local_executor
+####################################################################################################
+def set_local_executor(executor):
+    """Set a local executor that runs the batch jobs on the local node, instead of submitting them
+    to the cluster with the commands of SLURM.
+
+    :param executor:
+        A @LocalExecutor, or None to use the cluster.
+    """
+
+    global LOCAL_EXECUTOR
+    LOCAL_EXECUTOR = executor
+
+
 ####################################################################################################
 # @squeue
 ####################################################################################################
@@ -69,12 +92,27 @@ def get_current_number_jobs_for_user(user_name):
         user name.
     """
 
-    number_jobs = 0
-    jobs = squeue()
-    for job in jobs:
-        if user_name in job:
-            number_jobs += 1
-    return number_jobs
+    # The jobs of the local executor
+    if LOCAL_EXECUTOR is not None:
+        return len(LOCAL_EXECUTOR.get_active_jobs())
+
+    # Only the jobs of the user are listed, a job per line
+    result = subprocess.check_output(['squeue', '--noheader', '--user=%s' % user_name],
+                                     universal_newlines=True)
+    return len([line for line in result.split('\n') if line.strip()])
+
+
+####################################################################################################
+# @get_user_name
+####################################################################################################
+def get_user_name():
+    """Get the user name of the current user, who submits the jobs.
+
+    :return:
+        The user name of the current user.
+    """
+
+    return getpass.getuser()
 
 
 ####################################################################################################
@@ -106,6 +144,10 @@ def create_batch_job_config_string(slurm_config):
     # Job name
     b += "#SBATCH --job-name=\"%s%s\"%s" % (slurm_config.job_name, str(slurm_config.job_number), sl)
 
+    # The tasks of the job array
+    if slurm_config.array is not None:
+        b += "#SBATCH --array=%s%s" % (slurm_config.array, sl)
+
     # Number of nodes required to execute the job
     b += "#SBATCH --nodes=%s%s" % (slurm_config.num_nodes, sl)
 
@@ -131,8 +173,10 @@ def create_batch_job_config_string(slurm_config):
     # b += "#SBATCH --reservation=%s%s" % ("viz_team", sl)
 
     """ Logs """
-    std_out = "%s/slurm-stdout_%s.log" % (slurm_config.logs_directory, str(slurm_config.job_number))
-    std_err = "%s/slurm-stderr_%s.log" % (slurm_config.logs_directory, str(slurm_config.job_number))
+    # The logs of the tasks of a job array are named after the job ID and the task index
+    log_id = '%A_%a' if slurm_config.array is not None else str(slurm_config.job_number)
+    std_out = "%s/slurm-stdout_%s.log" % (slurm_config.logs_directory, log_id)
+    std_err = "%s/slurm-stderr_%s.log" % (slurm_config.logs_directory, log_id)
     b += "#SBATCH --output=%s%s" % (std_out, sl)
     b += "#SBATCH --error=%s%s" % (std_err, dl)
 
@@ -215,7 +259,9 @@ def create_batch_job_script_for_gid(arguments,
 ####################################################################################################
 def create_batch_job_script_for_multiple_gids(arguments,
                                               gids,
-                                              script_id):
+                                              script_id,
+                                              memory_mb=None,
+                                              session_time=None):
     """Create a batch job file for different neurons with specific gids for the meshing.
 
     :param arguments:
@@ -224,6 +270,10 @@ def create_batch_job_script_for_multiple_gids(arguments,
         A list of GIDs.
     :param script_id:
         Script ID.
+    :param memory_mb:
+        The memory of the job in MB, if None the default one is used.
+    :param session_time:
+        The time of the job as H:MM:SS, if None the default one is used.
     """
 
     # Create slurm configuration
@@ -233,6 +283,12 @@ def create_batch_job_script_for_multiple_gids(arguments,
     # Job number should match the gid
     slurm_config.job_number = script_id
 
+    # The resources of the job
+    if memory_mb is not None:
+        slurm_config.memory_mb = memory_mb
+    if session_time is not None:
+        slurm_config.session_time = session_time
+
     # Execution directory, same as output directory
     slurm_config.execution_directory = '%s' % arguments.output_directory
 
@@ -258,6 +314,65 @@ def create_batch_job_script_for_multiple_gids(arguments,
     file_ops.write_batch_job_string_to_file(slurm_jobs_directory, script_id, batch_job_config_string)
 
 
+####################################################################################################
+# @create_batch_job_script_for_multiple_morphology_files
+####################################################################################################
+def create_batch_job_script_for_multiple_morphology_files(arguments,
+                                                          morphology_files,
+                                                          script_id,
+                                                          memory_mb=None,
+                                                          session_time=None):
+    """Create a batch job file for different morphology files.
+
+    :param arguments:
+        Command line arguments.
+    :param morphology_files:
+        A list of morphology files.
+    :param script_id:
+        Script ID.
+    :param memory_mb:
+        The memory of the job in MB, if None the default one is used.
+    :param session_time:
+        The time of the job as H:MM:SS, if None the default one is used.
+    """
+
+    # Create slurm configuration
+    slurm_config = slurm_configuration.SlurmConfiguration()
+
+    # Update slurm configuration data
+    slurm_config.job_number = script_id
+
+    # The resources of the job
+    if memory_mb is not None:
+        slurm_config.memory_mb = memory_mb
+    if session_time is not None:
+        slurm_config.session_time = session_time
+
+    # Execution directory, same as output directory
+    slurm_config.execution_directory = '%s' % arguments.output_directory
+
+    # Log directory
+    slurm_config.logs_directory = '%s/%s' % (arguments.output_directory,
+                                             paths_consts.Paths.SLURM_LOGS_FOLDER)
+
+    # Generate the batch job configuration string
+    batch_job_config_string = create_batch_job_config_string(slurm_config)
+
+    # Setup the shell command, a command per file
+    shell_command = ""
+    for morphology_file in morphology_files:
+        shell_command += arguments_parser.create_executable_for_single_morphology_file(
+            arguments, morphology_file) + '\n'
+
+    # Add the command to the batch job config string
+    batch_job_config_string += shell_command
+
+    # Write the batch job script to file in the slurm jobs directory
+    slurm_jobs_directory = '%s/%s' % (arguments.output_directory,
+                                      paths_consts.Paths.SLURM_JOBS_FOLDER)
+    file_ops.write_batch_job_string_to_file(slurm_jobs_directory, script_id, batch_job_config_string)
+
+
 ####################################################################################################
 # @create_batch_job_script_for_morphology_file
 ####################################################################################################
@@ -302,72 +417,316 @@ def create_batch_job_script_for_morphology_file(arguments,
         slurm_jobs_directory, morphology_file, batch_job_config_string)
 
 
+####################################################################################################
+# @pack_jobs
+####################################################################################################
+def pack_jobs(arguments,
+              jobs):
+    """Packs the inputs into cluster jobs with balanced predicted times, using the cost model.
+
+    The model is calibrated first from the timings that are recorded by the runs it has scheduled,
+    including the current one if it is resumed, and this run is registered to calibrate it later.
+    The number of the packed jobs is the number of the inputs divided by the chunk size.
+
+    :param arguments:
+        Command line arguments.
+    :param jobs:
+        A list of dictionaries of the jobs, with either a 'morphology_file' or a 'gid'.
+    :return:
+        A list of the packed jobs, every one is a tuple of the indices of its inputs, its
+        predicted time in seconds and its predicted peak memory in MB.
+    """
+
+    # Nothing to pack
+    if not jobs:
+        return list()
+
+    # Calibrate the model, and register the run
+    model_file = arguments.cost_model if arguments.cost_model not in [None, 'None'] else None
+    model = cost_model.CostModel(model_file)
+    builder_key = cost_model.get_builder_key(arguments)
+    model.add_run(arguments.output_directory, builder_key)
+    number_observations = model.calibrate()
+    model.write()
+
+    # Predict the cost of every input, the GIDs are sized from the morphology files in the circuit
+    gids_files = cost_model.get_gids_morphology_files(
+        getattr(arguments, 'blue_config', None),
+        [job['gid'] for job in jobs if job.get('gid') is not None])
+    predictions = [model.predict(builder_key, model.get_input_size(
+        get_job_key(job), job.get('morphology_file') or gids_files.get(job.get('gid'))))
+        for job in jobs]
+
+    # Pack the inputs
+    bins, loads = cost_model.pack_inputs(
+        [prediction[0] for prediction in predictions],
+        inputs_list.get_number_chunks(len(jobs), arguments.chunk_size))
+    packed_jobs = [(indices, load, max(predictions[i][1] for i in indices))
+                   for indices, load in zip(bins, loads)]
+
+    # Report
+    print('PACKED: %d inputs into %d jobs, predicted times %.1f - %.1f s (%d new timings)' % (
+        len(jobs), len(packed_jobs), min(loads), max(loads), number_observations))
+
+    # Return the packed jobs
+    return packed_jobs
+
+
+####################################################################################################
+# @create_job_array_script
+####################################################################################################
+def create_job_array_script(arguments,
+                            jobs,
+                            packed_jobs):
+    """Create a single batch script for a SLURM job array over a list of inputs.
+
+    The inputs are written to a list file in the slurm jobs directory, and every task of the array
+    processes a packed chunk of the list in a single Blender session. The number of tasks that run
+    at once is limited by the concurrency limit of the array. All the tasks share the same time and
+    memory, that fit the most expensive of them.
+
+    :param arguments:
+        Command line arguments.
+    :param jobs:
+        A list of dictionaries of the jobs, with either a 'morphology_file' or a 'gid'.
+    :param packed_jobs:
+        A list of the packed jobs, see @pack_jobs.
+    :return:
+        The path to the batch script, and the SLURM configuration of the array.
+    """
+
+    # The slurm jobs directory
+    slurm_jobs_directory = '%s/%s' % (arguments.output_directory,
+                                      paths_consts.Paths.SLURM_JOBS_FOLDER)
+
+    # Write the inputs list, every job has the index of its chunk
+    chunked_jobs = list()
+    for chunk_index, (indices, _, _) in enumerate(packed_jobs):
+        for i in indices:
+            chunked_jobs.append(dict(jobs[i], chunk=chunk_index))
+    inputs_list_file = '%s/inputs.list' % slurm_jobs_directory
+    inputs_list.write_inputs_list(inputs_list_file, chunked_jobs)
+
+    # A task per chunk
+    number_tasks = len(packed_jobs)
+
+    # Create slurm configuration
+    slurm_config = slurm_configuration.SlurmConfiguration()
+
+    # The resources of the most expensive task
+    slurm_config.session_time, slurm_config.memory_mb = cost_model.get_job_resources(
+        max(packed_job[1] for packed_job in packed_jobs),
+        max(packed_job[2] for packed_job in packed_jobs))
+
+    # The tasks of the array and the limit of the running tasks
+    slurm_config.job_number = 'Array'
+    slurm_config.array = '0-%d%%%d' % (number_tasks - 1, max(1, arguments.maximum_jobs))
+
+    # Execution directory, same as output directory
+    slurm_config.execution_directory = '%s' % arguments.output_directory
+
+    # Log directory
+    slurm_config.logs_directory = '%s/%s' % (arguments.output_directory,
+                                             paths_consts.Paths.SLURM_LOGS_FOLDER)
+
+    # Generate the batch job configuration string
+    batch_job_config_string = create_batch_job_config_string(slurm_config)
+
+    # Setup the shell command, the chunk is selected by the index of the task
+    batch_job_config_string += arguments_parser.create_executable_for_array_task(
+        arguments, inputs_list_file)
+
+    # Write the batch job script to file in the slurm jobs directory
+    file_ops.write_batch_job_string_to_file(slurm_jobs_directory, 'array', batch_job_config_string)
+
+    # Return the script and the configuration
+    return '%s/array.sh' % slurm_jobs_directory, slurm_config
+
+
+####################################################################################################
+# @submit_batch_job
+####################################################################################################
+def submit_batch_job(script_full_path):
+    """Submits a single batch script.
+
+    :param script_full_path:
+        The path to the batch script.
+    :return:
+        The ID of the submitted job, or None if the submission failed.
+    """
+
+    # 'chmod' the script to be able to execute it
+    subprocess.call('chmod +x %s' % script_full_path, shell=True)
+
+    # Run it on the local node
+    if LOCAL_EXECUTOR is not None:
+        print('Submitting [%s] to the local executor' % script_full_path)
+        return LOCAL_EXECUTOR.submit(script_full_path)
+
+    # Submit it, the parsable output is the ID of the job and optionally the cluster name
+    print('Submitting [sbatch %s]' % script_full_path)
+    try:
+        result = subprocess.check_output(['sbatch', '--parsable', script_full_path],
+                                         universal_newlines=True)
+    except (OSError, subprocess.CalledProcessError) as error:
+        print('ERROR: Cannot submit [%s], %s' % (script_full_path, str(error)))
+        return None
+
+    # Return the job ID
+    return result.strip().split(';')[0]
+
+
 ####################################################################################################
 # @submit_batch_jobs
 ####################################################################################################
 def submit_batch_jobs(user_name,
-                      slurm_jobs_directory):
+                      slurm_jobs_directory,
+                      maximum_jobs=500):
     """Submits all the batch jobs found in the jobs directory.
 
-    This function takes into account the maximum limit imposed by the cluster (500 jobs per user).
+    This function takes into account the maximum number of jobs that a user can have on the
+    cluster at the same time.
 
     :param user_name:
         The user name of the current user.
     :param slurm_jobs_directory:
         The directory where the batch jobs are created. .
+    :param maximum_jobs:
+        The maximum number of jobs of the user on the cluster.
+    :return:
+        A dictionary mapping the submitted scripts to the IDs of their jobs.
     """
 
     # Get all the scripts in the slurm jobs directory to submit them
     scripts = file_ops.get_files_in_directory(slurm_jobs_directory, file_extension='.sh')
 
+    # The IDs of the submitted jobs
+    submitted_jobs = dict()
+
     # Use an index to keep track on the number of jobs submitted to the cluster.
     script_index = 0
 
     # Submit the jobs taking into account the maximum number of jobs dedicated per user
-    while True:
-
-        # Just sleep for a second
-        time.sleep(1)
+    while script_index < len(scripts):
 
         # Get the number of jobs active for that user
         number_active_jobs = get_current_number_jobs_for_user(user_name=user_name)
 
-        # If the number of jobs is greater than 500, then wait a second and try again
-        if number_active_jobs >= 500:
+        # If the number of jobs reaches the limit, then wait a second and try again
+        if number_active_jobs >= maximum_jobs:
             print('Waiting for resources ...')
+            time.sleep(1)
             continue
 
-        # Otherwise, you can submit some jobs
-        else:
+        # Otherwise, submit as many jobs as you can
+        for i in range(maximum_jobs - number_active_jobs):
 
-            # Get the number of jobs that are available to submit
-            number_available_jobs = 500 - number_active_jobs
+            # Make sure that we still have some jobs to submit, otherwise break
+            if script_index >= len(scripts):
+                return submitted_jobs
 
-            # Submit as many jobs as you can
-            for i in range(number_available_jobs):
+            # Submit the script
+            submitted_jobs[scripts[script_index]] = submit_batch_job(
+                '%s/%s' % (slurm_jobs_directory, scripts[script_index]))
 
-                # Make sure that we still have some jobs to submit, otherwise break
-                if script_index >= len(scripts):
-                    return
+            # Increment the script index
+            script_index += 1
 
-                # Get the script full path
-                script_full_path = '%s/%s' % (slurm_jobs_directory, scripts[script_index])
+    return submitted_jobs
 
-                # 'chmod' the script to be able to execute it
-                shell_command = 'chmod +x %s' % script_full_path
 
-                # Execute the command
-                subprocess.call(shell_command, shell=True)
+####################################################################################################
+# @run_job_array_on_cluster
+####################################################################################################
+def run_job_array_on_cluster(arguments,
+                             jobs):
+    """Runs the jobs on the cluster as a single SLURM job array.
+
+    :param arguments:
+        Input arguments.
+    :param jobs:
+        A list of dictionaries of the jobs, with either a 'morphology_file' or a 'gid'.
+    :return:
+        The ID of the job array, or None if it is not submitted.
+    """
+
+    # Nothing to submit
+    if not jobs:
+        print('No jobs to submit')
+        return None
+
+    # Create the script of the array and submit it once
+    packed_jobs = pack_jobs(arguments=arguments, jobs=jobs)
+    script, slurm_config = create_job_array_script(
+        arguments=arguments, jobs=jobs, packed_jobs=packed_jobs)
+    job_id = submit_batch_job(script)
+    if job_id is None:
+        return None
+    print('SUBMITTED: Job array [%s] of %d tasks for %d inputs, %d tasks at once' % (
+        job_id, len(packed_jobs), len(jobs), min(len(packed_jobs), max(1, arguments.maximum_jobs))))
+
+    # Record the array to be monitored, with the inputs and the error log of every task
+    tasks = dict()
+    for task, (indices, _, _) in enumerate(packed_jobs):
+        tasks[str(task)] = {'inputs': [get_job_key(jobs[i]) for i in indices],
+                            'stderr': '%s/slurm-stderr_%s_%d.log' % (
+                                slurm_config.logs_directory, job_id, task)}
+    job_monitor.record_submission(
+        arguments.output_directory, job_id, script, tasks, slurm_config.memory_mb,
+        slurm_config.session_time, array=True)
+
+    # Return the ID of the array
+    return job_id
 
-                # Format the shell command
-                shell_command = 'sbatch %s' % script_full_path
 
-                # Execute the command
-                print('Submitting [%s]' % shell_command)
-                subprocess.call(shell_command, shell=True)
+####################################################################################################
+# @get_job_key
+####################################################################################################
+def get_job_key(job):
+    """Get the key of the input of a job in the run manifest.
 
-                # Increment the script index
-                script_index += 1
+    :param job:
+        A dictionary of the job, with either a 'morphology_file' or a 'gid'.
+    :return:
+        The key of the input.
+    """
+
+    return run_manifest.get_input_key(morphology_file=job.get('morphology_file'),
+                                      gid=job.get('gid'))
+
+
+####################################################################################################
+# @submit_packed_batch_jobs
+####################################################################################################
+def submit_packed_batch_jobs(arguments,
+                             packed_scripts):
+    """Submits the batch jobs of the packed inputs, and records them to be monitored.
+
+    :param arguments:
+        Input arguments.
+    :param packed_scripts:
+        A list of the created scripts, every one is a tuple of its script ID, the keys of its
+        inputs, its memory and its session time.
+    """
+
+    # Submit the jobs
+    slurm_jobs_directory = '%s/%s' % (arguments.output_directory,
+                                      paths_consts.Paths.SLURM_JOBS_FOLDER)
+    submitted_jobs = submit_batch_jobs(
+        user_name=get_user_name(), slurm_jobs_directory=slurm_jobs_directory,
+        maximum_jobs=arguments.maximum_jobs)
+
+    # Record every job as a single task
+    slurm_logs_directory = '%s/%s' % (arguments.output_directory,
+                                      paths_consts.Paths.SLURM_LOGS_FOLDER)
+    for script_id, keys, memory_mb, session_time in packed_scripts:
+        job_id = submitted_jobs.get('%s.sh' % script_id)
+        if job_id is None:
+            continue
+        job_monitor.record_submission(
+            arguments.output_directory, job_id, '%s/%s.sh' % (slurm_jobs_directory, script_id),
+            {'0': {'inputs': keys, 'stderr': '%s/slurm-stderr_%s.log' % (
+                slurm_logs_directory, script_id)}}, memory_mb, session_time)
 
 
 ####################################################################################################
@@ -383,16 +742,58 @@ def run_gid_jobs_on_cluster(arguments,
         GID list for all the neurons.
     """
 
-    for gid in gids:
-
-        # Create the batch jobs for the all the GIDs in the target
-        create_batch_job_script_for_gid(arguments=arguments, gid=gid)
+    # The manifest of the run, skip the complete GIDs if the run is resumed
+    manifest = run_manifest.RunManifest(arguments.output_directory)
+    keys = [run_manifest.get_input_key(gid=gid) for gid in gids]
+    if arguments.resume:
+        gids = manifest.get_pending_inputs(gids, keys, run_manifest.get_options_hash(arguments))
+
+    # List all the GIDs of the run in the manifest, the jobs record them when they finish
+    manifest.write(keys)
+    job_monitor.start_submissions(arguments.output_directory,
+                                  run_manifest.get_options_hash(arguments))
+
+    # A single job array over all the GIDs
+    if arguments.slurm_backend != 'jobs':
+        run_job_array_on_cluster(arguments=arguments, jobs=[
+            {'gid': str(gid), 'blue_config': arguments.blue_config} for gid in gids])
+        return
+
+    # Create a batch job for every packed group of GIDs, with its own resources
+    jobs = [{'gid': str(gid)} for gid in gids]
+    packed_scripts = list()
+    for script_id, (indices, predicted_time, predicted_memory) in enumerate(
+            pack_jobs(arguments=arguments, jobs=jobs)):
+        session_time, memory_mb = cost_model.get_job_resources(predicted_time, predicted_memory)
+        create_batch_job_script_for_multiple_gids(
+            arguments=arguments, gids=[gids[i] for i in indices], script_id=script_id,
+            memory_mb=memory_mb, session_time=session_time)
+        packed_scripts.append((script_id, [get_job_key(jobs[i]) for i in indices], memory_mb,
+                               session_time))
 
     # Submit the jobs
-    # TODO: Add an option for the user
-    slurm_jobs_directory = '%s/%s' % (arguments.output_directory,
-                                      paths_consts.Paths.SLURM_JOBS_FOLDER)
-    submit_batch_jobs(user_name='abdellah', slurm_jobs_directory=slurm_jobs_directory)
+    submit_packed_batch_jobs(arguments=arguments, packed_scripts=packed_scripts)
+
+
+####################################################################################################
+# @get_morphology_file_path
+####################################################################################################
+def get_morphology_file_path(arguments,
+                             morphology_file):
+    """Get the path to a morphology file, that is relative to the morphology directory if the
+    input is a directory.
+
+    :param arguments:
+        Input arguments.
+    :param morphology_file:
+        The name of the morphology file in the directory, or its path.
+    :return:
+        The path to the morphology file.
+    """
+
+    if arguments.morphology_directory in [None, 'None']:
+        return morphology_file
+    return '%s/%s' % (arguments.morphology_directory, morphology_file)
 
 
 ####################################################################################################
@@ -408,15 +809,38 @@ def run_morphology_files_jobs_on_cluster(arguments,
         A list of morphology files.
     """
 
-    for morphology_file in morphology_files:
-
-        # Create the batch jobs for the all the GIDs in the target
-        create_batch_job_script_for_morphology_file(
-            arguments=arguments, morphology_file=morphology_file)
+    # The manifest of the run, skip the complete files if the run is resumed
+    manifest = run_manifest.RunManifest(arguments.output_directory)
+    keys = [run_manifest.get_input_key(get_morphology_file_path(arguments, morphology_file))
+            for morphology_file in morphology_files]
+    if arguments.resume:
+        morphology_files = manifest.get_pending_inputs(
+            morphology_files, keys, run_manifest.get_options_hash(arguments))
+
+    # List all the files of the run in the manifest, the jobs record them when they finish
+    manifest.write(keys)
+    job_monitor.start_submissions(arguments.output_directory,
+                                  run_manifest.get_options_hash(arguments))
+
+    # A single job array over all the files
+    if arguments.slurm_backend != 'jobs':
+        run_job_array_on_cluster(arguments=arguments, jobs=[
+            {'morphology_file': os.path.abspath(get_morphology_file_path(
+                arguments, morphology_file))} for morphology_file in morphology_files])
+        return
+
+    # Create a batch job for every packed group of files, with its own resources
+    jobs = [{'morphology_file': get_morphology_file_path(arguments, morphology_file)}
+            for morphology_file in morphology_files]
+    packed_scripts = list()
+    for script_id, (indices, predicted_time, predicted_memory) in enumerate(
+            pack_jobs(arguments=arguments, jobs=jobs)):
+        session_time, memory_mb = cost_model.get_job_resources(predicted_time, predicted_memory)
+        create_batch_job_script_for_multiple_morphology_files(
+            arguments=arguments, morphology_files=[morphology_files[i] for i in indices],
+            script_id=script_id, memory_mb=memory_mb, session_time=session_time)
+        packed_scripts.append((script_id, [get_job_key(jobs[i]) for i in indices], memory_mb,
+                               session_time))
 
     # Submit the jobs
-    # TODO: Add an option for the user
-    slurm_jobs_directory = '%s/%s' % (arguments.output_directory,
-                                      paths_consts.Paths.SLURM_JOBS_FOLDER)
-    submit_batch_jobs(user_name='abdellah', slurm_jobs_directory=slurm_jobs_directory)
-
+    submit_packed_batch_jobs(arguments=arguments, packed_scripts=packed_scripts)
@@ -73,4 +73,8 @@ class SlurmConfiguration:
         self.execution_directory = ''
 
         # Logs directory, where the logs will be written
-        self.logs_directory = ''
\ No newline at end of file
+        self.logs_directory = ''
+
+        # The indices of the tasks if the job is an array, with an optional limit of the tasks
+        # that run at once, for example 0-99%50, or None for a single job
+        self.array = None
\ No newline at end of file
@@ -23,7 +23,9 @@ __maintainer__  = "Marwan Abdellah"
 __email__       = "marwan.abdellah@epfl.ch"
 __status__      = "Production"
 
+from .code_profiler import *
 from .parser import *
+from .profiler import *
 from .std_output import *
 from .time_line import *
 from .timer import *
@@ -0,0 +1,293 @@
+####################################################################################################
+# Copyright (c) 2016 - 2018, EPFL / Blue Brain Project
+#               Marwan Abdellah <marwan.abdellah@epfl.ch>
+#
+# This file is part of NeuroMorphoVis <https://github.com/BlueBrain/NeuroMorphoVis>
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU General Public License as published by the Free Software Foundation, version 3 of the License.
+#
+# This Blender-based tool is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program.
+# If not, see <http://www.gnu.org/licenses/>.
+####################################################################################################
+
+__author__      = "Marwan Abdellah"
+__copyright__   = "Copyright (c) 2016 - 2018, Blue Brain Project / EPFL"
+__credits__     = ["Ahmet Bilgili", "Juan Hernando", "Stefan Eilemann"]
+__version__     = "1.0.0"
+__maintainer__  = "Marwan Abdellah"
+__email__       = "marwan.abdellah@epfl.ch"
+__status__      = "Production"
+
+# System imports
+import io
+import os
+import sys
+import time
+import pstats
+import cProfile
+import threading
+
+
+# The supported profilers
+CODE_PROFILERS = ['cprofile', 'sampling']
+
+
+####################################################################################################
+# @get_function_name
+####################################################################################################
+def get_function_name(code):
+    """Gets a readable name of the function of a code object.
+
+    :param code:
+        The code object of a frame.
+    :return:
+        A string of the file, line and function, in the same form as pstats.
+    """
+
+    return '%s:%d(%s)' % (code.co_filename, code.co_firstlineno, code.co_name)
+
+
+####################################################################################################
+# @SamplingProfiler
+####################################################################################################
+class SamplingProfiler:
+    """A low-overhead statistical profiler that samples the stack of a thread at a fixed interval
+    from a background thread.
+
+    The profiled thread is never interrupted, so its overhead is that of walking its stack at every
+    sample. The samples are kept as collapsed stacks, which can be given to the flame graph tools.
+    """
+
+    ################################################################################################
+    # @__init__
+    ################################################################################################
+    def __init__(self,
+                 interval=0.005,
+                 thread=None):
+        """Constructor
+
+        :param interval:
+            The interval between two samples, in seconds.
+        :param thread:
+            The profiled thread, by default the thread that creates the profiler.
+        """
+
+        # The sampling interval
+        self.interval = interval
+
+        # The identifier of the profiled thread
+        self.thread_id = (thread if thread is not None else threading.current_thread()).ident
+
+        # The number of samples of every collapsed stack
+        self.stacks = dict()
+
+        # The total number of samples
+        self.number_samples = 0
+
+        # An event to stop the sampling thread
+        self.stop_event = threading.Event()
+
+        # The sampling thread
+        self.thread = None
+
+    ################################################################################################
+    # @sample
+    ################################################################################################
+    def sample(self):
+        """Takes a single sample of the stack of the profiled thread.
+        """
+
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return
+
+        # Walk the stack from the innermost frame
+        functions = list()
+        while frame is not None:
+            functions.append(get_function_name(frame.f_code))
+            frame = frame.f_back
+
+        stack = ';'.join(reversed(functions))
+        self.stacks[stack] = self.stacks.get(stack, 0) + 1
+        self.number_samples += 1
+
+    ################################################################################################
+    # @run
+    ################################################################################################
+    def run(self):
+        """Samples the profiled thread until the profiler is stopped.
+        """
+
+        while not self.stop_event.wait(self.interval):
+            self.sample()
+
+    ################################################################################################
+    # @enable
+    ################################################################################################
+    def enable(self):
+        """Starts sampling.
+        """
+
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    ################################################################################################
+    # @disable
+    ################################################################################################
+    def disable(self):
+        """Stops sampling.
+        """
+
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    ################################################################################################
+    # @dump_stats
+    ################################################################################################
+    def dump_stats(self,
+                   file_path):
+        """Writes the samples as collapsed stacks, a stack and its number of samples per line.
+
+        :param file_path:
+            The path to the output file.
+        """
+
+        with open(file_path, 'w') as stacks_file:
+            for stack, count in sorted(self.stacks.items()):
+                stacks_file.write('%s %d\n' % (stack, count))
+
+    ################################################################################################
+    # @get_summary
+    ################################################################################################
+    def get_summary(self,
+                    top=20):
+        """Gets a summary of the hottest functions.
+
+        :param top:
+            The number of functions in the summary.
+        :return:
+            A string of the functions sorted by their own samples, with their cumulative samples.
+        """
+
+        own_samples = dict()
+        cumulative_samples = dict()
+        for stack, count in self.stacks.items():
+            functions = stack.split(';')
+            own_samples[functions[-1]] = own_samples.get(functions[-1], 0) + count
+            for function in set(functions):
+                cumulative_samples[function] = cumulative_samples.get(function, 0) + count
+
+        total = max(1, self.number_samples)
+        lines = ['%d samples, every %.1f ms' % (self.number_samples, self.interval * 1000.0),
+                 '%8s %8s  %s' % ('Own %', 'Cum %', 'Function')]
+        for function, count in sorted(own_samples.items(), key=lambda item: -item[1])[:top]:
+            lines.append('%8.2f %8.2f  %s' % (100.0 * count / total,
+                                               100.0 * cumulative_samples[function] / total,
+                                               function))
+        return '\n'.join(lines)
+
+
+####################################################################################################
+# @CodeProfiler
+####################################################################################################
+class CodeProfiler:
+    """Profiles the Python code of a run, either deterministically with cProfile or statistically
+    with @SamplingProfiler, and writes the profile next to the outputs of the run.
+    """
+
+    ################################################################################################
+    # @__init__
+    ################################################################################################
+    def __init__(self,
+                 profiler='cprofile'):
+        """Constructor
+
+        :param profiler:
+            The profiler, 'cprofile' or 'sampling'.
+        """
+
+        # The name of the profiler
+        self.profiler = profiler
+
+        # The profiler object
+        if profiler == 'sampling':
+            self.profile = SamplingProfiler()
+        else:
+            self.profile = cProfile.Profile()
+
+        # The wall time of the profiled code
+        self.starting_time = 0.0
+        self.elapsed = 0.0
+
+    ################################################################################################
+    # @start
+    ################################################################################################
+    def start(self):
+        """Starts profiling.
+        """
+
+        self.starting_time = time.time()
+        self.profile.enable()
+
+    ################################################################################################
+    # @stop
+    ################################################################################################
+    def stop(self):
+        """Stops profiling.
+        """
+
+        self.profile.disable()
+        self.elapsed = time.time() - self.starting_time
+
+    ################################################################################################
+    # @write
+    ################################################################################################
+    def write(self,
+              directory,
+              label):
+        """Writes the profile to a file, a pstats file for cProfile that can be loaded with
+        pstats or snakeviz, or a collapsed stacks file for the sampling profiler.
+
+        :param directory:
+            The output directory of the profile.
+        :param label:
+            The label of the profiled input.
+        :return:
+            The path to the profile file.
+        """
+
+        os.makedirs(directory, exist_ok=True)
+        extension = 'folded' if self.profiler == 'sampling' else 'prof'
+        profile_file = '%s/%s.%s' % (directory, label, extension)
+        self.profile.dump_stats(profile_file)
+        return profile_file
+
+    ################################################################################################
+    # @get_summary
+    ################################################################################################
+    def get_summary(self,
+                    top=20):
+        """Gets a summary of the hottest functions of the profile.
+
+        :param top:
+            The number of functions in the summary.
+        :return:
+            A string of the summary.
+        """
+
+        if self.profiler == 'sampling':
+            summary = self.profile.get_summary(top)
+        else:
+            stream = io.StringIO()
+            stats = pstats.Stats(self.profile, stream=stream)
+            stats.sort_stats('tottime').print_stats(top)
+            summary = stream.getvalue().strip()
+        return 'Profiled [%f] seconds\n%s' % (self.elapsed, summary)
@@ -0,0 +1,515 @@
+####################################################################################################
+# Copyright (c) 2016 - 2018, EPFL / Blue Brain Project
+#               Marwan Abdellah <marwan.abdellah@epfl.ch>
+#
+# This file is part of NeuroMorphoVis <https://github.com/BlueBrain/NeuroMorphoVis>
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU General Public License as published by the Free Software Foundation, version 3 of the License.
+#
+# This Blender-based tool is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program.
+# If not, see <http://www.gnu.org/licenses/>.
+####################################################################################################
+
+__author__      = "Marwan Abdellah"
+__copyright__   = "Copyright (c) 2016 - 2018, Blue Brain Project / EPFL"
+__credits__     = ["Ahmet Bilgili", "Juan Hernando", "Stefan Eilemann"]
+__version__     = "1.0.0"
+__maintainer__  = "Marwan Abdellah"
+__email__       = "marwan.abdellah@epfl.ch"
+__status__      = "Production"
+
+# System imports
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import functools
+import threading
+import contextlib
+
+# The resource module is not available on Windows
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+# The folder where the profiles of a run are written, in the output directory
+PROFILES_FOLDER = 'profiles'
+
+# The summary of the profiles of a batch, in the output directory
+PROFILES_SUMMARY_FILE = 'profiles-summary.json'
+
+# The profiler of the morphology that is currently processed, if any
+active_profiler = None
+
+
+####################################################################################################
+# @get_peak_rss
+####################################################################################################
+def get_peak_rss():
+    """Gets the peak resident set size of the process until now, or since it was last reset by
+    @reset_peak_rss.
+
+    :return:
+        The peak RSS in MB, or None if it cannot be measured on this platform.
+    """
+
+    # The peak of Linux, that can be reset
+    try:
+        with open('/proc/self/status', 'r') as status_file:
+            for line in status_file:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024.0
+    except (IOError, OSError, ValueError):
+        pass
+
+    if resource is None:
+        return None
+
+    # The maximum RSS is given in bytes on macOS and in kilobytes otherwise
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return peak_rss / (1024.0 * 1024.0)
+    return peak_rss / 1024.0
+
+
+####################################################################################################
+# @reset_peak_rss
+####################################################################################################
+def reset_peak_rss():
+    """Resets the peak resident set size of the process to its current one, so that the peak of
+    every input of a long session can be measured on its own. Only supported on Linux.
+
+    :return:
+        True if the peak is reset, otherwise False.
+    """
+
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs_file:
+            clear_refs_file.write('5')
+        return True
+    except (IOError, OSError):
+        return False
+
+
+####################################################################################################
+# @ProfileSpan
+####################################################################################################
+class ProfileSpan:
+    """A named span of the execution, it measures the wall time, the CPU time and the peak RSS of
+    the block that it wraps, and holds the spans that are nested in it.
+
+    The CPU time is that of the whole process, so it includes the background threads, for
+    example the prefetching of the next morphologies, that run during the span.
+    """
+
+    ################################################################################################
+    # @__init__
+    ################################################################################################
+    def __init__(self,
+                 name):
+        """Constructor
+
+        :param name:
+            The name of the span.
+        """
+
+        # The name of the span
+        self.name = name
+
+        # The wall time, in seconds
+        self.wall_time = 0.0
+
+        # The CPU time, in seconds
+        self.cpu_time = 0.0
+
+        # The peak RSS of the process at the end of the span, in MB
+        self.peak_rss = None
+
+        # The increase of the peak RSS during the span, in MB
+        self.peak_rss_increase = None
+
+        # The nested spans, in the order of their execution
+        self.children = list()
+
+        # The starting times and peak RSS
+        self.starting_wall_time = 0.0
+        self.starting_cpu_time = 0.0
+        self.starting_peak_rss = None
+
+    ################################################################################################
+    # @__enter__
+    ################################################################################################
+    def __enter__(self):
+        """Starts measuring the span.
+        """
+
+        self.starting_peak_rss = get_peak_rss()
+        self.starting_cpu_time = time.process_time()
+        self.starting_wall_time = time.time()
+        return self
+
+    ################################################################################################
+    # @__exit__
+    ################################################################################################
+    def __exit__(self,
+                 exception_type,
+                 exception_value,
+                 traceback):
+        """Ends measuring the span, even if the wrapped block raised an exception.
+        """
+
+        self.wall_time = time.time() - self.starting_wall_time
+        self.cpu_time = time.process_time() - self.starting_cpu_time
+        self.peak_rss = get_peak_rss()
+        if self.peak_rss is not None and self.starting_peak_rss is not None:
+            self.peak_rss_increase = self.peak_rss - self.starting_peak_rss
+        return False
+
+    ################################################################################################
+    # @to_dict
+    ################################################################################################
+    def to_dict(self):
+        """Converts the span and its nested spans to a dictionary.
+
+        :return:
+            A dictionary of the span.
+        """
+
+        return {'name': self.name,
+                'wall_time': self.wall_time,
+                'cpu_time': self.cpu_time,
+                'peak_rss': self.peak_rss,
+                'peak_rss_increase': self.peak_rss_increase,
+                'children': [child.to_dict() for child in self.children]}
+
+
+####################################################################################################
+# @StageProfiler
+####################################################################################################
+class StageProfiler:
+    """Profiles the stages of the processing of a single morphology as a tree of named spans.
+
+    Only the thread that creates the profiler records spans, the spans that are opened on other
+    threads are ignored, so the nesting of the tree always follows the main thread.
+    """
+
+    ################################################################################################
+    # @__init__
+    ################################################################################################
+    def __init__(self,
+                 label,
+                 tags=None):
+        """Constructor
+
+        :param label:
+            The label of the morphology.
+        :param tags:
+            A dictionary of extra information on the run, for example the builder, that is used
+            to group the profiles of a batch.
+        """
+
+        # The label of the morphology
+        self.label = label
+
+        # The tags of the run
+        self.tags = dict(tags) if tags is not None else dict()
+
+        # The root span of the run
+        self.root = ProfileSpan('total')
+
+        # The stack of the open spans, starting with the root
+        self.stack = [self.root]
+
+        # The thread that records the spans
+        self.thread = threading.current_thread()
+
+    ################################################################################################
+    # @start
+    ################################################################################################
+    def start(self):
+        """Starts measuring the whole run.
+        """
+
+        self.root.__enter__()
+
+    ################################################################################################
+    # @end
+    ################################################################################################
+    def end(self):
+        """Ends measuring the whole run.
+        """
+
+        self.root.__exit__(None, None, None)
+
+    ################################################################################################
+    # @span
+    ################################################################################################
+    @contextlib.contextmanager
+    def span(self,
+             name):
+        """Measures a block of code as a span nested in the current one.
+
+        :param name:
+            The name of the span.
+        """
+
+        # Ignore the spans of the other threads
+        if threading.current_thread() is not self.thread:
+            yield None
+            return
+
+        span = ProfileSpan(name)
+        self.stack[-1].children.append(span)
+        self.stack.append(span)
+        try:
+            with span:
+                yield span
+        finally:
+            self.stack.pop()
+
+    ################################################################################################
+    # @add_span
+    ################################################################################################
+    def add_span(self,
+                 span):
+        """Adds a span that is measured separately, for example on another thread, to the current
+        one.
+
+        :param span:
+            A measured span, see @ProfileSpan.
+        """
+
+        if span is not None:
+            self.stack[-1].children.append(span)
+
+    ################################################################################################
+    # @to_dict
+    ################################################################################################
+    def to_dict(self):
+        """Converts the profile to a dictionary.
+
+        :return:
+            A dictionary of the profile.
+        """
+
+        return {'label': self.label,
+                'tags': self.tags,
+                'finished': time.time(),
+                'spans': self.root.to_dict()}
+
+    ################################################################################################
+    # @write
+    ################################################################################################
+    def write(self,
+              output_directory):
+        """Writes the profile to a JSON file in the profiles folder of the output directory,
+        atomically.
+
+        :param output_directory:
+            The output directory of the run.
+        :return:
+            The path to the profile file.
+        """
+
+        profiles_directory = '%s/%s' % (output_directory, PROFILES_FOLDER)
+        os.makedirs(profiles_directory, exist_ok=True)
+        profile_file = '%s/%s.json' % (profiles_directory, self.label)
+
+        file_descriptor, temporary_file = tempfile.mkstemp(dir=profiles_directory, suffix='.tmp')
+        try:
+            with os.fdopen(file_descriptor, 'w') as json_file:
+                json.dump(self.to_dict(), json_file, indent=1, sort_keys=True)
+            os.replace(temporary_file, profile_file)
+        except Exception:
+            if os.path.exists(temporary_file):
+                os.remove(temporary_file)
+            raise
+        return profile_file
+
+
+####################################################################################################
+# @start_profiling
+####################################################################################################
+def start_profiling(label,
+                    tags=None):
+    """Starts profiling the processing of a morphology, the spans that are opened with
+    @profile_span are recorded in its profile until @stop_profiling is called.
+
+    :param label:
+        The label of the morphology.
+    :param tags:
+        A dictionary of extra information on the run.
+    :return:
+        The active profiler.
+    """
+
+    global active_profiler
+    active_profiler = StageProfiler(label=label, tags=tags)
+    active_profiler.start()
+    return active_profiler
+
+
+####################################################################################################
+# @stop_profiling
+####################################################################################################
+def stop_profiling():
+    """Stops the active profiler.
+
+    :return:
+        The stopped profiler, or None if no profiler is active.
+    """
+
+    global active_profiler
+    profiler = active_profiler
+    active_profiler = None
+    if profiler is not None:
+        profiler.end()
+    return profiler
+
+
+####################################################################################################
+# @profile_span
+####################################################################################################
+def profile_span(name):
+    """Measures a block of code as a span of the active profiler, or does nothing if the run is
+    not profiled.
+
+    :param name:
+        The name of the span.
+    :return:
+        A context manager of the span.
+    """
+
+    if active_profiler is None:
+        return contextlib.ExitStack()
+    return active_profiler.span(name)
+
+
+####################################################################################################
+# @profiled
+####################################################################################################
+def profiled(name):
+    """A decorator that measures every call of a function as a span of the active profiler.
+
+    :param name:
+        The name of the span.
+    :return:
+        The decorator.
+    """
+
+    def decorator(function):
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with profile_span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+####################################################################################################
+# @collect_span_statistics
+####################################################################################################
+def collect_span_statistics(span,
+                            statistics,
+                            parent_path=None):
+    """Accumulates the measures of a span and its nested spans by their path in the tree.
+
+    :param span:
+        A dictionary of the span.
+    :param statistics:
+        A dictionary of the statistics of every path, it is updated in place.
+    :param parent_path:
+        The path of the parent span.
+    """
+
+    path = span['name'] if parent_path is None else '%s/%s' % (parent_path, span['name'])
+    self_wall_time = span['wall_time'] - sum(child['wall_time'] for child in span['children'])
+
+    entry = statistics.setdefault(path, {'count': 0, 'wall_time': 0.0, 'self_wall_time': 0.0,
+                                         'cpu_time': 0.0, 'maximum_wall_time': 0.0,
+                                         'peak_rss': None})
+    entry['count'] += 1
+    entry['wall_time'] += span['wall_time']
+    entry['self_wall_time'] += max(0.0, self_wall_time)
+    entry['cpu_time'] += span['cpu_time']
+    entry['maximum_wall_time'] = max(entry['maximum_wall_time'], span['wall_time'])
+    if span['peak_rss'] is not None:
+        entry['peak_rss'] = max(entry['peak_rss'] or 0.0, span['peak_rss'])
+
+    for child in span['children']:
+        collect_span_statistics(child, statistics, path)
+
+
+####################################################################################################
+# @aggregate_profiles
+####################################################################################################
+def aggregate_profiles(output_directory):
+    """Aggregates the profiles of a batch run and writes their summary to the output directory.
+
+    The spans are grouped by the builder of the run and by their path in the tree. The self wall
+    time of a span excludes its nested spans, so it shows the stage where the time is spent.
+
+    :param output_directory:
+        The output directory of the run.
+    :return:
+        A dictionary of the summary, keyed by the builder and then by the span path.
+    """
+
+    profiles_directory = '%s/%s' % (output_directory, PROFILES_FOLDER)
+    summary = dict()
+    if not os.path.isdir(profiles_directory):
+        return summary
+
+    for file_name in sorted(os.listdir(profiles_directory)):
+        if not file_name.endswith('.json'):
+            continue
+        try:
+            with open('%s/%s' % (profiles_directory, file_name), 'r') as profile_file:
+                profile = json.load(profile_file)
+        except (IOError, ValueError):
+            continue
+        builder = str(profile['tags'].get('builder', 'all'))
+        collect_span_statistics(profile['spans'], summary.setdefault(builder, dict()))
+
+    # Compute the averages
+    for statistics in summary.values():
+        for entry in statistics.values():
+            entry['mean_wall_time'] = entry['wall_time'] / entry['count']
+            entry['mean_cpu_time'] = entry['cpu_time'] / entry['count']
+
+    with open('%s/%s' % (output_directory, PROFILES_SUMMARY_FILE), 'w') as summary_file:
+        json.dump(summary, summary_file, indent=1, sort_keys=True)
+    return summary
+
+
+####################################################################################################
+# @ Run the main function if invoked from the command line.
+####################################################################################################
+if __name__ == "__main__":
+
+    # Aggregate the profiles of a batch run
+    parser = argparse.ArgumentParser(description='Aggregates the stage profiles of a run')
+    parser.add_argument('output_directory', help='The output directory of the run')
+    arguments = parser.parse_args()
+
+    summary = aggregate_profiles(arguments.output_directory)
+    for builder, statistics in sorted(summary.items()):
+        print('Builder: [%s]' % builder)
+        print('\t%-48s %6s %12s %12s %12s %10s' % (
+            'Span', 'Count', 'Self [s]', 'Mean [s]', 'CPU [s]', 'RSS [MB]'))
+        for path, entry in sorted(statistics.items(), key=lambda item: -item[1]['self_wall_time']):
+            print('\t%-48s %6d %12.3f %12.3f %12.3f %10s' % (
+                path, entry['count'], entry['self_wall_time'], entry['mean_wall_time'],
+                entry['cpu_time'],
+                '%.1f' % entry['peak_rss'] if entry['peak_rss'] is not None else '-'))
+    sys.exit(0)
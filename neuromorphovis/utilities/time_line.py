@@ -109,20 +109,23 @@ def play_simulation(first_frame_index=1,
         The index of the last frame in the simulation.
     """
 
-    # Set the time-line frame, one by one, where the simulation will be activated
-    simulation_timer = nmv.utilities.timer.Timer()
-    simulation_timer.start()
+    # NOTE: The span is opened at call time, the package is not initialized at import time
+    with nmv.utilities.profile_span('soma-simulation'):
 
-    for frame in range(first_frame_index, last_frame_index):
+        # Set the time-line frame, one by one, where the simulation will be activated
+        simulation_timer = nmv.utilities.timer.Timer()
+        simulation_timer.start()
 
-        # Show progress
-        show_progress('Simulation', frame, last_frame_index)
+        for frame in range(first_frame_index, last_frame_index):
 
-        # Update the time-line
-        bpy.context.scene.frame_set(frame)
+            # Show progress
+            show_progress('Simulation', frame, last_frame_index)
 
-    simulation_timer.end()
-    show_progress('Simulation', last_frame_index, last_frame_index, done=True)
+            # Update the time-line
+            bpy.context.scene.frame_set(frame)
+
+        simulation_timer.end()
+        show_progress('Simulation', last_frame_index, last_frame_index, done=True)
 
     # Display the simulation time
     nmv.logger.log('Simulation time [%f] seconds' % simulation_timer.duration())
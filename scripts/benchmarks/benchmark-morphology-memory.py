@@ -0,0 +1,238 @@
+####################################################################################################
+# Copyright (c) 2016 - 2018, EPFL / Blue Brain Project
+#               Marwan Abdellah <marwan.abdellah@epfl.ch>
+#
+# This file is part of NeuroMorphoVis <https://github.com/BlueBrain/NeuroMorphoVis>
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU General Public License as published by the Free Software Foundation, version 3 of the License.
+#
+# This Blender-based tool is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program.
+# If not, see <http://www.gnu.org/licenses/>.
+####################################################################################################
+
+# System imports
+import sys, os
+import argparse
+
+# Internal imports
+sys.path.append('%s/../..' % os.path.dirname(os.path.realpath(__file__)))
+import neuromorphovis as nmv
+import neuromorphovis.file
+import neuromorphovis.skeleton
+
+
+####################################################################################################
+# @parse_command_line_arguments
+####################################################################################################
+def parse_command_line_arguments():
+    """Parses the command line arguments.
+
+    :return:
+        A structure with all the benchmark options.
+    """
+
+    # Create an argument parser, and then add the options one by one
+    parser = argparse.ArgumentParser()
+
+    # Morphology directory
+    arg_help = 'Morphology directory containing multiple (.SWC) or (.H5) files'
+    parser.add_argument('--morphology-directory',
+                        action='store',
+                        default='%s/../../data/morphologies' %
+                                os.path.dirname(os.path.realpath(__file__)),
+                        help=arg_help)
+
+    # Parse the arguments, and return a list of them
+    return parser.parse_args()
+
+
+####################################################################################################
+# @get_morphology_files
+####################################################################################################
+def get_morphology_files(directory):
+    """Gets all the morphology files in a directory and its sub-directories.
+
+    :param directory:
+        A given directory.
+    :return:
+        A sorted list of the paths of all the .SWC and .H5 files.
+    """
+
+    morphology_files = list()
+    for root, directories, files in os.walk(directory):
+        for file in files:
+            if file.endswith('.swc') or file.endswith('.h5'):
+                morphology_files.append('%s/%s' % (root, file))
+
+    # Return the sorted list
+    return sorted(morphology_files)
+
+
+####################################################################################################
+# @get_object_size
+####################################################################################################
+def get_object_size(instance):
+    """Gets the size of an object in bytes, including its dictionary if it has one.
+
+    :param instance:
+        A given object.
+    :return:
+        The size of the object in bytes.
+    """
+
+    size = sys.getsizeof(instance)
+    if hasattr(instance, '__dict__'):
+        size += sys.getsizeof(instance.__dict__)
+    return size
+
+
+####################################################################################################
+# @get_dict_backed_object_size
+####################################################################################################
+# The dictionary-backed mirror classes, one per class with __slots__
+DICT_BACKED_CLASSES = dict()
+
+
+def get_dict_backed_object_size(instance):
+    """Gets the size that an object with __slots__ would have if its attributes were kept in a
+    dictionary instead, as the Sample and the Section did before their attributes were declared in
+    __slots__. The attributes are copied into a mirror object of a plain class.
+
+    :param instance:
+        A given object with __slots__.
+    :return:
+        The size of the mirror in bytes, including its dictionary.
+    """
+
+    # Every class has its own mirror class, so the dictionaries of its mirrors share their keys
+    cls = type(instance)
+    if cls not in DICT_BACKED_CLASSES:
+        DICT_BACKED_CLASSES[cls] = type('DictBacked%s' % cls.__name__, (object,), dict())
+
+    # The samples of a section are kept in the _samples slot behind the samples property
+    mirror = DICT_BACKED_CLASSES[cls]()
+    for name in cls.__slots__:
+        if hasattr(instance, name):
+            setattr(mirror, name.lstrip('_'), getattr(instance, name))
+    return get_object_size(mirror)
+
+
+####################################################################################################
+# @get_arbors_size
+####################################################################################################
+def get_arbors_size(morphology,
+                    dict_backed=False):
+    """Gets the size of the sections and the samples objects of all the arbors of a morphology.
+
+    :param morphology:
+        A given morphology.
+    :param dict_backed:
+        If True, the sizes of the sections and the samples are measured as if their attributes
+        were kept in dictionaries, before they were declared in __slots__.
+    :return:
+        The size of the sections and samples objects in bytes, and the number of samples.
+    """
+
+    # The size of a single object
+    object_size = get_dict_backed_object_size if dict_backed else get_object_size
+
+    # Get the arbors
+    arbors = list()
+    if morphology.axon is not None:
+        arbors.append(morphology.axon)
+    if morphology.dendrites is not None:
+        arbors.extend(morphology.dendrites)
+    if morphology.apical_dendrite is not None:
+        arbors.append(morphology.apical_dendrite)
+
+    size = 0
+    number_samples = 0
+    for arbor in arbors:
+        sections = [arbor]
+        while sections:
+            section = sections.pop()
+            sections.extend(section.children)
+
+            # The section and its lists
+            size += object_size(section)
+            size += sys.getsizeof(section.children) + sys.getsizeof(section.children_ids)
+            size += sys.getsizeof(section.samples)
+
+            # The samples and their points
+            for sample in section.samples:
+                size += object_size(sample) + sys.getsizeof(sample.point)
+            number_samples += len(section.samples)
+
+    # Return the size and the number of samples
+    return size, number_samples
+
+
+####################################################################################################
+# @read_morphology
+####################################################################################################
+def read_morphology(morphology_file):
+    """Reads a morphology file.
+
+    :param morphology_file:
+        A given .SWC or .H5 morphology file.
+    :return:
+        A reference to the morphology.
+    """
+
+    if morphology_file.endswith('.swc'):
+        return nmv.file.readers.SWCReader(morphology_file).read_file()
+    return nmv.file.readers.H5Reader(morphology_file).read_file()
+
+
+####################################################################################################
+# @ Run the main function if invoked from the command line.
+####################################################################################################
+if __name__ == "__main__":
+
+    # Ignore blender extra arguments required to launch blender given to the command line interface
+    args = sys.argv
+    if '--' in args:
+        sys.argv = args[args.index("--") + 1:]
+    else:
+        sys.argv = args[:1]
+
+    # Parse the command line arguments
+    args = parse_command_line_arguments()
+
+    # The .H5 reader exits if h5py is missing, so the .H5 files are skipped in that case
+    try:
+        import h5py
+        h5_supported = True
+    except ImportError:
+        h5_supported = False
+        print('WARNING: Cannot import h5py, the .H5 files are skipped')
+
+    print('%-64s %10s %22s %21s %16s' % ('MORPHOLOGY', 'SAMPLES', 'OBJECTS-BEFORE [B/S]',
+                                         'OBJECTS-AFTER [B/S]', 'COLUMNAR [B/S]'))
+
+    for morphology_file in get_morphology_files(args.morphology_directory):
+
+        # Skip the .H5 files if they cannot be read
+        if morphology_file.endswith('.h5') and not h5_supported:
+            continue
+
+        # Read the morphology
+        morphology = read_morphology(morphology_file)
+
+        # The size of the objects graph of the arbors, before and after the __slots__
+        objects_size_before, number_samples = get_arbors_size(morphology, dict_backed=True)
+        objects_size_after, _ = get_arbors_size(morphology)
+
+        # The size of the columnar representation
+        columnar_size = nmv.skeleton.ColumnarMorphology.from_morphology(
+            morphology).get_memory_footprint()
+
+        print('%-64s %10d %22.1f %21.1f %16.1f' % (
+            os.path.basename(morphology_file), number_samples,
+            objects_size_before / number_samples, objects_size_after / number_samples,
+            columnar_size / number_samples))
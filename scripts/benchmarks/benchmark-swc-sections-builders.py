@@ -0,0 +1,172 @@
+####################################################################################################
+# Copyright (c) 2016 - 2018, EPFL / Blue Brain Project
+#               Marwan Abdellah <marwan.abdellah@epfl.ch>
+#
+# This file is part of NeuroMorphoVis <https://github.com/BlueBrain/NeuroMorphoVis>
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the
+# GNU General Public License as published by the Free Software Foundation, version 3 of the License.
+#
+# This Blender-based tool is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program.
+# If not, see <http://www.gnu.org/licenses/>.
+####################################################################################################
+
+# System imports
+import sys, os
+import argparse
+
+# Internal imports
+sys.path.append('%s/../..' % os.path.dirname(os.path.realpath(__file__)))
+import neuromorphovis as nmv
+import neuromorphovis.file
+import neuromorphovis.utilities
+
+
+####################################################################################################
+# @parse_command_line_arguments
+####################################################################################################
+def parse_command_line_arguments():
+    """Parses the command line arguments.
+
+    :return:
+        A structure with all the benchmark options.
+    """
+
+    # Create an argument parser, and then add the options one by one
+    parser = argparse.ArgumentParser()
+
+    # Morphology directory
+    arg_help = 'Morphology directory containing multiple (.SWC) files'
+    parser.add_argument('--morphology-directory',
+                        action='store',
+                        default='%s/../../data/morphologies/swc' %
+                                os.path.dirname(os.path.realpath(__file__)),
+                        help=arg_help)
+
+    # Number of iterations per file
+    arg_help = 'Number of times every builder is executed on every file'
+    parser.add_argument('--iterations',
+                        action='store', type=int, default=5,
+                        help=arg_help)
+
+    # Parse the arguments, and return a list of them
+    return parser.parse_args()
+
+
+####################################################################################################
+# @build_sections_from_paths
+####################################################################################################
+def build_sections_from_paths(reader):
+    """Builds the sections of a reader with the path-based builder.
+
+    :param reader:
+        An SWC reader that has already read the samples of its file.
+    :return:
+        A list of the indices of the samples of every section.
+    """
+
+    # Reset the state of the reader
+    reader.paths = list()
+    reader.sections_terminal_samples_indices = list()
+    reader.sections_samples_indices_list = list()
+
+    # Build the sections
+    reader.build_connected_paths_from_samples()
+    reader.build_sections_from_paths()
+
+    # Return the sections
+    return reader.sections_samples_indices_list
+
+
+####################################################################################################
+# @build_sections_from_parents_indices
+####################################################################################################
+def build_sections_from_parents_indices(reader):
+    """Builds the sections of a reader with the builder that relies on the parents indices.
+
+    :param reader:
+        An SWC reader that has already read the samples of its file.
+    :return:
+        A list of the indices of the samples of every section.
+    """
+
+    # Build the sections
+    reader.build_sections_from_parents_indices()
+
+    # Return the sections
+    return reader.sections_samples_indices_list
+
+
+####################################################################################################
+# @time_builder
+####################################################################################################
+def time_builder(builder,
+                 reader,
+                 iterations):
+    """Runs a sections builder multiple times and returns the minimum duration and the sections.
+
+    :param builder:
+        A function that builds the sections of a given reader.
+    :param reader:
+        An SWC reader that has already read the samples of its file.
+    :param iterations:
+        Number of times the builder is executed.
+    :return:
+        The minimum duration in seconds and the sections built in the last iteration.
+    """
+
+    timer = nmv.utilities.Timer()
+    durations = list()
+    sections = None
+    for i in range(iterations):
+        timer.start()
+        sections = builder(reader)
+        timer.end()
+        durations.append(timer.duration())
+
+    # Return the best time and the sections
+    return min(durations), sections
+
+
+####################################################################################################
+# @ Run the main function if invoked from the command line.
+####################################################################################################
+if __name__ == "__main__":
+
+    # Ignore blender extra arguments required to launch blender given to the command line interface
+    args = sys.argv
+    if '--' in args:
+        sys.argv = args[args.index("--") + 1:]
+    else:
+        sys.argv = args[:1]
+
+    # Parse the command line arguments
+    args = parse_command_line_arguments()
+
+    # Get all the morphology files in the directory
+    morphology_files = nmv.file.ops.get_files_in_directory(args.morphology_directory, '.swc')
+    morphology_files.sort()
+
+    print('%-32s %10s %10s %14s %14s %10s %s' % (
+        'MORPHOLOGY', 'SAMPLES', 'SECTIONS', 'PATHS [ms]', 'PARENTS [ms]', 'SPEEDUP', 'MATCH'))
+
+    for morphology_file in morphology_files:
+
+        # Read the samples once, only the sections builders are timed
+        reader = nmv.file.readers.SWCReader('%s/%s' % (args.morphology_directory, morphology_file))
+        reader.read_samples()
+
+        # Time the two builders
+        paths_time, paths_sections = time_builder(
+            build_sections_from_paths, reader, args.iterations)
+        parents_time, parents_sections = time_builder(
+            build_sections_from_parents_indices, reader, args.iterations)
+
+        print('%-32s %10d %10d %14.3f %14.3f %9.1fx %s' % (
+            morphology_file, len(reader.samples_list) - 1, len(parents_sections),
+            paths_time * 1e3, parents_time * 1e3, paths_time / max(parents_time, 1e-9),
+            paths_sections == parents_sections))